@@ -182,6 +182,30 @@ def crawl_cancel(job_id: str):
     asyncio.run(cancel_job())
 
 
+@cli.command()
+@click.option("--concurrency", type=int, default=None, help="Jobs to run at once (default: from config)")
+@click.option("--worker-id", help="Identifier recorded on claimed jobs (default: host:pid)")
+def worker(concurrency: int | None, worker_id: str | None):
+    """Run queued crawl jobs (requires CRAWL_EXECUTION_MODE=queue on the API)."""
+    import signal
+
+    from src.crawler.worker import CrawlWorker
+
+    async def run_worker():
+        crawl_worker = CrawlWorker(worker_id=worker_id, concurrency=concurrency)
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(sig, crawl_worker.stop)
+
+        console.print(
+            f"[bold green]Crawl worker {crawl_worker.worker_id} waiting for jobs...[/bold green]"
+        )
+        await crawl_worker.run()
+        console.print("[yellow]Crawl worker stopped[/yellow]")
+
+    asyncio.run(run_worker())
+
+
 @cli.command()
 @click.argument('file_path', type=click.Path(exists=True))
 @click.option('--source-url', help='Source URL for the content')
@@ -263,7 +287,10 @@ def upload(file_path: str, source_url: str | None, name: str | None):
 @click.option("--include", multiple=True, help='Include file patterns (e.g., "docs/**/*.md")')
 @click.option("--exclude", multiple=True, help='Exclude file patterns (e.g., "**/test/*.md")')
 @click.option("--no-cleanup", is_flag=True, help="Keep cloned repository after processing")
-def upload_repo(repo_url, name, path, branch, token, include, exclude, no_cleanup):
+@click.option(
+    "--full", is_flag=True, help="Process every file, not only those changed since the last upload"
+)
+def upload_repo(repo_url, name, path, branch, token, include, exclude, no_cleanup, full):
     """Upload markdown documentation from a GitHub repository."""
     from src.crawler.github_processor import GitHubProcessor, GitHubRepoConfig
 
@@ -292,6 +319,7 @@ def upload_repo(repo_url, name, path, branch, token, include, exclude, no_cleanu
                 include_patterns=list(include) if include else None,
                 exclude_patterns=list(exclude) if exclude else None,
                 cleanup=not no_cleanup,
+                incremental=not full,
             )
 
             processor = GitHubProcessor()
@@ -5,6 +5,9 @@ interface FailedPage {
   id: number;
   url: string;
   error_message: string | null;
+  failure_class: string;
+  status_code: number | null;
+  attempts: number;
   failed_at: string | null;
 }
 
@@ -100,6 +103,8 @@ export function FailedPagesList({ pages, onRetrySelected, isRetrying = false }:
                 {page.failed_at && (
                   <p className="text-xs text-gray-500 dark:text-gray-400 mt-1">
                     Failed at: {new Date(page.failed_at).toLocaleString()}
+                    {" · "}{page.failure_class.replace("_", " ")}
+                    {page.attempts > 1 && ` · ${page.attempts} attempts`}
                   </p>
                 )}
               </div>
@@ -523,12 +523,18 @@ class APIClient {
     id: number
     url: string
     error_message: string | null
+    failure_class: string
+    status_code: number | null
+    attempts: number
     failed_at: string | null
   }>> {
     return this.fetch<Array<{
       id: number
       url: string
       error_message: string | null
+      failure_class: string
+      status_code: number | null
+      attempts: number
       failed_at: string | null
     }>>(`/crawl-jobs/${id}/failed-pages`)
   }
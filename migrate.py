@@ -66,6 +66,16 @@ class MigrationRunner:
         ("007_add_markdown_fulltext_search", "migrations/add_markdown_fulltext_search.sql"),
         # Source-scoped duplicate detection
         ("008_remove_code_hash_unique", "src/database/migrations/008_remove_code_hash_unique.sql"),
+        # Resumable deep crawls
+        ("009_add_crawl_frontier", "src/database/migrations/009_add_crawl_frontier.sql"),
+        # Near-duplicate snippet detection
+        ("010_add_snippet_fingerprints", "src/database/migrations/010_add_snippet_fingerprints.sql"),
+        # Crawl workers
+        ("011_add_crawl_job_queue", "src/database/migrations/011_add_crawl_job_queue.sql"),
+        # Batched failed page recording
+        ("012_add_failed_page_attempts", "src/database/migrations/012_add_failed_page_attempts.sql"),
+        # Background retries of failed pages
+        ("013_add_failed_page_retries", "src/database/migrations/013_add_failed_page_retries.sql"),
     ]
 
     def __init__(self):
@@ -72,6 +72,28 @@ async def lifespan(app: FastAPI):
         health_monitor = None
         health_task = None
 
+    # Relay job progress published by any process to this process's websocket clients
+    from ..crawler.progress_bus import get_progress_bus
+    from .websocket import relay_crawl_update
+
+    progress_bus = get_progress_bus()
+    progress_bus.add_handler(relay_crawl_update)
+    await progress_bus.start()
+
+    # Failed pages are retried where crawls run (workers retry them in queue mode)
+    crawling = get_settings().crawling
+    retry_scheduler = None
+    retry_task = None
+    if (
+        os.getenv("TESTING") != "true"
+        and crawling.retry_failed_pages
+        and crawling.execution_mode == "inline"
+    ):
+        from ..crawler.retry_scheduler import get_retry_scheduler
+
+        retry_scheduler = get_retry_scheduler()
+        retry_task = asyncio.create_task(retry_scheduler.start())
+
     yield
 
     # Shutdown
@@ -86,6 +108,27 @@ async def lifespan(app: FastAPI):
         except asyncio.CancelledError:
             pass
 
+    if retry_scheduler and retry_task:
+        await retry_scheduler.stop()
+        retry_task.cancel()
+        try:
+            await retry_task
+        except asyncio.CancelledError:
+            pass
+
+    from ..crawler.browser_pool import close_browser_pool
+    from ..crawler.cancellation import get_cancellation_bus
+    from ..crawler.failed_page_utils import get_failed_page_recorder
+    from ..crawler.llm_clients import get_llm_client_registry
+    from .websocket import get_connection_manager
+
+    await close_browser_pool()
+    await get_failed_page_recorder().close()
+    await get_cancellation_bus().close()
+    await get_llm_client_registry().close()
+    await progress_bus.close()
+    await get_connection_manager().close()
+
     logger.info("CodeDox API shutdown complete")
 
 
@@ -171,6 +214,8 @@ async def health_check_crawler():
     import psutil
 
     from ..crawler import CrawlManager
+    from ..crawler.host_scheduler import get_host_scheduler
+    from ..crawler.pipeline import get_pipeline_metrics
     from ..database import get_db_manager
 
     crawl_manager = CrawlManager()
@@ -195,21 +240,16 @@ async def health_check_crawler():
     memory_info = process.memory_info()
     memory_percent = process.memory_percent()
 
-    # Get ResultProcessor thread pool status
-    result_processor = crawl_manager.result_processor
-    format_pool_active = result_processor.format_thread_pool._threads
-    format_pool_queue_size = result_processor.format_thread_pool._work_queue.qsize()
-
     return {
         "status": "healthy",
         "crawler": {
             "active_crawl_tasks": active_tasks,
             "total_crawl_tasks": len(crawl_manager._active_crawl_tasks),
         },
+        "pipelines": get_pipeline_metrics(),
+        "hosts": get_host_scheduler().snapshot(),
         "threads": {
             "active_threads": thread_count,
-            "format_pool_threads": len(format_pool_active),
-            "format_pool_queue": format_pool_queue_size,
         },
         "database_pool": {
             "size": pool_size,
@@ -225,6 +265,21 @@ async def health_check_crawler():
     }
 
 
+@app.get("/api/health/llm")
+async def health_check_llm():
+    """LLM concurrency controller and scheduler status, including queue depth per job."""
+    from ..crawler.llm_clients import get_llm_client_registry
+    from ..crawler.llm_concurrency import get_llm_limiter
+    from ..crawler.llm_scheduler import get_llm_scheduler
+
+    return {
+        "status": "healthy",
+        "concurrency": get_llm_limiter().snapshot(),
+        "scheduler": get_llm_scheduler().snapshot(),
+        "clients": get_llm_client_registry().snapshot(),
+    }
+
+
 # Recent snippets endpoint
 @app.get("/api/snippets/recent")
 async def get_recent_snippets(hours: int = 24, limit: int = 10, db: Session = Depends(get_db)):
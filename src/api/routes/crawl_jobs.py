@@ -1,7 +1,7 @@
 """Crawl job management routes."""
 
 import logging
-from typing import Any
+from typing import Any, Literal
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
@@ -9,6 +9,7 @@ from pydantic import BaseModel
 from sqlalchemy.orm import Session
 
 from ...crawler import CrawlManager
+from ...crawler.failed_page_utils import RETRY_PRIORITY
 from ...database import get_db
 from ...database.models import CrawlJob, FailedPage
 from ...mcp_server import MCPTools
@@ -27,6 +28,8 @@ class CreateCrawlJobRequest(BaseModel):
     domain_filter: str | None = None
     url_patterns: list[str] | None = None
     max_concurrent_crawls: int | None = None
+    use_sitemap: bool | None = None
+    fetch_mode: Literal["http", "browser", "auto"] | None = None
 
 
 class RecrawlJobRequest(BaseModel):
@@ -111,6 +114,11 @@ async def create_crawl_job(
         max_pages=request.max_pages,
         domain_filter=request.domain_filter,
         url_patterns=request.url_patterns,
+        metadata={
+            key: value
+            for key, value in (("use_sitemap", request.use_sitemap), ("fetch_mode", request.fetch_mode))
+            if value is not None
+        } or None,
         max_concurrent_crawls=request.max_concurrent_crawls
     )
 
@@ -322,14 +330,20 @@ async def get_failed_pages(job_id: str, db: Session = Depends(get_db)) -> list[d
     if not job:
         raise HTTPException(status_code=404, detail="Crawl job not found")
 
-    # Get failed pages
-    failed_pages = db.query(FailedPage).filter_by(crawl_job_id=job_id).all()
+    # Get failed pages, the ones most worth retrying first
+    failed_pages = sorted(
+        db.query(FailedPage).filter_by(crawl_job_id=job_id).all(),
+        key=lambda page: RETRY_PRIORITY.get(page.failure_class, len(RETRY_PRIORITY)),
+    )
 
     return [
         {
             "id": page.id,
             "url": page.url,
             "error_message": page.error_message,
+            "failure_class": page.failure_class,
+            "status_code": page.status_code,
+            "attempts": page.attempts,
             "failed_at": page.failed_at.isoformat() if page.failed_at else None
         }
         for page in failed_pages
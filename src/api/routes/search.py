@@ -20,6 +20,9 @@ async def search_snippets(
     search_mode: str = Query("enhanced", description="Search mode: 'code' or 'enhanced'"),
     limit: int = Query(20, le=100),
     offset: int = Query(0, ge=0),
+    collapse_near_duplicates: bool | None = Query(
+        None, description="Show only the first of nearly identical snippets"
+    ),
     db: Session = Depends(get_db),
 ) -> list[dict[str, Any]]:
     """Search code snippets with optional enhanced search mode."""
@@ -31,6 +34,7 @@ async def search_snippets(
         limit=limit,
         offset=offset,
         search_mode=search_mode,
+        collapse_near_duplicates=collapse_near_duplicates,
     )
 
     # Return list directly for backward compatibility with tests
@@ -47,6 +51,8 @@ async def search_snippets(
                 "start_line": snippet.line_start,
                 "end_line": snippet.line_end,
                 "created_at": snippet.created_at.isoformat(),
+                # Nearly identical results folded into this one
+                "near_duplicates": getattr(snippet, "_near_duplicate_count", 0),
             },
             "score": 1.0,  # Placeholder score
         }
@@ -15,6 +15,7 @@ from ...crawler.extractors.models import ExtractedCodeBlock
 from ...crawler.github_processor import GitHubProcessor, GitHubRepoConfig
 from ...crawler.llm_retry import LLMDescriptionGenerator
 from ...database import get_db
+from ...database.fingerprint import code_fingerprint
 from ...database.models import CodeSnippet, CrawlJob, Document
 from .upload_utils import (
     TitleExtractor,
@@ -125,6 +126,7 @@ async def upload_markdown(
                         )
 
             # Save enhanced code snippets
+            new_snippets: list[CodeSnippet] = []
             for block in enhanced_blocks:
                 # Calculate code hash
                 code_hash = hashlib.md5(block.code_content.encode()).hexdigest()
@@ -144,6 +146,7 @@ async def upload_markdown(
                     language=block.language or "unknown",
                     code_content=block.code_content,
                     code_hash=code_hash,
+                    simhash=code_fingerprint(block.code_content),
                     snippet_type="code",
                     source_url=doc_url,
                     functions=[],
@@ -151,8 +154,15 @@ async def upload_markdown(
                     keywords=[],
                 )
                 db.add(snippet)
+                new_snippets.append(snippet)
                 snippets_count += 1
 
+            if new_snippets:
+                # Make the new snippets findable by near-duplicate lookups
+                from ...database.content_check import index_snippet_fingerprints
+                db.flush()
+                index_snippet_fingerprints(db, [(snippet.id, snippet.simhash) for snippet in new_snippets])
+
         # Update job stats
         job.snippets_extracted = snippets_count
         job.processed_pages = 1
@@ -378,6 +388,9 @@ class UploadGitHubRepoRequest(BaseModel):
     max_concurrent: int | None = Field(
         None, description="Maximum number of files to process concurrently"
     )
+    incremental: bool = Field(
+        True, description="Only process files changed since the last upload of this repository"
+    )
 
 
 @router.post("/github")
@@ -404,6 +417,7 @@ async def upload_github_repo(
             exclude_patterns=request.exclude_patterns,
             cleanup=True,
             max_concurrent=request.max_concurrent,
+            incremental=request.incremental,
         )
 
         processor = GitHubProcessor()
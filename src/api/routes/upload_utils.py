@@ -10,6 +10,7 @@ from sqlalchemy.orm import Session
 from src.config import get_settings
 from src.constants import ALL_SUPPORTED_EXTENSIONS
 from src.crawler.extractors.models import ExtractedCodeBlock
+from src.database.fingerprint import code_fingerprint
 from src.database.models import CodeSnippet, Document
 
 logger = logging.getLogger(__name__)
@@ -330,7 +331,7 @@ def process_code_snippets(
     Returns:
         Number of snippets created
     """
-    snippets_created = 0
+    new_snippets: list[CodeSnippet] = []
 
     if batch_snippets is None:
         batch_snippets = {}
@@ -360,12 +361,19 @@ def process_code_snippets(
             language=block.language or "text",
             code_content=block.code_content,
             code_hash=code_hash,
+            simhash=code_fingerprint(block.code_content),
             snippet_type="code",
             source_url=source_url,
         )
 
         db.add(snippet)
         batch_snippets[code_hash] = snippet
-        snippets_created += 1
+        new_snippets.append(snippet)
 
-    return snippets_created
+    if new_snippets:
+        # Make the new snippets findable by near-duplicate lookups
+        from ...database.content_check import index_snippet_fingerprints
+        db.flush()
+        index_snippet_fingerprints(db, [(snippet.id, snippet.simhash) for snippet in new_snippets])
+
+    return len(new_snippets)
@@ -1,7 +1,19 @@
-"""WebSocket support for real-time updates."""
-
+"""WebSocket support for real-time updates.
+
+``ConnectionManager`` is a fan-out hub: an index from job ID to subscribed
+clients finds a job's subscribers without scanning every client, and each
+client has a bounded send queue drained by its own writer task. Publishing
+only enqueues, so neither a slow client nor the crawl task that reports
+progress waits for any socket. Progress frames of the same job replace each
+other while queued, and a full queue drops its oldest progress frame first.
+"""
+
+import asyncio
+import itertools
 import json
 import logging
+from collections import OrderedDict
+from dataclasses import dataclass, field
 from typing import Any
 
 from fastapi import WebSocket, WebSocketDisconnect
@@ -10,112 +22,204 @@ from ..constants import WebSocketMessageType
 
 logger = logging.getLogger(__name__)
 
+# Frames queued per client before stale progress frames are dropped
+SEND_QUEUE_SIZE = 100
+
+# Seconds a single send may take before the client is considered gone
+SEND_TIMEOUT = 10.0
+
+# Message types where a newer frame supersedes a queued one of the same job/source
+COALESCED_TYPES = frozenset({
+    WebSocketMessageType.CRAWL_PROGRESS,
+    WebSocketMessageType.REGENERATION_PROGRESS,
+})
+
+_frame_ids = itertools.count()
+
+
+def coalesce_key(message: dict[str, Any]) -> tuple[str, str] | None:
+    """Key under which a newer frame replaces a queued one (None: always delivered)."""
+    message_type = message.get("type")
+    subject = message.get("job_id") or message.get("source_id")
+    if not subject:
+        return None
+    if message_type in COALESCED_TYPES:
+        return (message_type, subject)
+    if message_type == WebSocketMessageType.CRAWL_UPDATE and message.get("status") == "running":
+        return (message_type, subject)
+    return None
+
+
+@dataclass
+class ClientConnection:
+    """A connected client with its send queue."""
+
+    websocket: WebSocket
+    job_ids: set[str] = field(default_factory=set)
+    pending: OrderedDict[Any, dict[str, Any]] = field(default_factory=OrderedDict)
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+    writer: asyncio.Task | None = None
+    sent: int = 0
+    coalesced: int = 0
+    dropped: int = 0
+
 
 class ConnectionManager:
     """Manages WebSocket connections for real-time updates."""
 
-    def __init__(self) -> None:
-        self.active_connections: dict[str, WebSocket] = {}
-        self.subscriptions: dict[str, set[str]] = {}  # client_id -> set of job_ids
+    def __init__(self, queue_size: int = SEND_QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT) -> None:
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.clients: dict[str, ClientConnection] = {}
+        self.subscribers: dict[str, set[str]] = {}  # job_id -> set of client_ids
 
     async def connect(self, websocket: WebSocket, client_id: str) -> None:
         """Accept a new WebSocket connection."""
         await websocket.accept()
-        self.active_connections[client_id] = websocket
-        self.subscriptions[client_id] = set()
+        if client_id in self.clients:
+            self.disconnect(client_id)
+
+        client = ClientConnection(websocket=websocket)
+        client.writer = asyncio.create_task(self._write(client_id, client))
+        self.clients[client_id] = client
         logger.info(f"Client {client_id} connected")
 
     def disconnect(self, client_id: str) -> None:
         """Remove a WebSocket connection."""
-        if client_id in self.active_connections:
-            del self.active_connections[client_id]
-            del self.subscriptions[client_id]
-            logger.info(f"Client {client_id} disconnected")
+        client = self.clients.pop(client_id, None)
+        if client is None:
+            return
+
+        for job_id in client.job_ids:
+            subscribers = self.subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(client_id)
+                if not subscribers:
+                    del self.subscribers[job_id]
+        if client.writer and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+        logger.info(f"Client {client_id} disconnected")
 
     async def send_message(self, client_id: str, message: dict[str, Any]) -> bool:
-        """Send a message to a specific client.
-        
+        """Queue a message for a specific client.
+
         Args:
             client_id: The client identifier
             message: The message payload to send
-            
+
         Returns:
-            True if message was sent successfully, False otherwise
-            
-        Note:
-            RuntimeError typically indicates WebSocket is closed/closing.
-            Failed sends automatically disconnect the client.
+            True if the message was queued, False if the client is not connected
         """
-        if client_id not in self.active_connections:
-            logger.warning(
-                f"Client {client_id} not in active connections. "
-                f"Active: {list(self.active_connections.keys())}"
-            )
-            return False
-            
-        websocket = self.active_connections[client_id]
-        try:
-            logger.debug(f"Sending {message.get('type', 'unknown')} to {client_id}")
-            await websocket.send_json(message)
-            logger.debug(f"Message sent to {client_id}")
-            return True
-            
-        except RuntimeError as e:
-            logger.warning(f"WebSocket closed for {client_id}: {e}")
-            self.disconnect(client_id)
-            return False
-            
-        except Exception as e:
-            logger.error(
-                f"Unexpected error sending to {client_id}: "
-                f"{type(e).__name__}: {e}"
-            )
-            self.disconnect(client_id)
+        if client_id not in self.clients:
+            logger.warning(f"Client {client_id} not in active connections ({len(self.clients)} connected)")
             return False
+        return self._enqueue(client_id, message)
 
     async def broadcast(self, message: dict[str, Any]) -> None:
         """Broadcast a message to all connected clients."""
-        disconnected_clients = []
-
-        for client_id, websocket in self.active_connections.items():
-            try:
-                await websocket.send_json(message)
-            except Exception as e:
-                logger.error(f"Error broadcasting to {client_id}: {e}")
-                disconnected_clients.append(client_id)
-
-        # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
+        for client_id in list(self.clients):
+            self._enqueue(client_id, message)
 
     async def broadcast_to_subscribers(self, job_id: str, message: dict[str, Any]) -> None:
         """Broadcast a message to clients subscribed to a specific job."""
-        disconnected_clients = []
-
-        for client_id, job_ids in self.subscriptions.items():
-            if job_id in job_ids:
-                try:
-                    await self.active_connections[client_id].send_json(message)
-                except Exception as e:
-                    logger.error(f"Error sending to subscriber {client_id}: {e}")
-                    disconnected_clients.append(client_id)
-
-        # Clean up disconnected clients
-        for client_id in disconnected_clients:
-            self.disconnect(client_id)
+        self.publish(job_id, message)
+
+    def publish(self, job_id: str, message: dict[str, Any]) -> int:
+        """Queue a message for the subscribers of a job without waiting for any send.
+
+        Returns:
+            Number of clients the message was queued for
+        """
+        queued = 0
+        for client_id in list(self.subscribers.get(job_id, ())):
+            queued += self._enqueue(client_id, message)
+        return queued
 
     def subscribe(self, client_id: str, job_id: str) -> None:
         """Subscribe a client to updates for a specific job."""
-        if client_id in self.subscriptions:
-            self.subscriptions[client_id].add(job_id)
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.job_ids.add(job_id)
+            self.subscribers.setdefault(job_id, set()).add(client_id)
             logger.info(f"Client {client_id} subscribed to job {job_id}")
 
     def unsubscribe(self, client_id: str, job_id: str) -> None:
         """Unsubscribe a client from updates for a specific job."""
-        if client_id in self.subscriptions:
-            self.subscriptions[client_id].discard(job_id)
+        client = self.clients.get(client_id)
+        if client is not None:
+            client.job_ids.discard(job_id)
+            subscribers = self.subscribers.get(job_id)
+            if subscribers is not None:
+                subscribers.discard(client_id)
+                if not subscribers:
+                    del self.subscribers[job_id]
             logger.info(f"Client {client_id} unsubscribed from job {job_id}")
 
+    def stats(self) -> dict[str, int]:
+        """Delivery counters across connected clients."""
+        clients = self.clients.values()
+        return {
+            "clients": len(self.clients),
+            "jobs": len(self.subscribers),
+            "queued": sum(len(client.pending) for client in clients),
+            "sent": sum(client.sent for client in clients),
+            "coalesced": sum(client.coalesced for client in clients),
+            "dropped": sum(client.dropped for client in clients),
+        }
+
+    async def close(self) -> None:
+        """Disconnect all clients and stop their writers."""
+        writers = [client.writer for client in self.clients.values() if client.writer]
+        for client_id in list(self.clients):
+            self.disconnect(client_id)
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def _enqueue(self, client_id: str, message: dict[str, Any]) -> bool:
+        client = self.clients[client_id]
+        key = coalesce_key(message)
+
+        if key is not None and key in client.pending:
+            # Keep the frame's place in the queue, with the latest content
+            client.pending[key] = message
+            client.coalesced += 1
+            return True
+
+        if len(client.pending) >= self.queue_size:
+            stale = next((k for k in client.pending if isinstance(k, tuple)), None)
+            if stale is None:
+                logger.warning(f"Client {client_id} is not keeping up with its messages, disconnecting")
+                self.disconnect(client_id)
+                return False
+            del client.pending[stale]
+            client.dropped += 1
+
+        client.pending[key if key is not None else next(_frame_ids)] = message
+        client.ready.set()
+        return True
+
+    async def _write(self, client_id: str, client: ClientConnection) -> None:
+        try:
+            # Checking the registration (not just cancellation) also ends the writer
+            # when wait_for() swallows a cancel that raced a finishing send
+            while self.clients.get(client_id) is client:
+                await client.ready.wait()
+                client.ready.clear()
+                while client.pending and self.clients.get(client_id) is client:
+                    _, message = client.pending.popitem(last=False)
+                    await asyncio.wait_for(client.websocket.send_json(message), self.send_timeout)
+                    client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError:
+            logger.warning(f"Send to {client_id} timed out after {self.send_timeout}s")
+        except RuntimeError as e:
+            logger.warning(f"WebSocket closed for {client_id}: {e}")
+        except Exception as e:
+            logger.error(f"Unexpected error sending to {client_id}: {type(e).__name__}: {e}")
+
+        if self.clients.get(client_id) is client:
+            self.disconnect(client_id)
+
 
 # Global connection manager instance
 manager = ConnectionManager()
@@ -179,9 +283,9 @@ async def websocket_endpoint(websocket: WebSocket, client_id: str) -> None:
         manager.disconnect(client_id)
 
 
-async def notify_crawl_update(job_id: str, status: str, data: dict[str, Any]) -> None:
-    """Notify subscribers about crawl job updates."""
-    message = {
+def crawl_update_message(job_id: str, status: str, data: dict[str, Any]) -> dict[str, Any]:
+    """Build the CRAWL_UPDATE frame sent to subscribers of a job."""
+    return {
         "type": WebSocketMessageType.CRAWL_UPDATE,
         "job_id": job_id,
         "status": status,
@@ -189,4 +293,12 @@ async def notify_crawl_update(job_id: str, status: str, data: dict[str, Any]) ->
         "timestamp": data.get("timestamp", "")
     }
 
-    await manager.broadcast_to_subscribers(job_id, message)
+
+def relay_crawl_update(job_id: str, status: str, data: dict[str, Any]) -> None:
+    """Progress bus handler passing updates of any process to this process's subscribers."""
+    manager.publish(job_id, crawl_update_message(job_id, status, data))
+
+
+async def notify_crawl_update(job_id: str, status: str, data: dict[str, Any]) -> None:
+    """Notify this process's subscribers about crawl job updates (queues the frames and returns)."""
+    relay_crawl_update(job_id, status, data)
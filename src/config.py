@@ -71,10 +71,10 @@ class CrawlingConfig(BaseSettings):
 
     default_max_depth: int = 2
     respect_robots_txt: bool = True
-    max_concurrent_pages: int = 3
+    max_concurrent_pages: int = 3  # Per host, shared by all running jobs
     content_size_limit: int = 50000
     user_agent: str = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    max_concurrent_sessions: int = 20
+    max_concurrent_sessions: int = 20  # Page fetches in flight across all jobs
 
     # Concurrent crawl management
     max_concurrent_crawls: int = Field(
@@ -86,6 +86,21 @@ class CrawlingConfig(BaseSettings):
     heartbeat_stall_threshold: int = Field(
         default=60, description="Seconds without heartbeat before considering job stalled"
     )
+    progress_flush_interval: float = Field(
+        default=2.0,
+        gt=0,
+        description="Seconds between batched writes of job progress counters and heartbeats",
+    )
+    failed_page_flush_interval: float = Field(
+        default=5.0,
+        gt=0,
+        description="Seconds between batched writes of buffered failed pages",
+    )
+    failed_page_batch_size: int = Field(
+        default=200,
+        ge=1,
+        description="Buffered failed pages of a job that trigger an early write",
+    )
     global_crawl_timeout: int = Field(
         default=3600,  # 1 hour
         description="Maximum time in seconds for entire crawl job",
@@ -98,6 +113,133 @@ class CrawlingConfig(BaseSettings):
         default=100, description="Maximum queue size for format thread pool"
     )
 
+    # Crawl processing pipeline (fetch -> parse -> describe -> persist)
+    pipeline_queue_size: int = Field(
+        default=50,
+        ge=0,
+        description="Maximum pages waiting in each pipeline stage queue (0 to size from available memory)",
+    )
+    pipeline_memory_fraction: float = Field(
+        default=0.1,
+        gt=0.0,
+        le=0.9,
+        description="Share of available memory queued pages may use when the queue size is 0",
+    )
+    pipeline_page_size_kb: int = Field(
+        default=512, ge=1, description="Estimated memory per queued page used for adaptive queue sizing"
+    )
+    parse_workers: int = Field(
+        default=2, ge=1, description="Concurrent workers extracting code blocks from fetched HTML"
+    )
+    persist_batch_size: int = Field(
+        default=10, ge=1, description="Maximum processed pages written per persist batch"
+    )
+
+    # Persistent deep-crawl frontier
+    persistent_frontier: bool = Field(
+        default=True, description="Keep the deep-crawl frontier in the database so jobs can resume"
+    )
+    frontier_batch_size: int = Field(
+        default=20, ge=1, description="URLs claimed from the frontier per fetch round"
+    )
+    frontier_claim_timeout: int = Field(
+        default=600, ge=1, description="Seconds before a claimed frontier URL is considered abandoned"
+    )
+
+    # Conditional revalidation of previously crawled pages
+    conditional_revalidation: bool = Field(
+        default=True,
+        description="On recrawls, skip rendering pages whose ETag/Last-Modified show they are unchanged",
+    )
+    revalidation_timeout: float = Field(
+        default=10.0, gt=0.0, description="Timeout in seconds for each conditional revalidation request"
+    )
+    revalidation_concurrency: int = Field(
+        default=10, ge=1, description="Maximum conditional revalidation requests in flight"
+    )
+
+    # Duplicate pages within a job
+    content_dedup: bool = Field(
+        default=True,
+        description="Record pages whose URL or content duplicates another page of the job as aliases instead of extracting them",
+    )
+
+    # Page fetching
+    fetch_mode: str = Field(
+        default="browser",
+        pattern="^(http|browser|auto)$",
+        description="How pages are fetched: plain HTTP, a headless browser, or HTTP with browser fallback",
+    )
+    http_fetch_timeout: float = Field(
+        default=30.0, gt=0.0, description="Timeout in seconds per page in the http fetch mode"
+    )
+    http_max_connections: int = Field(
+        default=20, ge=1, description="Pooled connections (and pages in flight) in the http fetch mode"
+    )
+
+    # Per-host politeness shared by crawl jobs
+    host_request_interval: float = Field(
+        default=0.5, ge=0.0, description="Minimum seconds between request starts on one host"
+    )
+    host_max_delay: float = Field(
+        default=30.0, gt=0.0, description="Upper bound in seconds for per-host backoff and robots.txt crawl-delay"
+    )
+
+    # Browser pool shared by crawl jobs
+    browser_pool_size: int = Field(
+        default=2, ge=0, description="Started browsers shared by concurrent crawls (0 launches one per crawl)"
+    )
+    browser_max_pages: int = Field(
+        default=500, ge=1, description="Pages a crawl's browser context serves before it is replaced"
+    )
+    browser_idle_timeout: float = Field(
+        default=300.0, ge=0.0, description="Seconds before an unused pooled browser is closed (0 keeps it open)"
+    )
+
+    # Sitemap-driven crawl planning
+    sitemap_planner: bool = Field(
+        default=False,
+        description="Seed deep crawls from sitemap.xml instead of following links when a sitemap exists",
+    )
+    sitemap_timeout: float = Field(default=15.0, gt=0.0, description="Timeout in seconds per sitemap request")
+    sitemap_max_urls: int = Field(
+        default=10000, ge=1, description="Maximum URLs read from the sitemaps of one crawl"
+    )
+
+    # Crawl workers
+    execution_mode: str = Field(
+        default="inline",
+        pattern="^(inline|queue)$",
+        description="Run crawls inside the API process (inline) or enqueue them for `cli.py worker` processes (queue)",
+    )
+    worker_concurrency: int = Field(default=2, ge=1, description="Crawl jobs one worker runs at once")
+    worker_poll_interval: float = Field(
+        default=2.0, gt=0.0, description="Seconds an idle worker waits before looking for queued jobs again"
+    )
+    progress_bus: str = Field(
+        default="postgres",
+        pattern="^(postgres|memory)$",
+        description="Publish job progress to every API process via Postgres NOTIFY (postgres) or within this process only (memory)",
+    )
+
+    # Background retries of failed pages
+    retry_failed_pages: bool = Field(
+        default=True, description="Retry transient page failures in the background with exponential backoff"
+    )
+    retry_max_attempts: int = Field(
+        default=4, ge=1, description="Failed fetches of a URL after which it is no longer retried"
+    )
+    retry_base_delay: float = Field(
+        default=30.0, gt=0.0, description="Seconds before the first retry; doubled for each further attempt"
+    )
+    retry_max_delay: float = Field(
+        default=1800.0, gt=0.0, description="Upper bound in seconds for the delay between retries"
+    )
+    retry_poll_interval: float = Field(
+        default=15.0, gt=0.0, description="Seconds between checks for failed pages due for a retry"
+    )
+    retry_batch_size: int = Field(default=50, ge=1, description="Failed pages retried per check")
+
 
 class CodeExtractionConfig(BaseSettings):
     """Code extraction configuration."""
@@ -129,6 +271,46 @@ class CodeExtractionConfig(BaseSettings):
         default="{}",
         description="Custom JSON parameters for LLM requests (e.g., temperature, extra_body)",
     )
+    llm_num_parallel: int = Field(
+        default=5, ge=1, description="Initial number of concurrent LLM requests"
+    )
+    llm_min_parallel: int = Field(
+        default=1, ge=1, description="Lower bound for adaptive LLM concurrency"
+    )
+    llm_max_parallel: int = Field(
+        default=32, ge=1, description="Upper bound for adaptive LLM concurrency"
+    )
+    llm_latency_target: float = Field(
+        default=30.0,
+        gt=0,
+        description="LLM response latency (seconds) above which concurrency is reduced",
+    )
+    llm_requests_per_minute: int = Field(
+        default=0, ge=0, description="Requests-per-minute budget shared by all jobs (0 = unlimited)"
+    )
+    llm_tokens_per_minute: int = Field(
+        default=0, ge=0, description="Tokens-per-minute budget shared by all jobs (0 = unlimited)"
+    )
+    llm_http_max_connections: int = Field(
+        default=100, ge=1, description="Maximum HTTP connections per pooled LLM client"
+    )
+    llm_http_max_keepalive: int = Field(
+        default=20, ge=0, description="Idle keep-alive connections retained per pooled LLM client"
+    )
+    llm_http_keepalive_expiry: float = Field(
+        default=60.0, gt=0, description="Seconds an idle LLM connection is kept open"
+    )
+    llm_client_idle_ttl: float = Field(
+        default=900.0, gt=0, description="Seconds after which an unused pooled LLM client is closed"
+    )
+    near_duplicate_reuse: bool = Field(
+        default=True,
+        description="Reuse the description of a nearly identical stored snippet instead of calling the LLM",
+    )
+    # The band index finds every snippet within 3 differing bits, so larger values miss matches
+    near_duplicate_max_distance: int = Field(
+        default=3, ge=0, le=3, description="Maximum differing fingerprint bits of a near-duplicate snippet"
+    )
     enable_context_extraction: bool = Field(
         default=True, description="Extract surrounding context for code blocks"
     )
@@ -167,6 +349,10 @@ class SearchConfig(BaseSettings):
     max_single_snippet_tokens: int = 2000  # Max tokens when returning single snippet
     max_multi_snippet_tokens: int = 500  # Max tokens per snippet when returning multiple
 
+    # Near-duplicate collapsing
+    collapse_near_duplicates: bool = False  # Show only the first of nearly identical snippets
+    near_duplicate_collapse_distance: int = 3  # Maximum differing fingerprint bits to collapse
+
 
 class TokenConfig(BaseSettings):
     """Token-related configuration using tiktoken."""
@@ -0,0 +1,383 @@
+"""Long-lived pool of started browser crawlers shared by crawl jobs.
+
+Launching Chromium costs seconds per ``AsyncWebCrawler``. The pool keeps a
+bounded number of started crawlers and shares them between crawls: every
+lease gets its own browser context on the least busy crawler, so the number
+of concurrent crawls is not limited by the number of browsers. A lease's
+context is replaced after serving a number of pages (releasing memory that
+long-lived contexts accumulate) and closed when the crawl ends. Crawlers are
+health-checked before each lease, and crawlers that stay idle are closed in
+the background. ``get_browser_pool()`` returns the pool shared by every
+crawl manager of the process.
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+from collections.abc import AsyncGenerator, AsyncIterator, Callable
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Any
+
+from crawl4ai import AsyncWebCrawler
+
+from ..config import get_settings
+from .config import create_browser_config
+
+logger = logging.getLogger(__name__)
+
+# Context key of the lease whose fetches are running; folded into Crawl4AI's
+# context signature so each lease gets its own browser context
+_context_key: ContextVar[str | None] = ContextVar("browser_pool_context_key", default=None)
+
+
+class _PooledCrawler:
+    """A started crawler plus its usage counters."""
+
+    def __init__(self, crawler: Any):
+        self.crawler = crawler
+        self.pages = 0
+        self.leases = 0
+        self.active = 0
+        self.healthy = True
+        self.last_used = time.monotonic()
+
+
+class BrowserLease:
+    """A crawl's browser context on a shared crawler.
+
+    Forwards arun/arun_many with the lease's context key set and counts the
+    pages they return; after the pool's ``max_pages_per_context`` pages later
+    fetches open a fresh context and the old one is closed once its pages are
+    released.
+    """
+
+    def __init__(self, pool: "BrowserPool", pooled: _PooledCrawler):
+        self._pool = pool
+        self._pooled = pooled
+        self.key = uuid.uuid4().hex
+        self.pages = 0
+        self._retired: list[str] = []
+
+    @property
+    def crawler(self) -> Any:
+        return self._pooled.crawler
+
+    async def arun(self, url: str, config: Any = None, **kwargs: Any) -> Any:
+        with self._scope():
+            result = await self.crawler.arun(url, config=config, **kwargs)
+        return await self._count(result)
+
+    async def arun_many(self, urls: list[str], config: Any = None, **kwargs: Any) -> Any:
+        with self._scope():
+            result = await self.crawler.arun_many(urls, config=config, **kwargs)
+        return await self._count(result)
+
+    @contextmanager
+    def _scope(self):
+        token = _context_key.set(self.key)
+        try:
+            yield
+        finally:
+            _context_key.reset(token)
+
+    async def _count(self, result: Any) -> Any:
+        if hasattr(result, "__aiter__"):
+            return self._count_stream(result)
+        await self._counted(len(result) if isinstance(result, list) else 1)
+        return result
+
+    async def _count_stream(self, results: AsyncIterator[Any]) -> AsyncGenerator[Any, None]:
+        iterator = aiter(results)
+        while True:
+            # Dispatchers start page fetches while the stream is iterated
+            with self._scope():
+                try:
+                    result = await anext(iterator)
+                except StopAsyncIteration:
+                    return
+            await self._counted(1)
+            yield result
+
+    async def _counted(self, pages: int) -> None:
+        self.pages += pages
+        self._pooled.pages += pages
+        if self.pages >= self._pool.max_pages_per_context:
+            # Recycle mid-crawl: fetches started from now on open a new context
+            self._pool.stats["recycled"] += 1
+            logger.info(f"Recycling browser context after {self.pages} pages")
+            self._retired.append(self.key)
+            self.key = uuid.uuid4().hex
+            self.pages = 0
+            self._pool.stats["contexts"] += 1
+        if self._retired:
+            await self._close_retired()
+
+    async def _close_retired(self) -> None:
+        """Close retired contexts whose pages have all been released."""
+        self._retired = [
+            key for key in self._retired if not await self._pool._close_context(self._pooled.crawler, key)
+        ]
+
+    async def close(self) -> None:
+        """Close every context the lease opened."""
+        self._retired.append(self.key)
+        for key in self._retired:
+            await self._pool._close_context(self._pooled.crawler, key, force=True)
+        self._retired = []
+
+
+class BrowserPool:
+    """Bounded pool of started AsyncWebCrawler instances shared by crawls."""
+
+    def __init__(
+        self,
+        browser_config: Any,
+        size: int = 2,
+        max_pages_per_context: int = 500,
+        idle_timeout: float = 300.0,
+        crawler_factory: Callable[[], Any] | None = None,
+    ):
+        """Initialize the pool.
+
+        Args:
+            browser_config: Crawl4AI browser configuration for new crawlers
+            size: Maximum started crawlers (leases share them)
+            max_pages_per_context: Replace a lease's browser context after it served this many pages
+            idle_timeout: Close crawlers unused for this many seconds
+            crawler_factory: Creates an unstarted crawler (defaults to AsyncWebCrawler)
+        """
+        self.browser_config = browser_config
+        self.size = max(1, size)
+        self.max_pages_per_context = max_pages_per_context
+        self.idle_timeout = idle_timeout
+        self.crawler_factory = crawler_factory or (lambda: AsyncWebCrawler(config=self.browser_config))
+
+        self._crawlers: list[_PooledCrawler] = []
+        self._leases = 0
+        self._lock = asyncio.Lock()
+        self._reaper_task: asyncio.Task | None = None
+        self._closed = False
+        self.stats = {
+            "launched": 0,
+            "reused": 0,
+            "contexts": 0,
+            "recycled": 0,
+            "unhealthy": 0,
+            "idle_closed": 0,
+        }
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncGenerator[BrowserLease, None]:
+        """Lease a browser context on the least busy started crawler."""
+        if self._closed:
+            raise RuntimeError("Browser pool is closed")
+        self._ensure_reaper()
+
+        pooled = await self._acquire()
+        lease = BrowserLease(self, pooled)
+        self.stats["contexts"] += 1
+        self._leases += 1
+        try:
+            yield lease
+        finally:
+            self._leases -= 1
+            await lease.close()
+            await self._release(pooled)
+
+    async def _acquire(self) -> _PooledCrawler:
+        async with self._lock:
+            for candidate in [candidate for candidate in self._crawlers if candidate.healthy]:
+                if not self._is_healthy(candidate.crawler):
+                    self.stats["unhealthy"] += 1
+                    logger.warning("Discarding unhealthy pooled browser")
+                    await self._retire(candidate)
+
+            available = [pooled for pooled in self._crawlers if pooled.healthy]
+            pooled = min(available, key=lambda candidate: candidate.active, default=None)
+            if pooled is not None and (pooled.active == 0 or len(available) >= self.size):
+                self.stats["reused"] += 1
+            else:
+                pooled = await self._launch()
+            pooled.active += 1
+            pooled.leases += 1
+            return pooled
+
+    async def _launch(self) -> _PooledCrawler:
+        """Start a crawler and add it to the pool (called with the lock held)."""
+        crawler = self.crawler_factory()
+        started = time.perf_counter()
+        await crawler.start()
+        self._scope_contexts(crawler)
+        self.stats["launched"] += 1
+        logger.info(f"Launched pooled browser in {time.perf_counter() - started:.2f}s")
+        pooled = _PooledCrawler(crawler)
+        self._crawlers.append(pooled)
+        return pooled
+
+    async def _release(self, pooled: _PooledCrawler) -> None:
+        pooled.last_used = time.monotonic()
+        pooled.active -= 1
+        if pooled.active == 0 and (self._closed or not pooled.healthy):
+            async with self._lock:
+                if pooled in self._crawlers:
+                    self._crawlers.remove(pooled)
+            await self._close_crawler(pooled)
+
+    async def _retire(self, pooled: _PooledCrawler) -> None:
+        """Stop leasing a crawler; it closes once its running crawls finish."""
+        pooled.healthy = False
+        if pooled.active == 0:
+            self._crawlers.remove(pooled)
+            await self._close_crawler(pooled)
+
+    @staticmethod
+    def _is_healthy(crawler: Any) -> bool:
+        """Whether a pooled crawler's browser is still usable."""
+        try:
+            if getattr(crawler, "ready", True) is False:
+                return False
+            browser = crawler.crawler_strategy.browser_manager.browser
+        except AttributeError:
+            return True
+        try:
+            return browser is None or browser.is_connected()
+        except Exception:
+            return False
+
+    @staticmethod
+    def _scope_contexts(crawler: Any) -> None:
+        """Key the crawler's browser contexts by the running lease.
+
+        Crawl4AI shares one context per run-config signature; appending the
+        lease's context key gives every lease (and every recycle) its own.
+        """
+        try:
+            manager = crawler.crawler_strategy.browser_manager
+            make_signature = manager._make_config_signature
+        except AttributeError:
+            return
+
+        def signature(config: Any) -> str:
+            key = _context_key.get()
+            base = make_signature(config)
+            return f"{base}:{key}" if key else base
+
+        manager._make_config_signature = signature
+
+    @staticmethod
+    async def _close_context(crawler: Any, key: str, force: bool = False) -> bool:
+        """Close the browser contexts opened under a lease's context key.
+
+        Contexts with pages still in use are kept unless ``force`` is set.
+
+        Returns:
+            Whether no context of the key is left open
+        """
+        try:
+            manager = crawler.crawler_strategy.browser_manager
+            contexts = manager.contexts_by_config
+            refcounts = manager._context_refcounts
+            lock = manager._contexts_lock
+        except AttributeError:
+            return True
+
+        closing = []
+        async with lock:
+            for signature in [signature for signature in contexts if signature.endswith(f":{key}")]:
+                if refcounts.get(signature, 0) and not force:
+                    return False
+                closing.append(contexts.pop(signature))
+                refcounts.pop(signature, None)
+                getattr(manager, "_context_last_used", {}).pop(signature, None)
+        for context in closing:
+            try:
+                await context.close()
+            except Exception as e:
+                logger.warning(f"Error closing browser context: {e}")
+        return True
+
+    async def _close_crawler(self, pooled: _PooledCrawler) -> None:
+        try:
+            await pooled.crawler.close()
+        except Exception as e:
+            logger.warning(f"Error closing pooled browser: {e}")
+
+    def _ensure_reaper(self) -> None:
+        if self.idle_timeout > 0 and (self._reaper_task is None or self._reaper_task.done()):
+            self._reaper_task = asyncio.create_task(self._reap_idle())
+
+    async def _reap_idle(self) -> None:
+        """Close crawlers idle for longer than idle_timeout."""
+        while not self._closed:
+            await asyncio.sleep(max(self.idle_timeout / 2, 0.01))
+            await self.close_idle(self.idle_timeout)
+
+    async def close_idle(self, older_than: float = 0.0) -> int:
+        """Close crawlers without leases unused for at least ``older_than`` seconds.
+
+        Returns:
+            Number of closed crawlers
+        """
+        cutoff = time.monotonic() - older_than
+        async with self._lock:
+            expired = [pooled for pooled in self._crawlers if pooled.active == 0 and pooled.last_used <= cutoff]
+            self._crawlers = [pooled for pooled in self._crawlers if pooled not in expired]
+        for pooled in expired:
+            await self._close_crawler(pooled)
+        if expired:
+            self.stats["idle_closed"] += len(expired)
+            logger.info(f"Closed {len(expired)} idle pooled browsers")
+        return len(expired)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Pool state for health reporting."""
+        return {
+            "size": self.size,
+            "browsers": len(self._crawlers),
+            "idle": sum(1 for pooled in self._crawlers if pooled.active == 0),
+            "leased": self._leases,
+            **self.stats,
+        }
+
+    async def close(self) -> None:
+        """Close all idle crawlers; leased ones close when their last lease ends."""
+        self._closed = True
+        if self._reaper_task and not self._reaper_task.done():
+            self._reaper_task.cancel()
+            try:
+                await self._reaper_task
+            except asyncio.CancelledError:
+                pass
+        await self.close_idle()
+
+
+_browser_pool: BrowserPool | None = None
+
+
+def get_browser_pool() -> BrowserPool | None:
+    """Get the process-wide browser pool (None when pooling is disabled)."""
+    global _browser_pool
+    crawling = get_settings().crawling
+    if _browser_pool is None and crawling.browser_pool_size > 0:
+        _browser_pool = BrowserPool(
+            create_browser_config(
+                headless=True,
+                viewport_width=1200,
+                viewport_height=800,
+                user_agent=crawling.user_agent,
+            ),
+            size=crawling.browser_pool_size,
+            max_pages_per_context=crawling.browser_max_pages,
+            idle_timeout=crawling.browser_idle_timeout,
+        )
+    return _browser_pool
+
+
+async def close_browser_pool() -> None:
+    """Close the process-wide browser pool; the next get_browser_pool() starts a new one."""
+    global _browser_pool
+    pool, _browser_pool = _browser_pool, None
+    if pool:
+        await pool.close()
@@ -0,0 +1,167 @@
+"""Event-driven crawl job cancellation.
+
+Cancelling a job publishes ``NOTIFY job_cancel, '<job id>'``. Every process
+running crawls holds one connection listening on that channel and sets the
+job's ``asyncio.Event`` and cancels its crawl task as soon as the notification
+arrives, so workers check for cancellation without querying ``crawl_jobs``
+and a cancelled job stops mid-page. Notifications sent while the listener
+is disconnected are lost, so after every (re)connect the listener looks up
+the registered jobs already cancelled in ``crawl_jobs``.
+"""
+
+import asyncio
+import logging
+from typing import Any
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from ..database import CrawlJob, get_db_manager
+from .job_manager import CANCELLED_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "job_cancel"
+
+# Seconds before the listener reconnects after losing its connection
+RECONNECT_DELAY = 5.0
+
+
+class CancellationBus:
+    """Per-process registry of running jobs and their cancellation events."""
+
+    def __init__(self, db_manager: Any | None = None, reconnect_delay: float = RECONNECT_DELAY):
+        """Initialize the bus.
+
+        Args:
+            db_manager: Database manager (defaults to the global one)
+            reconnect_delay: Seconds between listener connection attempts
+        """
+        self.db_manager = db_manager or get_db_manager()
+        self.reconnect_delay = reconnect_delay
+        self._events: dict[str, asyncio.Event] = {}
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._listener: asyncio.Task | None = None
+
+    def register(self, job_id: str, task: asyncio.Task | None = None) -> asyncio.Event:
+        """Watch a job for cancellation.
+
+        Args:
+            job_id: Job ID
+            task: Task running the job, cancelled when the job is
+
+        Returns:
+            Event set once the job is cancelled
+        """
+        event = asyncio.Event()
+        self._events[job_id] = event
+        if task is not None:
+            self._tasks[job_id] = task
+
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+        return event
+
+    def unregister(self, job_id: str, task: asyncio.Task | None = None) -> None:
+        """Stop watching a finished job.
+
+        Args:
+            job_id: Job ID
+            task: Finished task; a newer run of the job registered with another
+                task stays watched
+        """
+        if task is not None and self._tasks.get(job_id) not in (None, task):
+            return
+        self._events.pop(job_id, None)
+        self._tasks.pop(job_id, None)
+
+    def is_cancelled(self, job_id: str) -> bool:
+        """Whether a cancellation of the job has been received."""
+        event = self._events.get(job_id)
+        return event is not None and event.is_set()
+
+    async def publish(self, job_id: str) -> None:
+        """Cancel a job in this and every other listening process."""
+        self._cancel(job_id)
+        try:
+            await asyncio.to_thread(self._notify, job_id)
+        except Exception as e:
+            logger.error(f"Failed to publish cancellation of job {job_id}: {e}")
+
+    def _notify(self, job_id: str) -> None:
+        with self.db_manager.session_scope() as session:
+            session.execute(text("SELECT pg_notify(:channel, :job_id)"), {"channel": CHANNEL, "job_id": job_id})
+
+    def _cancel(self, job_id: str) -> None:
+        event = self._events.get(job_id)
+        if event is None or event.is_set():
+            return
+
+        logger.info(f"Cancellation received for job {job_id}")
+        event.set()
+        task = self._tasks.get(job_id)
+        if task is not None and task is not asyncio.current_task() and not task.done():
+            task.cancel()
+
+    def _conninfo(self) -> str:
+        url = make_url(self.db_manager.database_url).set(drivername="postgresql")
+        return url.render_as_string(hide_password=False)
+
+    async def _listen(self) -> None:
+        """Receive cancellations on a dedicated connection, reconnecting as needed."""
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    logger.debug(f"Listening for job cancellations on channel {CHANNEL}")
+                    await self._catch_up()
+                    async for notify in conn.notifies():
+                        self._cancel(notify.payload)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Cancellation listener disconnected: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _catch_up(self) -> None:
+        """Cancel registered jobs that were cancelled while nothing was listening."""
+        job_ids = list(self._events)
+        if not job_ids:
+            return
+        for job_id in await asyncio.to_thread(self._cancelled_jobs, job_ids):
+            self._cancel(job_id)
+
+    def _cancelled_jobs(self, job_ids: list[str]) -> list[str]:
+        with self.db_manager.session_scope() as session:
+            rows = (
+                session.query(CrawlJob.id)
+                .filter(
+                    CrawlJob.id.in_(job_ids),
+                    CrawlJob.status == "completed",
+                    CrawlJob.error_message == CANCELLED_MESSAGE,
+                )
+                .all()
+            )
+            return [str(job_id) for job_id, in rows]
+
+    async def close(self) -> None:
+        """Stop the listener."""
+        if self._listener and not self._listener.done():
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        self._listener = None
+
+
+_bus: CancellationBus | None = None
+
+
+def get_cancellation_bus() -> CancellationBus:
+    """Get the cancellation bus of this process."""
+    global _bus
+    if _bus is None:
+        _bus = CancellationBus()
+    return _bus
@@ -1,5 +1,6 @@
 """Simplified crawler configuration."""
 
+from typing import Any
 
 from crawl4ai import (
     BrowserConfig,
@@ -36,6 +37,10 @@ def create_crawler_config(
     include_patterns: list[str] | None = None,
     user_agent: str | None = None,
     max_pages: int | None = None,
+    job_id: str | None = None,
+    frontier_batch_size: int = 20,
+    frontier_claim_timeout: float = 600.0,
+    revalidator: Any | None = None,
 ) -> CrawlerRunConfig:
     """Create unified crawler configuration for both single page and deep crawl.
     
@@ -45,6 +50,10 @@ def create_crawler_config(
         include_patterns: URL patterns to include
         user_agent: Custom user agent string for HTTP requests
         max_pages: Maximum number of pages to crawl
+        job_id: Job whose persistent frontier backs the deep crawl (None for in-memory BFS)
+        frontier_batch_size: URLs claimed from the frontier per fetch round
+        frontier_claim_timeout: Seconds before another worker's claim is considered abandoned
+        revalidator: HTTPRevalidator letting the frontier crawl skip unchanged pages
     
     Returns:
         Configured CrawlerRunConfig instance
@@ -99,6 +108,17 @@ def create_crawler_config(
         if filters:
             strategy_kwargs["filter_chain"] = FilterChain(filters)
 
-        config_dict["deep_crawl_strategy"] = BFSDeepCrawlStrategy(**strategy_kwargs)
+        if job_id:
+            from .frontier import FrontierBFSDeepCrawlStrategy
+
+            config_dict["deep_crawl_strategy"] = FrontierBFSDeepCrawlStrategy(
+                job_id=job_id,
+                batch_size=frontier_batch_size,
+                claim_timeout=frontier_claim_timeout,
+                revalidator=revalidator,
+                **strategy_kwargs,
+            )
+        else:
+            config_dict["deep_crawl_strategy"] = BFSDeepCrawlStrategy(**strategy_kwargs)
 
     return CrawlerRunConfig(**config_dict)
@@ -2,15 +2,20 @@
 
 import asyncio
 import logging
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from typing import Any
 
 from ..config import get_settings
+from .browser_pool import close_browser_pool, get_browser_pool
+from .cancellation import get_cancellation_bus
 from .config import create_browser_config
+from .failed_page_utils import get_failed_page_recorder
+from .frontier import CrawlFrontier
 from .job_manager import JobManager
-from .page_crawler import PageCrawler
+from .page_crawler import CrawlResult, PageCrawler, ResultSink
 from .progress_tracker import ProgressTracker
 from .result_processor import ResultProcessor
+from .sitemap import SitemapPlanner
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -43,6 +48,7 @@ class CrawlManager:
         # Initialize components
         self.job_manager = JobManager()
         self.progress_tracker = ProgressTracker(self.job_manager)
+        self.cancellation_bus = get_cancellation_bus()
 
         # Get user agent from settings
         user_agent = self.settings.crawling.user_agent
@@ -55,8 +61,12 @@ class CrawlManager:
             user_agent=user_agent,
         )
 
+        # Started browsers are shared by all crawls of the process (a context each)
+        # instead of launched per start URL
+        self.browser_pool = get_browser_pool()
+
         # Initialize crawler and processor
-        self.page_crawler = PageCrawler(self.browser_config)
+        self.page_crawler = PageCrawler(self.browser_config, browser_pool=self.browser_pool)
         self.result_processor = ResultProcessor()
 
         # Cleanup task will be started when first crawl starts
@@ -100,6 +110,28 @@ class CrawlManager:
             "max_concurrent_crawls": config.max_concurrent_crawls,
         }
 
+        # In queue mode the job is left to a `cli.py worker` process
+        if self.settings.crawling.execution_mode == "queue":
+            # Stop a previous run of a reused job on whichever worker still has it
+            # and drop its frontier before the row is queued, so a worker claiming
+            # the job right away starts from the new start URLs
+            previous_job_id = await asyncio.to_thread(self.job_manager.find_job_id, config.name, config.version)
+            if previous_job_id:
+                await self.cancellation_bus.publish(previous_job_id)
+                await asyncio.to_thread(CrawlFrontier(previous_job_id).clear)
+
+            job_id = self.job_manager.get_or_create_job(
+                config.name,
+                config.start_urls,
+                config.max_depth,
+                config.domain_restrictions,
+                job_config,
+                config.version,
+                status="queued",
+            )
+            logger.info(f"Queued crawl job {job_id} for a worker")
+            return job_id
+
         job_id = self.job_manager.get_or_create_job(
             config.name,
             config.start_urls,
@@ -109,6 +141,9 @@ class CrawlManager:
             config.version,
         )
 
+        # A new run of a reused job starts from its start URLs, not a stale frontier
+        await asyncio.to_thread(CrawlFrontier(job_id).clear)
+
         # Start cleanup task if not already running
         if self._cleanup_task is None or self._cleanup_task.done():
             self._cleanup_task = asyncio.create_task(self._periodic_cleanup())
@@ -134,6 +169,8 @@ class CrawlManager:
         # Start async crawl
         task = asyncio.create_task(self._execute_crawl(job_id, config))
         self._active_crawl_tasks[job_id] = task
+        # A cancellation published by any process cancels the task
+        self.cancellation_bus.register(job_id, task)
 
         return job_id
 
@@ -146,8 +183,7 @@ class CrawlManager:
 
     async def _check_job_cancelled(self, job_id: str) -> None:
         """Check if job is cancelled and raise CancelledError if so."""
-        job_status = self.job_manager.get_job_status(job_id)
-        if job_status and job_status.get("status") == "completed":
+        if self.cancellation_bus.is_cancelled(job_id):
             logger.info(f"Job {job_id} has been cancelled, stopping crawl")
             raise asyncio.CancelledError("Job cancelled by user")
 
@@ -171,8 +207,22 @@ class CrawlManager:
 
         return processed_count if send_notification else last_ws_count
 
-    async def _execute_crawl(self, job_id: str, config: CrawlConfig) -> None:
-        """Execute the crawl job with global timeout."""
+    async def _execute_crawl(self, job_id: str, config: CrawlConfig, worker_id: str | None = None) -> None:
+        """Execute the crawl job with global timeout.
+
+        With a ``worker_id`` the job's heartbeats and completion only apply
+        while that worker still owns the job; once another worker took it
+        over the crawl is cancelled and left to the new owner.
+        """
+        task = asyncio.current_task()
+        lost = False
+
+        def lose_ownership() -> None:
+            nonlocal lost
+            lost = True
+            if task and not task.done():
+                task.cancel()
+
         try:
             # Check if job is already cancelled
             job_status = self.job_manager.get_job_status(job_id)
@@ -180,7 +230,7 @@ class CrawlManager:
                 logger.info(f"Job {job_id} is cancelled, not starting crawl")
                 return
             # Start tracking
-            await self.progress_tracker.start_tracking(job_id)
+            await self.progress_tracker.start_tracking(job_id, owner=worker_id, on_lost=lose_ownership)
 
             # Wrap crawl execution with global timeout
             try:
@@ -200,11 +250,18 @@ class CrawlManager:
             logger.info(f"Job {job_id} completed - Snippets: {final_snippet_count} (added {final_snippet_count - base_count})")
 
             # Complete job immediately after crawl
-            self.job_manager.complete_job(job_id, success=True)
+            if not self.job_manager.complete_job(job_id, success=True, worker_id=worker_id):
+                logger.warning(f"Job {job_id} was taken over by another worker, not completing it")
+                return
+            # Only unfinished jobs resume from their frontier
+            await asyncio.to_thread(CrawlFrontier(job_id).clear)
 
             await self.progress_tracker.send_completion(job_id, success=True)
 
         except asyncio.CancelledError:
+            if lost:
+                logger.warning(f"Crawl job {job_id} was taken over by another worker, stopping")
+                raise
             logger.info(f"Crawl job {job_id} was cancelled")
             # Job status is already set to cancelled by cancel_job
             await self.progress_tracker.send_completion(
@@ -213,15 +270,17 @@ class CrawlManager:
             raise  # Re-raise to properly handle task cancellation
         except TimeoutError as e:
             logger.error(f"Crawl job {job_id} timed out: {e}")
-            self.job_manager.complete_job(job_id, success=False, error_message=str(e))
+            self.job_manager.complete_job(job_id, success=False, error_message=str(e), worker_id=worker_id)
             await self.progress_tracker.send_completion(job_id, success=False, error=str(e))
         except Exception as e:
             logger.error(f"Crawl job {job_id} failed: {e}")
-            self.job_manager.complete_job(job_id, success=False, error_message=str(e))
+            self.job_manager.complete_job(job_id, success=False, error_message=str(e), worker_id=worker_id)
             await self.progress_tracker.send_completion(job_id, success=False, error=str(e))
         finally:
             # Clean up
+            await get_failed_page_recorder().flush(job_id)
             await self.progress_tracker.stop_tracking(job_id)
+            self.cancellation_bus.unregister(job_id, asyncio.current_task())
             # Remove from active tasks
             self._active_crawl_tasks.pop(job_id, None)
 
@@ -229,19 +288,63 @@ class CrawlManager:
         """Internal crawl execution without timeout wrapper."""
         # Execute crawl based on depth
         if config.max_depth > 0:
+            if self._use_sitemap(config) and await self._execute_sitemap_crawl(job_id, config):
+                return
             await self._execute_deep_crawl(job_id, config)
         else:
             # Single page crawl handles both single and multiple URLs
             await self._execute_single_crawl(job_id, config)
 
-    async def _execute_deep_crawl(self, job_id: str, config: CrawlConfig) -> None:
-        """Execute deep crawl."""
-        visited_urls: set[str] = set()
-        processed_count = 0
-        last_ws_count = 0
+    def _use_sitemap(self, config: CrawlConfig) -> bool:
+        """Whether a deep crawl should be planned from sitemaps (job metadata overrides the setting)."""
+        use_sitemap = (config.metadata or {}).get("use_sitemap")
+        if use_sitemap is None:
+            return self.settings.crawling.sitemap_planner
+        return bool(use_sitemap)
+
+    async def _execute_sitemap_crawl(self, job_id: str, config: CrawlConfig) -> bool:
+        """Crawl the URLs listed in the start URLs' sitemaps.
+
+        Returns:
+            False if no sitemap lists matching URLs, so the caller falls back to BFS
+        """
+        crawling = self.settings.crawling
+        planner = SitemapPlanner(
+            user_agent=crawling.user_agent,
+            timeout=crawling.sitemap_timeout,
+            max_urls=crawling.sitemap_max_urls,
+        )
+        plan = await planner.plan(
+            config.start_urls,
+            domain_restrictions=config.domain_restrictions,
+            include_patterns=config.include_patterns,
+            max_pages=config.max_pages,
+            # Regeneration must revisit every page regardless of lastmod
+            incremental=not (config.metadata or {}).get("ignore_hash"),
+        )
+        if not plan.found:
+            logger.info(f"No usable sitemap for job {job_id}, falling back to link-following crawl")
+            return False
+
+        if not plan.urls:
+            logger.info(f"Sitemaps list no pages changed since the last crawl of job {job_id}")
+            return True
 
+        logger.info(f"Crawling {len(plan.urls)} URLs planned from sitemaps for job {job_id}")
+        await self._execute_single_crawl(job_id, replace(config, start_urls=plan.urls, max_depth=0))
+        return True
+
+    async def _execute_deep_crawl(self, job_id: str, config: CrawlConfig) -> None:
+        """Execute deep crawl, persisting pages as they are processed."""
         # Initialize tracking
         base_snippet_count, total_snippets = self._initialize_crawl_tracking(job_id)
+        tracking = {
+            "processed_count": 0,
+            "total_snippets": total_snippets,
+            "visited_urls": set(),
+            "last_ws_count": 0,
+            "base_snippet_count": base_snippet_count,
+        }
         logger.info(f"Starting deep crawl for job {job_id}")
 
         # Build fresh config for this crawl - don't merge with old config
@@ -258,43 +361,35 @@ class CrawlManager:
         if job_data and job_data.get("config", {}).get("base_snippet_count") is not None:
             job_config["base_snippet_count"] = job_data["config"]["base_snippet_count"]
 
+        # Pages are written in micro-batches as they leave the pipeline instead of
+        # after the whole BFS, so memory stays bounded and snippets become searchable
+        result_sink = self._create_result_sink(job_id, tracking, use_pipeline=False)
+
         for start_url in config.start_urls:
             # Check if job is cancelled
             await self._check_job_cancelled(job_id)
 
             # Crawl from this start URL
-            logger.info(f"DEBUG: About to call crawl_page for {start_url}")
-            results = await self.page_crawler.crawl_page(
-                start_url, job_id, 0, config.max_depth, job_config, self.progress_tracker
+            await self.page_crawler.crawl_page(
+                start_url, job_id, 0, config.max_depth, job_config, self.progress_tracker,
+                result_sink=result_sink, retain_results=False,
             )
 
-            if results:
-                logger.info(f"Deep crawl completed! Received {len(results)} pages")
-
-                # Process results
-                docs, snippets = await self.result_processor.process_batch(
-                    results, job_id, use_pipeline=False
-                )
-
-                processed_count += len(results)
-                total_snippets += snippets
-                visited_urls.update(r.url for r in results)
-
-                logger.debug(f"Deep crawl batch processed: {snippets} new snippets")
-
-                # Update progress
-                last_ws_count = await self._update_crawl_progress(
-                    job_id, processed_count, visited_urls, total_snippets, docs, last_ws_count, base_snippet_count
-                )
+            logger.info(
+                f"Deep crawl from {start_url} finished: {tracking['processed_count']} pages persisted so far"
+            )
 
     async def _execute_single_crawl(self, job_id: str, config: CrawlConfig) -> None:
         """Execute single page crawl."""
-        visited_urls: set[str] = set()
-        processed_count = 0
-        last_ws_count = 0
-
         # Initialize tracking
         base_snippet_count, total_snippets = self._initialize_crawl_tracking(job_id)
+        tracking = {
+            "processed_count": 0,
+            "total_snippets": total_snippets,
+            "visited_urls": set(),
+            "last_ws_count": 0,
+            "base_snippet_count": base_snippet_count,
+        }
         logger.info(f"Starting single crawl for job {job_id}")
 
         # Build fresh config for this crawl - don't merge with old config
@@ -319,6 +414,9 @@ class CrawlManager:
             if config.metadata and config.metadata.get("ignore_hash"):
                 job_config["metadata"]["ignore_hash"] = True
 
+        # Results are persisted in micro-batches by the crawler's persist stage
+        result_sink = self._create_result_sink(job_id, tracking)
+
         # If we have multiple URLs, use the efficient arun_many approach
         if len(config.start_urls) > 1:
             logger.info(f"Using multi-URL crawling for {len(config.start_urls)} URLs")
@@ -326,66 +424,87 @@ class CrawlManager:
             # Check if job is cancelled before starting
             await self._check_job_cancelled(job_id)
 
-            # Use the new crawl_multiple_urls method
-            results = await self.page_crawler.crawl_multiple_urls(
-                config.start_urls, job_id, job_config, self.progress_tracker
+            await self.page_crawler.crawl_multiple_urls(
+                config.start_urls, job_id, job_config, self.progress_tracker,
+                result_sink=result_sink, retain_results=False,
             )
-
-            if results:
-                # Process all results
-                for result in results:
-                    doc_id, snippet_count = await self.result_processor.process_result_pipeline(
-                        result, job_id, 0
-                    )
-                    processed_count += 1
-                    total_snippets += snippet_count
-                    visited_urls.add(result.url)
-
-                # Final progress update
-                await self._update_crawl_progress(
-                    job_id, processed_count, visited_urls, total_snippets, processed_count, 0, base_snippet_count
-                )
         else:
             # Single URL - use the original approach
             for url in config.start_urls:
                 # Check if job is cancelled
                 await self._check_job_cancelled(job_id)
 
-                visited_urls.add(url)
+                tracking["visited_urls"].add(url)
 
-                # Crawl single page
-                results = await self.page_crawler.crawl_page(
-                    url, job_id, 0, 0, job_config, self.progress_tracker
+                await self.page_crawler.crawl_page(
+                    url, job_id, 0, 0, job_config, self.progress_tracker,
+                    result_sink=result_sink, retain_results=False,
                 )
 
-                if results:
-                    logger.debug(f"Processing {len(results)} results")
+    def _create_result_sink(
+        self, job_id: str, tracking: dict[str, Any], use_pipeline: bool = True
+    ) -> ResultSink:
+        """Create a sink that persists result batches as the crawl pipeline emits them.
 
-                    # Process results
-                    for result in results:
-                        logger.debug(
-                            f"Processing result for {result.url} with {len(result.code_blocks) if result.code_blocks else 0} code blocks"
-                        )
+        Args:
+            job_id: Job ID
+            tracking: Mutable progress counters shared with the caller
+            use_pipeline: Whether the result processor uses pipeline processing
 
-                        doc_id, snippet_count = await self.result_processor.process_result_pipeline(
-                            result, job_id, 0
-                        )
+        Returns:
+            Coroutine function accepting a list of CrawlResult objects
+        """
+        async def persist(batch: list[CrawlResult]) -> None:
+            docs, snippets = await self.result_processor.process_batch(
+                batch, job_id, use_pipeline=use_pipeline
+            )
+
+            tracking["processed_count"] += len(batch)
+            tracking["total_snippets"] += snippets
+            tracking["visited_urls"].update(result.url for result in batch)
+
+            logger.debug(f"Persisted batch of {len(batch)} pages: {snippets} new snippets")
+
+            tracking["last_ws_count"] = await self._update_crawl_progress(
+                job_id,
+                tracking["processed_count"],
+                tracking["visited_urls"],
+                tracking["total_snippets"],
+                tracking["processed_count"],
+                tracking["last_ws_count"],
+                tracking["base_snippet_count"],
+            )
+
+        return persist
+
+    async def run_queued_job(self, job_id: str, worker_id: str | None = None) -> None:
+        """Run a job a worker claimed from the queue in the current task.
 
-                        logger.debug(f"Result: doc_id={doc_id}, snippet_count={snippet_count}")
+        A job reassigned from a dead worker continues from its persisted frontier.
 
-                        processed_count += 1
-                        total_snippets += snippet_count
+        Args:
+            job_id: Claimed job ID
+            worker_id: Worker that claimed the job; the crawl stops if it loses the job
+        """
+        job_status = self.job_manager.get_job_status(job_id)
+        if not job_status:
+            logger.error(f"Claimed job {job_id} not found")
+            return
 
-                    # Update progress
-                    last_ws_count = await self._update_crawl_progress(
-                        job_id, processed_count, visited_urls, total_snippets, processed_count, last_ws_count, base_snippet_count
-                    )
+        task = asyncio.current_task()
+        self._active_crawl_tasks[job_id] = task
+        self.cancellation_bus.register(job_id, task)
+        await self._execute_crawl(job_id, self._reconstruct_config(job_status), worker_id)
 
     async def cancel_job(self, job_id: str) -> bool:
         """Cancel a crawl job."""
         # First update the database status
         success = self.job_manager.cancel_job(job_id)
 
+        if success:
+            # Stops the crawl in whichever process is running it
+            await self.cancellation_bus.publish(job_id)
+
         if success and job_id in self._active_crawl_tasks:
             # Cancel the active crawl task
             task = self._active_crawl_tasks[job_id]
@@ -449,8 +568,20 @@ class CrawlManager:
                 logger.error(f"Failed to create retry job for {job_id}")
                 return False
         else:
-            # No failed pages, restart the entire crawl
-            logger.info(f"No failed pages found for job {job_id}, restarting entire crawl")
+            # No failed pages: continue the crawl from its persisted frontier. Claims
+            # held by the stalled run are released so those URLs are fetched again.
+            logger.info(f"No failed pages found for job {job_id}, resuming crawl from its frontier")
+            if self.settings.crawling.execution_mode == "queue":
+                # Leave the run to a worker instead of crawling in this process
+                from .worker import requeue_job
+
+                with db_manager.session_scope() as session:
+                    job = self.job_manager.get_job(job_id, session)
+                    job.error_message = None
+                    requeue_job(job)
+                return True
+
+            CrawlFrontier(job_id).release_claims()
 
             # Reset job status
             self.job_manager.update_job_status(
@@ -465,6 +596,7 @@ class CrawlManager:
             config = self._reconstruct_config(job_status)
             task = asyncio.create_task(self._execute_crawl(job_id, config))
             self._active_crawl_tasks[job_id] = task
+            self.cancellation_bus.register(job_id, task)
             return True
 
     def _build_retry_metadata(self, original_job: dict, failed_count: int) -> dict:
@@ -546,6 +678,46 @@ class CrawlManager:
 
         return new_job_id
 
+    async def retry_pages(self, job_id: str, urls: list[str]) -> int:
+        """Re-fetch failed pages of a job in place (used by the RetryScheduler).
+
+        Recovered pages are stored with the job and leave failed_pages; pages
+        that fail again are recorded with their next retry time.
+
+        Returns:
+            Number of pages processed
+        """
+        job_status = self.job_manager.get_job_status(job_id)
+        if not job_status:
+            return 0
+
+        config = self._reconstruct_config(job_status)
+        job_config = {
+            "domain_restrictions": config.domain_restrictions,
+            "include_patterns": config.include_patterns,
+            "metadata": config.metadata,
+            "max_concurrent_crawls": config.max_concurrent_crawls,
+        }
+        tracking = {"processed_count": 0, "total_snippets": 0}
+
+        async def persist(batch: list[CrawlResult]) -> None:
+            _, snippets = await self.result_processor.process_batch(batch, job_id)
+            tracking["processed_count"] += len(batch)
+            tracking["total_snippets"] += snippets
+
+        await self.page_crawler.crawl_multiple_urls(
+            urls, job_id, job_config, result_sink=persist, retain_results=False
+        )
+        await get_failed_page_recorder().flush(job_id)
+
+        # A running crawl reports its own totals; finished jobs are updated here
+        if tracking["total_snippets"] and job_status["status"] != "running":
+            self.job_manager.update_job_progress(
+                job_id,
+                snippets_extracted=(job_status.get("snippets_extracted") or 0) + tracking["total_snippets"],
+            )
+        return tracking["processed_count"]
+
     def get_job_status(self, job_id: str) -> dict[str, Any] | None:
         """Get job status."""
         return self.job_manager.get_job_status(job_id)
@@ -594,4 +766,6 @@ class CrawlManager:
         if hasattr(self, 'result_processor'):
             self.result_processor.cleanup()
 
+        await close_browser_pool()
+
         logger.info("CrawlManager shutdown complete")
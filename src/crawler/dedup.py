@@ -0,0 +1,125 @@
+"""Per-job detection of pages served under several URLs.
+
+Documentation sites often serve one page under several URLs (trailing slash,
+``index.html``, tracking parameters, versioned aliases such as ``/latest/``).
+``ContentDeduplicator`` maps normalized URLs and content hashes to the first
+URL seen with them. A fetched page matching a different URL is recorded as an
+alias of that page's document instead of being parsed and described again.
+"""
+
+import logging
+from typing import Any
+
+from ..database import get_db_manager
+from ..database.models import Document
+from .utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Document.meta_data key listing the other URLs serving the document's content
+ALIASES_KEY = "aliases"
+
+
+class ContentDeduplicator:
+    """Content hash and URL map of one crawl job."""
+
+    def __init__(self, job_id: str, db_manager: Any | None = None):
+        """Initialize the deduplicator.
+
+        Args:
+            job_id: Crawl job whose pages are compared
+            db_manager: Database manager (defaults to the global one)
+        """
+        self.job_id = job_id
+        self.db_manager = db_manager or get_db_manager()
+        self._url_by_hash: dict[str, str] = {}
+        self._url_by_key: dict[str, str] = {}
+        self._hash_by_url: dict[str, str] = {}
+        self._stored: set[str] = set()
+        self._pending: dict[str, set[str]] = {}
+
+    def load(self) -> int:
+        """Seed the map with the job's stored documents.
+
+        Pages stored by an earlier run (or an earlier start URL of this run)
+        count as seen, so their aliases are recognized on the first fetch.
+
+        Returns:
+            Number of loaded documents
+        """
+        with self.db_manager.session_scope() as session:
+            rows = (
+                session.query(Document.url, Document.content_hash)
+                .filter(Document.crawl_job_id == self.job_id)
+                .order_by(Document.id)
+                .all()
+            )
+        for url, content_hash in rows:
+            self._stored.add(url)
+            self._remember(url, content_hash)
+        return len(rows)
+
+    def check(self, url: str, content_hash: str) -> str | None:
+        """Register a fetched page and find the page it duplicates.
+
+        Args:
+            url: Fetched URL
+            content_hash: Hash of the page content
+
+        Returns:
+            URL of the page this one duplicates, or None if it is new or the
+            same page as before
+        """
+        # A page with its own stored document is recrawled as usual
+        if url in self._stored and self._hash_by_url.get(url) in (None, content_hash):
+            self._remember(url, content_hash)
+            return None
+
+        original = self._url_by_key.get(normalize_url(url)) or self._url_by_hash.get(content_hash)
+        if original and original != url:
+            self._pending.setdefault(original, set()).add(url)
+            return original
+
+        self._remember(url, content_hash)
+        return None
+
+    def _remember(self, url: str, content_hash: str | None) -> None:
+        previous = self._hash_by_url.get(url)
+        if previous and previous != content_hash and self._url_by_hash.get(previous) == url:
+            # The page changed; its old content no longer identifies it
+            del self._url_by_hash[previous]
+        self._url_by_key.setdefault(normalize_url(url), url)
+        if content_hash:
+            self._hash_by_url[url] = content_hash
+            self._url_by_hash.setdefault(content_hash, url)
+
+    @property
+    def alias_count(self) -> int:
+        return sum(len(aliases) for aliases in self._pending.values())
+
+    def flush(self) -> int:
+        """Record pending aliases in the meta_data of their documents.
+
+        Call once the original pages are persisted; aliases of pages without a
+        document stay pending.
+
+        Returns:
+            Number of recorded aliases
+        """
+        if not self._pending:
+            return 0
+
+        recorded = 0
+        with self.db_manager.session_scope() as session:
+            documents = session.query(Document).filter(Document.url.in_(list(self._pending))).all()
+            for doc in documents:
+                aliases = self._pending.pop(doc.url)
+                meta_data = dict(doc.meta_data or {})
+                meta_data[ALIASES_KEY] = sorted(set(meta_data.get(ALIASES_KEY, [])) | aliases)
+                # Reassign so SQLAlchemy notices the JSONB change
+                doc.meta_data = meta_data
+                recorded += len(aliases)
+
+        if recorded:
+            logger.info(f"Recorded {recorded} duplicate URLs as aliases for job {self.job_id}")
+        return recorded
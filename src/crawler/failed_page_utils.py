@@ -1,69 +1,381 @@
-"""Utility functions for recording failed pages."""
+"""Utility functions for recording failed pages.
+
+Failed pages are buffered per job by ``FailedPageRecorder`` and written with
+one ``INSERT ... ON CONFLICT (crawl_job_id, url) DO UPDATE`` per flush, so a
+host going down mid-crawl costs a few batched statements instead of one
+transaction per failed URL. Repeated failures of a URL bump its attempt count
+and keep the last error. Transient failures get a ``next_retry_at`` with
+exponential backoff and jitter for the ``RetryScheduler``.
+"""
 
 import asyncio
 import logging
-from datetime import datetime, timezone
+import random
+import re
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any
 from uuid import UUID
 
+from sqlalchemy import case, func, literal_column, null, or_, select
+from sqlalchemy.dialects.postgresql import insert
+
+from ..config import get_settings
 from ..database import CrawlJob, FailedPage, get_db_manager
+from .cancellation import get_cancellation_bus
 
 logger = logging.getLogger(__name__)
 
+FAILURE_CLASSES = ("timeout", "client_error", "server_error", "extraction", "other")
+
+# Order in which failed pages are worth retrying: transient failures first
+RETRY_PRIORITY = {
+    "timeout": 0,
+    "server_error": 1,
+    "other": 2,
+    "extraction": 3,
+    "client_error": 4,
+}
+
+# Client errors that may go away on their own
+RETRYABLE_STATUS_CODES = frozenset({408, 429})
+
+# Rows per INSERT, well below the bind parameter limit of Postgres
+WRITE_CHUNK_SIZE = 1000
+
+_STATUS_PATTERN = re.compile(r"\b(?:HTTP|status(?: code)?)[\s:=]*([45]\d\d)\b", re.IGNORECASE)
+
+
+def classify_failure(error_message: str | None, status_code: int | None = None) -> str:
+    """Classify a page failure.
+
+    Args:
+        error_message: Error message of the failure
+        status_code: HTTP status code, if known (otherwise read from the message)
+
+    Returns:
+        One of FAILURE_CLASSES
+    """
+    if status_code is None and error_message:
+        match = _STATUS_PATTERN.search(error_message)
+        if match:
+            status_code = int(match.group(1))
+
+    if status_code == 408:
+        return "timeout"
+    if status_code is not None and 400 <= status_code < 500:
+        return "client_error"
+    if status_code is not None and status_code >= 500:
+        return "server_error"
+
+    message = (error_message or "").lower()
+    if "timeout" in message or "timed out" in message:
+        return "timeout"
+    if "extract" in message or "pars" in message:
+        return "extraction"
+    return "other"
+
+
+def is_retryable(failure_class: str, status_code: int | None = None) -> bool:
+    """Whether a failure is transient (timeouts, 5xx, network errors, 408/429).
+
+    Other client errors such as 404 and 410 are permanent, and extraction
+    errors fail again on the same content.
+    """
+    if status_code in RETRYABLE_STATUS_CODES:
+        return True
+    return failure_class in ("timeout", "server_error", "other")
+
+
+def retry_delay(attempts: int, base_delay: float, max_delay: float) -> float:
+    """Seconds until the next retry of a URL that failed `attempts` times.
+
+    The delay doubles per attempt up to `max_delay`; a random half of it is
+    dropped so retries of pages that failed together do not hit the host at once.
+    """
+    delay = min(max_delay, base_delay * 2 ** min(attempts - 1, 32))
+    return random.uniform(delay / 2, delay)
+
+
+@dataclass
+class PendingFailure:
+    """A buffered failure of one URL."""
+
+    error_message: str | None
+    failure_class: str
+    status_code: int | None = None
+    failed_at: datetime = field(default_factory=datetime.utcnow)
+    attempts: int = 1
+
+
+class FailedPageRecorder:
+    """Buffers failed pages per job and upserts them in batches."""
+
+    def __init__(
+        self,
+        flush_interval: float | None = None,
+        batch_size: int | None = None,
+        db_manager: Any | None = None,
+    ):
+        """Initialize the recorder.
+
+        Args:
+            flush_interval: Seconds between flushes (defaults to the setting)
+            batch_size: Buffered pages of a job that trigger an early flush (defaults to the setting)
+            db_manager: Database manager (defaults to the global one)
+        """
+        crawling = get_settings().crawling
+        self.flush_interval = flush_interval or crawling.failed_page_flush_interval
+        self.batch_size = batch_size or crawling.failed_page_batch_size
+        self.retry_enabled = crawling.retry_failed_pages
+        self.max_attempts = crawling.retry_max_attempts
+        self.base_delay = crawling.retry_base_delay
+        self.max_delay = crawling.retry_max_delay
+        self.db_manager = db_manager or get_db_manager()
+        self._pending: dict[str, dict[str, PendingFailure]] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._early_flushes: dict[str, asyncio.Task] = {}
+        self._flush_lock = asyncio.Lock()
+        self.flush_count = 0
+
+    def add(
+        self,
+        job_id: str,
+        url: str,
+        error_message: str | None,
+        failure_class: str | None = None,
+        status_code: int | None = None,
+    ) -> None:
+        """Buffer a failed page of a job."""
+        failure = PendingFailure(
+            error_message=error_message,
+            failure_class=failure_class or classify_failure(error_message, status_code),
+            status_code=status_code,
+        )
+        self._merge(job_id, url, failure)
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        if len(self._pending[job_id]) >= self.batch_size and job_id not in self._early_flushes:
+            task = asyncio.create_task(self.flush(job_id))
+            self._early_flushes[job_id] = task
+            task.add_done_callback(lambda _: self._early_flushes.pop(job_id, None))
+
+    def discard(self, job_id: str, url: str) -> None:
+        """Drop a buffered failure of a URL that has since been crawled."""
+        pending = self._pending.get(str(job_id))
+        if pending:
+            pending.pop(url, None)
 
-async def record_failed_page(job_id: str, url: str, error_message: str) -> None:
+    def pending_count(self, job_id: str) -> int:
+        """Number of buffered failed pages of a job."""
+        return len(self._pending.get(job_id, {}))
+
+    async def flush(self, job_id: str | None = None) -> int:
+        """Write buffered failed pages.
+
+        Args:
+            job_id: Only flush this job (all jobs by default)
+
+        Returns:
+            Number of written pages
+        """
+        async with self._flush_lock:
+            if job_id is None:
+                batch, self._pending = self._pending, {}
+            else:
+                pending = self._pending.pop(job_id, None)
+                batch = {job_id: pending} if pending else {}
+
+            rows = [
+                self._row(batch_job_id, url, failure)
+                for batch_job_id, failures in batch.items()
+                for url, failure in failures.items()
+            ]
+            if not rows:
+                return 0
+
+            try:
+                written = await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                logger.error(f"Failed to record {len(rows)} failed pages: {e}")
+                # Keep them for the next flush, merged with failures buffered meanwhile
+                for batch_job_id, failures in batch.items():
+                    for url, failure in failures.items():
+                        self._merge(batch_job_id, url, failure, newer=False)
+                return 0
+
+            self.flush_count += 1
+            logger.info(f"Recorded {written} failed pages")
+            return written
+
+    async def close(self) -> None:
+        """Flush everything and stop the flush loop."""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        self._flush_task = None
+        await self.flush()
+
+    def _merge(self, job_id: str, url: str, failure: PendingFailure, newer: bool = True) -> None:
+        pending = self._pending.setdefault(job_id, {})
+        existing = pending.get(url)
+        if existing is None:
+            pending[url] = failure
+            return
+
+        existing.attempts += failure.attempts
+        if newer:
+            existing.error_message = failure.error_message
+            existing.failure_class = failure.failure_class
+            existing.status_code = failure.status_code
+            existing.failed_at = failure.failed_at
+
+    def _row(self, job_id: str, url: str, failure: PendingFailure) -> dict[str, Any]:
+        next_retry_at = None
+        if (
+            self.retry_enabled
+            and failure.attempts < self.max_attempts
+            and is_retryable(failure.failure_class, failure.status_code)
+        ):
+            delay = retry_delay(failure.attempts, self.base_delay, self.max_delay)
+            next_retry_at = failure.failed_at + timedelta(seconds=delay)
+
+        return {
+            "crawl_job_id": UUID(str(job_id)),
+            "url": url,
+            "error_message": failure.error_message,
+            "failure_class": failure.failure_class,
+            "status_code": failure.status_code,
+            "failed_at": failure.failed_at,
+            "attempts": failure.attempts,
+            "next_retry_at": next_retry_at,
+        }
+
+    def _write(self, rows: list[dict[str, Any]]) -> int:
+        with self.db_manager.session_scope() as session:
+            job_ids = {row["crawl_job_id"] for row in rows}
+            existing = set(
+                session.execute(select(CrawlJob.id).where(CrawlJob.id.in_(job_ids))).scalars()
+            )
+            if len(existing) < len(job_ids):
+                logger.warning(
+                    f"Crawl jobs {', '.join(str(i) for i in job_ids - existing)} not found - "
+                    "skipping their failed pages"
+                )
+                rows = [row for row in rows if row["crawl_job_id"] in existing]
+
+            for start in range(0, len(rows), WRITE_CHUNK_SIZE):
+                stmt = insert(FailedPage).values(rows[start:start + WRITE_CHUNK_SIZE])
+                attempts = FailedPage.attempts + stmt.excluded.attempts
+                # Same backoff as retry_delay(), for the attempts stored so far
+                delay = func.least(
+                    self.max_delay, self.base_delay * func.power(2, func.least(attempts - 1, 32))
+                ) * (0.5 + func.random() * 0.5)
+                session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[FailedPage.crawl_job_id, FailedPage.url],
+                        set_={
+                            "attempts": attempts,
+                            "error_message": stmt.excluded.error_message,
+                            "failure_class": stmt.excluded.failure_class,
+                            "status_code": stmt.excluded.status_code,
+                            "failed_at": stmt.excluded.failed_at,
+                            "next_retry_at": case(
+                                (
+                                    or_(
+                                        stmt.excluded.next_retry_at.is_(None),
+                                        attempts >= self.max_attempts,
+                                    ),
+                                    null(),
+                                ),
+                                else_=stmt.excluded.failed_at
+                                + delay * literal_column("interval '1 second'"),
+                            ),
+                        },
+                    )
+                )
+            session.commit()
+            return len(rows)
+
+    async def _flush_loop(self) -> None:
+        while self._pending:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in failed page flush loop: {e}")
+
+
+_recorder: FailedPageRecorder | None = None
+
+
+def get_failed_page_recorder() -> FailedPageRecorder:
+    """Get the failed page recorder shared by all jobs."""
+    global _recorder
+    if _recorder is None:
+        _recorder = FailedPageRecorder()
+    return _recorder
+
+
+def _job_key(job_id: str | UUID) -> str | None:
+    """Normalize a job ID, stopping the crawler if the job is cancelled."""
+    try:
+        job_uuid = UUID(job_id) if isinstance(job_id, str) else job_id
+    except ValueError:
+        logger.error(f"Invalid job ID format: {job_id}")
+        return None
+
+    # Stop the crawler if the job is cancelled
+    if get_cancellation_bus().is_cancelled(str(job_uuid)):
+        logger.info(f"Crawl job {job_uuid} is cancelled - stopping crawler")
+        raise asyncio.CancelledError("Job cancelled by user")
+    return str(job_uuid)
+
+
+async def record_failed_page(
+    job_id: str,
+    url: str,
+    error_message: str,
+    failure_class: str | None = None,
+    status_code: int | None = None,
+) -> None:
     """Record a failed page.
 
+    The page is buffered and written with the next batch of the job.
+
     Args:
         job_id: Job ID
         url: Failed URL
         error_message: Error message
+        failure_class: One of FAILURE_CLASSES (classified from the error by default)
+        status_code: HTTP status code, if known
     """
-    try:
-        # Handle job_id format
-        try:
-            job_uuid = UUID(job_id) if isinstance(job_id, str) else job_id
-        except ValueError:
-            logger.error(f"Invalid job ID format: {job_id}")
-            return
+    job_key = _job_key(job_id)
+    if job_key is None:
+        return
 
-        db_manager = get_db_manager()
-        with db_manager.session_scope() as session:
-            # Check if crawl job exists
-            crawl_job = session.query(CrawlJob).filter_by(id=job_uuid).first()
-            if not crawl_job:
-                logger.warning(f"Crawl job {job_uuid} not found - skipping failed page recording")
-                return
-
-            # Check if job is cancelled
-            if crawl_job.status == "cancelled":
-                logger.info(f"Crawl job {job_uuid} is cancelled - stopping crawler")
-                raise asyncio.CancelledError("Job cancelled by user")
-
-            # Check if already exists
-            existing = session.query(FailedPage).filter_by(crawl_job_id=job_uuid, url=url).first()
-            if not existing:
-                failed_page = FailedPage(
-                    crawl_job_id=job_uuid,
-                    url=url,
-                    error_message=error_message,
-                    failed_at=datetime.now(timezone.utc),
-                )
-                session.add(failed_page)
-                session.commit()
-                logger.info(f"Recorded failed page: {url} - {error_message}")
-    except asyncio.CancelledError:
-        raise  # Re-raise cancellation
-    except Exception as e:
-        logger.error(f"Failed to record failed page {url}: {e}")
+    get_failed_page_recorder().add(job_key, url, error_message, failure_class, status_code)
+    logger.info(f"Recorded failed page: {url} - {error_message}")
 
 
-async def record_failed_pages_batch(job_id: str, urls: list[str], error_message: str) -> None:
+async def record_failed_pages_batch(
+    job_id: str, urls: list[str], error_message: str, failure_class: str | None = None
+) -> None:
     """Record multiple failed pages at once.
 
     Args:
         job_id: Job ID
         urls: List of failed URLs
         error_message: Error message for all URLs
+        failure_class: One of FAILURE_CLASSES (classified from the error by default)
     """
+    job_key = _job_key(job_id)
+    if job_key is None:
+        return
+
+    recorder = get_failed_page_recorder()
     for url in urls:
-        await record_failed_page(job_id, url, error_message)
+        recorder.add(job_key, url, error_message, failure_class)
+    logger.info(f"Recorded {len(urls)} failed pages - {error_message}")
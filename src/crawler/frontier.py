@@ -0,0 +1,335 @@
+"""Persistent URL frontier and the deep-crawl strategy backed by it."""
+
+import asyncio
+import logging
+from collections.abc import AsyncGenerator
+from datetime import datetime, timedelta
+from typing import Any
+from uuid import uuid4
+
+from crawl4ai.deep_crawling import BFSDeepCrawlStrategy
+from sqlalchemy import func, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from ..database import get_db_manager
+from ..database.models import FrontierURL
+from .utils import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_PROGRESS = "in_progress"
+DONE = "done"
+FAILED = "failed"
+
+
+class CrawlFrontier:
+    """Database-backed BFS frontier of a crawl job.
+
+    Every discovered URL is stored once per job with its depth, parent and
+    state. Workers claim the shallowest pending URLs with ``FOR UPDATE SKIP
+    LOCKED`` so several crawlers can share one job without fetching a URL twice.
+    """
+
+    def __init__(self, job_id: str, db_manager: Any | None = None):
+        """Initialize the frontier.
+
+        Args:
+            job_id: Crawl job the frontier belongs to
+            db_manager: Database manager (defaults to the global one)
+        """
+        self.job_id = job_id
+        self.db_manager = db_manager or get_db_manager()
+
+    def add(self, urls: list[tuple[str, int, str | None]]) -> int:
+        """Add discovered URLs; URLs already in the frontier are ignored.
+
+        Args:
+            urls: Tuples of (url, depth, parent_url)
+
+        Returns:
+            Number of URLs that were new to the frontier
+        """
+        if not urls:
+            return 0
+
+        rows = [
+            {"crawl_job_id": self.job_id, "url": url, "depth": depth, "parent_url": parent, "state": PENDING}
+            for url, depth, parent in urls
+        ]
+        stmt = (
+            pg_insert(FrontierURL)
+            .values(rows)
+            .on_conflict_do_nothing(index_elements=["crawl_job_id", "url"])
+            .returning(FrontierURL.id)
+        )
+        with self.db_manager.session_scope() as session:
+            return len(session.execute(stmt).scalars().all())
+
+    def claim(self, worker_id: str, limit: int, max_depth: int | None = None) -> list[tuple[str, int, str | None]]:
+        """Claim the shallowest pending URLs for a worker.
+
+        Args:
+            worker_id: Identifier of the claiming worker
+            limit: Maximum URLs to claim
+            max_depth: Only claim URLs up to this depth
+
+        Returns:
+            Claimed URLs as (url, depth, parent_url) tuples
+        """
+        query = (
+            select(FrontierURL.id)
+            .where(FrontierURL.crawl_job_id == self.job_id, FrontierURL.state == PENDING)
+            .order_by(FrontierURL.depth, FrontierURL.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        if max_depth is not None:
+            query = query.where(FrontierURL.depth <= max_depth)
+
+        with self.db_manager.session_scope() as session:
+            ids = session.execute(query).scalars().all()
+            if not ids:
+                return []
+            claimed = session.execute(
+                update(FrontierURL)
+                .where(FrontierURL.id.in_(ids))
+                .values(state=IN_PROGRESS, claimed_by=worker_id, claimed_at=datetime.utcnow())
+                .returning(FrontierURL.url, FrontierURL.depth, FrontierURL.parent_url)
+            ).all()
+
+        # Keep BFS order; RETURNING does not guarantee it
+        return sorted(((url, depth, parent) for url, depth, parent in claimed), key=lambda item: item[1])
+
+    def mark(self, urls: list[str], state: str) -> None:
+        """Set the state of URLs (done, failed or back to pending)."""
+        if not urls:
+            return
+        values: dict[str, Any] = {"state": state, "updated_at": datetime.utcnow()}
+        if state == PENDING:
+            values.update(claimed_by=None, claimed_at=None)
+        with self.db_manager.session_scope() as session:
+            session.execute(
+                update(FrontierURL)
+                .where(FrontierURL.crawl_job_id == self.job_id, FrontierURL.url.in_(urls))
+                .values(**values)
+            )
+
+    def release_claims(self, older_than: float | None = None, worker_id: str | None = None) -> int:
+        """Return in-progress URLs to pending.
+
+        Args:
+            older_than: Only release claims older than this many seconds
+            worker_id: Only release claims held by this worker
+
+        Returns:
+            Number of released URLs
+        """
+        stmt = update(FrontierURL).where(
+            FrontierURL.crawl_job_id == self.job_id, FrontierURL.state == IN_PROGRESS
+        )
+        if older_than is not None:
+            stmt = stmt.where(FrontierURL.claimed_at < datetime.utcnow() - timedelta(seconds=older_than))
+        if worker_id is not None:
+            stmt = stmt.where(FrontierURL.claimed_by == worker_id)
+
+        with self.db_manager.session_scope() as session:
+            released = session.execute(
+                stmt.values(state=PENDING, claimed_by=None, claimed_at=None)
+            ).rowcount
+        if released:
+            logger.info(f"Released {released} claimed frontier URLs for job {self.job_id}")
+        return released
+
+    def counts(self, max_depth: int | None = None) -> dict[str, int]:
+        """Get the number of URLs in each state.
+
+        Args:
+            max_depth: Only count URLs up to this depth
+        """
+        query = select(FrontierURL.state, func.count()).where(FrontierURL.crawl_job_id == self.job_id)
+        if max_depth is not None:
+            query = query.where(FrontierURL.depth <= max_depth)
+        with self.db_manager.session_scope() as session:
+            rows = session.execute(query.group_by(FrontierURL.state)).all()
+        counts = {PENDING: 0, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(rows))
+        return counts
+
+    def clear(self) -> None:
+        """Remove the whole frontier, e.g. before a fresh run of the job."""
+        with self.db_manager.session_scope() as session:
+            session.query(FrontierURL).filter(FrontierURL.crawl_job_id == self.job_id).delete()
+
+
+class FrontierBFSDeepCrawlStrategy(BFSDeepCrawlStrategy):
+    """BFS deep crawl whose queue and visited set live in the crawl_frontier table.
+
+    Pages are claimed in batches from the persistent frontier, links found on
+    them are written back as pending URLs, and each page is marked done or
+    failed once crawled. A resumed job therefore continues with the URLs it
+    had not fetched yet instead of starting over from the start URLs.
+    """
+
+    def __init__(
+        self,
+        job_id: str,
+        batch_size: int = 20,
+        claim_timeout: float = 600.0,
+        poll_interval: float = 1.0,
+        frontier: CrawlFrontier | None = None,
+        revalidator: Any | None = None,
+        **kwargs: Any,
+    ):
+        """Initialize the strategy.
+
+        Args:
+            job_id: Crawl job whose frontier is used
+            batch_size: URLs claimed and fetched per round
+            claim_timeout: Seconds after which another worker's claim is considered abandoned
+            poll_interval: Seconds to wait while other workers still hold claims
+            frontier: Frontier store (defaults to one for job_id)
+            revalidator: HTTPRevalidator; claimed pages it reports unchanged are not
+                rendered and their previously discovered links are followed instead
+            **kwargs: Passed to BFSDeepCrawlStrategy (max_depth, filter_chain, max_pages, ...)
+        """
+        super().__init__(**kwargs)
+        self.job_id = job_id
+        self.batch_size = max(1, batch_size)
+        self.claim_timeout = claim_timeout
+        self.poll_interval = poll_interval
+        self.frontier = frontier or CrawlFrontier(job_id)
+        self.revalidator = revalidator
+        self.worker_id = uuid4().hex[:16]
+
+    async def _arun_batch(self, start_url: str, crawler: Any, config: Any) -> list[Any]:
+        return [result async for result in self._arun_stream(start_url, crawler, config)]
+
+    async def _arun_stream(self, start_url: str, crawler: Any, config: Any) -> AsyncGenerator[Any, None]:
+        self._cancel_event = asyncio.Event()
+        # Links and page states of a round are written in one go when it ends
+        self._new_links: dict[str, tuple[str, int, str | None]] = {}
+        self._marks: dict[str, list[str]] = {DONE: [], FAILED: [], PENDING: []}
+
+        # Frontier queries block, so they run in a thread instead of stalling other jobs
+        # Seed the start URL; on resume it is already known and this is a no-op
+        await asyncio.to_thread(self.frontier.add, [(canonicalize_url(start_url), 0, None)])
+        await asyncio.to_thread(self.frontier.release_claims, older_than=self.claim_timeout)
+        counts = await asyncio.to_thread(self.frontier.counts)
+        self._pages_crawled = counts[DONE]
+        if counts[DONE]:
+            logger.info(
+                f"Resuming frontier for job {self.job_id}: {counts[DONE]} done, {counts[PENDING]} pending"
+            )
+
+        claimed: dict[str, tuple[int, str | None]] = {}
+        try:
+            while not self._cancel_event.is_set():
+                if self._pages_crawled >= self.max_pages:
+                    logger.info(f"Max pages limit ({self.max_pages}) reached, stopping crawl")
+                    break
+                if await self._check_cancellation():
+                    logger.info("Crawl cancelled by user")
+                    break
+
+                limit = int(min(self.batch_size, max(1, self.max_pages - self._pages_crawled)))
+                batch = await asyncio.to_thread(
+                    self.frontier.claim, self.worker_id, limit, max_depth=self.max_depth
+                )
+                if not batch:
+                    if not await self._wait_for_other_workers():
+                        break
+                    await asyncio.sleep(self.poll_interval)
+                    continue
+
+                claimed = {url: (depth, parent) for url, depth, parent in batch}
+
+                unchanged = {}
+                if self.revalidator:
+                    unchanged = await self.revalidator.find_unchanged(list(claimed), with_children=True)
+                for page in unchanged.values():
+                    depth, parent_url = claimed.pop(page.url)
+                    page.metadata.update(depth=depth, parent_url=parent_url)
+                    self._pages_crawled += 1
+                    await self._record_known_links(page.children, page.url, depth)
+                    self._marks[DONE].append(page.url)
+
+                    yield page
+
+                    if self._pages_crawled >= self.max_pages:
+                        break
+
+                if claimed and self._pages_crawled < self.max_pages:
+                    stream_config = config.clone(deep_crawl_strategy=None, stream=True)
+                    stream_gen = await crawler.arun_many(urls=list(claimed), config=stream_config)
+
+                    async for result in stream_gen:
+                        depth, parent_url = claimed.pop(result.url, (0, None))
+                        result.metadata = result.metadata or {}
+                        result.metadata["depth"] = depth
+                        result.metadata["parent_url"] = parent_url
+
+                        if result.success:
+                            self._pages_crawled += 1
+                            await self._record_links(result, depth)
+                        self._marks[DONE if result.success else FAILED].append(result.url)
+
+                        yield result
+
+                        if self._pages_crawled >= self.max_pages:
+                            break
+
+                # URLs the crawler returned nothing for must not stay claimed; if the
+                # batch was cut short by max_pages they stay available for a resume
+                if claimed:
+                    stopped_early = self._pages_crawled >= self.max_pages
+                    self._marks[PENDING if stopped_early else FAILED].extend(claimed)
+                    claimed = {}
+                await asyncio.to_thread(self._flush_round)
+        finally:
+            # Hand unfinished claims back so a resume or another worker picks them up.
+            # The generator may be closing on cancellation, so this write is not awaited.
+            self._marks[PENDING].extend(claimed)
+            self._flush_round()
+
+    def _flush_round(self) -> None:
+        """Write the round's discovered links, then the states of its pages."""
+        links, self._new_links = self._new_links, {}
+        marks, self._marks = self._marks, {DONE: [], FAILED: [], PENDING: []}
+        if links:
+            self.frontier.add(list(links.values()))
+        for state, urls in marks.items():
+            if urls:
+                self.frontier.mark(urls, state)
+
+    async def _wait_for_other_workers(self) -> bool:
+        """Whether other workers still hold claims that may add new URLs."""
+        await asyncio.to_thread(self.frontier.release_claims, older_than=self.claim_timeout)
+        # Pending URLs past max_depth are never claimed, so they are not waited for
+        counts = await asyncio.to_thread(self.frontier.counts, max_depth=self.max_depth)
+        return counts[PENDING] > 0 or counts[IN_PROGRESS] > 0
+
+    async def _record_links(self, result: Any, depth: int) -> None:
+        """Queue the page's new links for the frontier."""
+        discovered: list[tuple[str, str | None]] = []
+        depths: dict[str, int] = {}
+        # The frontier table is the visited set; duplicates are dropped on insert
+        await self.link_discovery(result, result.url, depth, set(), discovered, depths)
+        self._add_links([(url, depths[url], parent) for url, parent in discovered])
+
+    async def _record_known_links(self, urls: list[str], parent_url: str, depth: int) -> None:
+        """Queue the links found on a page by an earlier crawl for the frontier."""
+        next_depth = depth + 1
+        if next_depth > self.max_depth:
+            return
+        self._add_links([
+            (url, next_depth, parent_url)
+            for url in urls
+            if await self.can_process_url(url, next_depth)
+        ])
+
+    def _add_links(self, links: list[tuple[str, int, str | None]]) -> None:
+        """Queue links under their canonical URL, so spellings of one page are fetched once."""
+        for url, depth, parent in links:
+            url = canonicalize_url(url)
+            self._new_links.setdefault(url, (url, depth, parent))
@@ -1,21 +1,60 @@
-"""GitHub repository processor for extracting markdown documentation."""
+"""GitHub repository processor for extracting markdown documentation.
+
+Repositories are ingested as a stream: the clone is walked lazily and files
+are read by the upload workers as they pick them up, so memory does not grow
+with the number of documents in the repository.
+
+The ingested commit is stored in the upload job's config. Re-ingesting the
+same repository fetches that commit shallowly and only processes the files
+``git diff`` reports as added or modified, deleting the documents of removed
+files, instead of re-reading and re-hashing every file.
+"""
 
 import asyncio
 import logging
 import os
 import shutil
 import tempfile
+from collections.abc import Iterable, Iterator
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 from urllib.parse import urlparse
 
+from sqlalchemy import delete
+
 from ..config import get_settings
 from ..constants import ALL_SUPPORTED_EXTENSIONS, get_content_type_for_extension
+from ..database import Document, UploadJob
 from .upload_processor import UploadConfig, UploadProcessor
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
 
+# Directories never searched for documentation
+DEFAULT_EXCLUDED_DIRS = frozenset({
+    "node_modules",
+    ".git",
+    ".github",
+    "vendor",
+    "dist",
+    "build",
+    "target",
+    ".tox",
+    ".pytest_cache",
+    "__pycache__",
+})
+
+
+@dataclass
+class RepoChanges:
+    """Documentation files changed since the last ingested commit."""
+
+    job_id: str  # Upload job holding the documents of the last ingest
+    base_commit: str
+    changed: list[Path]  # Added or modified files in the clone
+    deleted: list[Path]  # Removed files, relative to the repository root
+
 
 @dataclass
 class GitHubRepoConfig:
@@ -31,6 +70,7 @@ class GitHubRepoConfig:
     exclude_patterns: list[str] | None = None
     cleanup: bool = True
     max_concurrent: int | None = None
+    incremental: bool = True  # Only process files changed since the last ingested commit
 
     def __post_init__(self):
         """Parse GitHub URL to extract branch and path if present."""
@@ -91,58 +131,84 @@ class GitHubProcessor:
                 if not target_path.is_dir():
                     raise ValueError(f"Path '{config.path}' is not a directory")
 
-            markdown_files = self._find_markdown_files(
-                target_path, config.include_patterns, config.exclude_patterns
-            )
-
-            if not markdown_files:
-                raise ValueError(
-                    f"No markdown or HTML files found in {'repository' if not config.path else config.path}"
+            commit = await self._head_commit(temp_dir)
+            changes = None
+            if config.incremental and commit:
+                changes = await self._changes_since_last_ingest(config, temp_dir, commit)
+
+            metadata: dict[str, Any] = {
+                "source": "github",
+                "repository": config.repo_url,
+                "branch": config.branch,
+                "path": config.path,
+                "include_patterns": config.include_patterns,
+                "exclude_patterns": config.exclude_patterns,
+                "commit": commit,
+                "mode": "full" if changes is None else "incremental",
+            }
+
+            if changes is None:
+                # Count first so progress has a total; the files are walked again lazily
+                file_count = await asyncio.to_thread(
+                    lambda: sum(
+                        1
+                        for _ in self._iter_documentation_files(
+                            target_path, config.include_patterns, config.exclude_patterns
+                        )
+                    )
                 )
 
-            logger.info(f"Found {len(markdown_files)} markdown files to process")
-
-            files_data = []
-            for file_path in markdown_files:
-                with open(file_path, encoding="utf-8") as f:
-                    content = f.read()
-
-                relative_path = file_path.relative_to(temp_dir)
-                source_url = self._generate_source_url(
-                    config.repo_url, relative_path, config.branch
+                if not file_count:
+                    raise ValueError(
+                        f"No markdown or HTML files found in {'repository' if not config.path else config.path}"
+                    )
+
+                logger.info(f"Found {file_count} markdown files to process")
+                files: Any = self._iter_upload_files(
+                    temp_dir,
+                    self._iter_documentation_files(
+                        target_path, config.include_patterns, config.exclude_patterns
+                    ),
+                    config,
                 )
-
-                # Determine content type using centralized config
-                content_type = get_content_type_for_extension(str(file_path))
-                if not content_type:
-                    content_type = "markdown"  # Default fallback
-
-                files_data.append(
-                    {
-                        "path": str(file_path),
-                        "content": content,
-                        "source_url": source_url,
-                        "content_type": content_type,
-                    }
+            else:
+                base_commit = changes.base_commit
+                file_count = len(changes.changed)
+                files = list(self._iter_upload_files(temp_dir, changes.changed, config))
+                if changes.deleted:
+                    deleted_urls = [
+                        self._generate_source_url(config.repo_url, path, config.branch)
+                        for path in changes.deleted
+                    ]
+                    removed = await asyncio.to_thread(self._delete_documents, changes.job_id, deleted_urls)
+                    logger.info(f"Deleted {removed} documents of files removed since {base_commit[:12]}")
+
+                logger.info(
+                    f"{file_count} files changed and {len(changes.deleted)} removed "
+                    f"since {base_commit[:12]}; processing only the changed files"
                 )
+                metadata["base_commit"] = base_commit
+                metadata["deleted_files"] = len(changes.deleted)
+
+            metadata["file_count"] = file_count
 
             upload_config = UploadConfig(
                 name=config.name,
                 version=config.version,
-                files=files_data,
-                metadata={
-                    "source": "github",
-                    "repository": config.repo_url,
-                    "branch": config.branch,
-                    "path": config.path,
-                    "file_count": len(files_data),
-                },
+                files=files,
+                file_count=file_count,
+                incremental=changes is not None,
+                metadata=metadata,
                 extract_code_only=True,
                 use_llm=settings.code_extraction.enable_llm_extraction,
                 max_concurrent_files=config.max_concurrent,
             )
 
-            job_id = await self.upload_processor.process_upload(upload_config)
+            # The clone is read until the upload finishes, so it is removed afterwards
+            clone_dir = temp_dir
+            on_complete = (lambda: self._cleanup_temp_dir(clone_dir)) if config.cleanup else None
+            job_id = await self.upload_processor.process_upload(upload_config, on_complete=on_complete)
+            temp_dir = None
 
             return job_id
 
@@ -150,6 +216,131 @@ class GitHubProcessor:
             if temp_dir and config.cleanup:
                 await self._cleanup_temp_dir(temp_dir)
 
+    def _iter_upload_files(
+        self, repo_dir: Path, file_paths: Iterable[Path], config: GitHubRepoConfig
+    ) -> Iterator[dict[str, Any]]:
+        """Yield upload entries for documentation files; contents are read by the upload workers."""
+        for file_path in file_paths:
+            relative_path = file_path.relative_to(repo_dir)
+            source_url = self._generate_source_url(config.repo_url, relative_path, config.branch)
+
+            # Determine content type using centralized config
+            content_type = get_content_type_for_extension(str(file_path))
+            if not content_type:
+                content_type = "markdown"  # Default fallback
+
+            yield {
+                "path": str(file_path),
+                "source_url": source_url,
+                "content_type": content_type,
+            }
+
+    async def _run_git(self, repo_dir: Path, *args: str) -> str:
+        """Run a git command in a clone and return its output."""
+        process = await asyncio.create_subprocess_exec(
+            "git", "-C", str(repo_dir), *args,
+            stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            error_msg = stderr.decode().strip() if stderr else "Unknown error"
+            raise RuntimeError(f"git {args[0]} failed: {error_msg}")
+        return stdout.decode()
+
+    async def _head_commit(self, repo_dir: Path) -> str | None:
+        """SHA of the cloned commit (None if it cannot be resolved)."""
+        try:
+            return (await self._run_git(repo_dir, "rev-parse", "HEAD")).strip()
+        except Exception as e:
+            logger.warning(f"Could not resolve the cloned commit: {e}")
+            return None
+
+    async def _changes_since_last_ingest(
+        self, config: GitHubRepoConfig, repo_dir: Path, commit: str
+    ) -> RepoChanges | None:
+        """Files changed since the last ingest of the repository (None: ingest everything)."""
+        try:
+            last_ingest = await asyncio.to_thread(self._last_ingest, config)
+        except Exception as e:
+            logger.warning(f"Could not look up the last ingested commit: {e}")
+            return None
+        if last_ingest is None:
+            return None
+
+        job_id, base_commit = last_ingest
+        if base_commit == commit:
+            return RepoChanges(job_id=job_id, base_commit=base_commit, changed=[], deleted=[])
+
+        try:
+            # Only the old commit itself is needed to compare its tree
+            await self._run_git(repo_dir, "fetch", "--depth", "1", "origin", base_commit)
+            return await self._diff_commits(repo_dir, job_id, base_commit, config)
+        except Exception as e:
+            logger.warning(f"Cannot diff against {base_commit[:12]}, ingesting all files: {e}")
+            return None
+
+    async def _diff_commits(
+        self, repo_dir: Path, job_id: str, base_commit: str, config: GitHubRepoConfig
+    ) -> RepoChanges:
+        """Documentation files added, modified or deleted between the base commit and HEAD."""
+        args = ["diff", "--name-status", "--no-renames", base_commit, "HEAD"]
+        if config.path:
+            args += ["--", config.path]
+        output = await self._run_git(repo_dir, *args)
+
+        target = Path(config.path) if config.path else Path()
+        changes = RepoChanges(job_id=job_id, base_commit=base_commit, changed=[], deleted=[])
+        for line in output.splitlines():
+            status, _, name = line.partition("\t")
+            relative_path = Path(name)
+            try:
+                in_target = relative_path.relative_to(target)
+            except ValueError:
+                continue
+            if not self._is_documentation_file(in_target, config.include_patterns, config.exclude_patterns):
+                continue
+
+            if status.startswith("D"):
+                changes.deleted.append(relative_path)
+            else:
+                # Added, modified or type-changed
+                changes.changed.append(repo_dir / relative_path)
+        return changes
+
+    def _last_ingest(self, config: GitHubRepoConfig) -> tuple[str, str] | None:
+        """Job ID and commit of the last completed ingest of the same repository, branch, path and patterns.
+
+        An ingest with other include/exclude patterns covered other files, so
+        diffing against its commit would miss files; it gets a full pass instead.
+        """
+        with self.upload_processor.db_manager.session_scope() as session:
+            job = (
+                session.query(UploadJob).filter_by(name=config.name, version=config.version).first()
+            )
+            if job is None or job.status != "completed":
+                return None
+
+            job_config = job.config or {}
+            same_source = (
+                job_config.get("source") == "github"
+                and job_config.get("repository") == config.repo_url
+                and job_config.get("branch") == config.branch
+                and job_config.get("path") == config.path
+                and job_config.get("include_patterns") == config.include_patterns
+                and job_config.get("exclude_patterns") == config.exclude_patterns
+            )
+            if not same_source or not job_config.get("commit"):
+                return None
+            return str(job.id), job_config["commit"]
+
+    def _delete_documents(self, job_id: str, urls: list[str]) -> int:
+        """Delete documents (and their snippets) of files removed from the repository."""
+        with self.upload_processor.db_manager.session_scope() as session:
+            result = session.execute(
+                delete(Document).where(Document.upload_job_id == job_id, Document.url.in_(urls))
+            )
+            return result.rowcount
+
     async def _clone_repository(self, config: GitHubRepoConfig) -> Path:
         """Clone a repository to a temporary directory."""
         temp_dir = Path(tempfile.mkdtemp(prefix="codedox_repo_"))
@@ -246,28 +437,20 @@ class GitHubProcessor:
         include_patterns: list[str] | None = None,
         exclude_patterns: list[str] | None = None,
     ) -> list[Path]:
-        """Find all supported documentation files in a directory."""
-        # Use centralized supported extensions
-        supported_extensions = set(ALL_SUPPORTED_EXTENSIONS)
-        markdown_files = []
-
-        default_excludes = {
-            "node_modules",
-            ".git",
-            ".github",
-            "vendor",
-            "dist",
-            "build",
-            "target",
-            ".tox",
-            ".pytest_cache",
-            "__pycache__",
-        }
+        """Find all supported documentation files in a directory, sorted."""
+        return sorted(self._iter_documentation_files(directory, include_patterns, exclude_patterns))
 
+    def _iter_documentation_files(
+        self,
+        directory: Path,
+        include_patterns: list[str] | None = None,
+        exclude_patterns: list[str] | None = None,
+    ) -> Iterator[Path]:
+        """Walk a directory lazily, yielding supported documentation files."""
         for root, dirs, files in os.walk(directory):
             root_path = Path(root)
 
-            dirs[:] = [d for d in dirs if d not in default_excludes]
+            dirs[:] = [d for d in dirs if d not in DEFAULT_EXCLUDED_DIRS]
 
             if exclude_patterns:
                 for pattern in exclude_patterns:
@@ -275,23 +458,37 @@ class GitHubProcessor:
 
             for file in files:
                 file_path = root_path / file
+                if self._is_documentation_file(
+                    file_path.relative_to(directory), include_patterns, exclude_patterns
+                ):
+                    yield file_path
 
-                if file_path.suffix.lower() not in supported_extensions:
-                    continue
-
-                relative_path = file_path.relative_to(directory)
-
-                if exclude_patterns:
-                    if any(relative_path.match(pattern) for pattern in exclude_patterns):
-                        continue
-
-                if include_patterns:
-                    if not any(relative_path.match(pattern) for pattern in include_patterns):
-                        continue
-
-                markdown_files.append(file_path)
-
-        return sorted(markdown_files)
+    def _is_documentation_file(
+        self,
+        relative_path: Path,
+        include_patterns: list[str] | None = None,
+        exclude_patterns: list[str] | None = None,
+    ) -> bool:
+        """Whether a file (relative to the searched directory) is ingested."""
+        if relative_path.suffix.lower() not in ALL_SUPPORTED_EXTENSIONS:
+            return False
+
+        # Directories the walk prunes, for paths that do not come from a walk
+        for directory in relative_path.parts[:-1]:
+            if directory in DEFAULT_EXCLUDED_DIRS:
+                return False
+            if exclude_patterns and any(Path(directory).match(pattern) for pattern in exclude_patterns):
+                return False
+
+        if exclude_patterns:
+            if any(relative_path.match(pattern) for pattern in exclude_patterns):
+                return False
+
+        if include_patterns:
+            if not any(relative_path.match(pattern) for pattern in include_patterns):
+                return False
+
+        return True
 
     def _generate_source_url(self, repo_url: str, relative_path: Path, branch: str) -> str:
         """Generate a GitHub source URL for a file."""
@@ -7,6 +7,7 @@ from typing import Any
 
 from ..config import get_settings
 from ..database import CrawlJob, get_db_manager
+from .worker import requeue_job
 
 logger = logging.getLogger(__name__)
 settings = get_settings()
@@ -50,10 +51,11 @@ class CrawlHealthMonitor:
             # Find running jobs with old heartbeats
             cutoff_time = datetime.utcnow() - timedelta(seconds=STALLED_THRESHOLD)
 
+            # Locked rows are being handled by the monitor of another API process
             stalled_jobs = session.query(CrawlJob).filter(
                 CrawlJob.status == 'running',
                 CrawlJob.last_heartbeat < cutoff_time
-            ).all()
+            ).with_for_update(skip_locked=True).all()
 
             for job in stalled_jobs:
                 time_since_heartbeat = (datetime.utcnow() - job.last_heartbeat).total_seconds()
@@ -61,6 +63,11 @@ class CrawlHealthMonitor:
                     f"Job {job.id} appears stalled - no heartbeat for {time_since_heartbeat:.0f} seconds"
                 )
 
+                # A worker died: hand the job to another worker while retries remain
+                if job.worker_id and (job.retry_count or 0) < (job.max_retries or 0):
+                    requeue_job(job)
+                    continue
+
                 # Mark stalled job as completed
                 job.status = 'completed'
                 job.completed_at = datetime.utcnow()
@@ -79,7 +86,7 @@ class CrawlHealthMonitor:
 
             if stalled_jobs:
                 session.commit()
-                logger.info(f"Marked {len(stalled_jobs)} stalled jobs as failed")
+                logger.info(f"Handled {len(stalled_jobs)} stalled jobs")
 
     def get_stalled_jobs(self) -> list[str]:
         """Get list of currently stalled job IDs.
@@ -0,0 +1,264 @@
+"""Process-wide, host-aware politeness scheduling for page fetches.
+
+Every fetch of every running job takes a slot from the ``HostScheduler``. Each
+host has its own concurrency limit and minimum spacing between request starts
+(raised to the site's ``robots.txt`` crawl-delay and backed off on 429/5xx), and
+a global limit caps all fetches across jobs. Jobs on different hosts therefore
+do not slow each other down, while jobs on the same host share its budget.
+"""
+
+import asyncio
+import logging
+import time
+from collections.abc import AsyncGenerator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
+
+import httpx
+from crawl4ai import CrawlResult, MemoryAdaptiveDispatcher
+from crawl4ai.models import CrawlerTaskResult
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Status codes that make the scheduler slow down for the host
+THROTTLE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+
+@dataclass
+class HostState:
+    """Scheduling state of one host."""
+
+    semaphore: asyncio.Semaphore
+    next_start: float = 0.0
+    penalty: float = 0.0
+    crawl_delay: float = 0.0
+    robots: RobotFileParser | None = None
+    robots_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    robots_loaded: bool = False
+    active: int = 0
+    requests: int = 0
+    throttled: int = 0
+
+
+class HostScheduler:
+    """Grants fetch slots per host under a global concurrency cap."""
+
+    def __init__(
+        self,
+        global_limit: int = 20,
+        per_host_limit: int = 3,
+        request_interval: float = 0.5,
+        max_delay: float = 30.0,
+        respect_robots_txt: bool = True,
+        user_agent: str | None = None,
+        robots_timeout: float = 10.0,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            global_limit: Maximum fetches in flight across all hosts and jobs
+            per_host_limit: Maximum fetches in flight per host
+            request_interval: Minimum seconds between request starts on one host
+            max_delay: Upper bound for the spacing after backoff or crawl-delay
+            respect_robots_txt: Honor robots.txt disallow rules and crawl-delay
+            user_agent: User agent matched against robots.txt rules
+            robots_timeout: Timeout in seconds for fetching robots.txt
+        """
+        self.per_host_limit = max(1, per_host_limit)
+        self.request_interval = request_interval
+        self.max_delay = max_delay
+        self.respect_robots_txt = respect_robots_txt
+        self.user_agent = user_agent or "*"
+        self.robots_timeout = robots_timeout
+        self._global = asyncio.Semaphore(max(1, global_limit))
+        self._hosts: dict[str, HostState] = {}
+
+    @staticmethod
+    def host_of(url: str) -> str:
+        return urlparse(url).netloc.lower()
+
+    def _state(self, host: str) -> HostState:
+        state = self._hosts.get(host)
+        if state is None:
+            state = self._hosts[host] = HostState(semaphore=asyncio.Semaphore(self.per_host_limit))
+        return state
+
+    def delay_for(self, host: str) -> float:
+        """Current spacing between request starts on a host."""
+        state = self._state(host)
+        return min(max(self.request_interval, state.crawl_delay) + state.penalty, self.max_delay)
+
+    @asynccontextmanager
+    async def slot(self, url: str) -> AsyncGenerator[None, None]:
+        """Hold a fetch slot for the URL's host for the duration of the request."""
+        host = self.host_of(url)
+        state = self._state(host)
+        if self.respect_robots_txt:
+            await self._load_robots(url, state)
+
+        async with state.semaphore:
+            # Space request starts; the host slot is held while waiting so other
+            # hosts keep the global slots
+            loop = asyncio.get_running_loop()
+            while (wait := state.next_start - loop.time()) > 0:
+                await asyncio.sleep(wait)
+            state.next_start = loop.time() + self.delay_for(host)
+
+            async with self._global:
+                state.active += 1
+                state.requests += 1
+                try:
+                    yield
+                finally:
+                    state.active -= 1
+
+    def record_response(self, url: str, status_code: int | None, retry_after: str | None = None) -> None:
+        """Adapt a host's pace to a response (None means the request failed)."""
+        host = self.host_of(url)
+        state = self._state(host)
+
+        if status_code is None or status_code in THROTTLE_STATUS_CODES:
+            state.throttled += 1
+            state.penalty = min(max(1.0, state.penalty * 2), self.max_delay)
+            if retry_after and retry_after.strip().isdigit():
+                loop = asyncio.get_running_loop()
+                resume = loop.time() + min(float(retry_after.strip()), self.max_delay)
+                state.next_start = max(state.next_start, resume)
+            logger.info(f"Slowing down for {host} after HTTP {status_code}: {self.delay_for(host):.1f}s between requests")
+        elif state.penalty:
+            state.penalty = 0.0 if state.penalty < 0.1 else state.penalty / 2
+
+    def is_backing_off(self, url: str) -> bool:
+        """Whether the URL's host recently answered with 429/5xx or failed."""
+        state = self._hosts.get(self.host_of(url))
+        return state is not None and state.penalty > 0
+
+    async def allowed(self, url: str) -> bool:
+        """Whether robots.txt allows fetching the URL."""
+        if not self.respect_robots_txt:
+            return True
+        state = self._state(self.host_of(url))
+        await self._load_robots(url, state)
+        return state.robots is None or state.robots.can_fetch(self.user_agent, url)
+
+    async def _load_robots(self, url: str, state: HostState) -> None:
+        if state.robots_loaded:
+            return
+        async with state.robots_lock:
+            if state.robots_loaded:
+                return
+            parsed = urlparse(url)
+            robots_url = f"{parsed.scheme}://{parsed.netloc}/robots.txt"
+            try:
+                async with httpx.AsyncClient(timeout=self.robots_timeout, follow_redirects=True) as client:
+                    response = await client.get(robots_url, headers={"User-Agent": self.user_agent})
+                if response.status_code == 200:
+                    parser = RobotFileParser(robots_url)
+                    parser.parse(response.text.splitlines())
+                    state.robots = parser
+                    delay = parser.crawl_delay(self.user_agent)
+                    if delay:
+                        state.crawl_delay = min(float(delay), self.max_delay)
+                        logger.info(f"Honoring robots.txt crawl-delay of {state.crawl_delay}s for {parsed.netloc}")
+            except httpx.HTTPError as e:
+                logger.debug(f"Could not read {robots_url}: {e}")
+            state.robots_loaded = True
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Per-host scheduling state for health reporting."""
+        return {
+            host: {
+                "active": state.active,
+                "requests": state.requests,
+                "throttled": state.throttled,
+                "delay": round(self.delay_for(host), 3),
+            }
+            for host, state in self._hosts.items()
+        }
+
+
+class HostAwareDispatcher(MemoryAdaptiveDispatcher):
+    """Crawl4AI dispatcher that fetches each URL inside a HostScheduler slot."""
+
+    def __init__(self, scheduler: HostScheduler, max_session_permit: int = 5, **kwargs: Any):
+        # Pacing is the scheduler's job; no per-dispatcher rate limiter
+        super().__init__(max_session_permit=max_session_permit, rate_limiter=None, **kwargs)
+        self.scheduler = scheduler
+
+    async def crawl_url(self, url: str, config: Any, task_id: str, retry_count: int = 0) -> Any:
+        if not await self.scheduler.allowed(url):
+            logger.info(f"Skipping {url}: disallowed by robots.txt")
+            now = time.time()
+            error = "Disallowed by robots.txt"
+            return CrawlerTaskResult(
+                task_id=task_id,
+                url=url,
+                result=CrawlResult(url=url, html="", success=False, error_message=error),
+                memory_usage=0,
+                peak_memory=0,
+                start_time=now,
+                end_time=now,
+                error_message=error,
+                retry_count=retry_count,
+            )
+        async with self.scheduler.slot(url):
+            task_result = await super().crawl_url(url, config, task_id, retry_count)
+        result = getattr(task_result, "result", None)
+        if result is not None:
+            self.scheduler.record_response(
+                url,
+                getattr(result, "status_code", None) or (200 if result.success else None),
+                (getattr(result, "response_headers", None) or {}).get("retry-after"),
+            )
+        return task_result
+
+
+class ScheduledCrawler:
+    """Wraps a browser crawler so all of its fetches go through the scheduler.
+
+    Deep crawls are driven from here (instead of Crawl4AI's deep-crawl
+    decorator) so the strategy's ``arun_many`` calls also get the dispatcher.
+    """
+
+    def __init__(self, crawler: Any, scheduler: HostScheduler, concurrency: int = 5):
+        self.crawler = crawler
+        self.scheduler = scheduler
+        self.concurrency = max(1, concurrency)
+
+    async def arun(self, url: str, config: Any = None, **kwargs: Any) -> Any:
+        if config is not None and config.deep_crawl_strategy:
+            return await config.deep_crawl_strategy.arun(start_url=url, crawler=self, config=config)
+        async with self.scheduler.slot(url):
+            result = await self.crawler.arun(url, config=config, **kwargs)
+        self.scheduler.record_response(
+            url, getattr(result, "status_code", None) or (200 if getattr(result, "success", False) else None)
+        )
+        return result
+
+    async def arun_many(self, urls: list[str], config: Any = None, **kwargs: Any) -> Any:
+        kwargs.setdefault("dispatcher", HostAwareDispatcher(self.scheduler, max_session_permit=self.concurrency))
+        return await self.crawler.arun_many(urls, config=config, **kwargs)
+
+
+_host_scheduler: HostScheduler | None = None
+
+
+def get_host_scheduler() -> HostScheduler:
+    """Get the process-wide host scheduler."""
+    global _host_scheduler
+    if _host_scheduler is None:
+        crawling = get_settings().crawling
+        _host_scheduler = HostScheduler(
+            global_limit=crawling.max_concurrent_sessions,
+            per_host_limit=crawling.max_concurrent_pages,
+            request_interval=crawling.host_request_interval,
+            max_delay=crawling.host_max_delay,
+            respect_robots_txt=crawling.respect_robots_txt,
+            user_agent=crawling.user_agent,
+        )
+    return _host_scheduler
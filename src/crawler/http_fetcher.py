@@ -0,0 +1,263 @@
+"""Browserless page fetching for documentation sites that serve complete HTML.
+
+``HTTPCrawler`` implements the part of ``AsyncWebCrawler`` the page crawler
+uses (``arun``, ``arun_many`` and the async context manager) on top of a pooled
+httpx client, so the parse pipeline and the BFS/frontier deep-crawl strategies
+work unchanged. In ``auto`` mode pages that look JavaScript-rendered, contain no
+code blocks or cannot be fetched over plain HTTP are handed to a browser crawler.
+"""
+
+import asyncio
+import logging
+from collections.abc import AsyncGenerator, Callable
+from contextlib import AsyncExitStack, nullcontext
+from dataclasses import dataclass, field
+from typing import Any
+from urllib.parse import urldefrag, urljoin, urlparse
+
+import httpx
+from bs4 import BeautifulSoup
+from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
+
+logger = logging.getLogger(__name__)
+
+FETCH_MODES = ("http", "browser", "auto")
+
+# Pages with less visible text than this that still ship scripts are treated as app shells
+MIN_STATIC_TEXT_LENGTH = 200
+
+_NOSCRIPT_HINTS = ("enable javascript", "javascript is required", "requires javascript", "javascript enabled")
+
+
+@dataclass
+class HTTPPageResult:
+    """Fetched page with the CrawlResult attributes the crawl pipeline reads."""
+
+    url: str
+    success: bool
+    html: str = ""
+    markdown: dict[str, str] | None = None
+    metadata: dict[str, Any] = field(default_factory=dict)
+    links: dict[str, list[dict[str, str]]] = field(default_factory=dict)
+    response_headers: dict[str, str] = field(default_factory=dict)
+    status_code: int | None = None
+    redirected_url: str | None = None
+    error_message: str | None = None
+    has_code: bool = False
+    js_rendered: bool = False
+    network_error: bool = False
+
+
+def looks_js_rendered(soup: BeautifulSoup, html: str) -> bool:
+    """Heuristic for pages whose content only appears after running JavaScript."""
+    if soup.find("script") is None:
+        return False
+    if len(soup.get_text(" ", strip=True)) < MIN_STATIC_TEXT_LENGTH:
+        return True
+    noscript = " ".join(tag.get_text(" ", strip=True).lower() for tag in soup.find_all("noscript"))
+    return any(hint in noscript for hint in _NOSCRIPT_HINTS)
+
+
+def parse_page(url: str, response: httpx.Response, markdown_generator: Any | None) -> HTTPPageResult:
+    """Turn an HTML response into a page result (CPU-bound; run in a thread)."""
+    html = response.text
+    soup = BeautifulSoup(html, "html.parser")
+    final_url = str(response.url)
+    host = urlparse(final_url).netloc
+
+    internal: list[dict[str, str]] = []
+    external: list[dict[str, str]] = []
+    seen: set[str] = set()
+    for anchor in soup.find_all("a", href=True):
+        href = urldefrag(urljoin(final_url, anchor["href"].strip())).url
+        if urlparse(href).scheme not in ("http", "https") or href in seen:
+            continue
+        seen.add(href)
+        link = {"href": href, "text": anchor.get_text(" ", strip=True)}
+        (internal if urlparse(href).netloc == host else external).append(link)
+
+    metadata: dict[str, Any] = {}
+    if soup.title and soup.title.string:
+        metadata["title"] = soup.title.string.strip()
+    for meta in soup.find_all("meta"):
+        name = meta.get("name") or meta.get("property")
+        if name and meta.get("content") and (name == "description" or name.startswith(("og:", "twitter:"))):
+            metadata[name] = meta["content"]
+
+    generator = markdown_generator or DefaultMarkdownGenerator()
+    generated = generator.generate_markdown(input_html=html, base_url=final_url)
+
+    return HTTPPageResult(
+        url=url,
+        success=True,
+        html=html,
+        markdown={"raw_markdown": generated.raw_markdown, "fit_markdown": generated.fit_markdown},
+        metadata=metadata,
+        links={"internal": internal, "external": external},
+        response_headers=dict(response.headers),
+        status_code=response.status_code,
+        redirected_url=final_url if final_url != url else None,
+        has_code=soup.find(["pre", "code"]) is not None,
+        js_rendered=looks_js_rendered(soup, html),
+    )
+
+
+class HTTPCrawler:
+    """Drop-in for AsyncWebCrawler that fetches pages without a browser."""
+
+    def __init__(
+        self,
+        user_agent: str | None = None,
+        timeout: float = 30.0,
+        max_connections: int = 20,
+        browser_factory: Callable[[], Any] | None = None,
+        scheduler: Any | None = None,
+    ):
+        """Initialize the crawler.
+
+        Args:
+            user_agent: User agent sent with requests
+            timeout: Timeout per request in seconds
+            max_connections: Pooled connections, also the number of pages fetched at once
+            browser_factory: Returns an async context manager yielding a browser
+                crawler; enables the ``auto`` fallback when given
+            scheduler: HostScheduler that paces requests per host
+        """
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_connections = max(1, max_connections)
+        self.browser_factory = browser_factory
+        self.scheduler = scheduler
+        self.fallback_count = 0
+        self._client: httpx.AsyncClient | None = None
+        self._browser: Any | None = None
+        self._exit_stack = AsyncExitStack()
+
+    async def __aenter__(self) -> "HTTPCrawler":
+        headers = {"User-Agent": self.user_agent} if self.user_agent else None
+        self._client = await self._exit_stack.enter_async_context(httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            headers=headers,
+            limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+        ))
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> None:
+        if self.fallback_count:
+            logger.info(f"HTTP fetch handed {self.fallback_count} pages to the browser")
+        await self._exit_stack.aclose()
+        self._client = None
+        self._browser = None
+
+    async def arun(self, url: str, config: Any = None, **kwargs: Any) -> Any:
+        """Fetch one page, or run the config's deep-crawl strategy from it."""
+        if config is not None and config.deep_crawl_strategy:
+            return await config.deep_crawl_strategy.arun(start_url=url, crawler=self, config=config)
+
+        result = await self._fetch(url, config)
+        if self._should_fall_back(result):
+            browser = await self._get_browser()
+            return await browser.arun(url, config=config)
+        return result
+
+    async def arun_many(self, urls: list[str], config: Any = None, **kwargs: Any) -> Any:
+        """Fetch many pages; streams results as they complete when ``config.stream`` is set."""
+        if config is not None and config.stream:
+            return self._stream(list(urls), config)
+        return [result async for result in self._stream(list(urls), config)]
+
+    async def _stream(self, urls: list[str], config: Any) -> AsyncGenerator[Any, None]:
+        # Keep at most max_connections fetches in flight so a slow consumer
+        # (the parse queue) also bounds how many pages sit in memory
+        remaining = iter(urls)
+        pending: set[asyncio.Task] = set()
+        fallback: list[str] = []
+
+        def fill() -> None:
+            while len(pending) < self.max_connections:
+                url = next(remaining, None)
+                if url is None:
+                    return
+                pending.add(asyncio.create_task(self._fetch(url, config)))
+
+        try:
+            fill()
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    result = task.result()
+                    if self._should_fall_back(result):
+                        fallback.append(result.url)
+                    else:
+                        yield result
+                fill()
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if fallback:
+            browser = await self._get_browser()
+            browser_config = config.clone(deep_crawl_strategy=None, stream=True)
+            async for result in await browser.arun_many(fallback, config=browser_config):
+                yield result
+
+    async def _fetch(self, url: str, config: Any) -> HTTPPageResult:
+        if self._client is None:
+            raise RuntimeError("HTTPCrawler must be used as an async context manager")
+        if self.scheduler and not await self.scheduler.allowed(url):
+            return HTTPPageResult(url=url, success=False, error_message="Disallowed by robots.txt")
+        try:
+            async with self.scheduler.slot(url) if self.scheduler else nullcontext():
+                response = await self._client.get(url)
+        except httpx.HTTPError as e:
+            if self.scheduler:
+                self.scheduler.record_response(url, None)
+            return HTTPPageResult(
+                url=url, success=False, error_message=f"HTTP fetch failed: {e}", network_error=True
+            )
+        if self.scheduler:
+            self.scheduler.record_response(url, response.status_code, response.headers.get("retry-after"))
+
+        if response.status_code >= 400:
+            return HTTPPageResult(
+                url=url, success=False, status_code=response.status_code,
+                error_message=f"HTTP {response.status_code}",
+            )
+        content_type = response.headers.get("content-type", "")
+        if "html" not in content_type:
+            return HTTPPageResult(
+                url=url, success=False, status_code=response.status_code,
+                error_message=f"Unsupported content type: {content_type or 'unknown'}",
+            )
+
+        markdown_generator = getattr(config, "markdown_generator", None)
+        try:
+            return await asyncio.to_thread(parse_page, url, response, markdown_generator)
+        except Exception as e:
+            # One unparseable page must not abort the whole crawl
+            logger.warning(f"Failed to parse {url}: {e}")
+            return HTTPPageResult(
+                url=url, success=False, status_code=response.status_code,
+                error_message=f"Failed to parse page: {e}",
+            )
+
+    def _should_fall_back(self, result: HTTPPageResult) -> bool:
+        if self.browser_factory is None:
+            return False
+        if result.success:
+            fall_back = result.js_rendered or not result.has_code
+        else:
+            # A 4xx, robots.txt or content-type answer would be the same in a browser
+            fall_back = result.network_error or (result.status_code or 0) >= 500
+        if fall_back:
+            self.fallback_count += 1
+            logger.debug(f"Falling back to browser for {result.url}")
+        return fall_back
+
+    async def _get_browser(self) -> Any:
+        if self._browser is None:
+            if self.browser_factory is None:
+                raise RuntimeError("No browser available for fallback")
+            self._browser = await self._exit_stack.enter_async_context(self.browser_factory())
+        return self._browser
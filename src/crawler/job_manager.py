@@ -11,6 +11,9 @@ from .domain_utils import get_primary_domain
 
 logger = logging.getLogger(__name__)
 
+# Error message of jobs cancelled by the user; cancelled jobs are stored as completed
+CANCELLED_MESSAGE = "Cancelled by user"
+
 
 class JobManager:
     """Manages crawl job lifecycle operations."""
@@ -27,6 +30,7 @@ class JobManager:
         domain_restrictions: list[str],
         config: dict[str, Any],
         version: str | None = None,
+        status: str = "running",
     ) -> str:
         """Create a new crawl job.
 
@@ -37,6 +41,7 @@ class JobManager:
             domain_restrictions: Domain restrictions
             config: Additional configuration
             version: Optional version identifier
+            status: "running", or "queued" to leave the job to a worker
 
         Returns:
             Job ID
@@ -53,8 +58,8 @@ class JobManager:
                 start_urls=start_urls,
                 max_depth=max_depth,
                 domain_restrictions=domain_restrictions,
-                status="running",
-                started_at=datetime.utcnow(),
+                status=status,
+                started_at=datetime.utcnow() if status == "running" else None,
                 last_heartbeat=datetime.utcnow(),
                 crawl_phase="crawling",
                 config=config,
@@ -71,6 +76,7 @@ class JobManager:
         domain_restrictions: list[str],
         config: dict[str, Any],
         version: str | None = None,
+        status: str = "running",
     ) -> str:
         """Get existing job for name+version or create new one.
 
@@ -81,6 +87,7 @@ class JobManager:
             domain_restrictions: Domain restrictions
             config: Additional configuration
             version: Optional version identifier
+            status: "running", or "queued" to leave the job to a worker
 
         Returns:
             Job ID
@@ -112,9 +119,11 @@ class JobManager:
                 existing_job.start_urls = start_urls
                 existing_job.max_depth = max_depth
                 existing_job.domain_restrictions = domain_restrictions
-                existing_job.status = "running"
-                existing_job.started_at = datetime.utcnow()
+                existing_job.status = status
+                existing_job.started_at = datetime.utcnow() if status == "running" else None
                 existing_job.last_heartbeat = datetime.utcnow()
+                existing_job.worker_id = None
+                existing_job.claimed_at = None
                 existing_job.crawl_phase = "crawling"
                 existing_job.error_message = None
                 existing_job.retry_count = 0
@@ -157,7 +166,7 @@ class JobManager:
             else:
                 # Create new job
                 return self.create_job(
-                    name, start_urls, max_depth, domain_restrictions, config, version
+                    name, start_urls, max_depth, domain_restrictions, config, version, status
                 )
 
     def update_job_status(
@@ -244,7 +253,11 @@ class JobManager:
             return True
 
     def complete_job(
-        self, job_id: str, success: bool = True, error_message: str | None = None
+        self,
+        job_id: str,
+        success: bool = True,
+        error_message: str | None = None,
+        worker_id: str | None = None,
     ) -> bool:
         """Mark job as completed.
 
@@ -252,12 +265,16 @@ class JobManager:
             job_id: Job ID
             success: Whether job completed successfully
             error_message: Error message if failed
+            worker_id: Only complete the job while this worker owns it
 
         Returns:
             True if updated successfully
         """
         with self.db_manager.session_scope() as session:
-            job = self.get_job(job_id, session)
+            query = session.query(CrawlJob).filter_by(id=job_id)
+            if worker_id:
+                query = query.filter_by(worker_id=worker_id).with_for_update()
+            job = query.first()
             if not job:
                 return False
 
@@ -291,6 +308,20 @@ class JobManager:
             with self.db_manager.session_scope() as session:
                 return session.query(CrawlJob).filter_by(id=job_id).first()
 
+    def find_job_id(self, name: str, version: str | None = None) -> str | None:
+        """Get the ID of the job get_or_create_job would reuse for name+version.
+
+        Args:
+            name: Job name
+            version: Optional version identifier
+
+        Returns:
+            Job ID, or None if no such job exists
+        """
+        with self.db_manager.session_scope() as session:
+            job_id = session.query(CrawlJob.id).filter_by(name=name, version=version).scalar()
+            return str(job_id) if job_id else None
+
     def get_job_status(self, job_id: str) -> dict[str, Any] | None:
         """Get job status as dictionary.
 
@@ -318,7 +349,7 @@ class JobManager:
         return self.complete_job(
             job_id,
             success=True,
-            error_message="Cancelled by user"
+            error_message=CANCELLED_MESSAGE
         )
 
     def is_job_active(self, job_id: str) -> bool:
@@ -0,0 +1,198 @@
+"""Registry of long-lived, pooled OpenAI-compatible clients."""
+
+import asyncio
+import hashlib
+import importlib.util
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any
+
+import httpx
+import openai
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+ClientKey = tuple[str, str, str]
+
+
+def make_client_key(api_key: str, base_url: str | None, model: str | None) -> ClientKey:
+    """Build a registry key without keeping the raw API key around.
+
+    Args:
+        api_key: API key for the endpoint
+        base_url: Endpoint base URL (None for the provider default)
+        model: Model name the client is used for
+
+    Returns:
+        Tuple of (base_url, api key hash, model)
+    """
+    key_hash = hashlib.sha256(api_key.encode()).hexdigest()[:16]
+    return (base_url or "", key_hash, model or "")
+
+
+@dataclass
+class _PooledClient:
+    client: openai.AsyncOpenAI
+    last_used: float
+    leases: int = 0
+
+
+class LLMClientRegistry:
+    """Shares one keep-alive HTTP connection pool per LLM endpoint.
+
+    Clients are created on first use and reused by every generator that
+    targets the same endpoint, key and model. Clients without leases that
+    were unused for longer than the idle TTL are closed on the next lookup;
+    callers holding a client across requests lease it with ``acquire()``.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive_connections: int = 20,
+        keepalive_expiry: float = 60.0,
+        idle_ttl: float = 900.0,
+    ):
+        """Initialize the registry.
+
+        Args:
+            max_connections: Connection cap per client pool
+            max_keepalive_connections: Idle connections kept open per pool
+            keepalive_expiry: Seconds an idle connection stays open
+            idle_ttl: Seconds after which an unused client is closed
+        """
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.idle_ttl = idle_ttl
+        # HTTP/2 needs the optional h2 package
+        self.http2 = importlib.util.find_spec("h2") is not None
+        self._clients: dict[ClientKey, _PooledClient] = {}
+        self._closing: set[asyncio.Task] = set()
+
+    def get_client(
+        self, api_key: str, base_url: str | None = None, model: str | None = None
+    ) -> openai.AsyncOpenAI:
+        """Get the pooled client for an endpoint, creating it if needed.
+
+        Args:
+            api_key: API key for the endpoint
+            base_url: Endpoint base URL (None for the provider default)
+            model: Model name the client is used for
+
+        Returns:
+            Shared AsyncOpenAI client
+        """
+        return self._lookup(api_key, base_url, model).client
+
+    def acquire(
+        self, api_key: str, base_url: str | None = None, model: str | None = None
+    ) -> openai.AsyncOpenAI:
+        """Lease the pooled client for an endpoint; it is not closed until released.
+
+        Args:
+            api_key: API key for the endpoint
+            base_url: Endpoint base URL (None for the provider default)
+            model: Model name the client is used for
+
+        Returns:
+            Shared AsyncOpenAI client
+        """
+        pooled = self._lookup(api_key, base_url, model)
+        pooled.leases += 1
+        return pooled.client
+
+    def release(self, client: openai.AsyncOpenAI) -> None:
+        """Return a client leased with acquire()."""
+        for pooled in self._clients.values():
+            if pooled.client is client:
+                pooled.leases = max(0, pooled.leases - 1)
+                pooled.last_used = time.monotonic()
+                return
+
+    def _lookup(self, api_key: str, base_url: str | None, model: str | None) -> _PooledClient:
+        now = time.monotonic()
+        self._evict_idle(now)
+
+        key = make_client_key(api_key, base_url, model)
+        pooled = self._clients.get(key)
+        if pooled is None:
+            http_client = openai.DefaultAsyncHttpxClient(limits=self.limits, http2=self.http2)
+            pooled = _PooledClient(
+                client=openai.AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client),
+                last_used=now,
+            )
+            self._clients[key] = pooled
+            logger.info(
+                f"Created pooled LLM client for {base_url or 'default endpoint'} "
+                f"(model={model or 'default'}, http2={self.http2})"
+            )
+        pooled.last_used = now
+        return pooled
+
+    def _evict_idle(self, now: float) -> None:
+        expired = [
+            key for key, pooled in self._clients.items()
+            if not pooled.leases and now - pooled.last_used > self.idle_ttl
+        ]
+        for key in expired:
+            pooled = self._clients.pop(key)
+            logger.debug(f"Closing idle LLM client for {key[0] or 'default endpoint'}")
+            self._close_later(pooled.client)
+
+    def _close_later(self, client: openai.AsyncOpenAI) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        # Keep a reference so the close task is not garbage collected mid-run
+        task = loop.create_task(client.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    async def close(self) -> None:
+        """Close every pooled client."""
+        clients = list(self._clients.values())
+        self._clients.clear()
+        for pooled in clients:
+            await pooled.client.close()
+        if self._closing:
+            await asyncio.gather(*self._closing, return_exceptions=True)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get pool configuration and the number of live clients."""
+        now = time.monotonic()
+        return {
+            "clients": len(self._clients),
+            "leased": sum(1 for pooled in self._clients.values() if pooled.leases),
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "idle_seconds": {
+                f"{key[0] or 'default'} ({key[2] or 'default model'})": round(now - pooled.last_used, 1)
+                for key, pooled in self._clients.items()
+            },
+        }
+
+
+# Global instance
+_client_registry: LLMClientRegistry | None = None
+
+
+def get_llm_client_registry() -> LLMClientRegistry:
+    """Get or create the process-wide LLM client registry."""
+    global _client_registry
+    if _client_registry is None:
+        config = get_settings().code_extraction
+        _client_registry = LLMClientRegistry(
+            max_connections=config.llm_http_max_connections,
+            max_keepalive_connections=config.llm_http_max_keepalive,
+            keepalive_expiry=config.llm_http_keepalive_expiry,
+            idle_ttl=config.llm_client_idle_ttl,
+        )
+    return _client_registry
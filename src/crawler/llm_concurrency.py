@@ -0,0 +1,281 @@
+"""Adaptive, process-wide concurrency control for LLM requests."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+from ..config import get_settings
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between two multiplicative decreases. Requests that were already
+# in flight when the endpoint started throttling would otherwise collapse the limit
+# to the minimum in a single burst.
+DECREASE_COOLDOWN = 2.0
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Parse a Retry-After header value into seconds.
+
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+
+    Returns:
+        Seconds to wait, or None if the value is missing or invalid
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def classify_llm_error(error: BaseException) -> tuple[str, float | None]:
+    """Classify an LLM client error for the concurrency controller.
+
+    Args:
+        error: Exception raised by the LLM call
+
+    Returns:
+        Tuple of (kind, retry_after) where kind is one of
+        'throttled', 'timeout', 'server_error' or 'error'
+    """
+    status_code = getattr(error, "status_code", None)
+    response = getattr(error, "response", None)
+    if status_code is None and response is not None:
+        status_code = getattr(response, "status_code", None)
+
+    retry_after = None
+    headers = getattr(response, "headers", None) if response is not None else None
+    if headers is not None:
+        try:
+            retry_after = parse_retry_after(headers.get("retry-after"))
+        except Exception:
+            retry_after = None
+
+    if status_code == 429:
+        return "throttled", retry_after
+    if isinstance(error, asyncio.TimeoutError | TimeoutError) or "Timeout" in type(error).__name__:
+        return "timeout", retry_after
+    if isinstance(status_code, int) and status_code >= 500:
+        return "server_error", retry_after
+    return "error", retry_after
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD concurrency limiter shared by every LLM caller in the process.
+
+    The limit grows by one slot per window of healthy responses and is cut
+    multiplicatively when the endpoint throttles, times out or fails with a
+    server error. Retry-After hints pause all new acquisitions until they expire.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 5,
+        min_limit: int = 1,
+        max_limit: int = 32,
+        latency_target: float = 30.0,
+        decrease_factor: float = 0.5,
+    ):
+        """Initialize the limiter.
+
+        Args:
+            initial_limit: Starting number of concurrent requests
+            min_limit: Lower bound for the limit
+            max_limit: Upper bound for the limit
+            latency_target: Latency in seconds above which the endpoint is treated as saturated
+            decrease_factor: Multiplier applied to the limit on congestion signals
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target = latency_target
+        self.decrease_factor = decrease_factor
+        self._limit = float(min(max(initial_limit, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._blocked_until = 0.0
+        self._last_decrease = 0.0
+        self._latency_ewma: float | None = None
+        self._stats = {"successes": 0, "throttled": 0, "timeouts": 0, "server_errors": 0, "errors": 0}
+
+    @property
+    def limit(self) -> int:
+        """Current concurrency limit."""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Number of requests currently holding a slot."""
+        return self._in_flight
+
+    @property
+    def paused_for(self) -> float:
+        """Seconds left of an active Retry-After pause."""
+        return max(0.0, self._blocked_until - time.monotonic())
+
+    def try_acquire(self) -> bool:
+        """Take a free slot without waiting.
+
+        Returns:
+            False while paused, at the limit or with callers already waiting
+        """
+        if self.paused_for > 0 or self._waiters or self._in_flight >= self.limit:
+            return False
+        self._in_flight += 1
+        return True
+
+    async def acquire(self) -> None:
+        """Wait for a free slot, honoring any active Retry-After pause."""
+        while True:
+            pause = self._blocked_until - time.monotonic()
+            if pause > 0:
+                await asyncio.sleep(pause)
+                continue
+
+            if self._in_flight < self.limit:
+                self._in_flight += 1
+                return
+
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
+            try:
+                await waiter
+            except asyncio.CancelledError:
+                # Pass a wakeup we may have consumed on to the next waiter
+                self._wake()
+                raise
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    def release(self, latency: float | None = None, error: BaseException | None = None) -> None:
+        """Release a slot and feed the outcome into the controller.
+
+        Args:
+            latency: Request duration in seconds (successful requests)
+            error: Exception raised by the request, if any
+        """
+        self._in_flight = max(0, self._in_flight - 1)
+
+        if error is None:
+            self._on_success(latency)
+        elif not isinstance(error, asyncio.CancelledError):
+            self._on_error(error)
+
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, acquired: bool = False) -> AsyncIterator[None]:
+        """Hold a slot for the duration of one LLM request.
+
+        Args:
+            acquired: The slot was already taken with try_acquire
+        """
+        if not acquired:
+            await self.acquire()
+        started = time.monotonic()
+        try:
+            yield
+        except BaseException as e:
+            self.release(error=e)
+            raise
+        else:
+            self.release(latency=time.monotonic() - started)
+
+    def _on_success(self, latency: float | None) -> None:
+        self._stats["successes"] += 1
+        if latency is None:
+            return
+
+        if self._latency_ewma is None:
+            self._latency_ewma = latency
+        else:
+            self._latency_ewma += LATENCY_EWMA_ALPHA * (latency - self._latency_ewma)
+
+        if self._latency_ewma > self.latency_target:
+            self._decrease(f"latency {self._latency_ewma:.1f}s above target")
+        elif self._limit < self.max_limit:
+            # Additive increase: roughly one extra slot per window of successes
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+
+    def _on_error(self, error: BaseException) -> None:
+        kind, retry_after = classify_llm_error(error)
+        stat_key = {
+            "throttled": "throttled",
+            "timeout": "timeouts",
+            "server_error": "server_errors",
+        }.get(kind, "errors")
+        self._stats[stat_key] += 1
+
+        if retry_after:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + retry_after)
+            logger.warning(f"LLM endpoint asked to retry after {retry_after:.1f}s, pausing new requests")
+
+        if kind != "error":
+            self._decrease(kind)
+
+    def _decrease(self, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < DECREASE_COOLDOWN:
+            return
+        self._last_decrease = now
+        old_limit = self.limit
+        self._limit = max(float(self.min_limit), self._limit * self.decrease_factor)
+        if self.limit != old_limit:
+            logger.info(f"LLM concurrency reduced {old_limit} -> {self.limit} ({reason})")
+
+    def _wake(self) -> None:
+        capacity = self.limit - self._in_flight
+        for waiter in list(self._waiters):
+            if capacity <= 0:
+                break
+            if not waiter.done():
+                waiter.set_result(None)
+                capacity -= 1
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get the current controller state for status endpoints."""
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            "paused_for_seconds": round(self.paused_for, 2),
+            "latency_ewma_seconds": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+            **self._stats,
+        }
+
+
+# Global instance
+_llm_limiter: AdaptiveConcurrencyLimiter | None = None
+
+
+def get_llm_limiter() -> AdaptiveConcurrencyLimiter:
+    """Get or create the process-wide LLM concurrency limiter."""
+    global _llm_limiter
+    if _llm_limiter is None:
+        config = get_settings().code_extraction
+        _llm_limiter = AdaptiveConcurrencyLimiter(
+            initial_limit=config.llm_num_parallel,
+            min_limit=config.llm_min_parallel,
+            max_limit=config.llm_max_parallel,
+            latency_target=config.llm_latency_target,
+        )
+    return _llm_limiter
@@ -15,6 +15,7 @@ from ..database import CodeSnippet, CrawlJob, Document
 from .extractors.models import TITLE_AND_DESCRIPTION_PROMPT
 from .language_mapping import normalize_language
 from .llm_retry import LLMDescriptionGenerator
+from .llm_scheduler import get_llm_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -162,7 +163,9 @@ class LLMRegenerator(LLMDescriptionGenerator):
                         progress_callback(progress)
                     await self._send_progress_update(source_id, client_id, progress)
 
-                    change = await self._regenerate_snippet_metadata(snippet)
+                    change = await self._regenerate_snippet_metadata(
+                        snippet, job_id=f"regenerate:{source_id}"
+                    )
 
                     progress.processed_snippets += 1
                     if change and change.has_changes:
@@ -236,16 +239,20 @@ class LLMRegenerator(LLMDescriptionGenerator):
             "preview_only": preview_only
         }
 
-    async def _regenerate_snippet_metadata(self, snippet: CodeSnippet) -> SnippetChange | None:
+    async def _regenerate_snippet_metadata(
+        self, snippet: CodeSnippet, job_id: str | None = None
+    ) -> SnippetChange | None:
         """Regenerate metadata for a single snippet.
         
         Args:
             snippet: Code snippet to regenerate
+            job_id: Scheduler queue the request is charged to
             
         Returns:
             SnippetChange object or None if failed
         """
-        if not self.client:
+        client = self.acquire_client()
+        if not client:
             logger.error("LLM client not initialized")
             return None
 
@@ -271,12 +278,14 @@ class LLMRegenerator(LLMDescriptionGenerator):
 
         try:
             # Make LLM call
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.1,
-                max_tokens=200
-            )
+            async with get_llm_scheduler().request(job_id, prompt, max_tokens=200) as ticket:
+                response = await client.chat.completions.create(
+                    model=self.model,
+                    messages=[{"role": "user", "content": prompt}],
+                    temperature=0.1,
+                    max_tokens=200
+                )
+                ticket.record_response(response)
 
             # Parse response
             content = response.choices[0].message.content.strip()
@@ -308,3 +317,5 @@ class LLMRegenerator(LLMDescriptionGenerator):
         except Exception as e:
             logger.error(f"LLM regeneration error for snippet {snippet.id}: {e}")
             return None
+        finally:
+            self.release_client(client)
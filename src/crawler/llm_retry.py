@@ -3,13 +3,15 @@
 import asyncio
 import json
 import logging
-import os
+from contextlib import nullcontext
 
 import openai
 
 from ..config import get_settings
 from .extractors.models import TITLE_AND_DESCRIPTION_PROMPT, ExtractedCodeBlock, ExtractedContext
 from .language_mapping import normalize_language
+from .llm_clients import get_llm_client_registry
+from .llm_scheduler import get_llm_scheduler
 
 logger = logging.getLogger(__name__)
 
@@ -24,63 +26,60 @@ class LLMDescriptionGenerator:
         model: str | None = None
     ):
         """Initialize LLM description generator."""
-        self.client = None
         self.custom_model = model
         self.custom_api_key = api_key
         self.custom_base_url = base_url
-        self._last_settings_hash = None
-        self._init_client(api_key=api_key, base_url=base_url)
     
     @property
     def settings(self):
         return get_settings()
 
-    def _get_settings_hash(self) -> str:
-        import hashlib
-        settings = self.settings.code_extraction
-        values = [
-            str(settings.llm_api_key.get_secret_value() if not self.custom_api_key else self.custom_api_key),
-            str(settings.llm_base_url if not self.custom_base_url else self.custom_base_url),
-            str(settings.llm_extraction_model if not self.custom_model else self.custom_model),
-            str(settings.enable_llm_extraction),
-        ]
-        return hashlib.md5("".join(values).encode()).hexdigest()
-    
-    def _should_reinit_client(self) -> bool:
-        current_hash = self._get_settings_hash()
-        if current_hash != self._last_settings_hash:
-            logger.info("LLM settings changed, reinitializing client")
-            self._last_settings_hash = current_hash
-            return True
-        return False
-    
-    def _init_client(
-        self, api_key: str | None = None, base_url: str | None = None
-    ):
-        """Initialize OpenAI client if API key is available."""
-        if api_key or self.settings.code_extraction.llm_api_key:
-            client_api_key = api_key
-            if not client_api_key:
-                client_api_key = self.settings.code_extraction.llm_api_key.get_secret_value()
-
-            client_base_url = base_url
-            if not client_base_url and hasattr(
-                self.settings.code_extraction, "llm_base_url"
-            ):
-                client_base_url = self.settings.code_extraction.llm_base_url
-
-            self.client = openai.AsyncOpenAI(
-                api_key=client_api_key, base_url=client_base_url
-            )
-            
-            self._last_settings_hash = self._get_settings_hash()
+    @property
+    def client(self) -> openai.AsyncOpenAI | None:
+        """Pooled OpenAI client for the current settings, or None without an API key.
+
+        Resolved on each access so runtime setting changes take effect immediately,
+        while generators targeting the same endpoint share one connection pool.
+        Each access hashes the key for the registry lookup, so callers resolve it
+        once per call and keep a local.
+        """
+        endpoint = self._endpoint()
+        return get_llm_client_registry().get_client(*endpoint) if endpoint else None
+
+    def acquire_client(self) -> openai.AsyncOpenAI | None:
+        """Lease the pooled client for callers that hold it across requests.
+
+        The registry does not close a leased client as idle; hand it back
+        with ``release_client`` when done. None without an API key.
+        """
+        endpoint = self._endpoint()
+        return get_llm_client_registry().acquire(*endpoint) if endpoint else None
+
+    @staticmethod
+    def release_client(client: openai.AsyncOpenAI | None) -> None:
+        """Return a client leased with acquire_client."""
+        if client:
+            get_llm_client_registry().release(client)
+
+    def _endpoint(self) -> tuple[str, str | None, str | None] | None:
+        """API key, base URL and model of the current settings, or None without an API key."""
+        config = self.settings.code_extraction
+        api_key = self.custom_api_key or config.llm_api_key.get_secret_value()
+        if not api_key:
+            return None
+        return (
+            api_key,
+            self.custom_base_url or config.llm_base_url,
+            self.custom_model or config.llm_extraction_model,
+        )
 
     async def generate_titles_and_descriptions_batch(
         self,
         code_blocks: list[ExtractedCodeBlock],
         url: str,
         max_concurrent: int | None = None,
-        semaphore: asyncio.Semaphore | None = None
+        semaphore: asyncio.Semaphore | None = None,
+        job_id: str | None = None
     ) -> list[ExtractedCodeBlock]:
         """
         Generate titles and descriptions for multiple code blocks concurrently.
@@ -88,26 +87,26 @@ class LLMDescriptionGenerator:
         Args:
             code_blocks: List of code blocks to generate titles and descriptions for
             url: Source URL for context
-            max_concurrent: Maximum concurrent requests (defaults to CODE_LLM_NUM_PARALLEL env var or 5)
-            semaphore: Optional semaphore for controlling concurrency
+            max_concurrent: Optional per-call cap on concurrent requests
+            semaphore: Optional semaphore shared by callers that want their own cap
+            job_id: Job the requests are charged to in the shared LLM scheduler
+
+        Requests always go through the process-wide LLM scheduler, which enforces
+        the RPM/TPM budgets fairly across jobs and adapts concurrency to the endpoint.
             
         Returns:
             List of code blocks with titles and descriptions added
         """
-        
-        if self._should_reinit_client():
-            self._init_client(api_key=self.custom_api_key, base_url=self.custom_base_url)
-
-        if semaphore is None:
-            if max_concurrent is None:
-                max_concurrent = int(os.getenv('CODE_LLM_NUM_PARALLEL', '5'))
-                logger.info(f"Using CODE_LLM_NUM_PARALLEL={max_concurrent} for batch title/description generation")
 
+        if semaphore is None and max_concurrent is not None:
             semaphore = asyncio.Semaphore(max_concurrent)
+        scheduler = get_llm_scheduler()
+        # Held for the whole batch, so the registry must not close it as idle
+        client = self.acquire_client()
 
         async def generate_with_semaphore(block: ExtractedCodeBlock) -> ExtractedCodeBlock:
-            async with semaphore:
-                if not self.client:
+            async with semaphore or nullcontext():
+                if not client:
                     logger.error("LLM client not initialized - missing API key")
                     if not block.context:
                         block.context = ExtractedContext()
@@ -173,7 +172,11 @@ class LLMDescriptionGenerator:
                             request_params.update(extra_params)
                         
                         logger.info(f"Final request params: {request_params}")
-                        response = await self.client.chat.completions.create(**request_params)
+                        async with scheduler.request(
+                            job_id, prompt, max_tokens=request_params.get("max_tokens") or 0
+                        ) as ticket:
+                            response = await client.chat.completions.create(**request_params)
+                            ticket.record_response(response)
 
                         logger.info(f"LLM call completed for code block from {url}")
 
@@ -275,6 +278,8 @@ class LLMDescriptionGenerator:
                 block.title = f"Code Block in {block.language or 'Unknown'}"
                 block.description = f"Code block in {block.language or 'unknown'} language"
                 results.append(block)
+        finally:
+            self.release_client(client)
 
         return results
 
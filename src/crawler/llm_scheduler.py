@@ -0,0 +1,303 @@
+"""Rate-limited, per-job fair scheduling of LLM requests and concurrency slots."""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any
+
+from ..config import get_settings
+from .llm_concurrency import AdaptiveConcurrencyLimiter, get_llm_limiter
+
+logger = logging.getLogger(__name__)
+
+# Queue key for requests that are not tied to a job (e.g. source name detection)
+UNSCOPED_JOB = "unscoped"
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate prompt tokens, falling back to a character heuristic.
+
+    Args:
+        text: Prompt text
+
+    Returns:
+        Estimated token count
+    """
+    try:
+        from ..utils.token_utils import count_tokens
+
+        return count_tokens(text)
+    except Exception:
+        # tiktoken may be unable to load its encoding (e.g. offline)
+        return max(1, len(text) // 4)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at a per-minute rate."""
+
+    def __init__(self, per_minute: float):
+        """Initialize the bucket.
+
+        Args:
+            per_minute: Refill rate per minute; 0 or less disables the bucket
+        """
+        self.per_minute = per_minute
+        self.capacity = float(per_minute)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    @property
+    def enabled(self) -> bool:
+        return self.per_minute > 0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.per_minute / 60.0)
+        self._updated = now
+
+    def time_until_available(self, amount: float) -> float:
+        """Get seconds until `amount` tokens can be consumed."""
+        if not self.enabled:
+            return 0.0
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self._tokens >= amount:
+            return 0.0
+        return (amount - self._tokens) * 60.0 / self.per_minute
+
+    def consume(self, amount: float) -> None:
+        """Take tokens from the bucket (negative amounts refund)."""
+        if not self.enabled:
+            return
+        self._refill()
+        self._tokens = min(self.capacity, self._tokens - min(amount, self.capacity))
+
+    @property
+    def available(self) -> float | None:
+        if not self.enabled:
+            return None
+        self._refill()
+        return self._tokens
+
+
+@dataclass
+class _PendingRequest:
+    future: asyncio.Future
+    tokens: int
+    tag: float
+
+
+@dataclass
+class _JobQueue:
+    last_tag: float = 0.0
+    pending: deque[_PendingRequest] = field(default_factory=deque)
+    dispatched: int = 0
+    tokens_dispatched: int = 0
+
+
+@dataclass
+class LLMTicket:
+    """Permit for one scheduled LLM request."""
+
+    job_id: str
+    estimated_tokens: int
+    actual_tokens: int | None = None
+
+    def record_response(self, response: Any) -> None:
+        """Record actual token usage reported by the provider."""
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None) if usage is not None else None
+        if isinstance(total, int):
+            self.actual_tokens = total
+
+
+class LLMRequestScheduler:
+    """Global RPM/TPM limiter with fair queueing between jobs.
+
+    Each job has its own queue. Requests are released in start-time fair
+    queueing order, and a released request holds a slot of the concurrency
+    limiter, so jobs share the rate budget and the concurrency slots equally
+    regardless of how many requests each has queued.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int = 0,
+        tokens_per_minute: int = 0,
+        limiter: AdaptiveConcurrencyLimiter | None = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            requests_per_minute: Request budget per minute (0 = unlimited)
+            tokens_per_minute: Token budget per minute (0 = unlimited)
+            limiter: Concurrency limiter handing out slots (defaults to the process-wide one)
+        """
+        self._rpm = TokenBucket(requests_per_minute)
+        self._tpm = TokenBucket(tokens_per_minute)
+        self.limiter = limiter or get_llm_limiter()
+        self._jobs: dict[str, _JobQueue] = {}
+        self._virtual_time = 0.0
+        self._timer: asyncio.TimerHandle | None = None
+
+    async def acquire(self, job_id: str | None, tokens: int) -> None:
+        """Wait until the request may be sent; returns holding a concurrency slot.
+
+        Args:
+            job_id: Job the request belongs to
+            tokens: Estimated tokens (prompt plus completion budget)
+        """
+        key = job_id or UNSCOPED_JOB
+        queue = self._jobs.get(key)
+        if queue is None:
+            queue = self._jobs[key] = _JobQueue()
+
+        start = max(self._virtual_time, queue.last_tag)
+        queue.last_tag = start + tokens
+        request = _PendingRequest(
+            future=asyncio.get_running_loop().create_future(), tokens=tokens, tag=start
+        )
+        queue.pending.append(request)
+        self._dispatch()
+
+        try:
+            await request.future
+        except asyncio.CancelledError:
+            if request in queue.pending:
+                queue.pending.remove(request)
+                self._drop_if_idle(key)
+            elif request.future.done() and not request.future.cancelled():
+                # Dispatched, but the waiter was cancelled before it could send
+                self.limiter.release(error=asyncio.CancelledError())
+                self._refund(tokens)
+            raise
+
+    def release(self, ticket: LLMTicket) -> None:
+        """Reconcile the token budget with the provider-reported usage.
+
+        Called once the request's concurrency slot has been released, so the
+        next queued request can take it.
+        """
+        if ticket.actual_tokens is not None:
+            self._tpm.consume(ticket.actual_tokens - ticket.estimated_tokens)
+        self._dispatch()
+
+    @asynccontextmanager
+    async def request(self, job_id: str | None, prompt: str, max_tokens: int = 0) -> AsyncIterator[LLMTicket]:
+        """Schedule one LLM request and hold a concurrency slot while it runs.
+
+        Args:
+            job_id: Job the request belongs to
+            prompt: Prompt text used to estimate tokens
+            max_tokens: Completion token budget
+        """
+        ticket = LLMTicket(job_id=job_id or UNSCOPED_JOB, estimated_tokens=estimate_tokens(prompt) + max_tokens)
+        await self.acquire(job_id, ticket.estimated_tokens)
+        try:
+            async with self.limiter.slot(acquired=True):
+                yield ticket
+        finally:
+            self.release(ticket)
+
+    def _refund(self, tokens: int) -> None:
+        """Return the budget taken by a request that was never sent."""
+        self._rpm.consume(-1)
+        self._tpm.consume(-tokens)
+        self._dispatch()
+
+    def _dispatch(self) -> None:
+        while True:
+            head_key, head = self._next_request()
+            if head is None:
+                return
+
+            wait = max(
+                self._rpm.time_until_available(1),
+                self._tpm.time_until_available(head.tokens),
+                self.limiter.paused_for,
+            )
+            if wait > 0:
+                self._schedule(wait)
+                return
+            if not self.limiter.try_acquire():
+                # All slots are taken; releasing one dispatches again
+                return
+
+            queue = self._jobs[head_key]
+            queue.pending.popleft()
+            queue.dispatched += 1
+            queue.tokens_dispatched += head.tokens
+            self._virtual_time = max(self._virtual_time, head.tag)
+            self._rpm.consume(1)
+            self._tpm.consume(head.tokens)
+            head.future.set_result(None)
+            self._drop_if_idle(head_key)
+
+    def _next_request(self) -> tuple[str | None, _PendingRequest | None]:
+        best_key = None
+        best = None
+        for key, queue in list(self._jobs.items()):
+            # Discard requests whose waiter went away
+            while queue.pending and queue.pending[0].future.done():
+                queue.pending.popleft()
+            if not queue.pending:
+                self._drop_if_idle(key)
+                continue
+            head = queue.pending[0]
+            if best is None or head.tag < best.tag:
+                best_key, best = key, head
+        return best_key, best
+
+    def _schedule(self, delay: float) -> None:
+        if self._timer is not None and not self._timer.cancelled():
+            return
+
+        def fire() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay, fire)
+
+    def _drop_if_idle(self, key: str) -> None:
+        queue = self._jobs.get(key)
+        if queue is not None and not queue.pending:
+            del self._jobs[key]
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get bucket levels and queue depth per job."""
+        available_rpm = self._rpm.available
+        available_tpm = self._tpm.available
+        return {
+            "requests_per_minute": self._rpm.per_minute or None,
+            "tokens_per_minute": self._tpm.per_minute or None,
+            "available_requests": round(available_rpm, 1) if available_rpm is not None else None,
+            "available_tokens": round(available_tpm) if available_tpm is not None else None,
+            "jobs": {
+                key: {
+                    "queued": len(queue.pending),
+                    "queued_tokens": sum(r.tokens for r in queue.pending),
+                    "dispatched": queue.dispatched,
+                }
+                for key, queue in self._jobs.items()
+            },
+        }
+
+
+# Global instance
+_llm_scheduler: LLMRequestScheduler | None = None
+
+
+def get_llm_scheduler() -> LLMRequestScheduler:
+    """Get or create the process-wide LLM request scheduler."""
+    global _llm_scheduler
+    if _llm_scheduler is None:
+        config = get_settings().code_extraction
+        _llm_scheduler = LLMRequestScheduler(
+            requests_per_minute=config.llm_requests_per_minute,
+            tokens_per_minute=config.llm_tokens_per_minute,
+        )
+    return _llm_scheduler
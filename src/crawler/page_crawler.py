@@ -1,25 +1,38 @@
 """Page crawling implementation using Crawl4AI."""
 
 import asyncio
+import functools
 import hashlib
 import logging
-import os
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
 from typing import Any
 
-from crawl4ai import (
-    AsyncWebCrawler,
-    RateLimiter,
-    SemaphoreDispatcher,
-)
+from crawl4ai import AsyncWebCrawler
 
 from ..config import get_settings
 from ..database import get_db_manager
+from ..database.content_check import ContentHashIndex, find_near_duplicate_snippets
+from ..database.fingerprint import code_fingerprint
+from .browser_pool import BrowserPool
+from .cancellation import get_cancellation_bus
 from .config import BrowserConfig, create_crawler_config
+from .dedup import ContentDeduplicator
 from .extractors.html import HTMLCodeExtractor
 from .extractors.models import ExtractedCodeBlock
-from .failed_page_utils import record_failed_page
+from .failed_page_utils import record_failed_page, record_failed_pages_batch
+from .host_scheduler import ScheduledCrawler, get_host_scheduler
+from .http_fetcher import FETCH_MODES, HTTPCrawler
 from .llm_retry import LLMDescriptionGenerator
+from .pipeline import (
+    PipelineStage,
+    StagedPipeline,
+    register_pipeline,
+    resolve_queue_size,
+    unregister_pipeline,
+)
+from .revalidation import VALIDATORS_KEY, HTTPRevalidator, UnchangedPage, extract_validators
 
 logger = logging.getLogger(__name__)
 
@@ -37,16 +50,35 @@ class CrawlResult:
     metadata: dict[str, Any] = field(default_factory=dict)
 
 
+@dataclass
+class ParsedPage:
+    """Page whose code blocks still need LLM titles and descriptions."""
+
+    url: str
+    title: str
+    content: str
+    content_hash: str
+    depth: int
+    code_blocks: list[ExtractedCodeBlock]
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+# Callback receiving micro-batches of processed results as they leave the pipeline
+ResultSink = Callable[[list[CrawlResult]], Awaitable[None]]
+
+
 class PageCrawler:
     """Handles page crawling operations."""
 
-    def __init__(self, browser_config: BrowserConfig):
+    def __init__(self, browser_config: BrowserConfig, browser_pool: BrowserPool | None = None):
         """Initialize page crawler.
 
         Args:
             browser_config: Browser configuration
+            browser_pool: Pool to lease started browsers from (launches one per crawl if None)
         """
         self.browser_config = browser_config
+        self.browser_pool = browser_pool
         self.db_manager = get_db_manager()
         self.description_generator = None
         self.html_extractor = HTMLCodeExtractor()
@@ -63,6 +95,8 @@ class PageCrawler:
         max_depth: int = 0,
         job_config: dict[str, Any] | None = None,
         progress_tracker: Any | None = None,
+        result_sink: ResultSink | None = None,
+        retain_results: bool = True,
     ) -> list[CrawlResult] | None:
         """Crawl a page or site using Crawl4AI.
 
@@ -72,9 +106,13 @@ class PageCrawler:
             depth: Current crawl depth
             max_depth: Maximum depth for deep crawling (0 for single page)
             job_config: Job configuration
+            result_sink: Optional callback that persists micro-batches of results
+                as they leave the pipeline
+            retain_results: Keep processed results in memory and return them; disable
+                when the sink persists them so memory stays bounded by the queue sizes
 
         Returns:
-            List of CrawlResult objects or None if failed
+            List of CrawlResult objects or None if failed or not retained
         """
         logger.info(f"Starting crawl for URL: {url}, job_id: {job_id}, max_depth: {max_depth}")
 
@@ -92,6 +130,7 @@ class PageCrawler:
 
         # Get user agent from settings
         user_agent = self.settings.crawling.user_agent
+        revalidator = self._create_revalidator(job_config)
 
         try:
             # Check job status before starting
@@ -105,56 +144,10 @@ class PageCrawler:
                 logger.debug(f"Creating AsyncWebCrawler with config: {self.browser_config}")
                 logger.debug(f"Browser config details - headless: {self.browser_config.headless}, viewport: {self.browser_config.viewport_width}x{self.browser_config.viewport_height}")
 
-            async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug("AsyncWebCrawler created successfully")
-                results = []
-
-                # Configure rate limiter and dispatcher
-                max_concurrent = job_config.get("max_concurrent_crawls", get_settings().crawling.max_concurrent_crawls) if job_config else get_settings().crawling.max_concurrent_crawls
+            async with self._open_crawler(job_config) as crawler:
                 if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"Setting up dispatcher with max_concurrent_crawls={max_concurrent}")
-
-                rate_limiter = RateLimiter(base_delay=(1.0, 2.0), max_delay=30.0, max_retries=4)
-                dispatcher = SemaphoreDispatcher(
-                    semaphore_count=5,
-                    max_session_permit=max_concurrent,
-                    rate_limiter=rate_limiter,
-                )
-
-                # Use streaming for all crawls
-                crawled_count = 0
-
-                # Create queue for parallel processing
-                extraction_queue = asyncio.Queue()
-                processed_results = asyncio.Queue()
-
-                # Start worker tasks for parallel LLM code extraction
-                # Get the number of parallel LLM workers from config
-                llm_parallel_limit = int(os.getenv('CODE_LLM_NUM_PARALLEL', '5'))
-                worker_count = llm_parallel_limit
-                extraction_semaphore = asyncio.Semaphore(llm_parallel_limit)
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"Starting {worker_count} LLM extraction workers with semaphore limit {llm_parallel_limit}")
-
-                workers = []
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"Creating {worker_count} extraction workers")
-                for i in range(worker_count):
-                    if logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"Creating worker {i+1}")
-                    worker = asyncio.create_task(
-                        self._extraction_worker(
-                            extraction_queue,
-                            processed_results,
-                            extraction_semaphore,
-                            job_id,
-                            depth,
-                            progress_tracker,
-                            job_config
-                        )
-                    )
-                    workers.append(worker)
+                    logger.debug(f"{type(crawler).__name__} created successfully")
+                results: list[CrawlResult] | None = [] if retain_results else None
 
                 # Track progress for WEB UI updates only
                 crawl_progress = {
@@ -165,10 +158,15 @@ class PageCrawler:
                     'base_snippet_count': job_config.get('base_snippet_count', 0) if job_config else 0
                 }
 
-                # Result collector task
-                collector_task = asyncio.create_task(
-                    self._collect_results(processed_results, results, crawl_progress, progress_tracker, job_id)
+                # Parse, describe and persist stages run concurrently with fetching
+                deduplicator = await self._create_deduplicator(job_id)
+                hash_index = await self._create_hash_index(job_id, job_config, [url])
+                pipeline = self._build_pipeline(
+                    job_id, depth, job_config, progress_tracker, crawl_progress, results, result_sink,
+                    deduplicator, hash_index,
                 )
+                pipeline.start()
+                register_pipeline(job_id, pipeline)
 
                 try:
                     # Create crawler run config
@@ -178,102 +176,50 @@ class PageCrawler:
                         include_patterns=job_config.get("include_patterns") if job_config else None,
                         user_agent=user_agent,
                         max_pages=job_config.get("max_pages") if job_config else None,
+                        job_id=job_id if self.settings.crawling.persistent_frontier else None,
+                        frontier_batch_size=self.settings.crawling.frontier_batch_size,
+                        frontier_claim_timeout=self.settings.crawling.frontier_claim_timeout,
+                        revalidator=revalidator,
                     )
 
-                    # Check if streaming is supported
-                    logger.info(f"Starting crawler.arun for URL: {url}")
-                    result_container = await crawler.arun(
-                        url, config=crawler_run_config, dispatcher=dispatcher
-                    )
-                    logger.info(f"Crawler.arun completed for URL: {url}")
-
-                    # Handle streaming if the result supports it
-                    if hasattr(result_container, '__aiter__'):
-                        # Streaming mode
-                        logger.info("Streaming mode detected, starting to process pages")
-                        async for result in result_container:
-                            crawled_count += 1
-                            crawl_progress['crawled_count'] = crawled_count
-
-                            # Check if job is cancelled periodically
-                            if crawled_count % 5 == 0:
-                                if await self._is_job_cancelled(job_id):
-                                    logger.info(f"Crawl job {job_id} is cancelled - stopping crawl")
-                                    raise asyncio.CancelledError("Job cancelled by user")
-
-                            # Queue result for parallel LLM code extraction
-                            logger.debug(f"Queueing page {crawled_count} for extraction: {result.url if hasattr(result, 'url') else 'unknown'}")
-                            await extraction_queue.put(result)
-                            logger.debug(f"Successfully queued page {crawled_count} for extraction")
-
-                            # Send progress update for crawling
-                            if progress_tracker and crawled_count % 3 == 0:  # Update every 3 pages
-                                await progress_tracker.update_progress(
-                                    job_id,
-                                    processed_pages=crawl_progress['processed_count'],
-                                    total_pages=crawled_count,
-                                    documents_crawled=crawl_progress['processed_count'],
-                                    send_notification=True
-                                )
+                    # A single page the server reports unchanged is not rendered at all
+                    unchanged = {}
+                    if revalidator and max_depth == 0:
+                        unchanged = await revalidator.find_unchanged([url])
+
+                    if unchanged:
+                        result_container = list(unchanged.values())
                     else:
-                        # Non-streaming mode - handle as a list of results
-                        results_list = []
-                        if hasattr(result_container, 'results'):
-                            results_list = result_container.results
-                        elif isinstance(result_container, list):
-                            results_list = result_container
-                        else:
-                            # Single result
-                            results_list = [result_container]
-
-                        for result in results_list:
-                            crawled_count += 1
-                            crawl_progress['crawled_count'] = crawled_count
-
-                            # Check if job is cancelled periodically
-                            if crawled_count % 5 == 0:
-                                if await self._is_job_cancelled(job_id):
-                                    logger.info(f"Crawl job {job_id} is cancelled - stopping crawl")
-                                    raise asyncio.CancelledError("Job cancelled by user")
-
-                            # Queue result for parallel LLM code extraction
-                            logger.debug(f"Queueing page {crawled_count} for extraction: {result.url if hasattr(result, 'url') else 'unknown'}")
-                            await extraction_queue.put(result)
-                            logger.debug(f"Successfully queued page {crawled_count} for extraction")
-
-                            # Send progress update for crawling
-                            if progress_tracker and crawled_count % 3 == 0:  # Update every 3 pages
-                                await progress_tracker.update_progress(
-                                    job_id,
-                                    processed_pages=crawl_progress['processed_count'],
-                                    total_pages=crawled_count,
-                                    documents_crawled=crawl_progress['processed_count'],
-                                    send_notification=True
-                                )
-
-                    # Signal workers to stop
-                    for _ in workers:
-                        await extraction_queue.put(None)
-
-                    # Wait for all workers to complete
-                    await asyncio.gather(*workers)
-
-                    # Signal collector to stop
-                    await processed_results.put(None)
-                    await collector_task
+                        logger.info(f"Starting crawler.arun for URL: {url}")
+                        result_container = await crawler.arun(url, config=crawler_run_config)
+                        logger.info(f"Crawler.arun completed for URL: {url}")
+
+                    # Fetch stage: hand pages to the pipeline as the crawler yields them
+                    await self._feed_pipeline(
+                        self._iterate_results(result_container), pipeline, crawl_progress, job_id, progress_tracker
+                    )
+
+                    # Drain the remaining stages
+                    await pipeline.join()
+
+                    # Originals are persisted now, so their documents can take the aliases
+                    if deduplicator:
+                        crawl_progress['duplicate_count'] = deduplicator.alias_count
+                        await asyncio.to_thread(deduplicator.flush)
 
                 finally:
-                    # Cancel any remaining tasks
-                    for worker in workers:
-                        if not worker.done():
-                            worker.cancel()
-                    if not collector_task.done():
-                        collector_task.cancel()
+                    await pipeline.cancel()
+                    unregister_pipeline(job_id, pipeline)
+                    logger.info(f"Pipeline metrics for job {job_id}: {pipeline.snapshot()}")
 
                 skipped_count = crawl_progress.get('skipped_count', 0)
-                new_extraction_count = crawl_progress['processed_count'] - skipped_count
+                new_extraction_count = crawl_progress['processed_count'] - skipped_count - crawl_progress.get('failed_count', 0)
 
-                logger.info(f"Crawl completed. Total: {crawled_count}, new: {new_extraction_count}, skipped: {skipped_count}")
+                logger.info(
+                    f"Crawl completed. Total: {crawl_progress['crawled_count']}, new: {new_extraction_count}, "
+                    f"skipped: {skipped_count}, duplicates: {crawl_progress.get('duplicate_count', 0)}, "
+                    f"failed: {crawl_progress.get('failed_count', 0)}"
+                )
 
                 if skipped_count > 0 and logger.isEnabledFor(logging.DEBUG):
                     efficiency_pct = (skipped_count / crawl_progress['processed_count']) * 100
@@ -305,6 +251,9 @@ class PageCrawler:
             if "cancelled" not in error_msg.lower():
                 await record_failed_page(job_id, url, error_msg)
             return None
+        finally:
+            if revalidator:
+                await revalidator.close()
 
     async def crawl_multiple_urls(
         self,
@@ -312,6 +261,8 @@ class PageCrawler:
         job_id: str,
         job_config: dict[str, Any] | None = None,
         progress_tracker: Any | None = None,
+        result_sink: ResultSink | None = None,
+        retain_results: bool = True,
     ) -> list[CrawlResult]:
         """Crawl multiple URLs efficiently using arun_many.
         
@@ -320,9 +271,13 @@ class PageCrawler:
             job_id: Job ID for tracking
             job_config: Job configuration
             progress_tracker: Progress tracker instance
-            
+            result_sink: Optional callback that persists micro-batches of results
+                as they leave the pipeline
+            retain_results: Keep processed results in memory and return them; disable
+                when the sink persists them so memory stays bounded by the queue sizes
+
         Returns:
-            List of CrawlResult objects
+            List of CrawlResult objects (empty when not retained)
         """
         logger.info(f"Starting multi-URL crawl for {len(urls)} URLs with job_id: {job_id}")
 
@@ -338,20 +293,11 @@ class PageCrawler:
         # Get user agent from settings
         user_agent = self.settings.crawling.user_agent
 
-        all_results = []
+        all_results: list[CrawlResult] | None = [] if retain_results else None
+        revalidator = self._create_revalidator(job_config)
 
         try:
-            async with AsyncWebCrawler(config=self.browser_config) as crawler:
-                # Configure rate limiter and dispatcher for multi-URL crawling
-                max_concurrent = job_config.get("max_concurrent_crawls", get_settings().crawling.max_concurrent_crawls) if job_config else get_settings().crawling.max_concurrent_crawls
-
-                rate_limiter = RateLimiter(base_delay=(1.0, 2.0), max_delay=30.0, max_retries=4)
-                dispatcher = SemaphoreDispatcher(
-                    semaphore_count=5,
-                    max_session_permit=max_concurrent,
-                    rate_limiter=rate_limiter,
-                )
-
+            async with self._open_crawler(job_config) as crawler:
                 # Create crawler config for single page crawls (max_depth=0)
                 crawler_run_config = create_crawler_config(
                     max_depth=0,
@@ -361,29 +307,6 @@ class PageCrawler:
                     max_pages=job_config.get("max_pages") if job_config else None,
                 )
 
-                # Create queues for parallel processing
-                extraction_queue = asyncio.Queue()
-                processed_results = asyncio.Queue()
-
-                # Start extraction workers
-                llm_parallel_limit = int(os.getenv('CODE_LLM_NUM_PARALLEL', '5'))
-                extraction_semaphore = asyncio.Semaphore(llm_parallel_limit)
-
-                workers = []
-                for _i in range(llm_parallel_limit):
-                    worker = asyncio.create_task(
-                        self._extraction_worker(
-                            extraction_queue,
-                            processed_results,
-                            extraction_semaphore,
-                            job_id,
-                            0,  # depth is 0 for single page crawls
-                            progress_tracker,
-                            job_config
-                        )
-                    )
-                    workers.append(worker)
-
                 # Track progress
                 crawl_progress = {
                     'crawled_count': 0,
@@ -393,71 +316,54 @@ class PageCrawler:
                     'base_snippet_count': job_config.get('base_snippet_count', 0) if job_config else 0
                 }
 
-                # Result collector task
-                collector_task = asyncio.create_task(
-                    self._collect_results(processed_results, all_results, crawl_progress, progress_tracker, job_id)
+                deduplicator = await self._create_deduplicator(job_id)
+                hash_index = await self._create_hash_index(job_id, job_config, urls)
+                pipeline = self._build_pipeline(
+                    job_id, 0, job_config, progress_tracker, crawl_progress, all_results, result_sink,
+                    deduplicator, hash_index,
                 )
+                pipeline.start()
+                register_pipeline(job_id, pipeline)
 
                 try:
-                    # Use arun_many for efficient multi-URL crawling
-                    logger.info(f"Starting crawler.arun_many for {len(urls)} URLs")
-
-
-
-                    # Enable streaming in the config
-                    crawler_run_config.stream = True
-
-                    # arun_many returns either an async generator (when streaming) or a container
-                    logger.info("Calling arun_many with dispatcher...")
-                    results = await crawler.arun_many(urls, config=crawler_run_config)
-                    logger.info("arun_many completed successfully")
-
-                    # Check if results is iterable
-                    logger.info(f"Results type: {type(results)}")
-                    logger.info(f"Results has __aiter__: {hasattr(results, '__aiter__')}")
+                    # Pages the server reports unchanged skip browser rendering
+                    fetch_urls = urls
+                    if revalidator:
+                        unchanged = await revalidator.find_unchanged(urls)
+                        if unchanged:
+                            await self._feed_pipeline(
+                                self._iterate_results(list(unchanged.values())),
+                                pipeline, crawl_progress, job_id, progress_tracker,
+                            )
+                            fetch_urls = [u for u in urls if u not in unchanged]
 
-                    # Since we enabled streaming, we can iterate directly
-                    logger.info("Starting to iterate over results...")
-                    async for result in results:
-                        crawl_progress['crawled_count'] += 1
+                    if fetch_urls:
+                        # Use arun_many for efficient multi-URL crawling
+                        logger.info(f"Starting crawler.arun_many for {len(fetch_urls)} URLs")
 
-                        # Check if job is cancelled periodically
-                        if crawl_progress['crawled_count'] % 5 == 0:
-                            if await self._is_job_cancelled(job_id):
-                                logger.info(f"Crawl job {job_id} is cancelled - stopping crawl")
-                                raise asyncio.CancelledError("Job cancelled by user")
+                        # Enable streaming in the config
+                        crawler_run_config.stream = True
 
-                        # Queue result for extraction
-                        await extraction_queue.put(result)
+                        # arun_many returns an async generator when streaming
+                        results = await crawler.arun_many(fetch_urls, config=crawler_run_config)
 
-                        # Send progress update
-                        if progress_tracker and crawl_progress['crawled_count'] % 3 == 0:
-                            await progress_tracker.update_progress(
-                                job_id,
-                                processed_pages=crawl_progress['processed_count'],
-                                total_pages=crawl_progress['crawled_count'],
-                                documents_crawled=crawl_progress['processed_count'],
-                                send_notification=True
-                            )
-
-                    # Signal workers to stop
-                    for _ in workers:
-                        await extraction_queue.put(None)
+                        # Fetch stage: hand pages to the pipeline as they complete
+                        await self._feed_pipeline(
+                            self._iterate_results(results), pipeline, crawl_progress, job_id, progress_tracker
+                        )
 
-                    # Wait for all workers to complete
-                    await asyncio.gather(*workers)
+                    # Drain the remaining stages
+                    await pipeline.join()
 
-                    # Signal collector to stop
-                    await processed_results.put(None)
-                    await collector_task
+                    # Originals are persisted now, so their documents can take the aliases
+                    if deduplicator:
+                        crawl_progress['duplicate_count'] = deduplicator.alias_count
+                        await asyncio.to_thread(deduplicator.flush)
 
                 finally:
-                    # Cancel any remaining tasks
-                    for worker in workers:
-                        if not worker.done():
-                            worker.cancel()
-                    if not collector_task.done():
-                        collector_task.cancel()
+                    await pipeline.cancel()
+                    unregister_pipeline(job_id, pipeline)
+                    logger.info(f"Pipeline metrics for job {job_id}: {pipeline.snapshot()}")
 
                 logger.info(f"Multi-URL crawl completed. Processed {crawl_progress['processed_count']} pages, extracted {crawl_progress['snippets_extracted']} snippets")
 
@@ -468,10 +374,7 @@ class PageCrawler:
             raise
         except AttributeError as e:
             logger.error(f"AttributeError in multi-URL crawl: {e}", exc_info=True)
-            logger.error(f"Error details - Dispatcher type: {type(dispatcher) if 'dispatcher' in locals() else 'Not available'}")
-            logger.error(f"Available dispatcher methods: {[method for method in dir(dispatcher) if not method.startswith('_')]} if 'dispatcher' in locals() else 'Not available'")
-            for url in urls:
-                await record_failed_page(job_id, url, str(e))
+            await record_failed_pages_batch(job_id, urls, str(e), failure_class="extraction")
             return []
         except Exception as e:
             error_msg = str(e)
@@ -483,80 +386,244 @@ class PageCrawler:
                     "Playwright browsers not installed. "
                     "Run 'playwright install' or './setup.sh' to install required browsers."
                 )
-                for url in urls:
-                    await record_failed_page(job_id, url, detailed_error)
+                await record_failed_pages_batch(job_id, urls, detailed_error)
                 raise RuntimeError(detailed_error) from e
             
             logger.error(f"Error in multi-URL crawl: {e}", exc_info=True)
-            for url in urls:
-                await record_failed_page(job_id, url, error_msg)
+            await record_failed_pages_batch(job_id, urls, error_msg)
             return []
+        finally:
+            if revalidator:
+                await revalidator.close()
+
+    def _fetch_mode(self, job_config: dict[str, Any] | None) -> str:
+        """Fetch mode of a job: its metadata overrides the configured default."""
+        fetch_mode = (job_config or {}).get('metadata', {}).get('fetch_mode') or self.settings.crawling.fetch_mode
+        if fetch_mode not in FETCH_MODES:
+            logger.warning(f"Unknown fetch mode '{fetch_mode}', using the browser")
+            return "browser"
+        return fetch_mode
+
+    def _open_crawler(self, job_config: dict[str, Any] | None) -> Any:
+        """Create the crawler for a job's fetch mode (used as an async context manager).
+
+        Fetches of every mode are paced by the process-wide host scheduler.
+        """
+        crawling = self.settings.crawling
+        concurrency = (job_config or {}).get("max_concurrent_crawls", crawling.max_concurrent_crawls)
+        open_browser = functools.partial(self._open_browser, concurrency)
+
+        fetch_mode = self._fetch_mode(job_config)
+        if fetch_mode == "browser":
+            return open_browser()
+
+        return HTTPCrawler(
+            user_agent=crawling.user_agent,
+            timeout=crawling.http_fetch_timeout,
+            max_connections=crawling.http_max_connections,
+            browser_factory=open_browser if fetch_mode == "auto" else None,
+            scheduler=get_host_scheduler(),
+        )
+
+    @asynccontextmanager
+    async def _open_browser(self, concurrency: int) -> AsyncGenerator[ScheduledCrawler, None]:
+        """Lease a started browser from the pool, or launch a dedicated one."""
+        opener = self.browser_pool.lease() if self.browser_pool else AsyncWebCrawler(config=self.browser_config)
+        async with opener as crawler:
+            yield ScheduledCrawler(crawler, get_host_scheduler(), concurrency)
+
+    def _create_revalidator(self, job_config: dict[str, Any] | None) -> HTTPRevalidator | None:
+        """Create the conditional-request checker unless disabled or regenerating."""
+        crawling = self.settings.crawling
+        if not crawling.conditional_revalidation:
+            return None
+        if job_config and job_config.get('metadata', {}).get('ignore_hash'):
+            return None
+        return HTTPRevalidator(
+            user_agent=crawling.user_agent,
+            timeout=crawling.revalidation_timeout,
+            max_concurrent=crawling.revalidation_concurrency,
+            db_manager=self.db_manager,
+        )
+
+    async def _create_deduplicator(self, job_id: str) -> ContentDeduplicator | None:
+        """Create the job's duplicate-page map, seeded with its stored documents."""
+        if not self.settings.crawling.content_dedup:
+            return None
+        deduplicator = ContentDeduplicator(job_id, db_manager=self.db_manager)
+        await asyncio.to_thread(deduplicator.load)
+        return deduplicator
+
+    async def _create_hash_index(
+        self, job_id: str, job_config: dict[str, Any] | None, urls: list[str]
+    ) -> ContentHashIndex | None:
+        """Preload the stored content hashes of the start URLs and the job's documents.
+
+        Pages found beyond them during a deep crawl are checked one by one.
+        """
+        if job_config and job_config.get('metadata', {}).get('ignore_hash'):
+            return None
+        hash_index = ContentHashIndex(self.db_manager)
+        await asyncio.to_thread(hash_index.preload_crawl_job, job_id)
+        await asyncio.to_thread(hash_index.preload, urls)
+        return hash_index
 
     async def _is_job_cancelled(self, job_id: str) -> bool:
-        """Check if job is cancelled."""
-        with self.db_manager.session_scope() as session:
-            from ..database.models import CrawlJob
-            job = session.query(CrawlJob).filter_by(id=job_id).first()
-            if job:
-                is_cancelled = bool(job.status == "cancelled")
-                if logger.isEnabledFor(logging.DEBUG):
-                    logger.debug(f"Job {job_id} status: {job.status}, is_cancelled: {is_cancelled}")
-                return is_cancelled
-            else:
-                logger.warning(f"Job {job_id} not found in database")
-                return True  # If job not found, consider it cancelled to stop processing
+        """Check if job is cancelled (set by the cancellation bus, no query)."""
+        return get_cancellation_bus().is_cancelled(job_id)
 
-    async def _extraction_worker(
+    def _build_pipeline(
         self,
-        extraction_queue: asyncio.Queue,
-        processed_results: asyncio.Queue,
-        semaphore: asyncio.Semaphore,
         job_id: str,
         depth: int,
-        progress_tracker: Any | None = None,
-        job_config: dict[str, Any] | None = None
+        job_config: dict[str, Any] | None,
+        progress_tracker: Any | None,
+        crawl_progress: dict[str, int],
+        results: list[CrawlResult] | None,
+        result_sink: ResultSink | None,
+        deduplicator: ContentDeduplicator | None = None,
+        hash_index: ContentHashIndex | None = None,
+    ) -> StagedPipeline:
+        """Build the parse → describe → persist pipeline fed by the crawler.
+
+        Every stage queue is bounded, so when description or persistence falls
+        behind, the fetch loop blocks on submit and Crawl4AI's stream pauses.
+        """
+        crawling = self.settings.crawling
+        queue_size = resolve_queue_size(
+            crawling.pipeline_queue_size,
+            item_bytes=crawling.pipeline_page_size_kb * 1024,
+            stages=3,
+            memory_fraction=crawling.pipeline_memory_fraction,
+        )
+        logger.debug(f"Pipeline queue size for job {job_id}: {queue_size}")
+
+        async def parse(result: Any) -> CrawlResult | ParsedPage | None:
+            return await self._parse_crawl_result(
+                result, job_id, depth, job_config, deduplicator, hash_index
+            )
+
+        async def describe(page: ParsedPage) -> CrawlResult:
+            return await self._describe_page(page, job_id, job_config)
+
+        async def persist(batch: list[CrawlResult]) -> None:
+            await self._persist_results(
+                batch, results, crawl_progress, progress_tracker, job_id, result_sink
+            )
+
+        def dropped(stage: str) -> Callable[[Any, Exception], Awaitable[None]]:
+            async def on_error(item: Any, error: Exception) -> None:
+                items = item if isinstance(item, list) else [item]
+                await self._record_dropped(items, stage, error, job_id, crawl_progress)
+            return on_error
+
+        return StagedPipeline([
+            PipelineStage(
+                "parse", parse, workers=crawling.parse_workers, maxsize=queue_size, on_error=dropped("parse")
+            ),
+            PipelineStage(
+                "describe",
+                describe,
+                workers=self.settings.code_extraction.llm_num_parallel,
+                maxsize=queue_size,
+                accepts=lambda item: isinstance(item, ParsedPage),
+                on_error=dropped("describe"),
+            ),
+            PipelineStage(
+                "persist",
+                persist,
+                workers=1,
+                maxsize=queue_size,
+                batch_size=crawling.persist_batch_size,
+                on_error=dropped("persist"),
+            ),
+        ])
+
+    @staticmethod
+    async def _record_dropped(
+        items: list[Any], stage: str, error: Exception, job_id: str, crawl_progress: dict[str, int]
     ) -> None:
-        """Worker that extracts code from markdown content."""
-        if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"Extraction worker started for job {job_id}")
-        worker_id = id(asyncio.current_task())
-        logger.info(f"Extraction worker {worker_id} started")
-        while True:
-            try:
-                result = await extraction_queue.get()
-
-                if result is None:  # Shutdown signal
-                    break
-
-                # Process the crawl result (semaphore used internally for LLM calls)
-                logger.info(f"Worker {worker_id} processing: {result.url if hasattr(result, 'url') else 'unknown'}")
-                processed_result = await self._process_crawl_result_with_html_extraction(
-                    result, job_id, depth, llm_semaphore=semaphore, job_config=job_config, progress_tracker=progress_tracker
-                )
-                logger.info(f"Worker {worker_id} completed processing: {result.url if hasattr(result, 'url') else 'unknown'}")
+        """Record pages a failing pipeline stage dropped as failed pages."""
+        urls = [item.url for item in items if getattr(item, 'url', None)]
+        crawl_progress['processed_count'] += len(items)
+        crawl_progress['failed_count'] = crawl_progress.get('failed_count', 0) + len(items)
+        if urls:
+            await record_failed_pages_batch(
+                job_id, urls, f"Failed to {stage} page: {error}", failure_class="extraction"
+            )
 
-                if processed_result:
-                    await processed_results.put(processed_result)
+    @staticmethod
+    async def _iterate_results(result_container: Any) -> AsyncIterator[Any]:
+        """Yield crawl results from a streaming generator or a materialized container."""
+        if hasattr(result_container, '__aiter__'):
+            async for result in result_container:
+                yield result
+            return
+
+        if hasattr(result_container, 'results'):
+            results_list = result_container.results
+        elif isinstance(result_container, list):
+            results_list = result_container
+        else:
+            # Single result
+            results_list = [result_container]
 
-            except Exception as e:
-                logger.error(f"Error in extraction worker: {e}")
+        for result in results_list:
+            yield result
 
-    async def _collect_results(
+    async def _feed_pipeline(
         self,
-        processed_results: asyncio.Queue,
-        results: list[CrawlResult],
+        crawl_results: AsyncIterator[Any],
+        pipeline: StagedPipeline,
         crawl_progress: dict[str, int],
+        job_id: str,
         progress_tracker: Any | None,
-        job_id: str
     ) -> None:
-        """Collect processed results from workers and update progress."""
-        while True:
-            result = await processed_results.get()
+        """Fetch stage: submit pages to the pipeline as the crawler produces them."""
+        async for result in crawl_results:
+            crawl_progress['crawled_count'] += 1
+            crawled_count = crawl_progress['crawled_count']
 
-            if result is None:
-                break
+            # Checking costs nothing, so stop as soon as the job is cancelled
+            if await self._is_job_cancelled(job_id):
+                logger.info(f"Crawl job {job_id} is cancelled - stopping crawl")
+                raise asyncio.CancelledError("Job cancelled by user")
+
+            # Blocks while the parse queue is full, which throttles fetching
+            logger.debug(f"Queueing page {crawled_count} for parsing: {result.url if hasattr(result, 'url') else 'unknown'}")
+            await pipeline.submit(result)
+
+            # Send progress update for crawling
+            if progress_tracker and crawled_count % 3 == 0:  # Update every 3 pages
+                await progress_tracker.update_progress(
+                    job_id,
+                    processed_pages=crawl_progress['processed_count'],
+                    total_pages=crawled_count,
+                    documents_crawled=crawl_progress['processed_count'],
+                    send_notification=True
+                )
 
-            results.append(result)
+    async def _persist_results(
+        self,
+        batch: list[CrawlResult],
+        results: list[CrawlResult] | None,
+        crawl_progress: dict[str, int],
+        progress_tracker: Any | None,
+        job_id: str,
+        result_sink: ResultSink | None,
+    ) -> None:
+        """Persist stage: hand a micro-batch to the sink and update progress.
+
+        Results are only accumulated when ``results`` is a list; streaming crawls
+        pass None so each batch can be freed once the sink has written it.
+        """
+        if result_sink:
+            await result_sink(batch)
+
+        if results is not None:
+            results.extend(batch)
+
+        for result in batch:
             crawl_progress['processed_count'] += 1
 
             if result.metadata.get('existing_snippet_count'):
@@ -565,32 +632,44 @@ class PageCrawler:
             if result.metadata.get('content_unchanged'):
                 crawl_progress['skipped_count'] = crawl_progress.get('skipped_count', 0) + 1
 
-            if progress_tracker:
-                should_update = crawl_progress['processed_count'] - crawl_progress['last_ws_count'] >= 3
-                if should_update:
-                    crawl_progress['last_ws_count'] = crawl_progress['processed_count']
-                    await progress_tracker.update_progress(
-                        job_id,
-                        processed_pages=crawl_progress['processed_count'],
-                        total_pages=crawl_progress['crawled_count'],
-                        documents_crawled=crawl_progress['processed_count'],
-                        send_notification=True
-                    )
+        if progress_tracker:
+            should_update = crawl_progress['processed_count'] - crawl_progress['last_ws_count'] >= 3
+            if should_update:
+                crawl_progress['last_ws_count'] = crawl_progress['processed_count']
+                await progress_tracker.update_progress(
+                    job_id,
+                    processed_pages=crawl_progress['processed_count'],
+                    total_pages=crawl_progress['crawled_count'],
+                    documents_crawled=crawl_progress['processed_count'],
+                    send_notification=True
+                )
 
-    async def _process_crawl_result_with_html_extraction(
+    async def _parse_crawl_result(
         self,
         result: Any,
         job_id: str,
         depth: int,
-        llm_semaphore: asyncio.Semaphore | None = None,
         job_config: dict[str, Any] | None = None,
-        progress_tracker: Any | None = None
-    ) -> CrawlResult | None:
-        """Process a single crawl result with HTML extraction + LLM descriptions."""
+        deduplicator: ContentDeduplicator | None = None,
+        hash_index: ContentHashIndex | None = None,
+    ) -> CrawlResult | ParsedPage | None:
+        """Parse stage: validate a fetched page, detect changes and extract code blocks.
+
+        Returns a finished CrawlResult when no LLM work is needed (unchanged content,
+        no code blocks or LLM disabled), otherwise a ParsedPage for the describe stage.
+        Returns None for failed pages and for duplicates of a page seen under
+        another URL, which are recorded as aliases of it.
+        """
+        if isinstance(result, UnchangedPage):
+            return self._not_modified_result(result, depth)
+
         try:
             if not result.success:
                 logger.error(f"Failed to crawl {result.url}: {result.error_message}")
-                await record_failed_page(job_id, result.url, result.error_message)
+                await record_failed_page(
+                    job_id, result.url, result.error_message,
+                    status_code=getattr(result, "status_code", None),
+                )
                 return None
         except AttributeError as e:
             logger.error(f"Result object missing expected attributes: {e}")
@@ -626,12 +705,24 @@ class PageCrawler:
             # Extract all metadata including Open Graph tags
             page_metadata = result.metadata.copy()
 
+        # Keep the cache validators so a recrawl can revalidate instead of rendering
+        validators = extract_validators(getattr(result, 'response_headers', None))
+        if validators:
+            page_metadata[VALIDATORS_KEY] = validators
+
         # Calculate content hash from raw markdown for consistency
         content_hash = hashlib.md5(markdown_for_hash.encode("utf-8")).hexdigest()
 
         if logger.isEnabledFor(logging.DEBUG):
             logger.debug(f"Content hash for {result.url}: {content_hash[:8]}... (using raw_markdown)")
 
+        # The same page under another URL is not parsed or described again
+        if deduplicator:
+            original_url = deduplicator.check(result.url, content_hash)
+            if original_url:
+                logger.info(f"{result.url} duplicates {original_url}, recording it as an alias")
+                return None
+
         # Check if we should ignore hash (for regeneration)
         ignore_hash = False
         if job_config and isinstance(job_config, dict):
@@ -643,35 +734,38 @@ class PageCrawler:
 
         # Check if content has changed (skip ONLY if ignore_hash is False)
         if not ignore_hash:
-            with self.db_manager.session_scope() as session:
-                from ..database import check_content_hash
-                content_unchanged, existing_snippet_count = check_content_hash(
-                    session, result.url, content_hash
-                )
-
-                if content_unchanged:
-                    # Log at INFO level for retry jobs to track efficiency
-                    is_retry_job = job_config and job_config.get('metadata', {}).get('retry_of_job')
-                    if is_retry_job:
-                        logger.info(f"[RETRY EFFICIENCY] Content unchanged for {result.url} (hash: {content_hash[:8]}...), skipping extraction. Using {existing_snippet_count} existing snippets.")
-                    elif logger.isEnabledFor(logging.DEBUG):
-                        logger.debug(f"Content unchanged for {result.url}, skipping extraction. Using {existing_snippet_count} existing snippets.")
-
-                    return CrawlResult(
-                        url=result.url,
-                        title=title,
-                        content=markdown_content,
-                        content_hash=content_hash,
-                        code_blocks=[],
-                        metadata={
-                            "depth": page_depth,
-                            "content_unchanged": True,
-                            "existing_snippet_count": existing_snippet_count,
-                            "skipped_extraction": True,
-                            "is_retry": bool(is_retry_job),
-                            **page_metadata  # Include all extracted metadata
-                        }
+            if hash_index:
+                content_unchanged, existing_snippet_count = hash_index.check(result.url, content_hash)
+            else:
+                with self.db_manager.session_scope() as session:
+                    from ..database import check_content_hash
+                    content_unchanged, existing_snippet_count = check_content_hash(
+                        session, result.url, content_hash
                     )
+
+            if content_unchanged:
+                # Log at INFO level for retry jobs to track efficiency
+                is_retry_job = job_config and job_config.get('metadata', {}).get('retry_of_job')
+                if is_retry_job:
+                    logger.info(f"[RETRY EFFICIENCY] Content unchanged for {result.url} (hash: {content_hash[:8]}...), skipping extraction. Using {existing_snippet_count} existing snippets.")
+                elif logger.isEnabledFor(logging.DEBUG):
+                    logger.debug(f"Content unchanged for {result.url}, skipping extraction. Using {existing_snippet_count} existing snippets.")
+
+                return CrawlResult(
+                    url=result.url,
+                    title=title,
+                    content=markdown_content,
+                    content_hash=content_hash,
+                    code_blocks=[],
+                    metadata={
+                        "depth": page_depth,
+                        "content_unchanged": True,
+                        "existing_snippet_count": existing_snippet_count,
+                        "skipped_extraction": True,
+                        "is_retry": bool(is_retry_job),
+                        **page_metadata  # Include all extracted metadata
+                    }
+                )
         else:
             # When ignore_hash is True, we force extraction even if content hasn't changed
             logger.info(f"Force regeneration enabled for {result.url}, proceeding with extraction despite content hash")
@@ -776,19 +870,56 @@ class PageCrawler:
                 }
             )
         
-        # LLM extraction enabled - proceed with original logic
+        # LLM extraction enabled - hand off to the describe stage
+        return ParsedPage(
+            url=result.url,
+            title=title,
+            content=markdown_content,
+            content_hash=content_hash,
+            depth=page_depth,
+            code_blocks=html_blocks,
+            metadata=page_metadata,
+        )
+
+    @staticmethod
+    def _not_modified_result(page: UnchangedPage, depth: int) -> CrawlResult:
+        """Build the result for a page skipped because the server reported it unchanged."""
+        logger.debug(f"Not modified since last crawl: {page.url}, using {page.snippet_count} existing snippets")
+        return CrawlResult(
+            url=page.url,
+            title=page.title,
+            content="",
+            content_hash=page.content_hash,
+            code_blocks=[],
+            metadata={
+                "depth": page.metadata.get("depth", depth),
+                "content_unchanged": True,
+                "not_modified": True,
+                "existing_snippet_count": page.snippet_count,
+                "skipped_extraction": True,
+                **page.metadata,
+            },
+        )
+
+    async def _describe_page(
+        self, page: ParsedPage, job_id: str, job_config: dict[str, Any] | None = None
+    ) -> CrawlResult:
+        """Describe stage: generate LLM titles and descriptions for a parsed page."""
+        html_blocks = page.code_blocks
+        title = page.title
+        markdown_content = page.content
+        content_hash = page.content_hash
+        page_depth = page.depth
+        page_metadata = page.metadata
+        processed_blocks = []
+
         if logger.isEnabledFor(logging.DEBUG):
-            logger.debug(f"Generating LLM descriptions for {len(html_blocks)} code blocks from {result.url}")
+            logger.debug(f"Generating LLM descriptions for {len(html_blocks)} code blocks from {page.url}")
 
         # Keep phase as crawling during LLM work (it's part of the crawl process)
         # No phase update needed here - we stay in 'crawling' phase
 
         try:
-            # Use the provided semaphore or create one if not provided
-            if llm_semaphore is None:
-                llm_parallel_limit = int(os.getenv('CODE_LLM_NUM_PARALLEL', '5'))
-                llm_semaphore = asyncio.Semaphore(llm_parallel_limit)
-
             # Check for custom LLM configuration in job config
             custom_model = None
             custom_api_key = None
@@ -808,20 +939,44 @@ class PageCrawler:
                     if custom_base_url:
                         logger.debug(f"Using custom LLM base URL: {custom_base_url}")
 
-            # Initialize description generator with custom config if needed
-            if custom_api_key or custom_base_url or not self.description_generator:
+            # Reuse the generator while the job's LLM configuration is unchanged;
+            # HTTP clients are pooled per endpoint by the shared client registry
+            generator = self.description_generator
+            if not generator or (
+                generator.custom_api_key,
+                generator.custom_base_url,
+                generator.custom_model,
+            ) != (custom_api_key, custom_base_url, custom_model):
                 self.description_generator = LLMDescriptionGenerator(
                     api_key=custom_api_key,
                     base_url=custom_base_url,
                     model=custom_model
                 )
 
-            blocks_with_descriptions = await self.description_generator.generate_titles_and_descriptions_batch(
-                html_blocks, result.url, semaphore=llm_semaphore
-            )
+            # Blocks nearly identical to a described snippet reuse its description
+            reused = await self._find_near_duplicates(html_blocks)
+            new_blocks = [block for block, snippet in zip(html_blocks, reused, strict=True) if snippet is None]
+            if new_blocks:
+                await self.description_generator.generate_titles_and_descriptions_batch(
+                    new_blocks, page.url, job_id=job_id
+                )
 
             # Convert to the format expected by result processor
-            for block in blocks_with_descriptions:
+            for block, snippet in zip(html_blocks, reused, strict=True):
+                if snippet is not None:
+                    processed_blocks.append({
+                        'code': block.code,
+                        'language': block.language or snippet['language'] or 'text',
+                        'title': snippet['title'] or 'Code Block',
+                        'description': snippet['description'],
+                        'source_url': block.source_url,
+                        'metadata': {
+                            'extraction_method': 'near_duplicate',
+                            'near_duplicate_of': snippet['id'],
+                        }
+                    })
+                    continue
+
                 # Fallback: generate title from description if LLM didn't provide one
                 if not block.title and block.description:
                     # Use first few words of description as title
@@ -844,7 +999,7 @@ class PageCrawler:
 
 
             return CrawlResult(
-                url=result.url,
+                url=page.url,
                 title=title,
                 content=markdown_content,
                 content_hash=content_hash,
@@ -858,7 +1013,7 @@ class PageCrawler:
             )
 
         except Exception as e:
-            logger.error(f"Error generating descriptions for {result.url}: {e}")
+            logger.error(f"Error generating descriptions for {page.url}: {e}")
             # Fall back to blocks without descriptions
             fallback_blocks = []
             for block in html_blocks:
@@ -875,10 +1030,10 @@ class PageCrawler:
                 })
 
             if logger.isEnabledFor(logging.DEBUG):
-                logger.debug(f"Falling back to {len(fallback_blocks)} code blocks without descriptions for {result.url}")
+                logger.debug(f"Falling back to {len(fallback_blocks)} code blocks without descriptions for {page.url}")
 
             return CrawlResult(
-                url=result.url,
+                url=page.url,
                 title=title,
                 content=markdown_content,
                 content_hash=content_hash,
@@ -891,6 +1046,48 @@ class PageCrawler:
                 }
             )
 
+    async def _find_near_duplicates(self, blocks: list[ExtractedCodeBlock]) -> list[dict[str, Any] | None]:
+        """Find a described snippet nearly identical to each block.
+
+        Returns:
+            Title, description, language and id of the matching snippet per
+            block, or None where the block needs an LLM description
+        """
+        code_extraction = self.settings.code_extraction
+        if not code_extraction.near_duplicate_reuse or not blocks:
+            return [None] * len(blocks)
+
+        fingerprints = [(code_fingerprint(block.code), block.language) for block in blocks]
+        if all(fingerprint is None for fingerprint, _ in fingerprints):
+            return [None] * len(blocks)
+
+        def lookup() -> list[dict[str, Any] | None]:
+            with self.db_manager.session_scope() as session:
+                snippets = find_near_duplicate_snippets(
+                    session, fingerprints, code_extraction.near_duplicate_max_distance
+                )
+                return [
+                    {
+                        'id': snippet.id,
+                        'title': snippet.title,
+                        'description': snippet.description,
+                        'language': snippet.language,
+                    } if snippet else None
+                    for snippet in snippets
+                ]
+
+        try:
+            matches = await asyncio.to_thread(lookup)
+        except Exception as e:
+            logger.warning(f"Near-duplicate lookup failed, describing all blocks: {e}")
+            return [None] * len(blocks)
+
+        if logger.isEnabledFor(logging.DEBUG):
+            reused = sum(match is not None for match in matches)
+            if reused:
+                logger.debug(f"Reusing descriptions of {reused}/{len(blocks)} near-duplicate code blocks")
+        return matches
+
     def _extract_markdown_content(self, result: Any, for_hash: bool = False) -> str | None:
         """Extract markdown content from result.
         
@@ -0,0 +1,266 @@
+"""Staged processing pipeline with bounded queues between stages."""
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+# Shutdown signal; each worker consumes exactly one
+_STOP = object()
+
+
+@dataclass
+class StageMetrics:
+    """Counters and latency for one pipeline stage."""
+
+    processed: int = 0
+    failed: int = 0
+    calls: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    # Time producers spent waiting for room in this stage's queue
+    blocked_puts: int = 0
+    blocked_seconds: float = 0.0
+
+    def record(self, seconds: float, items: int = 1, failed: bool = False) -> None:
+        if failed:
+            self.failed += items
+        else:
+            self.processed += items
+        self.calls += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+
+    def record_blocked(self, seconds: float) -> None:
+        self.blocked_puts += 1
+        self.blocked_seconds += seconds
+
+
+class PipelineStage:
+    """One stage of a pipeline: a bounded input queue served by N workers."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: Callable[[Any], Awaitable[Any]],
+        workers: int = 1,
+        maxsize: int = 0,
+        batch_size: int = 1,
+        accepts: Callable[[Any], bool] | None = None,
+        on_error: Callable[[Any, Exception], Awaitable[None]] | None = None,
+    ):
+        """Initialize the stage.
+
+        Args:
+            name: Stage name used in metrics and logs
+            handler: Coroutine processing one item (or a list of items when batching);
+                its return value is forwarded to the next stage unless None
+            workers: Number of concurrent workers
+            maxsize: Input queue bound (0 for unbounded)
+            batch_size: Maximum items handed to the handler at once; batches are
+                formed from whatever is already queued, so they never wait to fill up
+            accepts: Optional predicate; items it rejects skip this stage
+            on_error: Optional coroutine called with the item (or batch) and the
+                exception when the handler fails, since the item is dropped
+        """
+        self.name = name
+        self.handler = handler
+        self.workers = max(1, workers)
+        self.batch_size = max(1, batch_size)
+        self.accepts = accepts
+        self.on_error = on_error
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize)
+        self.metrics = StageMetrics()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Get queue depth, throughput and latency for this stage."""
+        calls = self.metrics.calls
+        return {
+            "workers": self.workers,
+            "queue_depth": self.queue.qsize(),
+            "queue_maxsize": self.queue.maxsize,
+            "processed": self.metrics.processed,
+            "failed": self.metrics.failed,
+            "avg_seconds": round(self.metrics.total_seconds / calls, 3) if calls else 0.0,
+            "max_seconds": round(self.metrics.max_seconds, 3),
+            "blocked_puts": self.metrics.blocked_puts,
+            "blocked_seconds": round(self.metrics.blocked_seconds, 3),
+        }
+
+
+class StagedPipeline:
+    """Runs items through a sequence of stages connected by bounded queues.
+
+    A full queue blocks the producer of the previous stage, so memory stays
+    bounded by the queue sizes and a slow stage slows its producers instead of
+    letting work pile up.
+    """
+
+    def __init__(self, stages: list[PipelineStage]):
+        """Initialize the pipeline.
+
+        Args:
+            stages: Stages in processing order
+        """
+        self.stages = stages
+        self._tasks: list[list[asyncio.Task]] = []
+
+    def start(self) -> None:
+        """Start the workers of every stage."""
+        self._tasks = [
+            [asyncio.create_task(self._run_worker(index)) for _ in range(stage.workers)]
+            for index, stage in enumerate(self.stages)
+        ]
+
+    async def submit(self, item: Any) -> None:
+        """Feed an item into the first stage that accepts it (blocks while full)."""
+        await self._forward(0, item)
+
+    async def join(self) -> None:
+        """Drain every stage in order and stop the workers."""
+        for stage, tasks in zip(self.stages, self._tasks, strict=True):
+            for _ in tasks:
+                await stage.queue.put(_STOP)
+            await asyncio.gather(*tasks)
+
+    async def cancel(self) -> None:
+        """Cancel all workers without draining."""
+        tasks = [task for stage_tasks in self._tasks for task in stage_tasks]
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        """Get metrics for every stage."""
+        return {stage.name: stage.snapshot() for stage in self.stages}
+
+    async def _forward(self, start: int, item: Any) -> None:
+        for stage in self.stages[start:]:
+            if stage.accepts is None or stage.accepts(item):
+                if stage.queue.full():
+                    started = time.monotonic()
+                    await stage.queue.put(item)
+                    stage.metrics.record_blocked(time.monotonic() - started)
+                else:
+                    stage.queue.put_nowait(item)
+                return
+        # No remaining stage wants the item; it leaves the pipeline here
+
+    async def _run_worker(self, index: int) -> None:
+        stage = self.stages[index]
+        while True:
+            item = await stage.queue.get()
+            if item is _STOP:
+                return
+
+            if stage.batch_size == 1:
+                await self._handle(index, item)
+                continue
+
+            batch = [item]
+            stop_after = False
+            while len(batch) < stage.batch_size and not stage.queue.empty():
+                queued = stage.queue.get_nowait()
+                if queued is _STOP:
+                    stop_after = True
+                    break
+                batch.append(queued)
+
+            await self._handle(index, batch)
+            if stop_after:
+                return
+
+    async def _handle(self, index: int, item: Any) -> None:
+        stage = self.stages[index]
+        items = len(item) if stage.batch_size > 1 else 1
+        started = time.monotonic()
+        try:
+            output = await stage.handler(item)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stage.metrics.record(time.monotonic() - started, items, failed=True)
+            logger.error(f"Pipeline stage '{stage.name}' failed: {e}", exc_info=True)
+            if stage.on_error:
+                try:
+                    await stage.on_error(item, e)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as error:
+                    logger.error(f"Error handler of pipeline stage '{stage.name}' failed: {error}")
+            return
+
+        stage.metrics.record(time.monotonic() - started, items)
+        if output is not None:
+            await self._forward(index + 1, output)
+
+
+def resolve_queue_size(
+    configured: int,
+    item_bytes: int,
+    stages: int,
+    memory_fraction: float,
+    minimum: int = 4,
+    maximum: int = 500,
+) -> int:
+    """Size stage queues from config or from available memory.
+
+    Args:
+        configured: Configured queue size (0 to size from memory headroom)
+        item_bytes: Estimated memory held by one queued page
+        stages: Number of bounded queues sharing the budget
+        memory_fraction: Share of currently available memory the queues may hold
+        minimum: Lower bound for the adaptive size
+        maximum: Upper bound for the adaptive size
+
+    Returns:
+        Maximum items per stage queue
+    """
+    if configured > 0:
+        return configured
+
+    import psutil
+
+    budget = psutil.virtual_memory().available * memory_fraction
+    size = int(budget / (max(1, item_bytes) * max(1, stages)))
+    return max(minimum, min(maximum, size))
+
+
+# Pipelines currently running, keyed by job ID
+_active_pipelines: dict[str, list[StagedPipeline]] = {}
+
+
+def register_pipeline(job_id: str, pipeline: StagedPipeline) -> None:
+    """Make a running pipeline visible to status endpoints."""
+    _active_pipelines.setdefault(job_id, []).append(pipeline)
+
+
+def unregister_pipeline(job_id: str, pipeline: StagedPipeline) -> None:
+    """Remove a finished pipeline from the registry."""
+    pipelines = _active_pipelines.get(job_id, [])
+    if pipeline in pipelines:
+        pipelines.remove(pipeline)
+    if not pipelines:
+        _active_pipelines.pop(job_id, None)
+
+
+def get_pipeline_metrics(job_id: str | None = None) -> dict[str, Any]:
+    """Get stage metrics for running pipelines.
+
+    Args:
+        job_id: Limit to one job (None for all jobs)
+
+    Returns:
+        Mapping of job ID to the stage metrics of its running pipelines
+    """
+    jobs = [job_id] if job_id else list(_active_pipelines)
+    return {
+        key: [pipeline.snapshot() for pipeline in _active_pipelines[key]]
+        for key in jobs
+        if key in _active_pipelines
+    }
@@ -0,0 +1,265 @@
+"""In-memory, write-behind progress counters of running jobs.
+
+Progress updates arrive every few pages from every running crawl and upload.
+``ProgressAggregator`` keeps the latest counters and heartbeat of each job in
+memory, serves websocket payloads from there and writes the changed jobs to
+``crawl_jobs``/``upload_jobs`` with one ``UPDATE ... FROM (VALUES ...)`` per
+table on a fixed cadence instead of one transaction per update. Crawl jobs
+run by a queue worker are written only while ``worker_id`` still names that
+worker; when the update misses, the job's ``on_lost`` callback is called.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import case, cast, column, func, or_, update, values
+from sqlalchemy.dialects.postgresql import UUID
+
+from ..config import get_settings
+from ..database import CrawlJob, UploadJob, get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Column written for each progress field, per job table
+_COLUMNS: dict[type, dict[str, str]] = {
+    CrawlJob: {
+        "processed_pages": "processed_pages",
+        "total_pages": "total_pages",
+        "snippets_extracted": "snippets_extracted",
+        "documents_crawled": "documents_crawled",
+        "crawl_phase": "crawl_phase",
+        "heartbeat": "last_heartbeat",
+    },
+    UploadJob: {
+        "processed_pages": "processed_files",
+        "snippets_extracted": "snippets_extracted",
+        "heartbeat": "updated_at",
+    },
+}
+
+# Column naming the worker that owns a job, per job table
+_OWNER_COLUMNS: dict[type, str] = {CrawlJob: "worker_id"}
+
+COUNTERS = ("processed_pages", "total_pages", "snippets_extracted", "documents_crawled")
+
+
+@dataclass
+class JobProgress:
+    """Latest known progress of one job."""
+
+    model: type
+    counters: dict[str, int | None] = field(default_factory=lambda: dict.fromkeys(COUNTERS))
+    crawl_phase: str | None = "crawling"
+    # Phase set since the last flush (None leaves the stored phase unchanged)
+    pending_phase: str | None = None
+    heartbeat: datetime | None = None
+    dirty: bool = False
+    owner: str | None = None
+    on_lost: Callable[[], Any] | None = None
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            **{name: value or 0 for name, value in self.counters.items()},
+            "crawl_phase": self.crawl_phase,
+        }
+
+
+class ProgressAggregator:
+    """Coalesces job progress updates and flushes them in batches."""
+
+    def __init__(self, flush_interval: float | None = None, db_manager: Any | None = None):
+        """Initialize the aggregator.
+
+        Args:
+            flush_interval: Seconds between flushes (defaults to the setting)
+            db_manager: Database manager (defaults to the global one)
+        """
+        self.flush_interval = flush_interval or get_settings().crawling.progress_flush_interval
+        self.db_manager = db_manager or get_db_manager()
+        self._jobs: dict[str, JobProgress] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._flush_lock = asyncio.Lock()
+        self.flush_count = 0
+
+    def track(
+        self,
+        job_id: str,
+        model: type = CrawlJob,
+        owner: str | None = None,
+        on_lost: Callable[[], Any] | None = None,
+        **counters: int | None,
+    ) -> JobProgress:
+        """Start aggregating a job's progress.
+
+        Args:
+            job_id: Job ID
+            model: CrawlJob or UploadJob
+            owner: Worker that claimed the job; progress is only written while it owns the job
+            on_lost: Called once if a flush finds the job owned by another worker
+            **counters: Stored counter values the job resumes from (not flushed)
+        """
+        progress = JobProgress(model=model, owner=owner, on_lost=on_lost)
+        progress.counters.update({k: v for k, v in counters.items() if k in progress.counters})
+        self._jobs[job_id] = progress
+
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_loop())
+        return progress
+
+    def update(self, job_id: str, phase: str | None = None, **counters: int | None) -> JobProgress | None:
+        """Record new counter values; None leaves a counter unchanged.
+
+        Returns:
+            The job's progress, or None if the job is not tracked
+        """
+        progress = self._jobs.get(job_id)
+        if progress is None:
+            return None
+
+        for name, value in counters.items():
+            if value is not None:
+                progress.counters[name] = value
+        if phase:
+            progress.crawl_phase = phase
+            progress.pending_phase = phase
+        progress.heartbeat = datetime.utcnow()
+        progress.dirty = True
+        return progress
+
+    def heartbeat(self, job_id: str) -> None:
+        """Record that a job is alive."""
+        self.update(job_id)
+
+    def snapshot(self, job_id: str) -> dict[str, Any] | None:
+        """Get a job's counters and phase from memory."""
+        progress = self._jobs.get(job_id)
+        return progress.to_dict() if progress else None
+
+    async def release(self, job_id: str) -> None:
+        """Flush a job's pending progress and stop tracking it."""
+        if job_id in self._jobs:
+            await self.flush()
+            self._jobs.pop(job_id, None)
+
+        if not self._jobs and self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+            self._flush_task = None
+
+    async def flush(self) -> int:
+        """Write the progress of all changed jobs.
+
+        Returns:
+            Number of updated jobs
+        """
+        async with self._flush_lock:
+            pending: dict[type, list[tuple[str, JobProgress]]] = {}
+            for job_id, progress in self._jobs.items():
+                if progress.dirty:
+                    progress.dirty = False
+                    pending.setdefault(progress.model, []).append((job_id, progress))
+            if not pending:
+                return 0
+
+            rows = {
+                model: [self._row(job_id, progress) for job_id, progress in jobs]
+                for model, jobs in pending.items()
+            }
+            phases = {job_id: progress.pending_phase for jobs in pending.values() for job_id, progress in jobs}
+            try:
+                updated = await asyncio.to_thread(self._write, rows)
+            except Exception as e:
+                logger.error(f"Failed to flush progress of {sum(map(len, rows.values()))} jobs: {e}")
+                # Counters hold the latest values, so the next flush retries them
+                for jobs in pending.values():
+                    for _, progress in jobs:
+                        progress.dirty = True
+                return 0
+
+            self.flush_count += 1
+            for jobs in pending.values():
+                for job_id, progress in jobs:
+                    if progress.pending_phase == phases[job_id]:
+                        progress.pending_phase = None
+                    if progress.owner and uuid.UUID(str(job_id)) not in updated:
+                        self._lose(job_id, progress)
+            return sum(len(jobs) for jobs in pending.values())
+
+    def _lose(self, job_id: str, progress: JobProgress) -> None:
+        """Stop writing a job another worker took over and notify its runner."""
+        logger.warning(f"Worker {progress.owner} no longer owns job {job_id}")
+        self._jobs.pop(job_id, None)
+        if progress.on_lost:
+            progress.on_lost()
+
+    @staticmethod
+    def _row(job_id: str, progress: JobProgress) -> tuple:
+        columns = _COLUMNS[progress.model]
+        fields = {**progress.counters, "crawl_phase": progress.pending_phase, "heartbeat": progress.heartbeat}
+        row = (uuid.UUID(str(job_id)), *(fields[name] for name in columns))
+        return (*row, progress.owner) if progress.model in _OWNER_COLUMNS else row
+
+    def _write(self, rows: dict[type, list[tuple]]) -> set[uuid.UUID]:
+        """Write the rows of each table.
+
+        Returns:
+            IDs of the updated jobs
+        """
+        updated: set[uuid.UUID] = set()
+        with self.db_manager.session_scope() as session:
+            for model, model_rows in rows.items():
+                table = model.__table__
+                names = list(_COLUMNS[model].values())
+                owner = _OWNER_COLUMNS.get(model)
+                progress = values(
+                    column("id", UUID(as_uuid=True)),
+                    *(column(name, table.c[name].type) for name in names),
+                    *([column("owner", table.c[owner].type)] if owner else []),
+                    name="progress",
+                ).data(model_rows)
+                statement = update(table).where(table.c.id == progress.c.id)
+                if owner:
+                    # Jobs of a worker are only written while it still owns them
+                    statement = statement.where(
+                        or_(progress.c.owner.is_(None), table.c[owner] == progress.c.owner)
+                    )
+                # Unset counters keep their stored value
+                assignments = {
+                    name: func.coalesce(cast(progress.c[name], table.c[name].type), table.c[name])
+                    for name in names
+                }
+                if "crawl_phase" in assignments:
+                    # A late flush must not set a phase on a finished job
+                    assignments["crawl_phase"] = case(
+                        (table.c.status == "running", assignments["crawl_phase"]),
+                        else_=table.c.crawl_phase,
+                    )
+                result = session.execute(statement.values(assignments).returning(table.c.id))
+                updated.update(result.scalars().all())
+            session.commit()
+        return updated
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.sleep(self.flush_interval)
+                await self.flush()
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.error(f"Error in progress flush loop: {e}")
+
+
+_aggregator: ProgressAggregator | None = None
+
+
+def get_progress_aggregator() -> ProgressAggregator:
+    """Get the progress aggregator shared by all jobs."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = ProgressAggregator()
+    return _aggregator
@@ -0,0 +1,266 @@
+"""Cross-process fan-out of job progress events.
+
+Crawls may run in another process than the API serving the websocket client
+(``cli.py worker``, or several uvicorn workers), so progress is published to
+a ``ProgressBus`` instead of the local websocket hub. Every API process
+subscribes a handler that relays the events to its own websocket clients.
+
+``PostgresProgressBus`` sends events with ``NOTIFY crawl_progress`` from a
+background task, batching what was published since the last send and keeping
+only the latest running update of each job, and receives them on one
+``LISTEN`` connection. ``InMemoryProgressBus`` delivers within the process,
+for tests and single-process deployments.
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from collections.abc import Callable
+from typing import Any
+
+import psycopg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+
+from ..config import get_settings
+from ..database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = "crawl_progress"
+
+# NOTIFY payloads must stay below 8000 bytes
+MAX_PAYLOAD_BYTES = 7900
+
+# Events buffered while the database is unreachable before the oldest are dropped
+MAX_PENDING = 1000
+
+# Recent events InMemoryProgressBus keeps for inspection
+MAX_PUBLISHED = 1000
+
+# Seconds before the listener reconnects after losing its connection
+RECONNECT_DELAY = 5.0
+
+ProgressHandler = Callable[[str, str, dict[str, Any]], None]
+
+
+class ProgressBus(ABC):
+    """Publishes job progress events to the handlers of every subscribed process."""
+
+    def __init__(self) -> None:
+        self._handlers: list[ProgressHandler] = []
+
+    def add_handler(self, handler: ProgressHandler) -> None:
+        """Call `handler(job_id, status, data)` for every received event."""
+        if handler not in self._handlers:
+            self._handlers.append(handler)
+
+    def remove_handler(self, handler: ProgressHandler) -> None:
+        """Stop calling a handler."""
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    @abstractmethod
+    def publish(self, job_id: str, status: str, data: dict[str, Any]) -> None:
+        """Publish an event without waiting for its delivery."""
+
+    @abstractmethod
+    async def start(self) -> None:
+        """Start receiving events for the handlers of this process."""
+
+    @abstractmethod
+    async def close(self) -> None:
+        """Send what is pending and stop receiving events."""
+
+    def _deliver(self, job_id: str, status: str, data: dict[str, Any]) -> None:
+        for handler in list(self._handlers):
+            try:
+                handler(job_id, status, data)
+            except Exception as e:
+                logger.error(f"Progress handler failed for job {job_id}: {e}")
+
+
+class InMemoryProgressBus(ProgressBus):
+    """Delivers events to the handlers of this process only."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.published: deque[tuple[str, str, dict[str, Any]]] = deque(maxlen=MAX_PUBLISHED)
+
+    def publish(self, job_id: str, status: str, data: dict[str, Any]) -> None:
+        """Publish an event to the local handlers."""
+        self.published.append((job_id, status, data))
+        self._deliver(job_id, status, data)
+
+    async def start(self) -> None:
+        """Nothing to start: events are delivered as they are published."""
+
+    async def close(self) -> None:
+        """Nothing to send: events are delivered as they are published."""
+
+
+class PostgresProgressBus(ProgressBus):
+    """Fans events out to every process listening on the ``crawl_progress`` channel."""
+
+    def __init__(self, db_manager: Any | None = None, reconnect_delay: float = RECONNECT_DELAY):
+        """Initialize the bus.
+
+        Args:
+            db_manager: Database manager (defaults to the global one)
+            reconnect_delay: Seconds between listener connection attempts
+        """
+        super().__init__()
+        self.db_manager = db_manager or get_db_manager()
+        self.reconnect_delay = reconnect_delay
+        self._pending: OrderedDict[Any, str] = OrderedDict()
+        self._ready = asyncio.Event()
+        self._sender: asyncio.Task | None = None
+        self._listener: asyncio.Task | None = None
+        self._event_ids = itertools.count()
+        self.sent = 0
+        self.dropped = 0
+
+    def publish(self, job_id: str, status: str, data: dict[str, Any]) -> None:
+        """Queue an event for the next NOTIFY batch."""
+        payload = encode_event(job_id, status, data)
+        if payload is None:
+            logger.warning(f"Progress event of job {job_id} is too large to publish")
+            return
+
+        # A newer running update supersedes one that has not been sent yet
+        key = ("running", job_id) if status == "running" else next(self._event_ids)
+        self._pending.pop(key, None)
+        self._pending[key] = payload
+        if len(self._pending) > MAX_PENDING:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+        self._ready.set()
+        if self._sender is None or self._sender.done():
+            self._sender = asyncio.create_task(self._send_loop())
+
+    async def start(self) -> None:
+        """Start the listener relaying events to this process's handlers."""
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def close(self) -> None:
+        """Send pending events and stop the sender and listener."""
+        for task in (self._sender, self._listener):
+            if task and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+        self._sender = None
+        self._listener = None
+
+        if self._pending:
+            try:
+                await asyncio.to_thread(self._notify, list(self._pending.values()))
+            except Exception as e:
+                logger.error(f"Failed to publish {len(self._pending)} progress events: {e}")
+            self._pending.clear()
+
+    def _notify(self, payloads: list[str]) -> None:
+        with self.db_manager.session_scope() as session:
+            session.execute(
+                text("SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"),
+                {"channel": CHANNEL, "payloads": payloads},
+            )
+            session.commit()
+
+    async def _send_loop(self) -> None:
+        while True:
+            await self._ready.wait()
+            self._ready.clear()
+            if not self._pending:
+                continue
+
+            batch = self._pending
+            self._pending = OrderedDict()
+            try:
+                await asyncio.to_thread(self._notify, list(batch.values()))
+                self.sent += len(batch)
+            except asyncio.CancelledError:
+                self._requeue(batch)
+                raise
+            except Exception as e:
+                logger.error(f"Failed to publish {len(batch)} progress events: {e}")
+                self._requeue(batch)
+                await asyncio.sleep(self.reconnect_delay)
+                self._ready.set()
+
+    def _requeue(self, batch: OrderedDict[Any, str]) -> None:
+        # Events published meanwhile are newer than the failed batch
+        for key, payload in batch.items():
+            if key not in self._pending:
+                self._pending[key] = payload
+                self._pending.move_to_end(key, last=False)
+        while len(self._pending) > MAX_PENDING:
+            self._pending.popitem(last=False)
+            self.dropped += 1
+
+    def _conninfo(self) -> str:
+        url = make_url(self.db_manager.database_url).set(drivername="postgresql")
+        return url.render_as_string(hide_password=False)
+
+    async def _listen(self) -> None:
+        """Receive events on a dedicated connection, reconnecting as needed."""
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._conninfo(), autocommit=True) as conn:
+                    await conn.execute(f"LISTEN {CHANNEL}")
+                    logger.debug(f"Listening for progress events on channel {CHANNEL}")
+                    async for notify in conn.notifies():
+                        event = decode_event(notify.payload)
+                        if event is not None:
+                            self._deliver(*event)
+            except asyncio.CancelledError:
+                break
+            except Exception as e:
+                logger.warning(f"Progress listener disconnected: {e}")
+            await asyncio.sleep(self.reconnect_delay)
+
+
+def encode_event(job_id: str, status: str, data: dict[str, Any]) -> str | None:
+    """Serialize an event as a NOTIFY payload (None if it cannot fit).
+
+    Pipeline metrics are left out of events that would not fit otherwise.
+    """
+    event = {"job_id": str(job_id), "status": status, "data": data}
+    payload = json.dumps(event, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES and "pipeline" in data:
+        event["data"] = {key: value for key, value in data.items() if key != "pipeline"}
+        payload = json.dumps(event, default=str)
+    if len(payload.encode()) > MAX_PAYLOAD_BYTES:
+        return None
+    return payload
+
+
+def decode_event(payload: str) -> tuple[str, str, dict[str, Any]] | None:
+    """Parse a NOTIFY payload into (job_id, status, data)."""
+    try:
+        event = json.loads(payload)
+        return event["job_id"], event["status"], event.get("data") or {}
+    except (ValueError, KeyError, TypeError) as e:
+        logger.warning(f"Ignoring malformed progress event: {e}")
+        return None
+
+
+_bus: ProgressBus | None = None
+
+
+def get_progress_bus() -> ProgressBus:
+    """Get the progress bus of this process (selected by CRAWL_PROGRESS_BUS)."""
+    global _bus
+    if _bus is None:
+        if get_settings().crawling.progress_bus == "memory":
+            _bus = InMemoryProgressBus()
+        else:
+            _bus = PostgresProgressBus()
+    return _bus
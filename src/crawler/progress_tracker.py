@@ -2,29 +2,15 @@
 
 import asyncio
 import logging
+from collections.abc import Callable
 from datetime import datetime, timezone
 from typing import Any
 
+from ..database import CrawlJob
 from .job_manager import JobManager
-
-# Import at runtime to avoid circular imports
-_notify_crawl_update = None
-
-def _get_notify_function():
-    """Get the notify function, importing it lazily."""
-    global _notify_crawl_update
-    if _notify_crawl_update is None:
-        try:
-            from ..api.websocket import notify_crawl_update
-            _notify_crawl_update = notify_crawl_update
-        except ImportError as e:
-            logger.warning(f"Failed to import WebSocket notify function: {e}")
-            # Fallback function
-            async def dummy_notify(job_id: str, status: str, data: dict[str, Any]) -> None:
-                logger.debug(f"WebSocket notification skipped for job {job_id}: {status}")
-            _notify_crawl_update = dummy_notify
-    return _notify_crawl_update
-
+from .pipeline import get_pipeline_metrics
+from .progress_aggregator import ProgressAggregator, get_progress_aggregator
+from .progress_bus import ProgressBus, get_progress_bus
 
 logger = logging.getLogger(__name__)
 
@@ -36,21 +22,37 @@ WS_UPDATE_INTERVAL = 3  # pages
 class ProgressTracker:
     """Tracks crawl progress and sends notifications."""
 
-    def __init__(self, job_manager: JobManager):
+    def __init__(
+        self,
+        job_manager: JobManager,
+        job_model: type = CrawlJob,
+        aggregator: ProgressAggregator | None = None,
+        progress_bus: ProgressBus | None = None,
+    ):
         """Initialize progress tracker.
 
         Args:
             job_manager: Job manager instance
+            job_model: Table of the tracked jobs (CrawlJob or UploadJob)
+            aggregator: Write-behind progress store (defaults to the shared one)
+            progress_bus: Bus relaying updates to websocket clients (defaults to the shared one)
         """
         self.job_manager = job_manager
+        self.job_model = job_model
+        self.aggregator = aggregator or get_progress_aggregator()
+        self.progress_bus = progress_bus or get_progress_bus()
         self._heartbeat_tasks: dict[str, asyncio.Task] = {}
         self._tracking_info: dict[str, dict[str, Any]] = {}
 
-    async def start_tracking(self, job_id: str) -> None:
+    async def start_tracking(
+        self, job_id: str, owner: str | None = None, on_lost: Callable[[], Any] | None = None
+    ) -> None:
         """Start tracking progress for a job.
 
         Args:
             job_id: Job ID to track
+            owner: Worker that claimed the job; heartbeats are fenced on it
+            on_lost: Called when the heartbeat finds the job owned by another worker
         """
         # Cancel any existing task
         await self.stop_tracking(job_id)
@@ -58,6 +60,18 @@ class ProgressTracker:
         # Initialize tracking info for this job
         self._tracking_info[job_id] = {'phase': 'crawling'}
 
+        # Counters are kept in memory from here on; resumed jobs start from their stored values
+        job_status = self.job_manager.get_job_status(job_id) or {}
+        self.aggregator.track(
+            job_id,
+            self.job_model,
+            owner=owner,
+            on_lost=on_lost,
+            processed_pages=job_status.get("processed_pages", job_status.get("processed_files")),
+            total_pages=job_status.get("total_pages"),
+            snippets_extracted=job_status.get("snippets_extracted"),
+        )
+
         # Start new heartbeat task
         self._heartbeat_tasks[job_id] = asyncio.create_task(self._heartbeat_loop(job_id))
 
@@ -94,6 +108,9 @@ class ProgressTracker:
         if job_id in self._tracking_info:
             del self._tracking_info[job_id]
 
+        # Write the job's last counters
+        await self.aggregator.release(job_id)
+
     async def stop_all(self) -> None:
         """Stop all tracking tasks."""
         tasks = list(self._heartbeat_tasks.keys())
@@ -115,8 +132,8 @@ class ProgressTracker:
                     logger.info(f"Job {job_id} no longer active, stopping heartbeat")
                     break
 
-                # Update heartbeat
-                self.job_manager.update_heartbeat(job_id)
+                # Written with the next progress flush
+                self.aggregator.heartbeat(job_id)
 
             except asyncio.CancelledError:
                 break
@@ -146,25 +163,35 @@ class ProgressTracker:
             current_url: Current URL being processed
             send_notification: Whether to send WebSocket notification
         """
-        # Update job in database
-        self.job_manager.update_job_progress(
+        # Counters are written to the database by the aggregator's next flush
+        progress = self.aggregator.update(
             job_id,
+            phase=phase,
             processed_pages=processed_pages,
             total_pages=total_pages,
             snippets_extracted=snippets_extracted,
             documents_crawled=documents_crawled,
         )
+        if progress is None:
+            # Not tracked (no start_tracking call): write through
+            self.job_manager.update_job_progress(
+                job_id,
+                processed_pages=processed_pages,
+                total_pages=total_pages,
+                snippets_extracted=snippets_extracted,
+                documents_crawled=documents_crawled,
+            )
+            if phase:
+                self.job_manager.update_job_status(job_id, phase=phase)
 
         if phase:
-            self.job_manager.update_job_status(job_id, phase=phase)
             # Store phase in tracking info for heartbeat
             if job_id in self._tracking_info:
                 self._tracking_info[job_id]['phase'] = phase
 
         # Send WebSocket notification if requested
         if send_notification:
-            # Get job status instead of job object to avoid DetachedInstanceError
-            job_status = self.job_manager.get_job_status(job_id)
+            job_status = self.aggregator.snapshot(job_id) or self.job_manager.get_job_status(job_id)
             if job_status:
                 data = {
                     "urls_crawled": job_status.get("processed_pages", 0),
@@ -178,6 +205,11 @@ class ProgressTracker:
                 if current_url:
                     data["current_url"] = current_url
 
+                # Stage queue depth and backpressure of the running crawl pipelines
+                pipelines = get_pipeline_metrics(job_id).get(job_id)
+                if pipelines:
+                    data["pipeline"] = pipelines
+
                 # Calculate progress percentages
                 total_pages = job_status.get("total_pages", 0)
                 processed_pages = job_status.get("processed_pages", 0)
@@ -192,20 +224,19 @@ class ProgressTracker:
     async def send_update(self, job_id: str, status: str, data: dict[str, Any]) -> None:
         """Send WebSocket update notification.
 
+        The update is published to the progress bus, which relays it to the
+        websocket clients of every API process.
+
         Args:
             job_id: Job ID
             status: Job status
             data: Update data
         """
         try:
-            notify_func = _get_notify_function()
-            await notify_func(job_id, status, data)
-            logger.debug(f"[WEBSOCKET] Successfully sent update for job {job_id}: {status}")
+            self.progress_bus.publish(job_id, status, data)
+            logger.debug(f"[WEBSOCKET] Published update for job {job_id}: {status}")
         except Exception as e:
-            logger.error(f"[WEBSOCKET] Failed to send update for job {job_id}: {e}")
-            # Log specific error details for 403 errors
-            if "403" in str(e):
-                logger.error(f"[WEBSOCKET] 403 Forbidden error - possible authentication issue for job {job_id}")
+            logger.error(f"[WEBSOCKET] Failed to publish update for job {job_id}: {e}")
 
     async def send_completion(
         self, job_id: str, success: bool = True, error: str | None = None
@@ -217,6 +248,9 @@ class ProgressTracker:
             success: Whether job completed successfully
             error: Error message if failed
         """
+        # Write pending counters before reading the final state
+        await self.aggregator.flush()
+
         # Get job status instead of job object to avoid DetachedInstanceError
         job_status = self.job_manager.get_job_status(job_id)
         if not job_status:
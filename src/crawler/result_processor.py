@@ -1,15 +1,24 @@
 """Process crawl results and store in database."""
 
 import asyncio
+import hashlib
 import logging
 from datetime import datetime
 from typing import Any
 
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.orm import Session
 
 from ..config import get_settings
 from ..database import CodeSnippet, Document, get_db_manager
+from ..database.fingerprint import code_fingerprint
+from .failed_page_utils import (
+    get_failed_page_recorder,
+    record_failed_page,
+    record_failed_pages_batch,
+)
 from .markdown_utils import remove_markdown_links
+from .revalidation import VALIDATORS_KEY
 
 logger = logging.getLogger(__name__)
 
@@ -51,83 +60,91 @@ class ResultProcessor:
         Returns:
             Tuple of (document_id, snippet_count)
         """
-        snippet_count = 0
-
         with self.db_manager.session_scope() as session:
-            # Check if document exists
-            existing_doc = session.query(Document).filter_by(url=result.url).first()
-
-            # Check if we should ignore hash (for regeneration)
-            ignore_hash = False
-            if hasattr(result, 'metadata') and result.metadata:
-                # Check if job has ignore_hash flag
-                from ..database.models import CrawlJob
-                job = session.query(CrawlJob).filter_by(id=job_id).first()
-                if job and job.config and isinstance(job.config, dict):
-                    job_metadata = job.config.get('metadata', {})
-                    ignore_hash = job_metadata.get('ignore_hash', False)
+            doc_id, snippet_count = await self._store_result(
+                session, result, job_id, depth, self._ignore_hash(session, job_id)
+            )
+            self._clear_failed_pages(session, job_id, [result.url])
+            return doc_id, snippet_count
 
-            if existing_doc and existing_doc.content_hash == result.content_hash and not ignore_hash:
-                # Content unchanged and not ignoring hash - count existing snippets
-                existing_snippet_count = session.query(CodeSnippet).filter_by(document_id=existing_doc.id).count()
+    @staticmethod
+    def _ignore_hash(session: Session, job_id: str) -> bool:
+        """Whether the job regenerates pages even if their content is unchanged."""
+        from ..database.models import CrawlJob
 
-                # Check if this is a retry job for better logging
-                is_retry_job = False
-                if hasattr(result, 'metadata') and result.metadata:
-                    is_retry_job = result.metadata.get('is_retry', False)
+        job = session.query(CrawlJob).filter_by(id=job_id).first()
+        if job and job.config and isinstance(job.config, dict):
+            return bool(job.config.get('metadata', {}).get('ignore_hash', False))
+        return False
 
-                if is_retry_job:
-                    logger.info(f"[RETRY EFFICIENCY] Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets (avoiding redundant LLM calls)")
-                else:
-                    logger.debug(f"Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets")
-                return int(existing_doc.id), existing_snippet_count
+    async def _store_result(
+        self, session: Session, result: Any, job_id: str, depth: int, ignore_hash: bool
+    ) -> tuple[int, int]:
+        """Store a result's document and snippets in the session without committing.
 
-            # Create or update document
-            doc = self._create_or_update_document(session, result, job_id, depth, existing_doc)
-            session.commit()
+        Returns:
+            Tuple of (document_id, snippet_count)
+        """
+        # Check if document exists
+        existing_doc = session.query(Document).filter_by(url=result.url).first()
 
-            doc_id = int(doc.id)
+        if existing_doc and existing_doc.content_hash == result.content_hash and not ignore_hash:
+            # Content unchanged and not ignoring hash - count existing snippets
+            existing_snippet_count = session.query(CodeSnippet).filter_by(document_id=existing_doc.id).count()
 
-            # Check for auto-detect name
-            await self._check_auto_detect_name(session, job_id, result)
+            # Check if this is a retry job for better logging
+            is_retry_job = False
+            if hasattr(result, 'metadata') and result.metadata:
+                is_retry_job = result.metadata.get('is_retry', False)
 
-            # Process code blocks directly
-            if result.code_blocks:
-                try:
-                    # Delete old snippets only if we're about to create new ones
-                    # This happens AFTER document update but BEFORE creating new snippets
-                    if existing_doc:
-                        session.query(CodeSnippet).filter_by(document_id=existing_doc.id).delete()
-                        logger.info(f"Deleted old snippets for document {existing_doc.id}")
+            if is_retry_job:
+                logger.info(f"[RETRY EFFICIENCY] Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets (avoiding redundant LLM calls)")
+            else:
+                logger.debug(f"Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets")
+            self._update_page_metadata(existing_doc, result)
+            return int(existing_doc.id), existing_snippet_count
 
-                    snippet_count = await self._process_code_blocks(
-                        session, doc, result.code_blocks, result.url
-                    )
-                except Exception as e:
-                    # Roll back snippet deletion if processing fails
-                    logger.error(f"Failed to process code blocks for {result.url}: {e}")
-                    session.rollback()
-                    # Re-count existing snippets
-                    if existing_doc:
-                        snippet_count = session.query(CodeSnippet).filter_by(document_id=existing_doc.id).count()
-                        logger.info(f"Preserved {snippet_count} existing snippets after processing error")
-                    else:
-                        snippet_count = 0
-                    # Still update the document metadata even if snippet processing failed
-                    session.add(doc)
-                    session.commit()
+        # Create or update document
+        doc = self._create_or_update_document(session, result, job_id, depth, existing_doc)
+        doc_id = int(doc.id)
 
-            session.commit()
+        # Check for auto-detect name
+        await self._check_auto_detect_name(session, job_id, result)
 
-            # Remove from failed_pages if this URL was previously failed
-            from ..database import FailedPage
-            session.query(FailedPage).filter_by(
-                crawl_job_id=job_id,
-                url=result.url
-            ).delete()
-            session.commit()
+        snippet_count = 0
+        if result.code_blocks:
+            # Old snippets are only deleted together with a successful insert of the new ones
+            savepoint = session.begin_nested()
+            try:
+                if existing_doc:
+                    session.query(CodeSnippet).filter_by(document_id=existing_doc.id).delete()
+                    logger.info(f"Deleted old snippets for document {existing_doc.id}")
 
-            return doc_id, snippet_count
+                snippet_count = await self._process_code_blocks(
+                    session, doc, result.code_blocks, result.url
+                )
+                savepoint.commit()
+            except Exception as e:
+                logger.error(f"Failed to process code blocks for {result.url}: {e}")
+                savepoint.rollback()
+                # The document metadata is still updated; count the preserved snippets
+                if existing_doc:
+                    snippet_count = session.query(CodeSnippet).filter_by(document_id=existing_doc.id).count()
+                    logger.info(f"Preserved {snippet_count} existing snippets after processing error")
+
+        return doc_id, snippet_count
+
+    @staticmethod
+    def _clear_failed_pages(session: Session, job_id: str, urls: list[str]) -> None:
+        """Remove stored pages from the job's failed pages."""
+        from ..database import FailedPage
+
+        recorder = get_failed_page_recorder()
+        for url in urls:
+            recorder.discard(job_id, url)
+        session.query(FailedPage).filter(
+            FailedPage.crawl_job_id == job_id, FailedPage.url.in_(urls)
+        ).delete(synchronize_session=False)
 
     async def process_result(
         self, result: Any, job_id: str, depth: int  # CrawlResult
@@ -169,6 +186,7 @@ class ResultProcessor:
                     logger.info(f"[RETRY EFFICIENCY] Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets (avoiding redundant LLM calls)")
                 else:
                     logger.debug(f"Content unchanged for {result.url}, returning {existing_snippet_count} existing snippets")
+                self._update_page_metadata(existing_doc, result)
                 return int(existing_doc.id), existing_snippet_count
 
             # Log when ignoring hash
@@ -212,6 +230,7 @@ class ResultProcessor:
 
             # Remove from failed_pages if this URL was previously failed
             from ..database import FailedPage
+            get_failed_page_recorder().discard(job_id, result.url)
             session.query(FailedPage).filter_by(
                 crawl_job_id=job_id,
                 url=result.url
@@ -225,6 +244,10 @@ class ResultProcessor:
     ) -> tuple[int, int]:
         """Process a batch of results.
 
+        With pipeline processing the batch is written in one transaction, each
+        result in its own savepoint so one failing page does not discard the
+        others. Pages that cannot be stored are recorded as failed pages.
+
         Args:
             results: List of crawl results
             job_id: Job ID
@@ -233,6 +256,9 @@ class ResultProcessor:
         Returns:
             Tuple of (total_documents, total_snippets)
         """
+        if use_pipeline:
+            return await self._store_batch(results, job_id)
+
         total_documents = 0
         total_snippets = 0
 
@@ -240,17 +266,10 @@ class ResultProcessor:
         batch_size = 10
         for i in range(0, len(results), batch_size):
             batch = results[i : i + batch_size]
-            tasks = []
-
-            for result in batch:
-                if use_pipeline:
-                    coro = self.process_result_pipeline(
-                        result, job_id, result.metadata.get("depth", 0)
-                    )
-                else:
-                    coro = self.process_result(result, job_id, result.metadata.get("depth", 0))
-                task = asyncio.create_task(coro)
-                tasks.append(task)
+            tasks = [
+                asyncio.create_task(self.process_result(result, job_id, result.metadata.get("depth", 0)))
+                for result in batch
+            ]
 
             # Wait for batch completion with timeout
             logger.debug(f"Waiting for {len(tasks)} tasks to complete in batch {i // batch_size + 1}")
@@ -265,11 +284,15 @@ class ResultProcessor:
                 for task in tasks:
                     if not task.done():
                         task.cancel()
-                continue  # Skip this batch
+                await record_failed_pages_batch(
+                    job_id, [result.url for result in batch], "Storing the page timed out", failure_class="timeout"
+                )
+                continue
 
-            for br in batch_results:
+            for result, br in zip(batch, batch_results, strict=True):
                 if isinstance(br, Exception):
                     logger.error(f"Error processing result: {br}")
+                    await record_failed_page(job_id, result.url, f"Failed to store page: {br}", failure_class="other")
                 else:
                     doc_id, snippet_count = br
                     total_documents += 1
@@ -277,6 +300,41 @@ class ResultProcessor:
 
         return total_documents, total_snippets
 
+    async def _store_batch(self, results: list[Any], job_id: str) -> tuple[int, int]:
+        """Store a micro-batch of results in one transaction.
+
+        Returns:
+            Tuple of (total_documents, total_snippets)
+        """
+        total_documents = 0
+        total_snippets = 0
+        failed: dict[str, str] = {}
+
+        with self.db_manager.session_scope() as session:
+            ignore_hash = self._ignore_hash(session, job_id)
+            for result in results:
+                savepoint = session.begin_nested()
+                try:
+                    _, snippet_count = await self._store_result(
+                        session, result, job_id, result.metadata.get("depth", 0), ignore_hash
+                    )
+                    savepoint.commit()
+                except Exception as e:
+                    savepoint.rollback()
+                    logger.error(f"Error processing result {result.url}: {e}")
+                    failed[result.url] = str(e)
+                    continue
+                total_documents += 1
+                total_snippets += snippet_count
+
+            stored = [result.url for result in results if result.url not in failed]
+            if stored:
+                self._clear_failed_pages(session, job_id, stored)
+
+        for url, error in failed.items():
+            await record_failed_page(job_id, url, f"Failed to store page: {error}", failure_class="other")
+        return total_documents, total_snippets
+
     def _create_or_update_document(
         self,
         session: Session,
@@ -308,6 +366,7 @@ class ResultProcessor:
             doc.markdown_content = remove_markdown_links(result.content)
             doc.crawl_job_id = job_id
             doc.last_crawled = datetime.utcnow()
+            self._update_page_metadata(doc, result)
         else:
             # Create new
             doc = Document(
@@ -317,13 +376,29 @@ class ResultProcessor:
                 markdown_content=remove_markdown_links(result.content),
                 crawl_job_id=job_id,
                 crawl_depth=depth,
-                metadata=result.metadata,
+                parent_url=result.metadata.get("parent_url"),
+                meta_data=result.metadata,
             )
             session.add(doc)
 
         session.flush()  # Get doc.id
         return doc
 
+    @staticmethod
+    def _update_page_metadata(doc: Document, result: Any) -> None:
+        """Refresh the HTTP validators and parent link recorded for a document.
+
+        Recrawls revalidate pages with the stored validators, and deep crawls
+        follow the stored parent links of pages they do not render.
+        """
+        metadata = result.metadata or {}
+        validators = metadata.get(VALIDATORS_KEY)
+        if validators and (doc.meta_data or {}).get(VALIDATORS_KEY) != validators:
+            # Reassign so SQLAlchemy sees the JSONB change
+            doc.meta_data = {**(doc.meta_data or {}), VALIDATORS_KEY: validators}
+        if metadata.get("parent_url"):
+            doc.parent_url = metadata["parent_url"]
+
     async def _check_auto_detect_name(
         self, session: Session, job_id: str, result: Any  # CrawlResult
     ) -> None:
@@ -351,7 +426,7 @@ class ResultProcessor:
                 job.name = detected_name
                 # Mark as detected to avoid future updates
                 job.config['name_detected'] = True
-                session.commit()
+                session.flush()
 
     async def _extract_site_name(
         self, title: str, url: str, metadata: dict[str, Any] | None = None,
@@ -396,11 +471,15 @@ class ResultProcessor:
 
         # Try LLM extraction if available
         if self.settings.code_extraction.llm_api_key and (title or content):
+            from .llm_retry import LLMDescriptionGenerator
+            from .llm_scheduler import get_llm_scheduler
+
+            # Leased, since the scheduler may hold the request back for a while
+            client = None
             try:
-                from .llm_retry import LLMDescriptionGenerator
-                llm_generator = LLMDescriptionGenerator()
+                client = LLMDescriptionGenerator().acquire_client()
 
-                if llm_generator.client:
+                if client:
                     # Create a focused prompt for name extraction
                     prompt = f"""Extract the library/framework name from this documentation page.
 
@@ -412,12 +491,14 @@ Respond with ONLY the library/framework name (e.g., "React", "Next.js", "Django"
 Do not include words like "Documentation", "Docs", "Guide", etc.
 If you cannot determine the name, respond with "UNKNOWN"."""
 
-                    response = await llm_generator.client.chat.completions.create(
-                        model=self.settings.code_extraction.llm_extraction_model,
-                        messages=[{"role": "user", "content": prompt}],
-                        temperature=0.1,
-                        max_tokens=50
-                    )
+                    async with get_llm_scheduler().request(None, prompt, max_tokens=50) as ticket:
+                        response = await client.chat.completions.create(
+                            model=self.settings.code_extraction.llm_extraction_model,
+                            messages=[{"role": "user", "content": prompt}],
+                            temperature=0.1,
+                            max_tokens=50
+                        )
+                        ticket.record_response(response)
 
                     extracted_name = response.choices[0].message.content.strip()
                     if extracted_name and extracted_name != "UNKNOWN" and len(extracted_name) <= 50:
@@ -425,6 +506,8 @@ If you cannot determine the name, respond with "UNKNOWN"."""
                         return extracted_name
             except Exception as e:
                 logger.warning(f"LLM name extraction failed: {e}")
+            finally:
+                LLMDescriptionGenerator.release_client(client)
 
         # Fallback to simple extraction logic
         if title:
@@ -472,12 +555,14 @@ If you cannot determine the name, respond with "UNKNOWN"."""
         return None
 
 
-# Improved _process_code_blocks method with better deduplication tracking
-
     async def _process_code_blocks(
         self, session: Session, doc: Document, code_blocks: list[Any], source_url: str
     ) -> int:
-        """Process code blocks and store directly.
+        """Process code blocks and store them with a single bulk insert.
+
+        Duplicates within the page and within the document's source are filtered
+        with one hash lookup, and new snippets are written with one multi-row
+        ``INSERT ... ON CONFLICT DO NOTHING RETURNING id``.
 
         Args:
             session: Database session
@@ -488,19 +573,26 @@ If you cannot determine the name, respond with "UNKNOWN"."""
         Returns:
             Number of NEW unique snippets created (not including duplicates)
         """
-        new_snippet_count = 0
         duplicate_count = 0
         skipped_count = 0
 
         logger.info(f"Processing {len(code_blocks)} code blocks for document {doc.url}")
 
-        # First, extract all block data and prepare for concurrent formatting
-        blocks_to_format = []
+        # Map purpose to snippet_type
+        snippet_type_map = {
+            'example': 'example',
+            'configuration': 'config',
+            'api_reference': 'code',
+            'tutorial': 'example',
+            'utility': 'function',
+            'test': 'code'
+        }
+        now = datetime.utcnow()
 
-        for i, block in enumerate(code_blocks):
-            # Debug log the block structure
-            logger.debug(f"Processing block {i}: type={type(block)}, has_dict_methods={hasattr(block, 'get')}")
+        # Rows keyed by code hash, which also drops repeats within the page
+        rows: dict[str, dict[str, Any]] = {}
 
+        for i, block in enumerate(code_blocks):
             # Handle both dict (from LLM) and object (from default) formats
             if isinstance(block, dict):
                 content = block.get('code', '')
@@ -510,8 +602,6 @@ If you cannot determine the name, respond with "UNKNOWN"."""
                 metadata = block.get('metadata', {})
                 filename = block.get('filename')
             else:
-                # Handle object format - check what attributes it has
-                logger.debug(f"Block is object type, checking attributes: {dir(block)}")
                 content = getattr(block, 'code', '')
                 language = getattr(block, 'language', 'text')
                 title = getattr(block, 'title', '')
@@ -525,96 +615,64 @@ If you cannot determine the name, respond with "UNKNOWN"."""
                 skipped_count += 1
                 continue
 
-            # Add to blocks to format
-            blocks_to_format.append({
-                'index': i,
-                'content': content,
-                'language': language,
-                'title': title,
-                'description': description,
-                'metadata': metadata,
-                'filename': filename
-            })
-
-        # No formatting - use original content
-        processed_blocks = blocks_to_format
-
-        # Now process all formatted blocks
-        import hashlib
-
-        for block_data in processed_blocks:
-            content = block_data['content']
-            title = block_data['title']
-            description = block_data['description']
-            language = block_data['language']
-            metadata = block_data['metadata']
-            filename = block_data['filename']
-
             # Calculate hash for deduplication
             code_hash = hashlib.md5(content.encode()).hexdigest()
+            if code_hash in rows:
+                duplicate_count += 1
+                continue
 
-            # Map purpose to snippet_type
-            purpose = metadata.get('purpose', 'code')
-            snippet_type_map = {
-                'example': 'example',
-                'configuration': 'config',
-                'api_reference': 'code',
-                'tutorial': 'example',
-                'utility': 'function',
-                'test': 'code'
-            }
-            snippet_type = snippet_type_map.get(purpose, 'code')
-
-            # Build simplified metadata
-            full_metadata = {
-                'filename': filename,
-                'extraction_method': metadata.get('extraction_method'),
+            metadata = metadata or {}
+            rows[code_hash] = {
+                'document_id': doc.id,
+                'title': title,
+                'description': description,
+                'language': language,
+                'code_content': content,
+                'code_hash': code_hash,
+                'simhash': code_fingerprint(content),
+                'section_title': metadata.get('section'),
+                'functions': [],
+                'imports': [],
+                'keywords': [],
+                'snippet_type': snippet_type_map.get(metadata.get('purpose', 'code'), 'code'),
+                'source_url': source_url,
+                'meta_data': {
+                    'filename': filename,
+                    'extraction_method': metadata.get('extraction_method'),
+                    'near_duplicate_of': metadata.get('near_duplicate_of'),
+                },
+                'created_at': now,
+                'updated_at': now,
             }
 
-            # Create snippet with all LLM data
-            snippet = CodeSnippet(
-                document_id=doc.id,
-                title=title,
-                description=description,
-                language=language,
-                code_content=content,
-                code_hash=code_hash,
-                line_start=None,
-                line_end=None,
-                context_before=None,
-                context_after=None,
-                section_title=metadata.get('section'),
-                section_content=None,
-                functions=[],
-                imports=[],
-                keywords=[],
-                snippet_type=snippet_type,
-                source_url=source_url,
-                metadata=full_metadata,
+        new_snippet_count = 0
+        if rows:
+            # Check for duplicates within the same source (crawl or upload job) in one query
+            from ..database.content_check import (
+                find_duplicate_hashes_in_source,
+                index_snippet_fingerprints,
             )
+            existing_hashes = find_duplicate_hashes_in_source(session, list(rows), doc)
+            new_rows = [row for code_hash, row in rows.items() if code_hash not in existing_hashes]
+            duplicate_count += len(rows) - len(new_rows)
+
+            if new_rows:
+                stmt = (
+                    pg_insert(CodeSnippet)
+                    .values(new_rows)
+                    .on_conflict_do_nothing(constraint="unique_code_per_document")
+                    .returning(CodeSnippet.id, CodeSnippet.simhash)
+                )
+                inserted = session.execute(stmt).all()
+                new_snippet_count = len(inserted)
+                index_snippet_fingerprints(session, [(row.id, row.simhash) for row in inserted])
 
-            # Check for duplicate within the same source (crawl or upload job)
-            from ..database.content_check import find_duplicate_snippet_in_source
-            existing = find_duplicate_snippet_in_source(session, snippet.code_hash, doc)
-
-            if not existing:
-                session.add(snippet)
-                session.flush()  # Flush to get the ID
-                new_snippet_count += 1
-                logger.debug(f"Added unique snippet: {title} (language: {language})")
-            else:
-                # Found duplicate within same source
-                duplicate_count += 1
-                logger.debug(f"Found duplicate in same source: {title}")
-
-        # Commit snippets
-        session.commit()
+        # The caller commits, so a page's snippets are written with its batch
+        session.flush()
 
-        # Log comprehensive statistics
-        len(processed_blocks)
-        logger.debug(f"Processed {len(code_blocks)} blocks for document {doc.id}: {new_snippet_count} new, {duplicate_count} duplicates")
+        logger.debug(
+            f"Processed {len(code_blocks)} blocks for document {doc.id}: {new_snippet_count} new, "
+            f"{duplicate_count} duplicates, {skipped_count} empty"
+        )
 
         return new_snippet_count
-
-
-
@@ -0,0 +1,180 @@
+"""Background retries of failed pages.
+
+Transient failures (timeouts, 5xx, network errors) are recorded with a
+``next_retry_at`` that backs off exponentially with jitter. ``RetryScheduler``
+periodically claims due pages with ``SELECT ... FOR UPDATE SKIP LOCKED``,
+takes at most the per-host concurrency of each host and skips hosts the
+``HostScheduler`` is currently backing off from, then re-fetches them through
+the job's regular pipeline, during and after the crawl. Claims are leases: a
+retry that never reports back is picked up again once the lease expires.
+"""
+
+import asyncio
+import logging
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import update
+
+from ..config import get_settings
+from ..database import CrawlJob, FailedPage, get_db_manager
+from .crawl_manager import CrawlManager
+from .host_scheduler import HostScheduler, get_host_scheduler
+from .job_manager import CANCELLED_MESSAGE
+
+logger = logging.getLogger(__name__)
+
+# Seconds a claimed retry may take before another scheduler claims it again
+CLAIM_LEASE = 600
+
+
+class RetryScheduler:
+    """Retries due failed pages, grouped per job and paced per host."""
+
+    def __init__(
+        self,
+        crawl_manager: CrawlManager | None = None,
+        host_scheduler: HostScheduler | None = None,
+        poll_interval: float | None = None,
+        batch_size: int | None = None,
+        db_manager: Any | None = None,
+    ):
+        """Initialize the scheduler.
+
+        Args:
+            crawl_manager: Re-fetches claimed pages (a new CrawlManager by default)
+            host_scheduler: Politeness state of hosts (defaults to the shared one)
+            poll_interval: Seconds between checks for due pages (defaults to the setting)
+            batch_size: Pages retried per check (defaults to the setting)
+            db_manager: Database manager (defaults to the global one)
+        """
+        crawling = get_settings().crawling
+        self.crawl_manager = crawl_manager or CrawlManager()
+        self.host_scheduler = host_scheduler or get_host_scheduler()
+        self.poll_interval = poll_interval or crawling.retry_poll_interval
+        self.batch_size = batch_size or crawling.retry_batch_size
+        self.db_manager = db_manager or get_db_manager()
+        self.running = False
+        self.retried = 0
+
+    async def start(self) -> None:
+        """Retry due pages until stopped."""
+        self.running = True
+        logger.info("Starting failed page retry scheduler")
+
+        while self.running:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Error in retry scheduler: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def stop(self) -> None:
+        """Stop the retry loop."""
+        logger.info("Stopping failed page retry scheduler")
+        self.running = False
+
+    async def run_once(self) -> int:
+        """Claim due pages and retry them.
+
+        Returns:
+            Number of claimed pages
+        """
+        lease_until = datetime.utcnow() + timedelta(seconds=CLAIM_LEASE)
+        claimed = await asyncio.to_thread(self.claim_due, lease_until)
+        if not claimed:
+            return 0
+
+        results = await asyncio.gather(
+            *(self.crawl_manager.retry_pages(job_id, urls) for job_id, urls in claimed.items()),
+            return_exceptions=True,
+        )
+        finished = {}
+        for (job_id, urls), result in zip(claimed.items(), results, strict=True):
+            if isinstance(result, BaseException):
+                logger.error(f"Retrying failed pages of job {job_id} failed: {result}")
+            else:
+                finished[job_id] = urls
+
+        # Pages a finished retry neither recovered nor recorded as failed again
+        # (skipped as duplicates, for example) are not retried again
+        if finished:
+            await asyncio.to_thread(self._end_leases, finished, lease_until)
+
+        count = sum(len(urls) for urls in claimed.values())
+        self.retried += count
+        return count
+
+    def claim_due(self, lease_until: datetime) -> dict[str, list[str]]:
+        """Claim failed pages due for a retry.
+
+        Args:
+            lease_until: When the claims expire
+
+        Returns:
+            Claimed URLs per job ID
+        """
+        with self.db_manager.session_scope() as session:
+            candidates = (
+                session.query(FailedPage)
+                .join(CrawlJob, FailedPage.crawl_job_id == CrawlJob.id)
+                .filter(
+                    FailedPage.next_retry_at <= datetime.utcnow(),
+                    CrawlJob.status.in_(("running", "completed")),
+                    CrawlJob.error_message.is_distinct_from(CANCELLED_MESSAGE),
+                )
+                .order_by(FailedPage.next_retry_at)
+                # Room for pages of hosts that are skipped below
+                .limit(self.batch_size * 4)
+                .with_for_update(of=FailedPage, skip_locked=True)
+                .all()
+            )
+
+            per_host: Counter[str] = Counter()
+            claimed: dict[str, list[str]] = {}
+            for page in candidates:
+                if sum(per_host.values()) >= self.batch_size:
+                    break
+                host = self.host_scheduler.host_of(page.url)
+                # Hosts that are throttling us are left alone until they recover
+                if per_host[host] >= self.host_scheduler.per_host_limit or self.host_scheduler.is_backing_off(page.url):
+                    continue
+                per_host[host] += 1
+                page.next_retry_at = lease_until
+                claimed.setdefault(str(page.crawl_job_id), []).append(page.url)
+
+            session.commit()
+
+        if claimed:
+            logger.info(
+                f"Retrying {sum(per_host.values())} failed pages of {len(claimed)} jobs on {len(per_host)} hosts"
+            )
+        return claimed
+
+    def _end_leases(self, claimed: dict[str, list[str]], lease_until: datetime) -> None:
+        with self.db_manager.session_scope() as session:
+            for job_id, urls in claimed.items():
+                session.execute(
+                    update(FailedPage)
+                    .where(
+                        FailedPage.crawl_job_id == job_id,
+                        FailedPage.url.in_(urls),
+                        FailedPage.next_retry_at == lease_until,
+                    )
+                    .values(next_retry_at=None)
+                )
+            session.commit()
+
+
+_retry_scheduler: RetryScheduler | None = None
+
+
+def get_retry_scheduler() -> RetryScheduler:
+    """Get the process-wide retry scheduler."""
+    global _retry_scheduler
+    if _retry_scheduler is None:
+        _retry_scheduler = RetryScheduler()
+    return _retry_scheduler
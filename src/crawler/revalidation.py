@@ -0,0 +1,227 @@
+"""Conditional HTTP revalidation of previously crawled pages.
+
+Pages are stored with the ``ETag``, ``Last-Modified`` and ``Content-Length``
+headers they were served with. On a recrawl a conditional ``HEAD`` request
+(``If-None-Match``/``If-Modified-Since``) tells whether the page changed, so
+unchanged pages can skip browser rendering entirely.
+"""
+
+import asyncio
+import logging
+from collections.abc import Mapping
+from dataclasses import dataclass, field
+from typing import Any
+
+import httpx
+from sqlalchemy import func, select
+
+from ..database import get_db_manager
+from ..database.models import CodeSnippet, Document
+
+logger = logging.getLogger(__name__)
+
+# Key under which validators are kept in Document.meta_data
+VALIDATORS_KEY = "http_validators"
+
+_VALIDATOR_HEADERS = (
+    ("etag", "etag"),
+    ("last-modified", "last_modified"),
+    ("content-length", "content_length"),
+)
+
+
+@dataclass
+class UnchangedPage:
+    """Previously crawled page the server reported as not modified."""
+
+    url: str
+    title: str
+    content_hash: str
+    snippet_count: int
+    children: list[str] = field(default_factory=list)
+    metadata: dict[str, Any] = field(default_factory=dict)
+    success: bool = True
+
+
+def extract_validators(headers: Mapping[str, Any] | None) -> dict[str, str]:
+    """Pick the cache validators out of response headers.
+
+    Args:
+        headers: Response headers (any casing)
+
+    Returns:
+        Dict with ``etag``, ``last_modified`` and ``content_length`` when present
+    """
+    if not headers:
+        return {}
+
+    lowered = {str(name).lower(): value for name, value in headers.items()}
+    return {
+        key: str(lowered[header])
+        for header, key in _VALIDATOR_HEADERS
+        if lowered.get(header)
+    }
+
+
+def is_unchanged(stored: Mapping[str, str], status_code: int, headers: Mapping[str, Any]) -> bool:
+    """Decide from a revalidation response whether the page is unchanged.
+
+    A 304 is authoritative. Servers that ignore conditional headers answer 200;
+    then the returned validators are compared with the stored ones, preferring
+    the ETag. ``Last-Modified`` only has one-second resolution, so it is
+    combined with the content length when both are known.
+    """
+    if status_code == 304:
+        return True
+    if status_code != 200:
+        return False
+
+    current = extract_validators(headers)
+    if stored.get("etag") and current.get("etag"):
+        return stored["etag"] == current["etag"]
+    if stored.get("last_modified") and current.get("last_modified"):
+        if stored["last_modified"] != current["last_modified"]:
+            return False
+        if stored.get("content_length") and current.get("content_length"):
+            return stored["content_length"] == current["content_length"]
+        return True
+    return False
+
+
+class HTTPRevalidator:
+    """Checks stored pages against the server with conditional requests."""
+
+    def __init__(
+        self,
+        user_agent: str | None = None,
+        timeout: float = 10.0,
+        max_concurrent: int = 10,
+        db_manager: Any | None = None,
+    ):
+        """Initialize the revalidator.
+
+        Args:
+            user_agent: User agent sent with the requests
+            timeout: Timeout per request in seconds
+            max_concurrent: Maximum requests in flight
+            db_manager: Database manager (defaults to the global one)
+        """
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.db_manager = db_manager or get_db_manager()
+        self._semaphore = asyncio.Semaphore(max(1, max_concurrent))
+        self._client: httpx.AsyncClient | None = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            headers = {"User-Agent": self.user_agent} if self.user_agent else None
+            self._client = httpx.AsyncClient(timeout=self.timeout, follow_redirects=True, headers=headers)
+        return self._client
+
+    async def close(self) -> None:
+        """Close the underlying HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def check(self, url: str, validators: Mapping[str, str]) -> bool:
+        """Send a conditional request for a URL.
+
+        Args:
+            url: Page URL
+            validators: Validators stored from the previous crawl
+
+        Returns:
+            True if the page is unchanged; any error counts as changed
+        """
+        headers = {}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        if not headers:
+            return False
+
+        client = self._get_client()
+        try:
+            async with self._semaphore:
+                response = await client.head(url, headers=headers)
+                if response.status_code in (405, 501):
+                    # HEAD not supported; close a conditional GET before reading the body
+                    async with client.stream("GET", url, headers=headers) as response:
+                        pass
+        except httpx.HTTPError as e:
+            logger.debug(f"Revalidation request failed for {url}: {e}")
+            return False
+
+        return is_unchanged(validators, response.status_code, response.headers)
+
+    async def find_unchanged(self, urls: list[str], with_children: bool = False) -> dict[str, UnchangedPage]:
+        """Find the URLs whose stored documents are still current.
+
+        Args:
+            urls: URLs about to be crawled
+            with_children: Also load the URLs previously discovered on each page,
+                so a deep crawl can continue past pages it does not render
+
+        Returns:
+            Mapping of unchanged URL to its stored page
+        """
+        if not urls:
+            return {}
+
+        rows = await asyncio.to_thread(self._load_stored_pages, urls)
+        candidates = {
+            url: (title, content_hash, (meta_data or {}).get(VALIDATORS_KEY), snippet_count)
+            for url, title, content_hash, meta_data, snippet_count in rows
+            if (meta_data or {}).get(VALIDATORS_KEY) and content_hash
+        }
+        if not candidates:
+            return {}
+
+        checks = await asyncio.gather(
+            *(self.check(url, validators) for url, (_, _, validators, _) in candidates.items())
+        )
+        unchanged = {
+            url: UnchangedPage(url=url, title=title or "", content_hash=content_hash, snippet_count=snippet_count)
+            for (url, (title, content_hash, _, snippet_count)), not_modified in zip(
+                candidates.items(), checks, strict=True
+            )
+            if not_modified
+        }
+
+        if with_children and unchanged:
+            children = await asyncio.to_thread(self._load_children, list(unchanged))
+            for parent_url, url in children:
+                unchanged[parent_url].children.append(url)
+
+        if unchanged:
+            logger.info(f"Revalidated {len(candidates)} stored pages, {len(unchanged)} not modified")
+        return unchanged
+
+    def _load_stored_pages(self, urls: list[str]) -> list[Any]:
+        """Stored title, hash, metadata and snippet count of the given URLs."""
+        snippet_counts = (
+            select(CodeSnippet.document_id, func.count(CodeSnippet.id).label("snippet_count"))
+            .group_by(CodeSnippet.document_id)
+            .subquery()
+        )
+        with self.db_manager.session_scope() as session:
+            return session.execute(
+                select(
+                    Document.url,
+                    Document.title,
+                    Document.content_hash,
+                    Document.meta_data,
+                    func.coalesce(snippet_counts.c.snippet_count, 0),
+                )
+                .outerjoin(snippet_counts, snippet_counts.c.document_id == Document.id)
+                .where(Document.url.in_(urls))
+            ).all()
+
+    def _load_children(self, parent_urls: list[str]) -> list[Any]:
+        """(parent_url, url) of the stored pages linked from the given pages."""
+        with self.db_manager.session_scope() as session:
+            return session.execute(
+                select(Document.parent_url, Document.url).where(Document.parent_url.in_(parent_urls))
+            ).all()
@@ -0,0 +1,309 @@
+"""Sitemap-driven crawl planning.
+
+Instead of discovering pages by following links, the planner reads the site's
+``sitemap.xml`` (and any sitemap indexes it points to), keeps the URLs that pass
+the job's domain and include-pattern filters and, on recrawls, drops URLs whose
+``<lastmod>`` is not newer than the stored document's ``last_crawled``.
+"""
+
+import asyncio
+import fnmatch
+import gzip
+import logging
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any
+from urllib.parse import urljoin, urlparse
+
+import httpx
+from sqlalchemy import select
+
+from ..database import get_db_manager
+from ..database.models import Document
+
+logger = logging.getLogger(__name__)
+
+# Nested sitemap indexes deeper than this are ignored
+MAX_INDEX_DEPTH = 3
+
+
+@dataclass
+class SitemapEntry:
+    """URL listed in a sitemap."""
+
+    url: str
+    lastmod: datetime | None = None
+
+
+@dataclass
+class SitemapPlan:
+    """URLs to crawl as planned from the sitemaps."""
+
+    urls: list[str] = field(default_factory=list)
+    sitemaps: list[str] = field(default_factory=list)
+    listed_count: int = 0
+    unchanged_count: int = 0
+
+    @property
+    def found(self) -> bool:
+        """Whether any sitemap with matching URLs was found."""
+        return self.listed_count > 0
+
+
+def parse_lastmod(value: str | None) -> datetime | None:
+    """Parse a W3C datetime ``<lastmod>`` into naive UTC.
+
+    Args:
+        value: Date (``2024-05-01``) or datetime with optional offset
+
+    Returns:
+        Naive UTC datetime, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def parse_sitemap(content: bytes) -> tuple[list[SitemapEntry], list[str]]:
+    """Parse a sitemap or sitemap index.
+
+    Args:
+        content: Raw, possibly gzipped, XML
+
+    Returns:
+        Tuple of (page entries, nested sitemap URLs)
+    """
+    try:
+        if content[:2] == b"\x1f\x8b":
+            content = gzip.decompress(content)
+        root = ET.fromstring(content)
+    except (OSError, ET.ParseError) as e:
+        logger.warning(f"Invalid sitemap XML: {e}")
+        return [], []
+
+    entries: list[SitemapEntry] = []
+    nested: list[str] = []
+    is_index = root.tag.rsplit("}", 1)[-1] == "sitemapindex"
+
+    for item in root:
+        loc = lastmod = None
+        for child in item:
+            tag = child.tag.rsplit("}", 1)[-1]
+            if tag == "loc" and child.text:
+                loc = child.text.strip()
+            elif tag == "lastmod":
+                lastmod = child.text
+        if not loc:
+            continue
+        if is_index:
+            nested.append(loc)
+        else:
+            entries.append(SitemapEntry(url=loc, lastmod=parse_lastmod(lastmod)))
+
+    return entries, nested
+
+
+def matches_filters(
+    url: str, allowed_domains: list[str], include_patterns: list[str] | None = None
+) -> bool:
+    """Apply the job's domain restrictions and include patterns to a URL.
+
+    Args:
+        url: Candidate URL
+        allowed_domains: Hosts the URL may be on (subdomains included)
+        include_patterns: Glob patterns of which at least one must match
+
+    Returns:
+        True if the URL should be crawled
+    """
+    parsed = urlparse(url)
+    if parsed.scheme not in ("http", "https"):
+        return False
+
+    host = (parsed.hostname or "").lower()
+    domains = [domain.lower().removeprefix("www.") for domain in allowed_domains]
+    host_without_www = host.removeprefix("www.")
+    if domains and not any(
+        host_without_www == domain or host_without_www.endswith("." + domain) for domain in domains
+    ):
+        return False
+
+    if include_patterns and not any(fnmatch.fnmatch(url, pattern) for pattern in include_patterns):
+        return False
+    return True
+
+
+def select_stale(entries: list[SitemapEntry], last_crawled: dict[str, datetime]) -> list[str]:
+    """Keep URLs that were never crawled or changed since their last crawl.
+
+    Args:
+        entries: Sitemap entries
+        last_crawled: Last crawl time of already stored URLs
+
+    Returns:
+        URLs to crawl
+    """
+    urls = []
+    for entry in entries:
+        crawled_at = last_crawled.get(entry.url)
+        if crawled_at is None or entry.lastmod is None or entry.lastmod > crawled_at:
+            urls.append(entry.url)
+    return urls
+
+
+class SitemapPlanner:
+    """Plans a crawl from the sitemaps of its start URLs."""
+
+    def __init__(
+        self,
+        user_agent: str | None = None,
+        timeout: float = 15.0,
+        max_urls: int = 10000,
+        db_manager: Any | None = None,
+    ):
+        """Initialize the planner.
+
+        Args:
+            user_agent: User agent sent when fetching sitemaps
+            timeout: Timeout per sitemap request in seconds
+            max_urls: Maximum URLs read from the sitemaps of one crawl
+            db_manager: Database manager (defaults to the global one)
+        """
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.max_urls = max_urls
+        self.db_manager = db_manager or get_db_manager()
+
+    async def plan(
+        self,
+        start_urls: list[str],
+        domain_restrictions: list[str] | None = None,
+        include_patterns: list[str] | None = None,
+        max_pages: int | None = None,
+        incremental: bool = True,
+    ) -> SitemapPlan:
+        """Build the list of URLs to crawl.
+
+        Args:
+            start_urls: Crawl start URLs whose sites' sitemaps are read
+            domain_restrictions: Allowed domains (defaults to the start URLs' hosts)
+            include_patterns: Glob patterns URLs must match
+            max_pages: Maximum URLs to schedule
+            incremental: Skip stored URLs whose lastmod is not newer than their last crawl
+
+        Returns:
+            SitemapPlan; ``found`` is False when no usable sitemap exists
+        """
+        allowed_domains = domain_restrictions or [
+            urlparse(url).hostname for url in start_urls if urlparse(url).hostname
+        ]
+
+        headers = {"User-Agent": self.user_agent} if self.user_agent else None
+        async with httpx.AsyncClient(timeout=self.timeout, follow_redirects=True, headers=headers) as client:
+            sitemap_urls = await self._locate_sitemaps(client, start_urls)
+            entries, sitemaps = await self._read_sitemaps(client, sitemap_urls)
+
+        unique: dict[str, SitemapEntry] = {}
+        for entry in entries:
+            if entry.url not in unique and matches_filters(entry.url, allowed_domains, include_patterns):
+                unique[entry.url] = entry
+        matched = list(unique.values())
+
+        plan = SitemapPlan(sitemaps=sitemaps, listed_count=len(matched))
+        if not matched:
+            return plan
+
+        if incremental:
+            last_crawled = await asyncio.to_thread(self._load_last_crawled, [entry.url for entry in matched])
+            plan.urls = select_stale(matched, last_crawled)
+        else:
+            plan.urls = [entry.url for entry in matched]
+        plan.unchanged_count = len(matched) - len(plan.urls)
+
+        if max_pages is not None:
+            plan.urls = plan.urls[:max_pages]
+
+        logger.info(
+            f"Sitemap plan: {plan.listed_count} matching URLs in {len(sitemaps)} sitemaps, "
+            f"{plan.unchanged_count} unchanged since last crawl, {len(plan.urls)} scheduled"
+        )
+        return plan
+
+    async def _locate_sitemaps(self, client: httpx.AsyncClient, start_urls: list[str]) -> list[str]:
+        """Find sitemap URLs from robots.txt, falling back to /sitemap.xml."""
+        origins = list(dict.fromkeys(
+            f"{parsed.scheme}://{parsed.netloc}" for parsed in map(urlparse, start_urls) if parsed.netloc
+        ))
+
+        sitemap_urls: list[str] = []
+        for origin in origins:
+            listed = []
+            try:
+                response = await client.get(urljoin(origin, "/robots.txt"))
+                if response.status_code == 200:
+                    listed = [
+                        line.split(":", 1)[1].strip()
+                        for line in response.text.splitlines()
+                        if line.lower().startswith("sitemap:")
+                    ]
+            except httpx.HTTPError as e:
+                logger.debug(f"Could not read robots.txt of {origin}: {e}")
+            sitemap_urls.extend(listed or [urljoin(origin, "/sitemap.xml")])
+
+        return list(dict.fromkeys(sitemap_urls))
+
+    async def _read_sitemaps(
+        self, client: httpx.AsyncClient, sitemap_urls: list[str]
+    ) -> tuple[list[SitemapEntry], list[str]]:
+        """Fetch sitemaps breadth-first, following sitemap indexes."""
+        entries: list[SitemapEntry] = []
+        read: list[str] = []
+        seen = set(sitemap_urls)
+        level = sitemap_urls
+
+        for _ in range(MAX_INDEX_DEPTH + 1):
+            if not level or len(entries) >= self.max_urls:
+                break
+            responses = await asyncio.gather(*(self._fetch(client, url) for url in level))
+
+            next_level = []
+            for url, content in zip(level, responses, strict=True):
+                if content is None:
+                    continue
+                page_entries, nested = parse_sitemap(content)
+                read.append(url)
+                entries.extend(page_entries)
+                next_level.extend(child for child in nested if child not in seen)
+                seen.update(nested)
+            level = next_level
+
+        return entries[: self.max_urls], read
+
+    async def _fetch(self, client: httpx.AsyncClient, url: str) -> bytes | None:
+        try:
+            response = await client.get(url)
+        except httpx.HTTPError as e:
+            logger.debug(f"Could not fetch sitemap {url}: {e}")
+            return None
+        if response.status_code != 200:
+            logger.debug(f"Sitemap {url} returned HTTP {response.status_code}")
+            return None
+        return response.content
+
+    def _load_last_crawled(self, urls: list[str]) -> dict[str, datetime]:
+        """Get the last crawl time of the stored documents among the URLs."""
+        with self.db_manager.session_scope() as session:
+            rows = session.execute(
+                select(Document.url, Document.last_crawled).where(Document.url.in_(urls))
+            ).all()
+        return {url: last_crawled for url, last_crawled in rows if last_crawled}
@@ -1,17 +1,30 @@
-"""Upload processor for handling user-uploaded documentation files."""
+"""Upload processor for handling user-uploaded documentation files.
+
+Files are fed to a fixed pool of workers through a bounded queue, so an upload
+of tens of thousands of files (a GitHub monorepo) holds only the files being
+processed. Entries without ``content`` are read from their ``path`` in a
+thread when a worker picks them up; binary, oversized and non-UTF-8 files are
+skipped. Files are pulled in batches, and the stored content hashes of each
+batch are loaded in one query to skip files that did not change.
+"""
 
 import asyncio
 import hashlib
 import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
 from dataclasses import dataclass, field
 from datetime import datetime
+from itertools import islice
+from pathlib import Path
 from typing import Any
 
+import psutil
 from crawl4ai import AsyncWebCrawler, CacheMode, CrawlerRunConfig
 from crawl4ai.markdown_generation_strategy import DefaultMarkdownGenerator
 
 from ..config import get_settings
-from ..database import CodeSnippet, Document, UploadJob, get_db_manager
+from ..database import CodeSnippet, ContentHashIndex, Document, UploadJob, get_db_manager
 from .config import create_browser_config
 from .extractors.factory import create_extractor
 from .extractors.models import ExtractedCodeBlock
@@ -29,12 +42,74 @@ class UploadConfig:
     """Configuration for an upload job."""
 
     name: str
-    files: list[dict[str, Any]]  # List of {path, content, source_url}
+    # {path, content, source_url, content_type} per file; a list or a lazy
+    # iterator, and content is read from path when missing
+    files: Iterable[dict[str, Any]]
     metadata: dict[str, Any] = field(default_factory=dict)
     version: str | None = None
     extract_code_only: bool = True
     use_llm: bool = True
     max_concurrent_files: int | None = None
+    file_count: int | None = None  # Required when files is an iterator
+    # Files update the reused job's documents; its totals are recounted at the end
+    incremental: bool = False
+
+    @property
+    def total_files(self) -> int:
+        """Number of files in the upload."""
+        if self.file_count is not None:
+            return self.file_count
+        return len(self.files)  # type: ignore[arg-type]
+
+
+@dataclass
+class IngestionStats:
+    """Throughput and memory of an upload job."""
+
+    files: int = 0
+    unreadable: int = 0
+    peak_rss: int = 0
+    started: float = field(default_factory=time.perf_counter)
+    process: psutil.Process = field(default_factory=psutil.Process, repr=False)
+
+    def sample_memory(self) -> None:
+        """Record the current resident memory of the process."""
+        self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Stats stored with the job and logged when it completes."""
+        seconds = time.perf_counter() - self.started
+        return {
+            "files": self.files,
+            "unreadable_files": self.unreadable,
+            "seconds": round(seconds, 2),
+            "files_per_second": round(self.files / seconds, 1) if seconds > 0 else None,
+            "peak_rss_mb": round(self.peak_rss / 1024 / 1024, 1),
+        }
+
+
+def read_text_file(path: Path, max_size: int, binary_check_bytes: int) -> str | None:
+    """Read a documentation file, or None if it is too large, binary or not UTF-8.
+
+    Args:
+        path: File to read
+        max_size: Maximum file size in bytes
+        binary_check_bytes: Leading bytes checked for NUL bytes
+    """
+    size = path.stat().st_size
+    if size > max_size:
+        logger.warning(f"Skipping {path}: {size} bytes exceeds the {max_size} byte limit")
+        return None
+
+    data = path.read_bytes()
+    if b"\x00" in data[:binary_check_bytes]:
+        logger.info(f"Skipping binary file {path}")
+        return None
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        logger.warning(f"Skipping {path}: not valid UTF-8")
+        return None
 
 
 @dataclass
@@ -58,7 +133,7 @@ class UploadProcessor:
         self.settings = settings
         self.db_manager = get_db_manager()
         self.result_processor = ResultProcessor()
-        self.progress_tracker = ProgressTracker(self)
+        self.progress_tracker = ProgressTracker(self, job_model=UploadJob)
 
         # Initialize browser config for HTML processing
         self.browser_config = create_browser_config()
@@ -68,12 +143,16 @@ class UploadProcessor:
         if self.settings.code_extraction.llm_api_key:
             self.description_generator = LLMDescriptionGenerator()
 
-    async def process_upload(self, config: UploadConfig) -> str:
+    async def process_upload(
+        self, config: UploadConfig, on_complete: Callable[[], Awaitable[None]] | None = None
+    ) -> str:
         """
         Process an upload job.
 
         Args:
             config: Upload configuration
+            on_complete: Awaited once the job has finished, e.g. to remove the
+                directory lazily read files come from
 
         Returns:
             Job ID
@@ -81,8 +160,15 @@ class UploadProcessor:
         # Create upload job
         job_id = self._create_upload_job(config)
 
+        async def run() -> None:
+            try:
+                await self._execute_upload(job_id, config)
+            finally:
+                if on_complete is not None:
+                    await on_complete()
+
         # Start async processing
-        asyncio.create_task(self._execute_upload(job_id, config))
+        asyncio.create_task(run())
 
         return job_id
 
@@ -104,9 +190,10 @@ class UploadProcessor:
                     f"Reusing existing upload job '{config.name}' (v{config.version}): {existing_job.id}"
                 )
 
-                existing_job.file_count = len(config.files)
+                if not config.incremental:
+                    existing_job.file_count = config.total_files
+                    existing_job.snippets_extracted = 0
                 existing_job.processed_files = 0
-                existing_job.snippets_extracted = 0
                 existing_job.status = "running"
                 existing_job.error_message = None
                 existing_job.started_at = datetime.utcnow()
@@ -121,7 +208,7 @@ class UploadProcessor:
                     id=str(uuid.uuid4()),
                     name=config.name,
                     version=config.version,
-                    file_count=len(config.files),
+                    file_count=config.total_files,
                     status="running",
                     config=config.metadata,
                 )
@@ -132,6 +219,7 @@ class UploadProcessor:
 
     async def _execute_upload(self, job_id: str, config: UploadConfig) -> None:
         """Execute the upload job."""
+        stats = IngestionStats()
         try:
             # Start tracking
             await self.progress_tracker.start_tracking(job_id)
@@ -140,126 +228,135 @@ class UploadProcessor:
             max_concurrent = (
                 config.max_concurrent_files or self.settings.crawling.max_concurrent_crawls
             )
-            semaphore = asyncio.Semaphore(max_concurrent)
+            total_files = config.total_files
             logger.info(
-                f"Processing {len(config.files)} files with max_concurrent={max_concurrent}"
+                f"Processing {total_files} files with max_concurrent={max_concurrent}"
             )
 
-            # Thread-safe counters for progress tracking
+            # Counters shared by the workers
             total_snippets = 0
             processed_files = 0
             skipped_files = 0
             progress_lock = asyncio.Lock()
 
-            async def process_single_file(file_info: dict[str, Any]) -> tuple[int, int]:
-                """Process a single file and return (doc_id, snippet_count)."""
+            # Stored hashes are loaded per batch of files instead of queried per file
+            hashes = ContentHashIndex(self.db_manager)
+
+            async def record_file(snippet_count: int, unchanged: bool = False) -> None:
                 nonlocal total_snippets, processed_files, skipped_files
+                async with progress_lock:
+                    total_snippets += snippet_count
+                    processed_files += 1
+                    skipped_files += int(unchanged)
+                    stats.files = processed_files
+                    stats.sample_memory()
+
+                    # Update progress
+                    await self.progress_tracker.update_progress(
+                        job_id,
+                        processed_pages=processed_files,
+                        total_pages=total_files,
+                        # Incremental runs keep the job's totals until they are recounted
+                        snippets_extracted=None if config.incremental else total_snippets,
+                        documents_crawled=processed_files,
+                        send_notification=True,
+                    )
 
-                async with semaphore:
-                    try:
-                        source_url = file_info["source_url"]
+            async def process_single_file(file_info: dict[str, Any]) -> None:
+                """Process a single file and record its snippet count."""
+                try:
+                    source_url = file_info["source_url"]
+
+                    content = file_info.get("content")
+                    if content is None:
+                        # Read lazily so only files being processed are held in memory
+                        content = await asyncio.to_thread(
+                            read_text_file,
+                            Path(file_info["path"]),
+                            self.settings.upload.max_file_size,
+                            self.settings.upload.binary_check_bytes,
+                        )
+                        if content is None:
+                            stats.unreadable += 1
+                            await record_file(0)
+                            return
 
-                        # Calculate content hash first to check for duplicates
-                        content_hash = hashlib.md5(file_info["content"].encode()).hexdigest()
+                    # Calculate content hash first to check for duplicates
+                    content_hash = hashlib.md5(content.encode()).hexdigest()
 
-                        # Check if this file has already been processed
-                        with self.db_manager.session_scope() as session:
-                            from ..database import check_content_hash
+                    # Check if this file has already been processed
+                    content_unchanged, existing_snippet_count = hashes.check(source_url, content_hash)
 
-                            content_unchanged, existing_snippet_count = check_content_hash(
-                                session, source_url, content_hash
-                            )
-
-                            if content_unchanged:
-                                logger.info(
-                                    f"Content unchanged for {source_url} (hash: {content_hash[:8]}...), skipping processing. Using {existing_snippet_count} existing snippets."
-                                )
-
-                                # Update counters for skipped file
-                                async with progress_lock:
-                                    total_snippets += existing_snippet_count
-                                    processed_files += 1
-                                    skipped_files += 1
-
-                                    # Update progress
-                                    await self.progress_tracker.update_progress(
-                                        job_id,
-                                        processed_pages=processed_files,
-                                        total_pages=len(config.files),
-                                        snippets_extracted=total_snippets,
-                                        documents_crawled=processed_files,
-                                        send_notification=True,
-                                    )
-
-                                return 0, existing_snippet_count
-
-                        # Content is new or changed, process it
-                        result = await self._process_file(
-                            file_info["content"],
-                            source_url,
-                            file_info.get("content_type", "markdown"),
+                    if content_unchanged:
+                        logger.info(
+                            f"Content unchanged for {source_url} (hash: {content_hash[:8]}...), skipping processing. Using {existing_snippet_count} existing snippets."
                         )
+                        await record_file(existing_snippet_count, unchanged=True)
+                        return
+
+                    # Content is new or changed, process it
+                    result = await self._process_file(
+                        content,
+                        source_url,
+                        file_info.get("content_type", "markdown"),
+                    )
 
-                        if result.error:
-                            logger.error(f"Failed to process {source_url}: {result.error}")
-                            return 0, 0
-
-                        # Generate LLM descriptions if enabled
-                        if config.use_llm and self.description_generator and result.code_blocks:
-                            try:
-                                result.code_blocks = await self.description_generator.generate_titles_and_descriptions_batch(
-                                    result.code_blocks, result.source_url, max_concurrent=5
-                                )
-                            except Exception as e:
-                                logger.warning(
-                                    f"LLM description generation failed for {source_url}: {e}"
-                                )
-
-                        # Store in database
-                        doc_id, snippet_count = await self._store_result(result, job_id)
-
-                        # Update counters thread-safely
-                        async with progress_lock:
-                            total_snippets += snippet_count
-                            processed_files += 1
-
-                            # Update progress
-                            await self.progress_tracker.update_progress(
-                                job_id,
-                                processed_pages=processed_files,
-                                total_pages=len(config.files),
-                                snippets_extracted=total_snippets,
-                                documents_crawled=processed_files,
-                                send_notification=True,
-                            )
+                    if result.error:
+                        logger.error(f"Failed to process {source_url}: {result.error}")
+                        await record_file(0)
+                        return
 
-                        return doc_id, snippet_count
-
-                    except Exception as e:
-                        logger.error(f"Failed to process file {file_info['source_url']}: {e}")
-                        async with progress_lock:
-                            processed_files += 1
-                            # Update progress even on failure
-                            await self.progress_tracker.update_progress(
-                                job_id,
-                                processed_pages=processed_files,
-                                total_pages=len(config.files),
-                                snippets_extracted=total_snippets,
-                                documents_crawled=processed_files,
-                                send_notification=True,
+                    # Generate LLM descriptions if enabled
+                    if config.use_llm and self.description_generator and result.code_blocks:
+                        try:
+                            result.code_blocks = await self.description_generator.generate_titles_and_descriptions_batch(
+                                result.code_blocks, result.source_url, job_id=job_id
+                            )
+                        except Exception as e:
+                            logger.warning(
+                                f"LLM description generation failed for {source_url}: {e}"
                             )
-                        return 0, 0
 
-            # Process all files concurrently
-            tasks = [process_single_file(file_info) for file_info in config.files]
-            results = await asyncio.gather(*tasks, return_exceptions=True)
+                    # Store in database
+                    _, snippet_count = await self._store_result(result, job_id)
+                    await record_file(snippet_count)
 
-            # Log any exceptions that occurred during processing
-            for i, result in enumerate(results):
-                if isinstance(result, Exception):
-                    logger.error(
-                        f"Exception processing file {config.files[i]['source_url']}: {result}"
-                    )
+                except Exception as e:
+                    logger.error(f"Failed to process file {file_info.get('source_url')}: {e}")
+                    # Update progress even on failure
+                    await record_file(0)
+
+            # A fixed pool of workers drains a bounded queue, so files are
+            # pulled from the (possibly lazy) list in batches as workers free up
+            queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue(maxsize=max_concurrent * 2)
+
+            async def produce() -> None:
+                try:
+                    files = iter(config.files)
+                    while True:
+                        if isinstance(config.files, list):
+                            batch = list(islice(files, hashes.chunk_size))
+                        else:
+                            # Walking a directory tree blocks, so advance lazy iterators in a thread
+                            batch = await asyncio.to_thread(lambda: list(islice(files, hashes.chunk_size)))
+                        if not batch:
+                            break
+
+                        # One query tells which files of the batch are already stored
+                        await asyncio.to_thread(
+                            hashes.preload, [file_info["source_url"] for file_info in batch]
+                        )
+                        for file_info in batch:
+                            await queue.put(file_info)
+                finally:
+                    for _ in range(max_concurrent):
+                        await queue.put(None)
+
+            async def work() -> None:
+                while (file_info := await queue.get()) is not None:
+                    await process_single_file(file_info)
+
+            await asyncio.gather(produce(), *(work() for _ in range(max_concurrent)))
 
             # Log efficiency if any files were skipped
             if skipped_files > 0:
@@ -269,14 +366,30 @@ class UploadProcessor:
                 logger.info(
                     f"[UPLOAD EFFICIENCY] Skipped {skipped_files}/{processed_files} files ({efficiency_pct:.1f}%) as unchanged. Total snippets: {total_snippets}"
                 )
+            logger.debug(
+                f"Content hash checks for job {job_id}: {hashes.hits} preloaded, {hashes.fallbacks} queried"
+            )
+
+            ingestion = stats.as_dict()
+            logger.info(
+                f"[UPLOAD THROUGHPUT] {ingestion['files']} files in {ingestion['seconds']}s "
+                f"({ingestion['files_per_second']} files/s), {ingestion['unreadable_files']} unreadable, "
+                f"peak RSS {ingestion['peak_rss_mb']} MB"
+            )
 
             # Complete job
-            self._complete_job(job_id, success=True, snippets_extracted=total_snippets)
+            self._complete_job(
+                job_id,
+                success=True,
+                snippets_extracted=total_snippets,
+                ingestion=ingestion,
+                recount=config.incremental,
+            )
             await self.progress_tracker.send_completion(job_id, success=True)
 
         except Exception as e:
             logger.error(f"Upload job {job_id} failed: {e}")
-            self._complete_job(job_id, success=False, error_message=str(e))
+            self._complete_job(job_id, success=False, error_message=str(e), recount=config.incremental)
             await self.progress_tracker.send_completion(job_id, success=False, error=str(e))
         finally:
             await self.progress_tracker.stop_tracking(job_id)
@@ -547,8 +660,15 @@ class UploadProcessor:
         success: bool,
         error_message: str | None = None,
         snippets_extracted: int = 0,
+        ingestion: dict[str, Any] | None = None,
+        recount: bool = False,
     ) -> None:
-        """Mark upload job as completed."""
+        """Mark upload job as completed.
+
+        With ``recount`` the job's file and snippet totals are counted from all
+        of its documents instead of taken from this run; a failed run keeps the
+        previous totals.
+        """
         from ..database import UploadJob
 
         with self.db_manager.session_scope() as session:
@@ -557,7 +677,20 @@ class UploadProcessor:
                 job.status = "completed" if success else "failed"
                 job.completed_at = datetime.utcnow()
                 job.error_message = error_message
-                job.snippets_extracted = snippets_extracted
+                if not recount:
+                    job.snippets_extracted = snippets_extracted
+                elif success:
+                    job.file_count = (
+                        session.query(Document).filter(Document.upload_job_id == job.id).count()
+                    )
+                    job.snippets_extracted = (
+                        session.query(CodeSnippet)
+                        .join(Document, CodeSnippet.document_id == Document.id)
+                        .filter(Document.upload_job_id == job.id)
+                        .count()
+                    )
+                if ingestion:
+                    job.config = {**(job.config or {}), "ingestion": ingestion}
                 session.commit()
 
     def get_job_status(self, job_id: str) -> dict[str, Any] | None:
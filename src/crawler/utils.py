@@ -1,36 +1,72 @@
 """Utility functions for crawling operations."""
 
 import logging
-from urllib.parse import urlparse
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
 
 logger = logging.getLogger(__name__)
 
+# Directory index documents served for the directory URL itself
+INDEX_PAGES = ("index.html", "index.htm")
 
+# Query parameters that only track the visitor and never change the page
+TRACKING_PARAMS = frozenset({"ref", "fbclid", "gclid", "msclkid", "_ga"})
 
+DEFAULT_PORTS = {"http": 80, "https": 443}
 
 
+def canonicalize_url(url: str) -> str:
+    """Rewrite a URL into the canonical form it is fetched and stored under.
 
+    Lowercases scheme and host, drops default ports, fragments, tracking query
+    parameters and directory index documents (``/docs/index.html`` becomes
+    ``/docs/``), and sorts the remaining query parameters. The trailing slash is
+    kept: ``/docs`` and ``/docs/`` resolve relative links differently.
+
+    Args:
+        url: URL to canonicalize
+
+    Returns:
+        Canonical URL
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or "").lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    if parsed.username:
+        credentials = parsed.username + (f":{parsed.password}" if parsed.password else "")
+        host = f"{credentials}@{host}"
+
+    path = parsed.path or "/"
+    directory, _, page = path.rpartition("/")
+    if page.lower() in INDEX_PAGES:
+        path = f"{directory}/"
+
+    query = urlencode(sorted(
+        (key, value)
+        for key, value in parse_qsl(parsed.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith("utm_")
+    ))
+
+    return urlunparse((scheme, host, path, parsed.params, query, ""))
 
 
 def normalize_url(url: str) -> str:
     """Normalize URL for comparison.
 
+    Builds on ``canonicalize_url`` and also ignores the trailing slash, so all
+    spellings of one page compare equal. Use it as a key, not for fetching.
+
     Args:
         url: URL to normalize
 
     Returns:
         Normalized URL
     """
-    # Remove trailing slash
-    if url.endswith("/"):
-        url = url[:-1]
-
-    # Remove fragment
-    if "#" in url:
-        url = url.split("#")[0]
-
+    parsed = urlparse(canonicalize_url(url))
 
-    return url
+    # Remove trailing slash
+    return urlunparse(parsed._replace(path=parsed.path.rstrip("/")))
 
 
 def is_valid_url(url: str) -> bool:
@@ -47,6 +83,3 @@ def is_valid_url(url: str) -> bool:
         return all([result.scheme, result.netloc])
     except Exception:
         return False
-
-
-
@@ -0,0 +1,185 @@
+"""Crawl worker processes fed by the Postgres job queue.
+
+With ``CRAWL_EXECUTION_MODE=queue`` the API only creates jobs in status
+``queued``. Each ``cli.py worker`` process claims the oldest queued job with
+``SELECT ... FOR UPDATE SKIP LOCKED``, so any number of workers on any number
+of hosts share one queue without claiming a job twice. A running job's
+``last_heartbeat`` doubles as its worker's ownership heartbeat; the health
+monitor requeues jobs whose worker stopped sending it. Heartbeats and the
+completion only update a job while ``worker_id`` still names the worker, and
+a worker whose job was requeued stops crawling it. Workers also run the
+background retries of failed pages.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from datetime import datetime
+from typing import Any
+
+from sqlalchemy import update
+
+from ..config import get_settings
+from ..database import CrawlJob, get_db_manager
+from .browser_pool import close_browser_pool
+from .crawl_manager import CrawlManager
+from .frontier import CrawlFrontier
+from .progress_bus import get_progress_bus
+from .retry_scheduler import RetryScheduler
+
+logger = logging.getLogger(__name__)
+
+
+def default_worker_id() -> str:
+    """Identify this process as host:pid."""
+    return f"{socket.gethostname()}:{os.getpid()}"[:64]
+
+
+def requeue_job(job: CrawlJob) -> None:
+    """Return a job whose worker is gone to the queue.
+
+    Frontier URLs the worker had claimed become pending again, so the next
+    worker continues the crawl where it stopped.
+    """
+    logger.info(f"Requeueing job {job.id} from worker {job.worker_id}")
+    job.status = "queued"
+    job.worker_id = None
+    job.claimed_at = None
+    job.retry_count = (job.retry_count or 0) + 1
+    CrawlFrontier(str(job.id)).release_claims()
+
+
+class CrawlWorker:
+    """Claims queued crawl jobs and runs them."""
+
+    def __init__(
+        self,
+        crawl_manager: CrawlManager | None = None,
+        worker_id: str | None = None,
+        concurrency: int | None = None,
+        poll_interval: float | None = None,
+        db_manager: Any | None = None,
+    ):
+        """Initialize the worker.
+
+        Args:
+            crawl_manager: Runs claimed jobs (a new one by default)
+            worker_id: Identifier recorded on claimed jobs (defaults to host:pid)
+            concurrency: Jobs run at once (defaults to the setting)
+            poll_interval: Seconds between queue checks while idle (defaults to the setting)
+            db_manager: Database manager (defaults to the global one)
+        """
+        crawling = get_settings().crawling
+        self.crawl_manager = crawl_manager or CrawlManager()
+        self.worker_id = worker_id or default_worker_id()
+        self.concurrency = concurrency or crawling.worker_concurrency
+        self.poll_interval = poll_interval or crawling.worker_poll_interval
+        self.db_manager = db_manager or get_db_manager()
+        self.retry_scheduler = (
+            RetryScheduler(crawl_manager=self.crawl_manager, db_manager=self.db_manager)
+            if crawling.retry_failed_pages else None
+        )
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._stopping: asyncio.Event | None = None
+        self._retry_task: asyncio.Task | None = None
+
+    def claim_job(self) -> str | None:
+        """Claim the oldest queued job.
+
+        Returns:
+            ID of the claimed job, or None if the queue is empty
+        """
+        with self.db_manager.session_scope() as session:
+            job = (
+                session.query(CrawlJob)
+                .filter(CrawlJob.status == "queued")
+                .order_by(CrawlJob.created_at)
+                .with_for_update(skip_locked=True)
+                .first()
+            )
+            if job is None:
+                return None
+
+            now = datetime.utcnow()
+            job.status = "running"
+            job.worker_id = self.worker_id
+            job.claimed_at = now
+            job.started_at = job.started_at or now
+            job.last_heartbeat = now
+            session.commit()
+            return str(job.id)
+
+    async def run(self) -> None:
+        """Claim and run jobs until stopped."""
+        self._stopping = asyncio.Event()
+        logger.info(f"Crawl worker {self.worker_id} started (concurrency {self.concurrency})")
+        if self.retry_scheduler:
+            self._retry_task = asyncio.create_task(self.retry_scheduler.start())
+
+        try:
+            while not self._stopping.is_set():
+                job_id = None
+                if len(self._tasks) < self.concurrency:
+                    try:
+                        job_id = await asyncio.to_thread(self.claim_job)
+                    except Exception as e:
+                        logger.error(f"Worker {self.worker_id} failed to claim a job: {e}")
+
+                if job_id:
+                    self._start(job_id)
+                    continue
+
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await self._shutdown()
+
+    def stop(self) -> None:
+        """Stop claiming jobs; running jobs are interrupted and requeued."""
+        if self._stopping:
+            self._stopping.set()
+
+    def _start(self, job_id: str) -> None:
+        logger.info(f"Worker {self.worker_id} claimed job {job_id}")
+        task = asyncio.create_task(self.crawl_manager.run_queued_job(job_id, self.worker_id))
+        self._tasks[job_id] = task
+        task.add_done_callback(lambda _: self._tasks.pop(job_id, None))
+
+    async def _shutdown(self) -> None:
+        if self._retry_task:
+            self._retry_task.cancel()
+            await asyncio.gather(self._retry_task, return_exceptions=True)
+
+        tasks = [task for task in self._tasks.values() if not task.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        # Interrupted jobs go back to the queue right away instead of waiting
+        # for the health monitor to notice the missing heartbeat
+        try:
+            released = await asyncio.to_thread(self._release_jobs)
+        except Exception as e:
+            logger.error(f"Worker {self.worker_id} failed to requeue its jobs: {e}")
+            released = 0
+
+        await close_browser_pool()
+        # Send the last progress events of the interrupted jobs
+        await get_progress_bus().close()
+        logger.info(f"Crawl worker {self.worker_id} stopped ({released} jobs requeued)")
+
+    def _release_jobs(self) -> int:
+        with self.db_manager.session_scope() as session:
+            job_ids = session.execute(
+                update(CrawlJob)
+                .where(CrawlJob.worker_id == self.worker_id, CrawlJob.status == "running")
+                .values(status="queued", worker_id=None, claimed_at=None)
+                .returning(CrawlJob.id)
+            ).scalars().all()
+        for job_id in job_ids:
+            CrawlFrontier(str(job_id)).release_claims()
+        return len(job_ids)
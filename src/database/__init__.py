@@ -1,8 +1,13 @@
 """Database package initialization."""
 
 from .connection import DatabaseManager, get_db, get_db_manager, get_session, init_db
-from .content_check import check_content_hash, get_existing_document_info
-from .models import Base, CodeSnippet, CrawlJob, Document, FailedPage, UploadJob
+from .content_check import (
+    ContentHashIndex,
+    check_content_hash,
+    get_existing_document_info,
+    preload_content_hashes,
+)
+from .models import Base, CodeSnippet, CrawlJob, Document, FailedPage, FrontierURL, UploadJob
 from .search import CodeSearcher
 
 __all__ = [
@@ -12,6 +17,7 @@ __all__ = [
     'Document',
     'CodeSnippet',
     'FailedPage',
+    'FrontierURL',
     'get_db',
     'get_session',
     'init_db',
@@ -19,5 +25,7 @@ __all__ = [
     'get_db_manager',
     'CodeSearcher',
     'check_content_hash',
-    'get_existing_document_info'
+    'get_existing_document_info',
+    'preload_content_hashes',
+    'ContentHashIndex'
 ]
@@ -1,11 +1,24 @@
 """Content hash checking utilities for avoiding redundant LLM extraction."""
 
+import logging
+from collections.abc import Iterable
+from typing import Any
 
+from sqlalchemy import Row, String, any_, bindparam, func, select, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Query, Session
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session
+from .fingerprint import LSH_BANDS, hamming_distance, lsh_bands
+from .models import CodeSnippet, Document, SnippetLSHBand
 
-from .models import CodeSnippet, Document
+logger = logging.getLogger(__name__)
+
+# Snippets whose descriptions were written by the LLM (directly or reused)
+REUSABLE_EXTRACTION_METHODS = ("html_llm", "near_duplicate")
+
+# URLs per preload query, keeping the IN list of very large jobs bounded
+HASH_PRELOAD_CHUNK_SIZE = 1000
 
 
 def check_content_hash(session: Session, url: str, content_hash: str) -> tuple[bool, int]:
@@ -39,6 +52,124 @@ def check_content_hash(session: Session, url: str, content_hash: str) -> tuple[b
     return True, snippet_count
 
 
+def preload_content_hashes(
+    session: Session,
+    urls: Iterable[str] | None = None,
+    crawl_job_id: Any | None = None,
+    chunk_size: int = HASH_PRELOAD_CHUNK_SIZE,
+) -> dict[str, tuple[str, int]]:
+    """Load stored content hashes and snippet counts in bulk.
+
+    Batch counterpart of check_content_hash: one query per chunk of URLs
+    instead of two queries per URL.
+
+    Args:
+        session: Database session
+        urls: Document URLs to load
+        crawl_job_id: Load every document of this crawl job instead
+        chunk_size: URLs per query
+
+    Returns:
+        Mapping of URL to (content_hash, snippet_count) for stored documents
+    """
+    query = (
+        select(Document.url, Document.content_hash, func.count(CodeSnippet.id))
+        .outerjoin(CodeSnippet, CodeSnippet.document_id == Document.id)
+        .group_by(Document.id)
+        # Newest first, so the oldest document of a URL is the one kept
+        .order_by(Document.id.desc())
+    )
+
+    if crawl_job_id is not None:
+        rows = session.execute(query.where(Document.crawl_job_id == crawl_job_id)).all()
+    else:
+        url_list = list(dict.fromkeys(urls or ()))
+        rows = []
+        for start in range(0, len(url_list), chunk_size):
+            chunk = url_list[start : start + chunk_size]
+            rows.extend(session.execute(query.where(Document.url.in_(chunk))).all())
+
+    return {url: (content_hash or "", int(snippet_count)) for url, content_hash, snippet_count in rows}
+
+
+class ContentHashIndex:
+    """Job-level view of stored content hashes, consulted instead of per-item queries.
+
+    URLs are preloaded in bulk before their pages or files are processed.
+    Checking a URL that was never preloaded falls back to check_content_hash.
+    """
+
+    def __init__(self, db_manager: Any, chunk_size: int = HASH_PRELOAD_CHUNK_SIZE):
+        """Initialize the index.
+
+        Args:
+            db_manager: Database manager providing session_scope()
+            chunk_size: URLs per preload query
+        """
+        self.db_manager = db_manager
+        self.chunk_size = chunk_size
+        self._hashes: dict[str, tuple[str, int]] = {}
+        self._loaded: set[str] = set()
+        self.hits = 0
+        self.fallbacks = 0
+
+    def preload(self, urls: Iterable[str]) -> int:
+        """Load the stored hashes of URLs not loaded yet.
+
+        Returns:
+            Number of stored documents found
+        """
+        missing = [url for url in dict.fromkeys(urls) if url not in self._loaded]
+        if not missing:
+            return 0
+        try:
+            with self.db_manager.session_scope() as session:
+                hashes = preload_content_hashes(session, missing, chunk_size=self.chunk_size)
+        except Exception as e:
+            logger.warning(f"Failed to preload content hashes of {len(missing)} URLs: {e}")
+            return 0
+        self._hashes.update(hashes)
+        self._loaded.update(missing)
+        return len(hashes)
+
+    def preload_crawl_job(self, crawl_job_id: Any) -> int:
+        """Load the stored hashes of every document of a crawl job.
+
+        Only the job's own URLs are marked loaded; other URLs still fall back.
+
+        Returns:
+            Number of stored documents found
+        """
+        try:
+            with self.db_manager.session_scope() as session:
+                hashes = preload_content_hashes(session, crawl_job_id=crawl_job_id)
+        except Exception as e:
+            logger.warning(f"Failed to preload content hashes of job {crawl_job_id}: {e}")
+            return 0
+        for url, stored in hashes.items():
+            if url not in self._loaded:
+                self._hashes[url] = stored
+                self._loaded.add(url)
+        return len(hashes)
+
+    def check(self, url: str, content_hash: str) -> tuple[bool, int]:
+        """Check if content with the given hash already exists for URL.
+
+        Returns:
+            Tuple of (content_unchanged, snippet_count), as check_content_hash
+        """
+        if url not in self._loaded:
+            self.fallbacks += 1
+            with self.db_manager.session_scope() as session:
+                return check_content_hash(session, url, content_hash)
+
+        self.hits += 1
+        stored = self._hashes.get(url)
+        if stored is None or stored[0] != content_hash:
+            return False, 0
+        return True, stored[1]
+
+
 def get_existing_document_info(session: Session, url: str) -> tuple[int, str, int] | None:
     """Get existing document info by URL.
     
@@ -87,8 +218,45 @@ def find_duplicate_snippet_in_source(
         .join(Document)
         .filter(CodeSnippet.code_hash == code_hash)
     )
-    
-    # Add source-specific filtering
+
+    return _filter_by_source(query, document).first()
+
+
+def find_duplicate_hashes_in_source(
+    session: Session,
+    code_hashes: list[str],
+    document: Document
+) -> set[str]:
+    """Find which of the given code hashes already exist in the document's source.
+
+    Batch counterpart of find_duplicate_snippet_in_source: resolves all hashes
+    of a page with a single ``code_hash = ANY(...)`` query.
+
+    Args:
+        session: Database session
+        code_hashes: Hashes of the code blocks to check
+        document: Document that contains or will contain the snippets
+
+    Returns:
+        Set of hashes that already have a snippet in the same source
+    """
+    if not code_hashes:
+        return set()
+
+    query = (
+        session.query(CodeSnippet.code_hash)
+        .join(Document)
+        .filter(
+            CodeSnippet.code_hash
+            == any_(bindparam("code_hashes", value=list(code_hashes), type_=ARRAY(String)))
+        )
+    )
+
+    return {row.code_hash for row in _filter_by_source(query, document).distinct()}
+
+
+def _filter_by_source(query: Query, document: Document) -> Query:
+    """Restrict a snippet query joined to Document to the document's source."""
     if document.crawl_job_id:
         # Check within same crawl job
         query = query.filter(Document.crawl_job_id == document.crawl_job_id)
@@ -102,5 +270,82 @@ def find_duplicate_snippet_in_source(
             Document.crawl_job_id.is_(None),
             Document.upload_job_id.is_(None)
         )
-    
-    return query.first()
+
+    return query
+
+
+def index_snippet_fingerprints(session: Session, snippets: list[tuple[int, int | None]]) -> int:
+    """Add snippets to the near-duplicate band index.
+
+    Args:
+        session: Database session
+        snippets: Tuples of (snippet_id, fingerprint); snippets without a
+            fingerprint are skipped
+
+    Returns:
+        Number of indexed snippets
+    """
+    rows = [
+        {"snippet_id": snippet_id, "band": band, "band_value": value}
+        for snippet_id, fingerprint in snippets
+        if fingerprint is not None
+        for band, value in lsh_bands(fingerprint)
+    ]
+    if rows:
+        session.execute(pg_insert(SnippetLSHBand).values(rows).on_conflict_do_nothing())
+    return len(rows) // LSH_BANDS
+
+
+def find_near_duplicate_snippets(
+    session: Session,
+    blocks: list[tuple[int | None, str | None]],
+    max_distance: int,
+) -> list[Row[Any] | None]:
+    """Find described snippets whose code nearly matches each block.
+
+    Candidates come from the band index in one query for all blocks and are
+    confirmed by Hamming distance. Only snippets with an LLM-generated
+    description are returned, so reusing them never spreads placeholder text.
+
+    Args:
+        session: Database session
+        blocks: Tuples of (fingerprint, language) per block; a block without a
+            language matches snippets of any language
+        max_distance: Maximum differing fingerprint bits (at most MAX_INDEXED_DISTANCE)
+
+    Returns:
+        The id, simhash, language, title and description of the closest
+        matching snippet per block, or None
+    """
+    keys = {key for fingerprint, _ in blocks if fingerprint is not None for key in lsh_bands(fingerprint)}
+    if not keys:
+        return [None] * len(blocks)
+
+    candidates = (
+        session.query(
+            CodeSnippet.id,
+            CodeSnippet.simhash,
+            CodeSnippet.language,
+            CodeSnippet.title,
+            CodeSnippet.description,
+        )
+        .join(SnippetLSHBand, SnippetLSHBand.snippet_id == CodeSnippet.id)
+        .filter(tuple_(SnippetLSHBand.band, SnippetLSHBand.band_value).in_(list(keys)))
+        .filter(CodeSnippet.description.isnot(None))
+        .filter(CodeSnippet.meta_data["extraction_method"].astext.in_(REUSABLE_EXTRACTION_METHODS))
+        .distinct()
+        .all()
+    )
+
+    matches: list[Row[Any] | None] = []
+    for fingerprint, language in blocks:
+        best: tuple[int, Row[Any]] | None = None
+        if fingerprint is not None:
+            for snippet in candidates:
+                if language and snippet.language != language.lower():
+                    continue
+                distance = hamming_distance(fingerprint, snippet.simhash)
+                if distance <= max_distance and (best is None or distance < best[0]):
+                    best = (distance, snippet)
+        matches.append(best[1] if best else None)
+    return matches
@@ -0,0 +1,68 @@
+"""Locality-sensitive fingerprints of code snippets.
+
+A 64-bit SimHash over the snippet's tokens changes in only a few bits when the
+code differs by whitespace, a renamed variable or a changed literal, while
+unrelated code differs in about half of the bits. The fingerprint is split into
+``LSH_BANDS`` bands that are indexed in ``snippet_lsh_bands``: two fingerprints
+within ``LSH_BANDS - 1`` bits of each other agree on at least one band, so
+near-duplicate candidates are found with an exact index lookup.
+"""
+
+import hashlib
+import re
+from collections import Counter
+
+FINGERPRINT_BITS = 64
+LSH_BANDS = 4
+BAND_BITS = FINGERPRINT_BITS // LSH_BANDS
+
+# Largest Hamming distance the band index is guaranteed to find
+MAX_INDEXED_DISTANCE = LSH_BANDS - 1
+
+# Shorter snippets have too few tokens for a meaningful fingerprint
+MIN_TOKENS = 10
+
+_TOKEN = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+|\S")
+_SIGN_BIT = 1 << (FINGERPRINT_BITS - 1)
+
+
+def _token_hash(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode(), digest_size=8).digest(), "big")
+
+
+def code_fingerprint(code: str) -> int | None:
+    """Compute the SimHash of a code snippet.
+
+    Whitespace is ignored and every token is weighted by its frequency.
+
+    Args:
+        code: Snippet source
+
+    Returns:
+        Fingerprint as a signed 64-bit integer (the BIGINT column's range),
+        or None for snippets with fewer than MIN_TOKENS tokens
+    """
+    tokens = Counter(_TOKEN.findall(code))
+    if sum(tokens.values()) < MIN_TOKENS:
+        return None
+
+    weights = [0] * FINGERPRINT_BITS
+    for token, count in tokens.items():
+        token_hash = _token_hash(token)
+        for bit in range(FINGERPRINT_BITS):
+            weights[bit] += count if token_hash >> bit & 1 else -count
+
+    fingerprint = sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+    return fingerprint - (1 << FINGERPRINT_BITS) if fingerprint & _SIGN_BIT else fingerprint
+
+
+def lsh_bands(fingerprint: int) -> list[tuple[int, int]]:
+    """Split a fingerprint into its (band, value) index keys."""
+    unsigned = fingerprint & ((1 << FINGERPRINT_BITS) - 1)
+    mask = (1 << BAND_BITS) - 1
+    return [(band, unsigned >> (band * BAND_BITS) & mask) for band in range(LSH_BANDS)]
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Number of differing bits between two fingerprints."""
+    return ((a ^ b) & ((1 << FINGERPRINT_BITS) - 1)).bit_count()
@@ -0,0 +1,22 @@
+-- Migration: Persistent URL frontier for deep crawls
+-- Stores every URL discovered by a deep crawl with its depth, parent and state so that
+-- resumed or retried jobs continue where they stopped and several workers can share a crawl
+
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    id BIGSERIAL PRIMARY KEY,
+    crawl_job_id UUID NOT NULL REFERENCES crawl_jobs(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    parent_url TEXT,
+    state VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'in_progress', 'done', 'failed')),
+    claimed_by VARCHAR(64),
+    claimed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE(crawl_job_id, url)
+);
+
+-- Claim queries pick the shallowest pending URLs of a job first
+CREATE INDEX IF NOT EXISTS idx_crawl_frontier_claim ON crawl_frontier(crawl_job_id, state, depth, id);
+
+COMMENT ON TABLE crawl_frontier IS 'URLs discovered by deep crawls; the BFS frontier survives restarts and is shared between workers.';
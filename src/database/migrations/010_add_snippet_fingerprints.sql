@@ -0,0 +1,17 @@
+-- Migration: Near-duplicate snippet fingerprints
+-- Stores a 64-bit SimHash per snippet and indexes it in bands so snippets that differ
+-- only in whitespace, names or literals can reuse descriptions and be collapsed in search
+
+ALTER TABLE code_snippets ADD COLUMN IF NOT EXISTS simhash BIGINT;
+
+CREATE TABLE IF NOT EXISTS snippet_lsh_bands (
+    snippet_id INTEGER NOT NULL REFERENCES code_snippets(id) ON DELETE CASCADE,
+    band INTEGER NOT NULL,
+    band_value INTEGER NOT NULL,
+    PRIMARY KEY (snippet_id, band)
+);
+
+-- Candidate lookups match one band value at a time
+CREATE INDEX IF NOT EXISTS idx_snippet_lsh_bands_lookup ON snippet_lsh_bands(band, band_value);
+
+COMMENT ON TABLE snippet_lsh_bands IS 'Bands of code_snippets.simhash; fingerprints within a few bits share at least one band.';
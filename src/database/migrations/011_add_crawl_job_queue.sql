@@ -0,0 +1,17 @@
+-- Migration: Postgres-backed crawl job queue
+-- Jobs enqueued by the API wait in status 'queued' until a worker claims them with
+-- SELECT ... FOR UPDATE SKIP LOCKED; the claiming worker is recorded so the health
+-- monitor can hand jobs of dead workers to another one
+
+-- The inline CHECK of schema.sql and the named one of the models allow only running/completed
+ALTER TABLE crawl_jobs DROP CONSTRAINT IF EXISTS crawl_jobs_status_check;
+ALTER TABLE crawl_jobs DROP CONSTRAINT IF EXISTS check_status;
+ALTER TABLE crawl_jobs ADD CONSTRAINT check_status CHECK (status IN ('queued', 'running', 'completed'));
+
+ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS worker_id VARCHAR(64);
+ALTER TABLE crawl_jobs ADD COLUMN IF NOT EXISTS claimed_at TIMESTAMP;
+
+-- Workers claim the oldest queued job first
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_queued ON crawl_jobs(created_at) WHERE status = 'queued';
+
+COMMENT ON COLUMN crawl_jobs.worker_id IS 'Worker running the job (NULL for jobs run inside the API process)';
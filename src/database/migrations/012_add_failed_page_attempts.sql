@@ -0,0 +1,15 @@
+-- Migration: Failed page attempts and failure classes
+-- Failed pages are buffered per job and upserted in batches; repeated failures of a URL
+-- bump its attempt count and keep the last error, and the failure class lets retries
+-- go to transient failures first
+
+ALTER TABLE failed_pages ADD COLUMN IF NOT EXISTS attempts INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE failed_pages ADD COLUMN IF NOT EXISTS failure_class VARCHAR(20) NOT NULL DEFAULT 'other';
+ALTER TABLE failed_pages ADD COLUMN IF NOT EXISTS status_code INTEGER;
+
+ALTER TABLE failed_pages DROP CONSTRAINT IF EXISTS check_failure_class;
+ALTER TABLE failed_pages ADD CONSTRAINT check_failure_class
+    CHECK (failure_class IN ('timeout', 'client_error', 'server_error', 'extraction', 'other'));
+
+COMMENT ON COLUMN failed_pages.attempts IS 'Number of times the URL failed in this job';
+COMMENT ON COLUMN failed_pages.failure_class IS 'timeout, client_error (4xx), server_error (5xx), extraction or other';
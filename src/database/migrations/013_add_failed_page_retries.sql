@@ -0,0 +1,9 @@
+-- Migration: Background retries of failed pages
+-- Transient failures get a next retry time with exponential backoff and jitter; the
+-- retry scheduler claims due pages with SELECT ... FOR UPDATE SKIP LOCKED
+
+ALTER TABLE failed_pages ADD COLUMN IF NOT EXISTS next_retry_at TIMESTAMP;
+
+CREATE INDEX IF NOT EXISTS idx_failed_pages_next_retry ON failed_pages(next_retry_at) WHERE next_retry_at IS NOT NULL;
+
+COMMENT ON COLUMN failed_pages.next_retry_at IS 'When the URL is retried next (NULL: permanent failure or attempts exhausted)';
@@ -6,6 +6,7 @@ from uuid import uuid4
 
 from sqlalchemy import (
     ARRAY,
+    BigInteger,
     CheckConstraint,
     Column,
     DateTime,
@@ -54,6 +55,10 @@ class CrawlJob(Base):  # type: ignore[misc,valid-type]
     retry_count = Column(Integer, default=0)
     max_retries = Column(Integer, default=3)
 
+    # Worker running a queued job
+    worker_id = Column(String(64))
+    claimed_at = Column(DateTime)
+
     # Relationships
     documents = relationship("Document", back_populates="crawl_job", cascade="all, delete-orphan")
     failed_pages = relationship(
@@ -63,7 +68,7 @@ class CrawlJob(Base):  # type: ignore[misc,valid-type]
     __table_args__ = (
         UniqueConstraint("name", "version", name="unique_name_version"),
         CheckConstraint("max_depth >= 0 AND max_depth <= 5", name="check_max_depth"),
-        CheckConstraint("status IN ('running', 'completed')", name="check_status"),
+        CheckConstraint("status IN ('queued', 'running', 'completed')", name="check_status"),
         CheckConstraint(
             "crawl_phase IN ('crawling', 'finalizing') OR crawl_phase IS NULL",
             name="check_crawl_phase",
@@ -79,7 +84,9 @@ class CrawlJob(Base):  # type: ignore[misc,valid-type]
             "domain": self.domain,
             "start_urls": self.start_urls,
             "max_depth": self.max_depth,
+            "domain_restrictions": self.domain_restrictions,
             "status": self.status,
+            "worker_id": self.worker_id,
             "total_pages": self.total_pages,
             "processed_pages": self.processed_pages,
             "snippets_extracted": self.snippets_extracted,
@@ -199,6 +206,7 @@ class CodeSnippet(Base):  # type: ignore[misc,valid-type]
     language = Column(String(50), index=True)
     code_content = Column(Text, nullable=False)
     code_hash = Column(String(64), nullable=False, index=True)  # Not globally unique, indexed for duplicate detection
+    simhash = Column(BigInteger)  # Near-duplicate fingerprint, see database/fingerprint.py
     line_start = Column(Integer)
     line_end = Column(Integer)
     context_before = Column(Text)
@@ -312,8 +320,12 @@ class FailedPage(Base):  # type: ignore[misc,valid-type]
     id = Column(Integer, primary_key=True)
     crawl_job_id = Column(UUID(as_uuid=True), ForeignKey("crawl_jobs.id", ondelete="CASCADE"))
     url = Column(Text, nullable=False)
-    error_message = Column(Text)
-    failed_at = Column(DateTime, default=datetime.utcnow)
+    error_message = Column(Text)  # Last error
+    failed_at = Column(DateTime, default=datetime.utcnow)  # Last failure
+    attempts = Column(Integer, nullable=False, default=1)
+    failure_class = Column(String(20), nullable=False, default="other")
+    status_code = Column(Integer)
+    next_retry_at = Column(DateTime)  # NULL when the URL is not retried (again)
 
     # Relationships
     crawl_job = relationship("CrawlJob", back_populates="failed_pages")
@@ -321,9 +333,54 @@ class FailedPage(Base):  # type: ignore[misc,valid-type]
     __table_args__ = (
         UniqueConstraint("crawl_job_id", "url", name="uq_failed_pages"),
         Index("idx_failed_pages_crawl_job_id", "crawl_job_id"),
+        CheckConstraint(
+            "failure_class IN ('timeout', 'client_error', 'server_error', 'extraction', 'other')",
+            name="check_failure_class",
+        ),
+    )
+
+
+class FrontierURL(Base):  # type: ignore[misc,valid-type]
+    """Represents a URL in the persistent frontier of a deep crawl."""
+
+    __tablename__ = "crawl_frontier"
+
+    id = Column(BigInteger, primary_key=True)
+    crawl_job_id = Column(
+        UUID(as_uuid=True), ForeignKey("crawl_jobs.id", ondelete="CASCADE"), nullable=False
+    )
+    url = Column(Text, nullable=False)
+    depth = Column(Integer, default=0, nullable=False)
+    parent_url = Column(Text)
+    state = Column(String(20), default="pending", nullable=False)  # pending, in_progress, done, failed
+    claimed_by = Column(String(64))
+    claimed_at = Column(DateTime)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    __table_args__ = (
+        UniqueConstraint("crawl_job_id", "url", name="uq_crawl_frontier_job_url"),
+        CheckConstraint(
+            "state IN ('pending', 'in_progress', 'done', 'failed')", name="check_frontier_state"
+        ),
+        Index("idx_crawl_frontier_claim", "crawl_job_id", "state", "depth", "id"),
     )
 
 
+class SnippetLSHBand(Base):  # type: ignore[misc,valid-type]
+    """Represents one band of a snippet's fingerprint in the near-duplicate index."""
+
+    __tablename__ = "snippet_lsh_bands"
+
+    snippet_id = Column(
+        Integer, ForeignKey("code_snippets.id", ondelete="CASCADE"), primary_key=True
+    )
+    band = Column(Integer, primary_key=True)
+    band_value = Column(Integer, nullable=False)
+
+    __table_args__ = (Index("idx_snippet_lsh_bands_lookup", "band", "band_value"),)
+
+
 class SnippetRelationship(Base):  # type: ignore[misc,valid-type]
     """Represents relationships between code snippets."""
 
@@ -17,7 +17,7 @@ CREATE TABLE IF NOT EXISTS crawl_jobs (
     start_urls TEXT[] NOT NULL,
     max_depth INTEGER DEFAULT 1 CHECK (max_depth >= 0 AND max_depth <= 5),
     domain_restrictions TEXT[],
-    status VARCHAR(20) DEFAULT 'running' CHECK (status IN ('running', 'completed')),
+    status VARCHAR(20) DEFAULT 'running' CHECK (status IN ('queued', 'running', 'completed')),
     total_pages INTEGER DEFAULT 0,
     processed_pages INTEGER DEFAULT 0,
     snippets_extracted INTEGER DEFAULT 0,
@@ -36,6 +36,10 @@ CREATE TABLE IF NOT EXISTS crawl_jobs (
     documents_crawled INTEGER DEFAULT 0,
     retry_count INTEGER DEFAULT 0,
     max_retries INTEGER DEFAULT 3,
+
+    -- Worker running a queued job
+    worker_id VARCHAR(64),
+    claimed_at TIMESTAMP,
     
     -- Unique constraint on name and version combination
     CONSTRAINT unique_name_version UNIQUE (name, version)
@@ -98,6 +102,7 @@ CREATE TABLE IF NOT EXISTS code_snippets (
     language VARCHAR(50),
     code_content TEXT NOT NULL,
     code_hash VARCHAR(64) NOT NULL,
+    simhash BIGINT,  -- Near-duplicate fingerprint
     line_start INTEGER,
     line_end INTEGER,
     context_before TEXT,
@@ -130,6 +135,7 @@ CREATE TABLE IF NOT EXISTS code_snippets (
 
 -- Crawl jobs indexes
 CREATE INDEX IF NOT EXISTS idx_crawl_jobs_status ON crawl_jobs(status);
+CREATE INDEX IF NOT EXISTS idx_crawl_jobs_queued ON crawl_jobs(created_at) WHERE status = 'queued';
 CREATE INDEX IF NOT EXISTS idx_crawl_jobs_created_by ON crawl_jobs(created_by);
 CREATE INDEX IF NOT EXISTS idx_crawl_jobs_created_at ON crawl_jobs(created_at DESC);
 
@@ -350,12 +356,48 @@ CREATE TABLE IF NOT EXISTS failed_pages (
     url TEXT NOT NULL,
     error_message TEXT,
     failed_at TIMESTAMP DEFAULT NOW(),
-    UNIQUE(crawl_job_id, url)
+    attempts INTEGER NOT NULL DEFAULT 1,
+    failure_class VARCHAR(20) NOT NULL DEFAULT 'other',
+    status_code INTEGER,
+    next_retry_at TIMESTAMP,
+    UNIQUE(crawl_job_id, url),
+    CONSTRAINT check_failure_class CHECK (failure_class IN ('timeout', 'client_error', 'server_error', 'extraction', 'other'))
 );
 
 -- Index for fast lookups by crawl job
 CREATE INDEX IF NOT EXISTS idx_failed_pages_crawl_job_id ON failed_pages(crawl_job_id);
 
+-- Failed pages due for a background retry
+CREATE INDEX IF NOT EXISTS idx_failed_pages_next_retry ON failed_pages(next_retry_at) WHERE next_retry_at IS NOT NULL;
+
+-- Persistent URL frontier for resumable deep crawls
+CREATE TABLE IF NOT EXISTS crawl_frontier (
+    id BIGSERIAL PRIMARY KEY,
+    crawl_job_id UUID NOT NULL REFERENCES crawl_jobs(id) ON DELETE CASCADE,
+    url TEXT NOT NULL,
+    depth INTEGER NOT NULL DEFAULT 0,
+    parent_url TEXT,
+    state VARCHAR(20) NOT NULL DEFAULT 'pending' CHECK (state IN ('pending', 'in_progress', 'done', 'failed')),
+    claimed_by VARCHAR(64),
+    claimed_at TIMESTAMP,
+    created_at TIMESTAMP DEFAULT NOW(),
+    updated_at TIMESTAMP DEFAULT NOW(),
+    UNIQUE(crawl_job_id, url)
+);
+
+-- Claim queries pick the shallowest pending URLs of a job first
+CREATE INDEX IF NOT EXISTS idx_crawl_frontier_claim ON crawl_frontier(crawl_job_id, state, depth, id);
+
+-- Band index of snippet fingerprints for near-duplicate lookups
+CREATE TABLE IF NOT EXISTS snippet_lsh_bands (
+    snippet_id INTEGER NOT NULL REFERENCES code_snippets(id) ON DELETE CASCADE,
+    band INTEGER NOT NULL,
+    band_value INTEGER NOT NULL,
+    PRIMARY KEY (snippet_id, band)
+);
+
+CREATE INDEX IF NOT EXISTS idx_snippet_lsh_bands_lookup ON snippet_lsh_bands(band, band_value);
+
 -- Snippet relationships table for tracking code dependencies
 CREATE TABLE IF NOT EXISTS snippet_relationships (
     id SERIAL PRIMARY KEY,
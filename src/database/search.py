@@ -9,6 +9,7 @@ from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 
 from ..config import get_settings
+from .fingerprint import hamming_distance
 from .models import CodeSnippet, CrawlJob, Document, UploadJob
 
 logger = logging.getLogger(__name__)
@@ -34,6 +35,7 @@ class CodeSearcher:
         offset: int = 0,
         include_context: bool = True,
         search_mode: str = "code",
+        collapse_near_duplicates: bool | None = None,
     ) -> tuple[list[CodeSnippet], int]:
         """Search code snippets with various filters.
 
@@ -48,12 +50,17 @@ class CodeSearcher:
             include_context: Whether to include context fields
             search_mode: Search strategy - "code" (default) uses threshold-based markdown fallback,
                         "enhanced" always searches markdown for maximum results
+            collapse_near_duplicates: Show only the first of nearly identical snippets
+                        (defaults to the collapse_near_duplicates setting)
 
         Returns:
-            Tuple of (results, total_count)
+            Tuple of (results, total_count). Collapsing applies to the returned
+            page only, so total_count and offsets count snippets before collapsing.
         """
         if limit is None:
             limit = self.settings.default_max_results
+        if collapse_near_duplicates is None:
+            collapse_near_duplicates = self.settings.collapse_near_duplicates
 
         # Resolve source name to job IDs if provided
         resolved_job_ids = []
@@ -248,6 +255,8 @@ class CodeSearcher:
                 else:
                     logger.info(f"No documents found matching '{query}' in markdown content")
 
+            if collapse_near_duplicates:
+                results = self._collapse_near_duplicates(results)
             return results, total_count
         else:
             # Non-text search - use regular SQLAlchemy query
@@ -297,8 +306,37 @@ class CodeSearcher:
                     snippet.context_before = ""  # Clear context
                     snippet.context_after = ""  # Clear context
 
+            if collapse_near_duplicates:
+                results = self._collapse_near_duplicates(results)
             return results, total_count
 
+    def _collapse_near_duplicates(self, snippets: list[CodeSnippet]) -> list[CodeSnippet]:
+        """Drop snippets nearly identical to an earlier result on the same page.
+
+        Snippets without a fingerprint are never collapsed. Each kept snippet
+        records how many results were folded into it in ``_near_duplicate_count``,
+        which the search API returns as ``near_duplicates``.
+        """
+        max_distance = self.settings.near_duplicate_collapse_distance
+        kept: list[CodeSnippet] = []
+        for snippet in snippets:
+            original = None
+            if snippet.simhash is not None:
+                original = next(
+                    (
+                        other for other in kept
+                        if other.simhash is not None
+                        and other.language == snippet.language
+                        and hamming_distance(other.simhash, snippet.simhash) <= max_distance
+                    ),
+                    None,
+                )
+            if original is None:
+                kept.append(snippet)
+            else:
+                original._near_duplicate_count = getattr(original, "_near_duplicate_count", 0) + 1
+        return kept
+
     def search_by_function(self, function_name: str, limit: int | None = None) -> list[CodeSnippet]:
         """Search for snippets containing specific function names.
 
@@ -4,6 +4,8 @@ import os
 
 # Set testing environment variable before any imports
 os.environ["TESTING"] = "true"
+# Deliver job progress in-process instead of through Postgres NOTIFY
+os.environ.setdefault("CRAWL_PROGRESS_BUS", "memory")
 
 import asyncio
 import logging
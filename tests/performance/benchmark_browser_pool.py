@@ -0,0 +1,93 @@
+"""Benchmark browser cold starts with and without the browser pool.
+
+Runs a number of small sequential crawls of a local page, the way a deep crawl
+with several start URLs or consecutive jobs do. ``fresh`` launches a new
+``AsyncWebCrawler`` per crawl, as crawls did before the pool; ``pooled`` leases
+a started browser from ``BrowserPool``. Reports the time to the first result of
+each crawl, which is dominated by the browser launch when it is not reused.
+
+Needs Playwright browsers (``playwright install``).
+
+Usage:
+    python tests/performance/benchmark_browser_pool.py [--crawls 5]
+"""
+
+import argparse
+import asyncio
+import functools
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from crawl4ai import AsyncWebCrawler  # noqa: E402
+
+from src.crawler.browser_pool import BrowserPool  # noqa: E402
+from src.crawler.config import create_browser_config, create_crawler_config  # noqa: E402
+
+PAGE = "<html><head><title>Page</title></head><body><h1>Page</h1><pre><code>print('hi')</code></pre></body></html>"
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+async def crawl_once(crawler, url: str) -> None:
+    config = create_crawler_config(max_depth=0)
+    async for _ in await crawler.arun_many([url], config=config):
+        pass
+
+
+async def run(mode: str, url: str, crawls: int) -> list[float]:
+    browser_config = create_browser_config(headless=True)
+    pool = BrowserPool(browser_config, size=1, idle_timeout=0) if mode == "pooled" else None
+    timings = []
+    try:
+        for _ in range(crawls):
+            started = time.perf_counter()
+            opener = pool.lease() if pool else AsyncWebCrawler(config=browser_config)
+            async with opener as crawler:
+                await crawl_once(crawler, url)
+            timings.append(time.perf_counter() - started)
+    finally:
+        if pool:
+            await pool.close()
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--crawls', type=int, default=5, help='Sequential crawls per mode')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        (Path(directory) / "index.html").write_text(PAGE)
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=directory))
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        url = f"http://127.0.0.1:{httpd.server_address[1]}/index.html"
+
+        print(f"\n📊 {args.crawls} sequential single-page crawls")
+        try:
+            for mode in ("fresh", "pooled"):
+                try:
+                    timings = asyncio.run(run(mode, url, args.crawls))
+                except Exception as e:
+                    print(f"   - {mode:<7}: skipped ({str(e).splitlines()[0][:80]})")
+                    continue
+                print(
+                    f"   - {mode:<7}: first {timings[0]:.2f}s, "
+                    f"median {statistics.median(timings):.2f}s, total {sum(timings):.2f}s"
+                )
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""Benchmark peak memory of retained vs streamed crawl persistence.
+
+Feeds synthetic pages (markdown plus code blocks sized like real documentation
+pages) through the crawler's persist stage and reports the peak RSS for each
+page count. ``retain`` keeps every result in memory until the crawl ends, the
+way deep crawls used to; ``stream`` hands each micro-batch to the sink and drops
+it, so memory should stay flat as the page count grows.
+
+Each measurement runs in a fresh subprocess because peak RSS never decreases
+within a process. No database or browser is needed; the sink discards batches.
+
+Usage:
+    python tests/performance/benchmark_crawl_memory.py [--pages 250 500 1000 2000] [--page-kb 200]
+"""
+
+import argparse
+import asyncio
+import resource
+import subprocess
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+async def run_worker(mode: str, pages: int, page_kb: int) -> None:
+    from src.crawler.config import BrowserConfig
+    from src.crawler.extractors.models import ExtractedCodeBlock
+    from src.crawler.page_crawler import CrawlResult, PageCrawler
+    from src.crawler.pipeline import PipelineStage, StagedPipeline
+
+    crawler = PageCrawler(BrowserConfig())
+    settings = crawler.settings.crawling
+    results: list[CrawlResult] | None = [] if mode == "retain" else None
+    crawl_progress = {'crawled_count': 0, 'processed_count': 0, 'last_ws_count': 0}
+
+    async def sink(batch: list[CrawlResult]) -> None:
+        # Stand-in for the database write; the batch is released afterwards
+        await asyncio.sleep(0)
+
+    async def parse(index: int) -> CrawlResult:
+        body = f"# Page {index}\n" + ("lorem ipsum dolor sit amet " * (page_kb * 40))
+        return CrawlResult(
+            url=f"https://benchmark.invalid/{index}",
+            title=f"Page {index}",
+            content=body,
+            content_hash=str(index),
+            code_blocks=[
+                ExtractedCodeBlock(code=f"print({index}, {i})\n" * 50, language="python")
+                for i in range(10)
+            ],
+        )
+
+    async def persist(batch: list[CrawlResult]) -> None:
+        await crawler._persist_results(batch, results, crawl_progress, None, "benchmark", sink)
+
+    pipeline = StagedPipeline([
+        PipelineStage("parse", parse, workers=settings.parse_workers, maxsize=settings.pipeline_queue_size),
+        PipelineStage(
+            "persist", persist, maxsize=settings.pipeline_queue_size, batch_size=settings.persist_batch_size
+        ),
+    ])
+    pipeline.start()
+    for index in range(pages):
+        crawl_progress['crawled_count'] += 1
+        await pipeline.submit(index)
+    await pipeline.join()
+
+    print(f"{peak_rss_mb():.1f}")
+
+
+def measure(mode: str, pages: int, page_kb: int) -> float:
+    output = subprocess.run(
+        [sys.executable, __file__, "--worker", mode, "--pages", str(pages), "--page-kb", str(page_kb)],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return float(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[250, 500, 1000, 2000], help='Page counts to measure')
+    parser.add_argument('--page-kb', type=int, default=200, help='Approximate markdown size per page in KB')
+    parser.add_argument('--worker', choices=['retain', 'stream'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        asyncio.run(run_worker(args.worker, args.pages[0], args.page_kb))
+        return
+
+    print(f"\n📊 Peak RSS (MB) with ~{args.page_kb} KB pages")
+    print(f"   {'pages':>6} {'retain':>10} {'stream':>10}")
+    for pages in args.pages:
+        retained = measure('retain', pages, args.page_kb)
+        streamed = measure('stream', pages, args.page_kb)
+        print(f"   {pages:>6} {retained:>10.1f} {streamed:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark page throughput and memory of the http and browser fetch modes.
+
+Serves generated documentation pages (prose plus code blocks) from a local
+static server and fetches them with ``HTTPCrawler`` and with Crawl4AI's
+browser-backed ``AsyncWebCrawler`` using the crawler's normal run config.
+Reports pages per second and the peak RSS of the process and its children
+(the browser runs in child processes).
+
+The browser mode needs Playwright browsers (``playwright install``); it is
+skipped with a message when they are missing.
+
+Usage:
+    python tests/performance/benchmark_fetch_modes.py [--pages 200] [--modes http browser]
+"""
+
+import argparse
+import asyncio
+import functools
+import sys
+import tempfile
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import psutil
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.crawler.config import create_browser_config, create_crawler_config  # noqa: E402
+from src.crawler.http_fetcher import HTTPCrawler  # noqa: E402
+
+PAGE = """<html><head><title>Page {index}</title></head><body>
+<h1>Page {index}</h1>
+{sections}
+</body></html>"""
+
+SECTION = """<h2>Section {i}</h2><p>{prose}</p>
+<pre><code class="language-python">def handler_{i}(request):
+    return process(request, retries={i})
+</code></pre>"""
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def write_site(directory: Path, pages: int) -> None:
+    prose = "Configuration options are described in this section. " * 20
+    for index in range(pages):
+        sections = "\n".join(SECTION.format(i=i, prose=prose) for i in range(8))
+        (directory / f"page-{index}.html").write_text(PAGE.format(index=index, sections=sections))
+
+
+class PeakMemory:
+    """Samples RSS of this process and its children in the background."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self) -> None:
+        process = psutil.Process()
+        while not self._stop.is_set():
+            rss = process.memory_info().rss
+            for child in process.children(recursive=True):
+                try:
+                    rss += child.memory_info().rss
+                except psutil.Error:
+                    pass
+            self.peak = max(self.peak, rss)
+            time.sleep(self.interval)
+
+    def __enter__(self) -> "PeakMemory":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._stop.set()
+        self._thread.join()
+
+
+async def fetch_all(mode: str, urls: list[str]) -> int:
+    config = create_crawler_config(max_depth=0)
+    if mode == "http":
+        crawler = HTTPCrawler()
+    else:
+        from crawl4ai import AsyncWebCrawler
+
+        crawler = AsyncWebCrawler(config=create_browser_config(headless=True))
+
+    succeeded = 0
+    async with crawler:
+        async for result in await crawler.arun_many(urls, config=config):
+            succeeded += bool(result.success)
+    return succeeded
+
+
+def run_mode(mode: str, urls: list[str]) -> None:
+    with PeakMemory() as memory:
+        started = time.perf_counter()
+        try:
+            succeeded = asyncio.run(fetch_all(mode, urls))
+        except Exception as e:
+            print(f"   - {mode:<8}: skipped ({str(e).splitlines()[0][:80]})")
+            return
+        elapsed = time.perf_counter() - started
+
+    print(
+        f"   - {mode:<8}: {succeeded}/{len(urls)} pages in {elapsed:.2f}s, "
+        f"{len(urls) / elapsed:.1f} pages/s, peak RSS {memory.peak / 1024 / 1024:.0f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200, help='Pages to fetch per mode')
+    parser.add_argument('--modes', nargs='+', choices=['http', 'browser'], default=['http', 'browser'])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        write_site(Path(directory), args.pages)
+        handler = functools.partial(QuietHandler, directory=directory)
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=httpd.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{httpd.server_address[1]}"
+        urls = [f"{base}/page-{index}.html" for index in range(args.pages)]
+
+        print(f"\n📊 Fetching {args.pages} local documentation pages")
+        try:
+            for mode in args.modes:
+                run_mode(mode, urls)
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""Benchmark throughput and peak memory of repository ingestion.
+
+Generates a repository of markdown files with code blocks and pushes it
+through ``UploadProcessor`` the way ``GitHubProcessor`` does. ``eager`` reads
+every file into the upload config up front, as repositories used to be
+ingested; ``stream`` walks the tree lazily and lets the upload workers read
+files as they pick them up. Code blocks are extracted as usual; the database
+writes are replaced by no-ops, so no database is needed.
+
+Each measurement runs in a fresh subprocess because peak RSS never decreases
+within a process.
+
+Usage:
+    python tests/performance/benchmark_repo_ingestion.py [--files 2000 10000] [--file-kb 64] [--concurrency 8]
+"""
+
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+os.environ.setdefault("CRAWL_PROGRESS_BUS", "memory")
+
+SECTION = """## Section {i}
+
+Configuration options are described in this section. {prose}
+
+```python
+def handler_{i}(request):
+    return process(request, retries={i})
+```
+"""
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB (ru_maxrss is KB on Linux)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def write_repo(directory: Path, files: int, file_kb: int) -> None:
+    prose = "Lorem ipsum dolor sit amet. " * 30
+    sections = max(1, file_kb * 1024 // len(SECTION.format(i=0, prose=prose)))
+    body = "\n".join(SECTION.format(i=i, prose=prose) for i in range(sections))
+    for index in range(files):
+        package = directory / "docs" / f"package-{index % 50}"
+        package.mkdir(parents=True, exist_ok=True)
+        (package / f"page-{index}.md").write_text(f"# Page {index}\n\n{body}")
+
+
+async def ingest(mode: str, repo: Path, concurrency: int) -> int:
+    from src.crawler.github_processor import GitHubProcessor, GitHubRepoConfig
+    from src.crawler.upload_processor import UploadConfig
+
+    github = GitHubProcessor()
+    processor = github.upload_processor
+
+    @contextmanager
+    def session_scope():
+        yield SimpleNamespace()
+
+    async def noop(*args, **kwargs):
+        return None
+
+    async def store_result(result, job_id):
+        return 0, len(result.code_blocks)
+
+    processor.db_manager = SimpleNamespace(session_scope=session_scope)
+    processor.description_generator = None
+    processor.progress_tracker = SimpleNamespace(
+        start_tracking=noop, update_progress=noop, send_completion=noop, stop_tracking=noop
+    )
+    processor._store_result = store_result
+    completed = {}
+    processor._complete_job = lambda job_id, **kwargs: completed.update(kwargs)
+
+    config = GitHubRepoConfig(repo_url="https://github.com/example/repo", name="Benchmark")
+    files = github._iter_upload_files(repo, github._iter_documentation_files(repo), config)
+    if mode == "eager":
+        files = [{**entry, "content": Path(entry["path"]).read_text()} for entry in files]
+        file_count = len(files)
+    else:
+        file_count = sum(1 for _ in github._iter_documentation_files(repo))
+
+    upload = UploadConfig(
+        name="Benchmark", files=files, file_count=file_count, max_concurrent_files=concurrency
+    )
+
+    import src.database.content_check
+
+    src.database.content_check.preload_content_hashes = lambda session, urls, **kwargs: {}
+    await processor._execute_upload("benchmark", upload)
+    return completed.get("snippets_extracted", 0)
+
+
+def run_worker(mode: str, repo: str, concurrency: int) -> None:
+    started = time.perf_counter()
+    snippets = asyncio.run(ingest(mode, Path(repo), concurrency))
+    print(f"{time.perf_counter() - started:.3f} {peak_rss_mb():.1f} {snippets}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, nargs='+', default=[2000, 10000], help='Repository sizes in files')
+    parser.add_argument('--file-kb', type=int, default=64, help='Approximate size of each file in KB')
+    parser.add_argument('--concurrency', type=int, default=8, help='Upload workers')
+    parser.add_argument('--modes', nargs='+', choices=['eager', 'stream'], default=['eager', 'stream'])
+    parser.add_argument('--worker', nargs=2, metavar=('MODE', 'REPO'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        import logging
+
+        logging.disable(logging.INFO)
+        run_worker(args.worker[0], args.worker[1], args.concurrency)
+        return
+
+    for files in args.files:
+        with tempfile.TemporaryDirectory() as directory:
+            write_repo(Path(directory), files, args.file_kb)
+            print(f"\n📊 Ingesting {files} files of ~{args.file_kb} KB")
+            for mode in args.modes:
+                output = subprocess.run(
+                    [sys.executable, __file__, '--concurrency', str(args.concurrency), '--worker', mode, directory],
+                    capture_output=True, text=True, check=True,
+                ).stdout.split()[-3:]
+                seconds, peak, snippets = float(output[0]), float(output[1]), int(output[2])
+                print(
+                    f"   - {mode:<7}: {files / seconds:.0f} files/s, peak RSS {peak:.0f} MB "
+                    f"({snippets} snippets)"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""Benchmark per-snippet vs bulk persistence of extracted code blocks.
+
+Compares the legacy write path (one duplicate lookup, ``add`` and ``flush`` per
+code block) with ``ResultProcessor._process_code_blocks``, which checks all
+hashes of a page in one query and writes them with one multi-row INSERT.
+
+Runs against the database configured in ``.env`` and removes the crawl job it
+creates when done.
+
+Usage:
+    python tests/performance/benchmark_snippet_persistence.py [--pages 50] [--blocks 20]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.crawler.result_processor import ResultProcessor  # noqa: E402
+from src.database import get_db_manager  # noqa: E402
+from src.database.content_check import find_duplicate_snippet_in_source  # noqa: E402
+from src.database.models import CodeSnippet, CrawlJob, Document  # noqa: E402
+
+
+def make_blocks(page: int, count: int, variant: str) -> list[dict]:
+    """Build unique code blocks for one page."""
+    return [
+        {
+            'code': f"def {variant}_page{page}_fn{i}(x):\n    return x * {i}\n",
+            'language': 'python',
+            'title': f"Function {i}",
+            'description': f"Multiplies by {i}",
+            'metadata': {'extraction_method': 'benchmark'},
+        }
+        for i in range(count)
+    ]
+
+
+def persist_per_block(session, doc: Document, blocks: list[dict], source_url: str) -> int:
+    """Legacy write path: one lookup and one flush per code block."""
+    created = 0
+    for block in blocks:
+        code_hash = hashlib.md5(block['code'].encode()).hexdigest()
+        if find_duplicate_snippet_in_source(session, code_hash, doc):
+            continue
+        session.add(CodeSnippet(
+            document_id=doc.id,
+            title=block['title'],
+            description=block['description'],
+            language=block['language'],
+            code_content=block['code'],
+            code_hash=code_hash,
+            source_url=source_url,
+            meta_data=block['metadata'],
+        ))
+        session.flush()
+        created += 1
+    session.commit()
+    return created
+
+
+async def run(pages: int, blocks: int) -> None:
+    db_manager = get_db_manager()
+    processor = ResultProcessor()
+    timings: dict[str, list[float]] = {'per_block': [], 'bulk': []}
+
+    with db_manager.session_scope() as session:
+        job = CrawlJob(
+            id=uuid4(),
+            name=f"snippet-benchmark-{datetime.utcnow():%Y%m%d%H%M%S}",
+            start_urls=['https://benchmark.invalid'],
+            status='completed',
+        )
+        session.add(job)
+        session.commit()
+
+        try:
+            for variant in ('per_block', 'bulk'):
+                for page in range(pages):
+                    url = f"https://benchmark.invalid/{variant}/{page}"
+                    doc = Document(url=url, title=url, crawl_job_id=job.id)
+                    session.add(doc)
+                    session.flush()
+
+                    page_blocks = make_blocks(page, blocks, variant)
+                    started = time.perf_counter()
+                    if variant == 'per_block':
+                        persist_per_block(session, doc, page_blocks, url)
+                    else:
+                        await processor._process_code_blocks(session, doc, page_blocks, url)
+                    timings[variant].append(time.perf_counter() - started)
+        finally:
+            session.rollback()
+            session.delete(session.get(CrawlJob, job.id))
+            session.commit()
+
+    print(f"\n📊 {pages} pages x {blocks} code blocks")
+    for variant, samples in timings.items():
+        total = sum(samples)
+        print(
+            f"   - {variant:<9}: total {total:.3f}s, "
+            f"median {statistics.median(samples) * 1000:.1f} ms/page, "
+            f"{pages * blocks / total:.0f} snippets/s"
+        )
+    speedup = sum(timings['per_block']) / sum(timings['bulk'])
+    print(f"\n📈 Bulk insert speedup: {speedup:.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=50, help='Pages to persist per variant')
+    parser.add_argument('--blocks', type=int, default=20, help='Code blocks per page')
+    args = parser.parse_args()
+    asyncio.run(run(args.pages, args.blocks))
+
+
+if __name__ == "__main__":
+    main()
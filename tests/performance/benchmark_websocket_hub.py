@@ -0,0 +1,127 @@
+"""Benchmark WebSocket fan-out of crawl progress to many subscribers.
+
+Simulates subscribers of one crawl job whose sends take a few milliseconds,
+plus a few stalled clients, and publishes a stream of progress updates. It
+compares awaiting every send in turn (how updates used to be broadcast)
+with the ``ConnectionManager`` hub, reporting how long the publishing crawl
+task was blocked and when the last responsive client saw the final update.
+
+Usage:
+    python tests/performance/benchmark_websocket_hub.py [--subscribers 500] [--updates 20] [--stalled 5]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from src.api.websocket import ConnectionManager  # noqa: E402
+from src.constants import WebSocketMessageType  # noqa: E402
+
+
+class SimulatedWebSocket:
+    """A client whose sends take `latency` seconds (forever when stalled)."""
+
+    def __init__(self, latency: float, stalled: bool = False):
+        self.latency = latency
+        self.stalled = stalled
+        self.last: dict | None = None
+        self.received_at = 0.0
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        if self.stalled:
+            await asyncio.Event().wait()
+        await asyncio.sleep(self.latency)
+        self.last = message
+        self.received_at = time.perf_counter()
+
+
+def progress(processed: int) -> dict:
+    return {
+        "type": WebSocketMessageType.CRAWL_UPDATE,
+        "job_id": "job-1",
+        "status": "running",
+        "data": {"processed_pages": processed},
+    }
+
+
+def make_clients(subscribers: int, stalled: int, latency: float) -> list[SimulatedWebSocket]:
+    return [SimulatedWebSocket(latency, stalled=i < stalled) for i in range(subscribers)]
+
+
+async def serial_broadcast(clients: list[SimulatedWebSocket], updates: int, send_timeout: float) -> float:
+    blocked = 0.0
+    for processed in range(updates):
+        started = time.perf_counter()
+        for client in clients:
+            try:
+                await asyncio.wait_for(client.send_json(progress(processed)), send_timeout)
+            except asyncio.TimeoutError:
+                pass
+        blocked += time.perf_counter() - started
+    return blocked
+
+
+async def hub_publish(clients: list[SimulatedWebSocket], updates: int, send_timeout: float) -> float:
+    hub = ConnectionManager(send_timeout=send_timeout)
+    for i, client in enumerate(clients):
+        await hub.connect(client, f"client-{i}")
+        hub.subscribe(f"client-{i}", "job-1")
+
+    blocked = 0.0
+    for processed in range(updates):
+        started = time.perf_counter()
+        hub.publish("job-1", progress(processed))
+        blocked += time.perf_counter() - started
+        # The crawler does other work between updates
+        await asyncio.sleep(0.001)
+
+    final = progress(updates - 1)
+    while not all(client.last == final for client in clients if not client.stalled):
+        await asyncio.sleep(0.01)
+    await hub.close()
+    return blocked
+
+
+async def run(mode: str, args: argparse.Namespace) -> None:
+    clients = make_clients(args.subscribers, args.stalled, args.latency)
+    runner = serial_broadcast if mode == "serial" else hub_publish
+
+    started = time.perf_counter()
+    blocked = await runner(clients, args.updates, args.send_timeout)
+    delivered = max(client.received_at for client in clients if not client.stalled) - started
+
+    print(
+        f"   - {mode:<7}: publisher blocked {blocked:.2f}s, "
+        f"final update delivered after {delivered:.2f}s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--subscribers', type=int, default=500, help='Subscribed clients')
+    parser.add_argument('--updates', type=int, default=20, help='Progress updates to publish')
+    parser.add_argument('--stalled', type=int, default=5, help='Clients that never finish a send')
+    parser.add_argument('--latency', type=float, default=0.002, help='Seconds per send of a responsive client')
+    parser.add_argument('--send-timeout', type=float, default=0.5, help='Seconds before a send is abandoned')
+    parser.add_argument('--modes', nargs='+', choices=['serial', 'hub'], default=['serial', 'hub'])
+    args = parser.parse_args()
+    logging.getLogger("src.api.websocket").setLevel(logging.WARNING)
+
+    print(
+        f"\n📊 Publishing {args.updates} updates to {args.subscribers} subscribers "
+        f"({args.stalled} stalled)"
+    )
+    for mode in args.modes:
+        asyncio.run(run(mode, args))
+
+
+if __name__ == "__main__":
+    main()
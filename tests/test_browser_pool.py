@@ -0,0 +1,197 @@
+"""Tests for the shared browser pool."""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.crawler.browser_pool import BrowserPool, close_browser_pool, get_browser_pool
+from src.crawler.crawl_manager import CrawlManager
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowserManager:
+    """Crawl4AI browser manager stand-in: one context per config signature."""
+
+    def __init__(self, crawler: "FakeCrawler"):
+        self.browser = SimpleNamespace(is_connected=lambda: crawler.connected)
+        self.contexts_by_config: dict[str, FakeContext] = {}
+        self._context_refcounts: dict[str, int] = {}
+        self._context_last_used: dict[str, float] = {}
+        self._contexts_lock = asyncio.Lock()
+        self.opened: list[FakeContext] = []
+
+    def _make_config_signature(self, config) -> str:
+        return "base"
+
+    def page(self) -> FakeContext:
+        signature = self._make_config_signature(None)
+        if signature not in self.contexts_by_config:
+            self.contexts_by_config[signature] = FakeContext()
+            self.opened.append(self.contexts_by_config[signature])
+        return self.contexts_by_config[signature]
+
+
+class FakeCrawler:
+    """AsyncWebCrawler stand-in that tracks its lifecycle and the contexts pages use."""
+
+    def __init__(self):
+        self.started = 0
+        self.closed = 0
+        self.connected = True
+        self.ready = False
+        self.crawler_strategy = SimpleNamespace(browser_manager=FakeBrowserManager(self))
+
+    @property
+    def contexts(self) -> list[FakeContext]:
+        return self.crawler_strategy.browser_manager.opened
+
+    async def start(self):
+        self.started += 1
+        self.ready = True
+        return self
+
+    async def close(self):
+        self.closed += 1
+        self.ready = False
+
+    async def arun_many(self, urls, config=None, **kwargs):
+        manager = self.crawler_strategy.browser_manager
+
+        async def stream():
+            for url in urls:
+                yield SimpleNamespace(url=url, success=True, context=manager.page())
+
+        return stream()
+
+
+def make_pool(**kwargs) -> tuple[BrowserPool, list[FakeCrawler]]:
+    created: list[FakeCrawler] = []
+
+    def factory() -> FakeCrawler:
+        created.append(FakeCrawler())
+        return created[-1]
+
+    kwargs.setdefault("idle_timeout", 0)
+    return BrowserPool(browser_config=None, crawler_factory=factory, **kwargs), created
+
+
+async def fetch(lease, count: int) -> list:
+    return [
+        result.context
+        async for result in await lease.arun_many([f"https://docs.example.com/{i}" for i in range(count)])
+    ]
+
+
+class TestBrowserPool:
+    """Test leasing, recycling, health checks and idle shutdown."""
+
+    @pytest.mark.asyncio
+    async def test_browser_is_reused_across_leases(self):
+        pool, created = make_pool(size=2)
+
+        for _ in range(3):
+            async with pool.lease() as lease:
+                await fetch(lease, 2)
+
+        assert len(created) == 1
+        assert created[0].started == 1
+        assert pool.stats["reused"] == 2
+
+    @pytest.mark.asyncio
+    async def test_concurrent_leases_share_browsers_with_own_contexts(self):
+        pool, created = make_pool(size=2)
+        release = asyncio.Event()
+        contexts = []
+
+        async def hold():
+            async with pool.lease() as lease:
+                contexts.extend(await fetch(lease, 1))
+                await release.wait()
+
+        holders = [asyncio.create_task(hold()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        assert pool.snapshot()["leased"] == 3
+        assert len(created) == 2
+
+        release.set()
+        await asyncio.gather(*holders)
+        assert len(set(map(id, contexts))) == 3
+        assert all(context.closed for context in contexts)
+
+    @pytest.mark.asyncio
+    async def test_context_is_recycled_during_a_crawl(self):
+        pool, created = make_pool(max_pages_per_context=3)
+
+        async with pool.lease() as lease:
+            contexts = await fetch(lease, 7)
+            assert contexts[0].closed
+            assert not contexts[-1].closed
+
+        assert [len({id(c) for c in contexts[i:i + 3]}) for i in (0, 3, 6)] == [1, 1, 1]
+        assert len(created[0].contexts) == 3
+        assert created[0].closed == 0
+        assert pool.stats["recycled"] == 2
+
+    @pytest.mark.asyncio
+    async def test_disconnected_browser_is_replaced(self):
+        pool, created = make_pool()
+
+        async with pool.lease():
+            pass
+        created[0].connected = False
+        async with pool.lease() as lease:
+            assert lease.crawler is created[1]
+
+        assert created[0].closed == 1
+        assert pool.stats["unhealthy"] == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_browsers_are_closed(self):
+        pool, created = make_pool(idle_timeout=0.05)
+
+        async with pool.lease():
+            pass
+        await asyncio.sleep(0.2)
+
+        assert created[0].closed == 1
+        assert pool.snapshot()["idle"] == 0
+        await pool.close()
+
+    @pytest.mark.asyncio
+    async def test_close_rejects_new_leases(self):
+        pool, created = make_pool()
+        async with pool.lease():
+            pass
+
+        await pool.close()
+
+        assert created[0].closed == 1
+        with pytest.raises(RuntimeError):
+            async with pool.lease():
+                pass
+
+
+class TestSharedBrowserPool:
+    """Test that crawl managers of a process share one pool."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_managers_share_the_process_pool(self):
+        await close_browser_pool()
+        pool = get_browser_pool()
+
+        assert pool is not None
+        assert CrawlManager().browser_pool is pool
+        assert CrawlManager().page_crawler.browser_pool is pool
+
+        await close_browser_pool()
+        assert pool._closed
+        assert get_browser_pool() is not pool
+        await close_browser_pool()
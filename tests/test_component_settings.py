@@ -19,40 +19,7 @@ def test_llm_generator_property_access():
     assert isinstance(settings1.code_extraction.llm_extraction_model, str)
 
 
-def test_llm_generator_hash_calculation():
-    import os
-    import src.config as config_module
-    original_runtime = runtime_module._runtime_settings
-    original_settings = config_module._settings
-    
-    try:
-        runtime = RuntimeSettingsManager(config_path="test_component_hash.json")
-        runtime_module._runtime_settings = runtime
-        
-        config_module._settings = None
-        from src.config import get_settings
-        settings = get_settings()
-        
-        runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4o-mini", "llm")
-        settings.reload_runtime_overrides()
-        
-        generator = LLMDescriptionGenerator()
-        hash1 = generator._get_settings_hash()
-        
-        runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4", "llm")
-        settings.reload_runtime_overrides()
-        hash2 = generator._get_settings_hash()
-        
-        assert hash1 != hash2
-        
-    finally:
-        runtime_module._runtime_settings = original_runtime
-        config_module._settings = original_settings
-        if os.path.exists("test_component_hash.json"):
-            os.remove("test_component_hash.json")
-
-
-def test_llm_generator_change_detection():
+def test_llm_generator_client_tracks_model():
     import os
     import src.config as config_module
     original_runtime = runtime_module._runtime_settings
@@ -64,21 +31,19 @@ def test_llm_generator_change_detection():
         
         config_module._settings = None
         from src.config import get_settings
-        settings = get_settings()
+        get_settings()
         
+        runtime.set("CODE_LLM_API_KEY", "test-key", "llm")
         runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4o-mini", "llm")
         
         generator = LLMDescriptionGenerator()
-        initial_hash = generator._last_settings_hash
+        initial_client = generator.client
         
-        assert not generator._should_reinit_client()
+        assert generator.client is initial_client
         
         runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4", "llm")
         
-        assert generator._should_reinit_client()
-        assert generator._last_settings_hash != initial_hash
-        
-        assert not generator._should_reinit_client()
+        assert generator.client is not initial_client
         
     finally:
         runtime_module._runtime_settings = original_runtime
@@ -128,9 +93,9 @@ def test_llm_generator_with_custom_settings():
     assert generator.custom_api_key == "custom-key"
     assert generator.custom_model == "custom-model"
     
-    hash1 = generator._get_settings_hash()
+    client1 = generator.client
+    assert client1.api_key == "custom-key"
     
     generator.custom_model = "different-model"
     
-    hash2 = generator._get_settings_hash()
-    assert hash1 != hash2
+    assert generator.client is not client1
@@ -0,0 +1,135 @@
+"""Tests for URL canonicalization and duplicate page detection."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.crawler.config import BrowserConfig
+from src.crawler.dedup import ALIASES_KEY, ContentDeduplicator
+from src.crawler.page_crawler import PageCrawler
+from src.crawler.utils import canonicalize_url, normalize_url
+from src.database.models import CrawlJob, Document
+
+
+class TestURLCanonicalization:
+    """Test the canonical and comparison forms of URLs."""
+
+    @pytest.mark.parametrize("url", [
+        "https://docs.example.com/guide/index.html",
+        "https://DOCS.example.com:443/guide/",
+        "https://docs.example.com/guide/#install",
+        "https://docs.example.com/guide/?utm_source=news&ref=nav",
+    ])
+    def test_spellings_share_the_canonical_url(self, url):
+        assert canonicalize_url(url) == "https://docs.example.com/guide/"
+
+    def test_canonical_url_keeps_trailing_slash_and_meaningful_query(self):
+        assert canonicalize_url("https://docs.example.com/guide") == "https://docs.example.com/guide"
+        assert canonicalize_url("http://localhost:8000/api?v=2&lang=py") == "http://localhost:8000/api?lang=py&v=2"
+
+    def test_normalized_url_ignores_trailing_slash(self):
+        assert normalize_url("https://docs.example.com/guide/") == normalize_url("https://docs.example.com/guide")
+        assert normalize_url("https://docs.example.com/guide/?v=2") == "https://docs.example.com/guide?v=2"
+
+
+class TestContentDeduplicator:
+    """Test detection of pages served under several URLs."""
+
+    def make(self) -> ContentDeduplicator:
+        return ContentDeduplicator("job-1", db_manager=object())
+
+    def test_same_content_under_another_url_is_an_alias(self):
+        dedup = self.make()
+
+        assert dedup.check("https://docs.example.com/latest/guide", "h1") is None
+        assert dedup.check("https://docs.example.com/v2/guide", "h1") == "https://docs.example.com/latest/guide"
+        assert dedup.alias_count == 1
+
+    def test_url_spelling_is_an_alias_even_if_content_differs(self):
+        dedup = self.make()
+
+        dedup.check("https://docs.example.com/guide/", "h1")
+
+        assert dedup.check("https://docs.example.com/guide", "h2") == "https://docs.example.com/guide/"
+
+    def test_refetching_the_same_url_is_not_an_alias(self):
+        dedup = self.make()
+
+        dedup.check("https://docs.example.com/guide", "h1")
+
+        assert dedup.check("https://docs.example.com/guide", "h1") is None
+        assert dedup.alias_count == 0
+
+    def test_stored_page_keeps_its_document(self):
+        dedup = self.make()
+        dedup._stored.update({"https://docs.example.com/a", "https://docs.example.com/b"})
+        dedup._remember("https://docs.example.com/a", "h1")
+        dedup._remember("https://docs.example.com/b", "h1")
+
+        assert dedup.check("https://docs.example.com/b", "h1") is None
+
+    def test_changed_page_no_longer_claims_old_content(self):
+        dedup = self.make()
+        dedup.check("https://docs.example.com/a", "old")
+        dedup.check("https://docs.example.com/a", "new")
+
+        assert dedup.check("https://docs.example.com/b", "old") is None
+
+
+class TestParseStageDeduplication:
+    """Test that duplicate pages skip extraction."""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_page_is_not_extracted(self):
+        crawler = PageCrawler(BrowserConfig())
+        dedup = ContentDeduplicator("job-1", db_manager=object())
+        dedup.check("https://docs.example.com/guide/", "unused")
+        extracted: list[str] = []
+
+        async def extract_blocks(html, url, batch_size=5):
+            extracted.append(url)
+            return []
+
+        crawler.html_extractor = SimpleNamespace(extract_blocks=extract_blocks)
+        page = SimpleNamespace(
+            url="https://docs.example.com/guide",
+            success=True,
+            html="<html><body><pre><code>print('hi')</code></pre></body></html>",
+            markdown="print('hi')",
+            metadata={"title": "Guide"},
+            response_headers={},
+        )
+
+        assert await crawler._parse_crawl_result(page, "job-1", 0, None, dedup) is None
+        assert extracted == []
+        assert dedup.alias_count == 1
+
+
+class TestAliasStore:
+    """Test loading stored documents and recording aliases."""
+
+    @pytest.fixture
+    def dedup(self, db: Session) -> ContentDeduplicator:
+        job = CrawlJob(id=uuid4(), name="Dedup", status="running", start_urls=["https://docs.example.com/"])
+        db.add(job)
+        db.flush()
+        db.add(Document(url="https://docs.example.com/guide/", title="Guide", content_hash="h1", crawl_job_id=job.id))
+        db.flush()
+
+        @contextmanager
+        def session_scope():
+            yield db
+
+        return ContentDeduplicator(str(job.id), db_manager=SimpleNamespace(session_scope=session_scope))
+
+    def test_aliases_are_recorded_on_the_stored_document(self, db: Session, dedup: ContentDeduplicator):
+        assert dedup.load() == 1
+
+        assert dedup.check("https://docs.example.com/latest/guide/", "h1") == "https://docs.example.com/guide/"
+        assert dedup.flush() == 1
+
+        doc = db.query(Document).filter_by(url="https://docs.example.com/guide/").one()
+        assert doc.meta_data[ALIASES_KEY] == ["https://docs.example.com/latest/guide/"]
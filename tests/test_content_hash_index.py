@@ -0,0 +1,131 @@
+"""Tests for bulk preloading of stored content hashes."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.crawler.config import BrowserConfig
+from src.crawler.page_crawler import PageCrawler
+from src.database.content_check import ContentHashIndex, preload_content_hashes
+from src.database.models import CodeSnippet, CrawlJob, Document
+
+
+def fake_db_manager():
+    @contextmanager
+    def session_scope():
+        yield SimpleNamespace()
+
+    return SimpleNamespace(session_scope=session_scope)
+
+
+class TestContentHashIndex:
+    """Test per-item checks against preloaded hashes."""
+
+    def test_preloaded_urls_are_answered_without_queries(self):
+        index = ContentHashIndex(fake_db_manager())
+        stored = {"https://docs.example.com/a": ("h1", 4)}
+        with (
+            patch("src.database.content_check.preload_content_hashes", return_value=stored),
+            patch("src.database.content_check.check_content_hash") as check,
+        ):
+            assert index.preload(["https://docs.example.com/a", "https://docs.example.com/b"]) == 1
+
+            assert index.check("https://docs.example.com/a", "h1") == (True, 4)
+            assert index.check("https://docs.example.com/a", "h2") == (False, 0)
+            assert index.check("https://docs.example.com/b", "h1") == (False, 0)
+
+        check.assert_not_called()
+        assert index.hits == 3
+
+    def test_only_urls_not_loaded_yet_are_queried(self):
+        index = ContentHashIndex(fake_db_manager())
+        with patch("src.database.content_check.preload_content_hashes", return_value={}) as preload:
+            index.preload(["https://docs.example.com/a"])
+            index.preload(["https://docs.example.com/a", "https://docs.example.com/b"])
+            index.preload(["https://docs.example.com/b"])
+
+        assert [call.args[1] for call in preload.call_args_list] == [
+            ["https://docs.example.com/a"],
+            ["https://docs.example.com/b"],
+        ]
+
+    def test_unknown_urls_fall_back_to_a_query(self):
+        index = ContentHashIndex(fake_db_manager())
+        with (
+            patch("src.database.content_check.preload_content_hashes", side_effect=RuntimeError("down")),
+            patch("src.database.content_check.check_content_hash", return_value=(True, 2)) as check,
+        ):
+            assert index.preload(["https://docs.example.com/a"]) == 0
+            assert index.check("https://docs.example.com/a", "h1") == (True, 2)
+
+        check.assert_called_once()
+        assert index.fallbacks == 1
+
+    @pytest.mark.asyncio
+    async def test_parse_stage_consults_the_index(self):
+        crawler = PageCrawler(BrowserConfig())
+        checked = []
+
+        def check(url, content_hash):
+            checked.append(url)
+            return True, 3
+
+        page = SimpleNamespace(
+            url="https://docs.example.com/guide",
+            success=True,
+            html="<html><body><pre><code>print('hi')</code></pre></body></html>",
+            markdown="print('hi')",
+            metadata={"title": "Guide"},
+            response_headers={},
+        )
+
+        result = await crawler._parse_crawl_result(
+            page, "job-1", 0, hash_index=SimpleNamespace(check=check)
+        )
+
+        assert checked == ["https://docs.example.com/guide"]
+        assert result.metadata["content_unchanged"]
+        assert result.metadata["existing_snippet_count"] == 3
+
+
+class TestPreloadContentHashes:
+    """Test the bulk query against the database."""
+
+    @pytest.fixture
+    def job(self, db: Session) -> CrawlJob:
+        job = CrawlJob(id=uuid4(), name="Docs", status="running", start_urls=["https://docs.example.com/"])
+        db.add(job)
+        db.flush()
+        for name, snippets in (("a", 2), ("b", 0), ("c", 1)):
+            doc = Document(
+                url=f"https://docs.example.com/{name}", title=name, content_hash=f"h-{name}", crawl_job_id=job.id
+            )
+            db.add(doc)
+            db.flush()
+            for i in range(snippets):
+                db.add(CodeSnippet(
+                    document_id=doc.id,
+                    title=f"Snippet {i}",
+                    code_content=f"print({i})",
+                    code_hash=f"{name}-{i}",
+                ))
+        db.flush()
+        return job
+
+    def test_hashes_and_snippet_counts_are_loaded_in_chunks(self, db: Session, job: CrawlJob):
+        urls = [f"https://docs.example.com/{name}" for name in ("a", "b", "c", "missing")]
+
+        assert preload_content_hashes(db, urls, chunk_size=2) == {
+            "https://docs.example.com/a": ("h-a", 2),
+            "https://docs.example.com/b": ("h-b", 0),
+            "https://docs.example.com/c": ("h-c", 1),
+        }
+
+    def test_documents_of_a_crawl_job_are_loaded(self, db: Session, job: CrawlJob):
+        hashes = preload_content_hashes(db, crawl_job_id=job.id)
+
+        assert sorted(hashes) == [f"https://docs.example.com/{name}" for name in ("a", "b", "c")]
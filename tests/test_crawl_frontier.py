@@ -0,0 +1,309 @@
+"""Tests for the persistent crawl frontier and the strategy backed by it."""
+
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from crawl4ai import CrawlerRunConfig
+from sqlalchemy.orm import Session
+
+from src.crawler.frontier import (
+    DONE,
+    FAILED,
+    IN_PROGRESS,
+    PENDING,
+    CrawlFrontier,
+    FrontierBFSDeepCrawlStrategy,
+)
+from src.crawler.revalidation import UnchangedPage
+from src.database.models import CrawlJob
+
+# Small site: the start page links to b and c, both of which link to d
+SITE = {
+    "https://docs.example.com/a": ["https://docs.example.com/b", "https://docs.example.com/c"],
+    "https://docs.example.com/b": ["https://docs.example.com/d"],
+    "https://docs.example.com/c": ["https://docs.example.com/d", "https://docs.example.com/a"],
+    "https://docs.example.com/d": [],
+}
+
+
+class InMemoryFrontier:
+    """Frontier with the same semantics as CrawlFrontier, kept in a dict."""
+
+    def __init__(self):
+        self.urls: dict[str, dict] = {}
+
+    def add(self, urls):
+        new = 0
+        for url, depth, parent in urls:
+            if url not in self.urls:
+                self.urls[url] = {"depth": depth, "parent": parent, "state": PENDING}
+                new += 1
+        return new
+
+    def claim(self, worker_id, limit, max_depth=None):
+        pending = [
+            (url, entry["depth"], entry["parent"])
+            for url, entry in self.urls.items()
+            if entry["state"] == PENDING and (max_depth is None or entry["depth"] <= max_depth)
+        ]
+        pending.sort(key=lambda item: item[1])
+        for url, _, _ in pending[:limit]:
+            self.urls[url]["state"] = IN_PROGRESS
+        return pending[:limit]
+
+    def mark(self, urls, state):
+        for url in urls:
+            self.urls[url]["state"] = state
+
+    def release_claims(self, older_than=None, worker_id=None):
+        released = [entry for entry in self.urls.values() if entry["state"] == IN_PROGRESS]
+        for entry in released:
+            entry["state"] = PENDING
+        return len(released)
+
+    def counts(self, max_depth=None):
+        counts = {PENDING: 0, IN_PROGRESS: 0, DONE: 0, FAILED: 0}
+        for entry in self.urls.values():
+            if max_depth is None or entry["depth"] <= max_depth:
+                counts[entry["state"]] += 1
+        return counts
+
+
+class FakeCrawler:
+    """Serves SITE and records every URL it fetches."""
+
+    def __init__(self, site=SITE):
+        self.site = site
+        self.fetched: list[str] = []
+
+    async def arun_many(self, urls, config):
+        async def stream():
+            for url in urls:
+                self.fetched.append(url)
+                yield SimpleNamespace(
+                    url=url,
+                    success=True,
+                    metadata={},
+                    links={"internal": [{"href": link} for link in self.site[url]]},
+                )
+
+        return stream()
+
+
+async def run_strategy(strategy, crawler):
+    results = []
+    async for result in strategy._arun_stream("https://docs.example.com/a", crawler, CrawlerRunConfig()):
+        results.append(result)
+    return results
+
+
+class TestFrontierBFSDeepCrawlStrategy:
+    """Test crawling and resuming from the persistent frontier."""
+
+    @pytest.mark.asyncio
+    async def test_crawls_each_page_once_in_bfs_order(self):
+        frontier = InMemoryFrontier()
+        crawler = FakeCrawler()
+        strategy = FrontierBFSDeepCrawlStrategy(job_id="job-1", max_depth=2, frontier=frontier)
+
+        results = await run_strategy(strategy, crawler)
+
+        assert crawler.fetched[0] == "https://docs.example.com/a"
+        assert sorted(crawler.fetched) == sorted(SITE)
+        depths = {result.url: result.metadata["depth"] for result in results}
+        assert depths["https://docs.example.com/b"] == 1
+        assert depths["https://docs.example.com/d"] == 2
+        assert frontier.counts()[DONE] == 4
+
+    @pytest.mark.asyncio
+    async def test_url_spellings_of_one_page_are_fetched_once(self):
+        site = {
+            "https://docs.example.com/a": [
+                "https://docs.example.com/guide/index.html",
+                "https://docs.example.com/guide/?ref=nav",
+                "https://docs.example.com:443/guide/#install",
+            ],
+            "https://docs.example.com/guide/": [],
+        }
+        frontier = InMemoryFrontier()
+        crawler = FakeCrawler(site)
+        strategy = FrontierBFSDeepCrawlStrategy(job_id="job-1", max_depth=1, frontier=frontier)
+
+        await run_strategy(strategy, crawler)
+
+        assert crawler.fetched == ["https://docs.example.com/a", "https://docs.example.com/guide/"]
+
+    @pytest.mark.asyncio
+    async def test_start_url_is_seeded_canonical(self):
+        frontier = InMemoryFrontier()
+        crawler = FakeCrawler()
+        strategy = FrontierBFSDeepCrawlStrategy(job_id="job-1", max_depth=1, frontier=frontier)
+
+        async for _ in strategy._arun_stream("https://docs.example.com:443/a#intro", crawler, CrawlerRunConfig()):
+            pass
+
+        # The link from c back to a is recognised as the start page
+        assert crawler.fetched.count("https://docs.example.com/a") == 1
+        assert "https://docs.example.com:443/a#intro" not in frontier.urls
+
+    @pytest.mark.asyncio
+    async def test_pending_urls_past_max_depth_are_not_waited_for(self):
+        frontier = InMemoryFrontier()
+        frontier.add([("https://docs.example.com/deep", 5, "https://docs.example.com/d")])
+        strategy = FrontierBFSDeepCrawlStrategy(job_id="job-1", max_depth=2, frontier=frontier, poll_interval=0.01)
+
+        results = await asyncio.wait_for(run_strategy(strategy, FakeCrawler()), timeout=2)
+
+        assert len(results) == 4
+        assert frontier.urls["https://docs.example.com/deep"]["state"] == PENDING
+
+    @pytest.mark.asyncio
+    async def test_resume_skips_pages_already_done(self):
+        frontier = InMemoryFrontier()
+        frontier.add([("https://docs.example.com/a", 0, None)])
+        frontier.mark(["https://docs.example.com/a"], DONE)
+        frontier.add([
+            ("https://docs.example.com/b", 1, "https://docs.example.com/a"),
+            ("https://docs.example.com/c", 1, "https://docs.example.com/a"),
+        ])
+        # Claimed by a run that stalled
+        frontier.claim("stalled-worker", 1)
+
+        crawler = FakeCrawler()
+        strategy = FrontierBFSDeepCrawlStrategy(job_id="job-1", max_depth=2, frontier=frontier)
+        await run_strategy(strategy, crawler)
+
+        assert "https://docs.example.com/a" not in crawler.fetched
+        assert sorted(crawler.fetched) == [
+            "https://docs.example.com/b",
+            "https://docs.example.com/c",
+            "https://docs.example.com/d",
+        ]
+
+    @pytest.mark.asyncio
+    async def test_max_pages_stops_without_leaving_claims(self):
+        frontier = InMemoryFrontier()
+        frontier.add([
+            ("https://docs.example.com/a", 0, None),
+            ("https://docs.example.com/b", 1, "https://docs.example.com/a"),
+            ("https://docs.example.com/c", 1, "https://docs.example.com/a"),
+        ])
+        crawler = FakeCrawler()
+        strategy = FrontierBFSDeepCrawlStrategy(
+            job_id="job-1", max_depth=2, max_pages=2, batch_size=5, frontier=frontier
+        )
+
+        results = await run_strategy(strategy, crawler)
+
+        assert len(results) == 2
+        counts = frontier.counts()
+        assert counts[DONE] == 2
+        assert counts[IN_PROGRESS] == 0
+        # The page that did not fit stays available for a later run
+        assert counts[PENDING] == 1
+
+
+    @pytest.mark.asyncio
+    async def test_frontier_writes_are_batched_per_round(self):
+        frontier = InMemoryFrontier()
+        calls = []
+        for name in ("add", "mark"):
+            method = getattr(frontier, name)
+
+            def record(*args, _name=name, _method=method, **kwargs):
+                calls.append(_name)
+                return _method(*args, **kwargs)
+
+            setattr(frontier, name, record)
+        strategy = FrontierBFSDeepCrawlStrategy(
+            "job-1", batch_size=10, frontier=frontier, max_depth=2, poll_interval=0
+        )
+
+        await run_strategy(strategy, FakeCrawler())
+
+        # Seed, then one add and one mark per round: a; b, c; d (a round linking nothing new skips the add)
+        assert calls == ["add", "add", "mark", "add", "mark", "mark"]
+
+
+class TestCrawlFrontierStore:
+    """Test the database-backed frontier."""
+
+    @pytest.fixture
+    def frontier(self, db: Session) -> CrawlFrontier:
+        job = CrawlJob(id=uuid4(), name="Frontier", status="running", start_urls=["https://docs.example.com/a"])
+        db.add(job)
+        db.flush()
+
+        @contextmanager
+        def session_scope():
+            yield db
+
+        return CrawlFrontier(str(job.id), db_manager=SimpleNamespace(session_scope=session_scope))
+
+    def test_add_ignores_known_urls(self, frontier: CrawlFrontier):
+        assert frontier.add([("https://docs.example.com/a", 0, None)]) == 1
+        assert frontier.add([
+            ("https://docs.example.com/a", 0, None),
+            ("https://docs.example.com/b", 1, "https://docs.example.com/a"),
+        ]) == 1
+        assert frontier.counts()[PENDING] == 2
+
+    def test_claim_returns_shallowest_first(self, frontier: CrawlFrontier):
+        frontier.add([
+            ("https://docs.example.com/d", 2, "https://docs.example.com/b"),
+            ("https://docs.example.com/b", 1, "https://docs.example.com/a"),
+        ])
+
+        claimed = frontier.claim("worker-1", 1)
+
+        assert claimed == [("https://docs.example.com/b", 1, "https://docs.example.com/a")]
+        assert frontier.counts()[IN_PROGRESS] == 1
+
+    def test_release_and_mark(self, frontier: CrawlFrontier):
+        frontier.add([("https://docs.example.com/a", 0, None), ("https://docs.example.com/b", 1, None)])
+        frontier.claim("worker-1", 2)
+
+        frontier.mark(["https://docs.example.com/a"], DONE)
+        assert frontier.release_claims(worker_id="worker-1") == 1
+
+        counts = frontier.counts()
+        assert counts[DONE] == 1
+        assert counts[PENDING] == 1
+
+
+class StaticRevalidator:
+    """Reports fixed pages as unchanged, with the links found on them last time."""
+
+    def __init__(self, unchanged: set[str]):
+        self.unchanged = unchanged
+
+    async def find_unchanged(self, urls, with_children=False):
+        return {
+            url: UnchangedPage(url=url, title="", content_hash="hash", snippet_count=0, children=list(SITE[url]))
+            for url in urls
+            if url in self.unchanged
+        }
+
+
+class TestFrontierRevalidation:
+    """Test that unchanged pages are not rendered but their links are still followed."""
+
+    @pytest.mark.asyncio
+    async def test_unchanged_pages_are_not_fetched(self):
+        frontier = InMemoryFrontier()
+        crawler = FakeCrawler()
+        strategy = FrontierBFSDeepCrawlStrategy(
+            job_id="job-1",
+            max_depth=2,
+            frontier=frontier,
+            revalidator=StaticRevalidator({"https://docs.example.com/a", "https://docs.example.com/b"}),
+        )
+
+        results = await run_strategy(strategy, crawler)
+
+        assert sorted(crawler.fetched) == ["https://docs.example.com/c", "https://docs.example.com/d"]
+        assert sorted(result.url for result in results) == sorted(SITE)
+        assert frontier.counts()[DONE] == 4
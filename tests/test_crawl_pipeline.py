@@ -0,0 +1,256 @@
+"""Tests for the staged crawl processing pipeline."""
+
+import asyncio
+
+import pytest
+
+from src.crawler.config import BrowserConfig
+from src.crawler.page_crawler import CrawlResult, PageCrawler
+from src.crawler.pipeline import (
+    PipelineStage,
+    StagedPipeline,
+    get_pipeline_metrics,
+    register_pipeline,
+    resolve_queue_size,
+    unregister_pipeline,
+)
+
+
+class TestStagedPipeline:
+    """Test stage routing, batching, backpressure and metrics."""
+
+    @pytest.mark.asyncio
+    async def test_items_flow_through_all_stages(self):
+        persisted: list[int] = []
+
+        async def double(item: int) -> int:
+            return item * 2
+
+        async def add_one(item: int) -> int:
+            return item + 1
+
+        async def persist(batch: list[int]) -> None:
+            persisted.extend(batch)
+
+        pipeline = StagedPipeline([
+            PipelineStage("double", double, workers=2, maxsize=2),
+            PipelineStage("add_one", add_one, workers=2, maxsize=2),
+            PipelineStage("persist", persist, maxsize=2, batch_size=4),
+        ])
+        pipeline.start()
+        for i in range(10):
+            await pipeline.submit(i)
+        await pipeline.join()
+
+        assert sorted(persisted) == sorted(i * 2 + 1 for i in range(10))
+        metrics = pipeline.snapshot()
+        assert metrics["double"]["processed"] == 10
+        assert metrics["persist"]["processed"] == 10
+        assert metrics["persist"]["queue_depth"] == 0
+
+    @pytest.mark.asyncio
+    async def test_rejected_items_skip_stage(self):
+        described: list[str] = []
+        persisted: list[str] = []
+
+        async def parse(item: str) -> str:
+            return item
+
+        async def describe(item: str) -> str:
+            described.append(item)
+            return item.upper()
+
+        async def persist(batch: list[str]) -> None:
+            persisted.extend(batch)
+
+        pipeline = StagedPipeline([
+            PipelineStage("parse", parse),
+            PipelineStage("describe", describe, accepts=lambda item: item.startswith("llm")),
+            PipelineStage("persist", persist, batch_size=10),
+        ])
+        pipeline.start()
+        for item in ["llm-a", "skip-b", "llm-c"]:
+            await pipeline.submit(item)
+        await pipeline.join()
+
+        assert sorted(described) == ["llm-a", "llm-c"]
+        assert sorted(persisted) == ["LLM-A", "LLM-C", "skip-b"]
+
+    @pytest.mark.asyncio
+    async def test_slow_stage_applies_backpressure(self):
+        release = asyncio.Event()
+
+        async def slow(item: int) -> None:
+            await release.wait()
+
+        pipeline = StagedPipeline([PipelineStage("slow", slow, workers=1, maxsize=2)])
+        pipeline.start()
+
+        # One item in the worker plus two queued fill the stage
+        for i in range(3):
+            await asyncio.wait_for(pipeline.submit(i), timeout=1)
+        blocked = asyncio.create_task(pipeline.submit(3))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+
+        release.set()
+        await asyncio.wait_for(blocked, timeout=1)
+        await pipeline.join()
+        assert pipeline.snapshot()["slow"]["processed"] == 4
+
+    @pytest.mark.asyncio
+    async def test_handler_errors_are_counted_not_fatal(self):
+        async def flaky(item: int) -> None:
+            if item % 2:
+                raise ValueError("bad page")
+
+        pipeline = StagedPipeline([PipelineStage("flaky", flaky, workers=2)])
+        pipeline.start()
+        for i in range(6):
+            await pipeline.submit(i)
+        await pipeline.join()
+
+        metrics = pipeline.snapshot()["flaky"]
+        assert metrics["processed"] == 3
+        assert metrics["failed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_failed_batches_reach_error_handler(self):
+        dropped: list[list[int]] = []
+
+        async def failing(batch: list[int]) -> None:
+            raise ValueError("database down")
+
+        async def on_error(batch: list[int], error: Exception) -> None:
+            dropped.append(batch)
+
+        pipeline = StagedPipeline([PipelineStage("persist", failing, batch_size=4, on_error=on_error)])
+        for i in range(3):
+            await pipeline.submit(i)
+        pipeline.start()
+        await pipeline.join()
+
+        assert [item for batch in dropped for item in batch] == [0, 1, 2]
+        assert pipeline.snapshot()["persist"]["failed"] == 3
+
+    @pytest.mark.asyncio
+    async def test_registry_reports_running_pipelines(self):
+        async def noop(item: int) -> None:
+            return None
+
+        pipeline = StagedPipeline([PipelineStage("noop", noop)])
+        register_pipeline("job-1", pipeline)
+        assert "noop" in get_pipeline_metrics("job-1")["job-1"][0]
+
+        unregister_pipeline("job-1", pipeline)
+        assert get_pipeline_metrics("job-1") == {}
+
+
+class TestStreamingPersistence:
+    """Test that the crawler's persist stage can stream without retaining results."""
+
+    @staticmethod
+    def _make_result(index: int) -> CrawlResult:
+        return CrawlResult(
+            url=f"https://example.com/page-{index}",
+            title=f"Page {index}",
+            content="x" * 1000,
+            content_hash=str(index),
+            code_blocks=[],
+        )
+
+    @pytest.mark.asyncio
+    async def test_batches_reach_sink_without_being_retained(self):
+        crawler = PageCrawler(BrowserConfig())
+        sunk: list[str] = []
+
+        async def sink(batch: list[CrawlResult]) -> None:
+            sunk.extend(result.url for result in batch)
+
+        crawl_progress = {'crawled_count': 5, 'processed_count': 0, 'last_ws_count': 0}
+        batch = [self._make_result(i) for i in range(5)]
+
+        await crawler._persist_results(batch, None, crawl_progress, None, "job-1", sink)
+
+        assert len(sunk) == 5
+        assert crawl_progress['processed_count'] == 5
+
+    @pytest.mark.asyncio
+    async def test_results_are_retained_when_requested(self):
+        crawler = PageCrawler(BrowserConfig())
+        retained: list[CrawlResult] = []
+        crawl_progress = {'crawled_count': 2, 'processed_count': 0, 'last_ws_count': 0}
+
+        await crawler._persist_results(
+            [self._make_result(0), self._make_result(1)], retained, crawl_progress, None, "job-1", None
+        )
+
+        assert [result.title for result in retained] == ["Page 0", "Page 1"]
+
+    @pytest.mark.asyncio
+    async def test_pages_of_a_failed_batch_are_recorded(self, monkeypatch):
+        recorded: list[tuple[list[str], str]] = []
+
+        async def record(job_id, urls, error_message, failure_class=None):
+            recorded.append((urls, error_message))
+
+        async def sink(batch: list[CrawlResult]) -> None:
+            raise RuntimeError("connection lost")
+
+        monkeypatch.setattr("src.crawler.page_crawler.record_failed_pages_batch", record)
+        crawler = PageCrawler(BrowserConfig())
+
+        async def parse(result, *args):
+            return result
+
+        monkeypatch.setattr(crawler, "_parse_crawl_result", parse)
+        crawl_progress = {'crawled_count': 2, 'processed_count': 0, 'last_ws_count': 0, 'snippets_extracted': 0}
+        pipeline = crawler._build_pipeline("job-1", 1, None, None, crawl_progress, None, sink)
+        pipeline.start()
+        for i in range(2):
+            await pipeline.submit(self._make_result(i))
+        await pipeline.join()
+
+        assert sorted(url for urls, _ in recorded for url in urls) == [
+            "https://example.com/page-0",
+            "https://example.com/page-1",
+        ]
+        assert all("connection lost" in message for _, message in recorded)
+        assert crawl_progress['failed_count'] == 2
+        assert crawl_progress['processed_count'] == 2
+
+
+class TestBackpressureMetrics:
+    """Test blocked-time accounting and queue sizing."""
+
+    @pytest.mark.asyncio
+    async def test_blocked_puts_are_recorded(self):
+        release = asyncio.Event()
+
+        async def slow(item: int) -> None:
+            await release.wait()
+
+        pipeline = StagedPipeline([PipelineStage("slow", slow, workers=1, maxsize=1)])
+        pipeline.start()
+        await pipeline.submit(0)
+        await asyncio.sleep(0.01)  # worker picks up the first item
+        await pipeline.submit(1)
+
+        blocked = asyncio.create_task(pipeline.submit(2))
+        await asyncio.sleep(0.05)
+        release.set()
+        await blocked
+        await pipeline.join()
+
+        metrics = pipeline.snapshot()["slow"]
+        assert metrics["blocked_puts"] == 1
+        assert metrics["blocked_seconds"] >= 0.04
+
+    def test_configured_queue_size_wins(self):
+        assert resolve_queue_size(25, item_bytes=1024, stages=3, memory_fraction=0.1) == 25
+
+    def test_adaptive_queue_size_is_clamped(self):
+        # A huge page estimate leaves room for less than one page per queue
+        assert resolve_queue_size(0, item_bytes=1 << 50, stages=3, memory_fraction=0.1) == 4
+        # A tiny page estimate would allow millions of pages
+        assert resolve_queue_size(0, item_bytes=1, stages=3, memory_fraction=0.1, maximum=200) == 200
@@ -0,0 +1,266 @@
+"""Tests for crawl workers fed by the Postgres job queue."""
+
+import asyncio
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.crawler.crawl_manager import CrawlConfig, CrawlManager
+from src.crawler.health_monitor import STALLED_THRESHOLD, CrawlHealthMonitor
+from src.crawler.worker import CrawlWorker
+from src.database.models import CrawlJob
+
+
+class FakeCrawlManager:
+    """Runs claimed jobs until they are cancelled."""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.cancelled: list[str] = []
+        self.owners: list[str | None] = []
+
+    async def run_queued_job(self, job_id: str, worker_id: str | None = None) -> None:
+        self.started.append(job_id)
+        self.owners.append(worker_id)
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            self.cancelled.append(job_id)
+            raise
+
+
+def make_worker(queue: list[str], concurrency: int = 2) -> CrawlWorker:
+    worker = CrawlWorker(
+        crawl_manager=FakeCrawlManager(),
+        worker_id="host-a:1",
+        concurrency=concurrency,
+        poll_interval=0.01,
+        db_manager=SimpleNamespace(),
+    )
+    worker.claim_job = lambda: queue.pop(0) if queue else None
+    worker.retry_scheduler = None
+    worker.released = False
+
+    def release_jobs():
+        worker.released = True
+        return 0
+
+    worker._release_jobs = release_jobs
+    return worker
+
+
+class TestCrawlWorkerLoop:
+    """Test claiming, concurrency and shutdown without a database."""
+
+    @pytest.mark.asyncio
+    async def test_claims_up_to_concurrency(self):
+        queue = ["job-1", "job-2", "job-3"]
+        worker = make_worker(queue, concurrency=2)
+
+        run = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+
+        assert worker.crawl_manager.started == ["job-1", "job-2"]
+        assert worker.crawl_manager.owners == ["host-a:1", "host-a:1"]
+        assert queue == ["job-3"]
+
+        worker.stop()
+        await run
+
+    @pytest.mark.asyncio
+    async def test_stop_cancels_running_jobs_and_requeues_them(self):
+        worker = make_worker(["job-1"])
+
+        run = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        worker.stop()
+        await run
+
+        assert worker.crawl_manager.cancelled == ["job-1"]
+        assert worker.released
+
+    @pytest.mark.asyncio
+    async def test_finished_jobs_free_a_slot(self):
+        worker = make_worker(["job-1", "job-2"], concurrency=1)
+        finished = asyncio.Event()
+
+        async def run_queued_job(job_id, worker_id=None):
+            worker.crawl_manager.started.append(job_id)
+            if job_id == "job-2":
+                finished.set()
+
+        worker.crawl_manager.run_queued_job = run_queued_job
+
+        run = asyncio.create_task(worker.run())
+        await asyncio.wait_for(finished.wait(), timeout=1)
+        worker.stop()
+        await run
+
+        assert worker.crawl_manager.started == ["job-1", "job-2"]
+
+    @pytest.mark.asyncio
+    async def test_claim_errors_do_not_stop_the_worker(self):
+        worker = make_worker([])
+        calls = []
+
+        def claim_job():
+            calls.append(1)
+            raise RuntimeError("database unavailable")
+
+        worker.claim_job = claim_job
+
+        run = asyncio.create_task(worker.run())
+        await asyncio.sleep(0.05)
+        worker.stop()
+        await run
+
+        assert len(calls) > 1
+
+
+class TestQueuedStart:
+    """Test that the API only enqueues in queue mode."""
+
+    @pytest.mark.asyncio
+    async def test_start_crawl_leaves_job_to_workers(self):
+        manager = CrawlManager()
+        manager.settings = SimpleNamespace(crawling=SimpleNamespace(execution_mode="queue"))
+        manager.job_manager = Mock()
+        manager.job_manager.get_or_create_job.return_value = "job-1"
+        manager.cancellation_bus = Mock(publish=AsyncMock())
+
+        config = CrawlConfig(name="Docs", start_urls=["https://docs.example.com"])
+        with patch("src.crawler.crawl_manager.CrawlFrontier"):
+            job_id = await manager.start_crawl(config)
+
+        assert job_id == "job-1"
+        kwargs = manager.job_manager.get_or_create_job.call_args.kwargs
+        assert kwargs["status"] == "queued"
+        assert "job-1" not in manager._active_crawl_tasks
+
+    @pytest.mark.asyncio
+    async def test_previous_run_is_stopped_before_the_job_is_queued(self):
+        manager = CrawlManager()
+        manager.settings = SimpleNamespace(crawling=SimpleNamespace(execution_mode="queue"))
+        calls: list[str] = []
+        manager.job_manager = Mock()
+        manager.job_manager.find_job_id.return_value = "job-1"
+        manager.job_manager.get_or_create_job.side_effect = lambda *args, **kwargs: calls.append("queue") or "job-1"
+        manager.cancellation_bus = Mock(publish=AsyncMock(side_effect=lambda job_id: calls.append("cancel")))
+
+        config = CrawlConfig(name="Docs", start_urls=["https://docs.example.com"])
+        with patch("src.crawler.crawl_manager.CrawlFrontier") as frontier:
+            frontier.return_value.clear.side_effect = lambda: calls.append("clear")
+            await manager.start_crawl(config)
+
+        assert calls == ["cancel", "clear", "queue"]
+
+    @pytest.mark.asyncio
+    async def test_resumed_job_is_requeued(self):
+        manager = CrawlManager()
+        manager.settings = SimpleNamespace(crawling=SimpleNamespace(execution_mode="queue"))
+        job = SimpleNamespace(
+            id="job-1", status="running", worker_id="host-b:2", claimed_at=datetime.utcnow(),
+            retry_count=0, error_message="Stalled",
+        )
+        manager.job_manager = Mock()
+        manager.job_manager.get_job_status.return_value = {"status": "running", "last_heartbeat": None}
+        manager.job_manager.get_job.return_value = job
+        session = Mock()
+        session.query.return_value.filter_by.return_value.count.return_value = 0
+
+        with (
+            patch("src.database.get_db_manager", return_value=_session_db_manager(session)),
+            patch("src.crawler.worker.CrawlFrontier") as frontier,
+        ):
+            assert await manager.resume_job("job-1")
+
+        assert (job.status, job.worker_id, job.error_message) == ("queued", None, None)
+        frontier.return_value.release_claims.assert_called_once()
+        assert "job-1" not in manager._active_crawl_tasks
+
+    @pytest.mark.asyncio
+    async def test_crawl_stops_when_another_worker_owns_the_job(self):
+        manager = CrawlManager()
+        manager.settings = SimpleNamespace(crawling=SimpleNamespace(global_crawl_timeout=10))
+        manager.job_manager = Mock()
+        manager.job_manager.get_job_status.return_value = {"status": "running"}
+        manager.progress_tracker = Mock(
+            start_tracking=AsyncMock(), send_completion=AsyncMock(), stop_tracking=AsyncMock()
+        )
+
+        async def crawl(job_id, config):
+            # The heartbeat flush found the job requeued to another worker
+            manager.progress_tracker.start_tracking.call_args.kwargs["on_lost"]()
+            await asyncio.sleep(10)
+
+        manager._execute_crawl_internal = crawl
+        config = CrawlConfig(name="Docs", start_urls=["https://docs.example.com"])
+        with pytest.raises(asyncio.CancelledError):
+            await manager._execute_crawl("job-1", config, worker_id="host-a:1")
+
+        assert manager.progress_tracker.start_tracking.call_args.kwargs["owner"] == "host-a:1"
+        manager.job_manager.complete_job.assert_not_called()
+        manager.progress_tracker.send_completion.assert_not_called()
+
+
+def _session_db_manager(session: Session) -> SimpleNamespace:
+    @contextmanager
+    def session_scope():
+        yield session
+        session.flush()
+
+    return SimpleNamespace(session_scope=session_scope)
+
+
+class TestQueueClaims:
+    """Test SKIP LOCKED claims and requeueing against the database."""
+
+    def _queued_job(self, db: Session, **kwargs) -> CrawlJob:
+        job = CrawlJob(
+            id=uuid4(),
+            name=f"Queued {uuid4().hex[:8]}",
+            domain="docs.example.com",
+            start_urls=["https://docs.example.com"],
+            status="queued",
+            **kwargs,
+        )
+        db.add(job)
+        db.flush()
+        return job
+
+    def test_claim_marks_job_running_for_worker(self, db: Session):
+        job = self._queued_job(db)
+        worker = CrawlWorker(
+            crawl_manager=FakeCrawlManager(), worker_id="host-a:1",
+            db_manager=_session_db_manager(db),
+        )
+
+        assert worker.claim_job() == str(job.id)
+        db.refresh(job)
+        assert job.status == "running"
+        assert job.worker_id == "host-a:1"
+        assert job.claimed_at is not None
+
+    @pytest.mark.asyncio
+    async def test_health_monitor_requeues_jobs_of_dead_workers(self, db: Session):
+        stale = datetime.utcnow() - timedelta(seconds=STALLED_THRESHOLD + 10)
+        job = self._queued_job(db)
+        job.status = "running"
+        job.worker_id = "host-b:2"
+        job.last_heartbeat = stale
+        db.flush()
+
+        monitor = CrawlHealthMonitor()
+        monitor.db_manager = _session_db_manager(db)
+        with patch("src.crawler.worker.CrawlFrontier"):
+            await monitor._check_stalled_jobs()
+
+        db.refresh(job)
+        assert job.status == "queued"
+        assert job.worker_id is None
+        assert job.retry_count == 1
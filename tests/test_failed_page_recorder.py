@@ -0,0 +1,160 @@
+"""Tests for buffered failed page recording."""
+
+import asyncio
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.dialects import postgresql
+
+from src.crawler import failed_page_utils
+from src.crawler.failed_page_utils import (
+    FailedPageRecorder,
+    classify_failure,
+    record_failed_pages_batch,
+)
+
+
+@pytest_asyncio.fixture
+async def recorder():
+    recorder = FailedPageRecorder(flush_interval=60, batch_size=3, db_manager=SimpleNamespace())
+    recorder.writes = []
+
+    def write(rows):
+        recorder.writes.append(rows)
+        return len(rows)
+
+    recorder._write = write
+    yield recorder
+    await recorder.close()
+
+
+class TestClassifyFailure:
+    """Test failure classes used to prioritize retries."""
+
+    @pytest.mark.parametrize("error_message, status_code, expected", [
+        ("Page.goto: Timeout 30000ms exceeded", None, "timeout"),
+        ("HTTP 404", None, "client_error"),
+        ("HTTP 503", None, "server_error"),
+        ("Gateway error", 502, "server_error"),
+        ("Request Timeout", 408, "timeout"),
+        ("'NoneType' object has no attribute 'markdown' while parsing", None, "extraction"),
+        ("net::ERR_NAME_NOT_RESOLVED", None, "other"),
+        (None, None, "other"),
+    ])
+    def test_classify(self, error_message, status_code, expected):
+        assert classify_failure(error_message, status_code) == expected
+
+
+class TestFailedPageRecorder:
+    """Test buffering, coalescing and batched writes."""
+
+    @pytest.mark.asyncio
+    async def test_failures_are_written_in_one_batch(self, recorder):
+        job_id = str(uuid4())
+        recorder.add(job_id, "https://example.com/a", "HTTP 500")
+        recorder.add(job_id, "https://example.com/b", "HTTP 404")
+
+        assert recorder.writes == []
+        assert await recorder.flush() == 2
+
+        assert len(recorder.writes) == 1
+        rows = {row["url"]: row for row in recorder.writes[0]}
+        assert rows["https://example.com/a"]["failure_class"] == "server_error"
+        assert rows["https://example.com/b"]["failure_class"] == "client_error"
+        assert recorder.pending_count(job_id) == 0
+
+    @pytest.mark.asyncio
+    async def test_repeated_failures_count_attempts_and_keep_last_error(self, recorder):
+        job_id = str(uuid4())
+        recorder.add(job_id, "https://example.com/a", "Timeout 30000ms exceeded")
+        recorder.add(job_id, "https://example.com/a", "HTTP 502")
+
+        await recorder.flush(job_id)
+
+        [row] = recorder.writes[0]
+        assert row["attempts"] == 2
+        assert row["error_message"] == "HTTP 502"
+        assert row["failure_class"] == "server_error"
+
+    @pytest.mark.asyncio
+    async def test_full_batch_is_flushed_early(self, recorder):
+        job_id = str(uuid4())
+        for i in range(3):
+            recorder.add(job_id, f"https://example.com/{i}", "HTTP 500")
+
+        await asyncio.sleep(0.01)
+
+        assert len(recorder.writes) == 1
+        assert len(recorder.writes[0]) == 3
+
+    @pytest.mark.asyncio
+    async def test_crawled_url_is_discarded(self, recorder):
+        job_id = str(uuid4())
+        recorder.add(job_id, "https://example.com/a", "HTTP 500")
+        recorder.discard(job_id, "https://example.com/a")
+
+        assert await recorder.flush() == 0
+
+    @pytest.mark.asyncio
+    async def test_failed_write_is_retried_with_merged_attempts(self, recorder):
+        job_id = str(uuid4())
+
+        def failing_write(rows):
+            raise RuntimeError("database unavailable")
+
+        write = recorder._write
+        recorder._write = failing_write
+        recorder.add(job_id, "https://example.com/a", "HTTP 500")
+        assert await recorder.flush() == 0
+
+        recorder._write = write
+        recorder.add(job_id, "https://example.com/a", "HTTP 503")
+        await recorder.flush()
+
+        [row] = recorder.writes[0]
+        assert row["attempts"] == 2
+        assert row["error_message"] == "HTTP 503"
+
+    @pytest.mark.asyncio
+    async def test_batch_helper_validates_job_once(self, recorder, monkeypatch):
+        monkeypatch.setattr(failed_page_utils, "get_failed_page_recorder", lambda: recorder)
+        job_id = str(uuid4())
+
+        await record_failed_pages_batch(job_id, ["https://example.com/a", "https://example.com/b"], "boom")
+        await record_failed_pages_batch("not-a-uuid", ["https://example.com/c"], "boom")
+
+        assert recorder.pending_count(job_id) == 2
+        assert recorder.pending_count("not-a-uuid") == 0
+
+
+class TestUpsertStatement:
+    """Test the statement a flush sends to the database."""
+
+    def test_flush_upserts_on_job_and_url(self):
+        job_id = uuid4()
+        statements = []
+
+        class Session:
+            def execute(self, stmt):
+                statements.append(stmt)
+                return SimpleNamespace(scalars=lambda: [job_id])
+
+            def commit(self):
+                pass
+
+        @contextmanager
+        def session_scope():
+            yield Session()
+
+        recorder = FailedPageRecorder(db_manager=SimpleNamespace(session_scope=session_scope))
+        row = recorder._row(str(job_id), "https://example.com/a", failed_page_utils.PendingFailure(
+            error_message="HTTP 500", failure_class="server_error"
+        ))
+
+        assert recorder._write([row]) == 1
+        sql = str(statements[-1].compile(dialect=postgresql.dialect()))
+        assert "ON CONFLICT (crawl_job_id, url) DO UPDATE" in sql
+        assert "attempts = (failed_pages.attempts + excluded.attempts)" in sql
@@ -76,8 +76,9 @@ class TestFailedPagesTracking:
         error_message = "Timeout 30000ms exceeded"
 
         # Record the failed page
-        from src.crawler.failed_page_utils import record_failed_page
+        from src.crawler.failed_page_utils import get_failed_page_recorder, record_failed_page
         await record_failed_page(job_id, url, error_message)
+        await get_failed_page_recorder().flush(job_id)
 
         # Verify it was saved
         failed_page = db.query(FailedPage).filter_by(
@@ -88,6 +89,8 @@ class TestFailedPagesTracking:
         assert failed_page is not None
         assert failed_page.url == url
         assert failed_page.error_message == error_message
+        assert failed_page.failure_class == "timeout"
+        assert failed_page.attempts == 1
         assert failed_page.failed_at is not None
 
     @pytest.mark.asyncio
@@ -98,17 +101,22 @@ class TestFailedPagesTracking:
         error_message = "Timeout 30000ms exceeded"
 
         # Record the same page twice
-        from src.crawler.failed_page_utils import record_failed_page
+        from src.crawler.failed_page_utils import get_failed_page_recorder, record_failed_page
+        recorder = get_failed_page_recorder()
         await record_failed_page(job_id, url, error_message)
+        await recorder.flush(job_id)
         await record_failed_page(job_id, url, "Different error")
+        await recorder.flush(job_id)
 
-        # Should only have one record
-        count = db.query(FailedPage).filter_by(
+        # Should only have one record, counting both attempts
+        failed_pages = db.query(FailedPage).filter_by(
             crawl_job_id=job_id,
             url=url
-        ).count()
+        ).all()
 
-        assert count == 1
+        assert len(failed_pages) == 1
+        assert failed_pages[0].attempts == 2
+        assert failed_pages[0].error_message == "Different error"
 
     @pytest.mark.asyncio
     async def test_retry_failed_pages_no_failures(self, crawl_manager, mock_crawl_job):
@@ -0,0 +1,259 @@
+"""Tests for incremental re-ingestion of GitHub repositories."""
+
+import shutil
+import subprocess
+from contextlib import contextmanager
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import patch
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.crawler.github_processor import GitHubProcessor, GitHubRepoConfig
+from src.crawler.upload_processor import UploadConfig
+from src.database.models import CodeSnippet, Document, UploadJob
+
+pytestmark = pytest.mark.skipif(shutil.which("git") is None, reason="git is not installed")
+
+
+class LocalRepo:
+    """A bare repository served over file:// with a working copy to commit from."""
+
+    def __init__(self, root: Path):
+        self.bare = root / "origin.git"
+        self.work = root / "work"
+        self.url = self.bare.as_uri()
+        self.git("init", "--bare", "-b", "main", str(self.bare), cwd=root)
+        self.git("clone", self.url, str(self.work), cwd=root)
+        self.git("checkout", "-b", "main")
+
+    def git(self, *args: str, cwd: Path | None = None) -> str:
+        return subprocess.run(
+            ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com", *args],
+            cwd=cwd or self.work,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+
+    def commit(self, write: dict[str, str] | None = None, remove: tuple[str, ...] = ()) -> str:
+        for name, content in (write or {}).items():
+            path = self.work / name
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        for name in remove:
+            self.git("rm", "-q", name)
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", "Update docs")
+        self.git("push", "-q", "origin", "main")
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    return LocalRepo(tmp_path)
+
+
+@pytest.fixture
+def processor():
+    return GitHubProcessor()
+
+
+def repo_config(repo: LocalRepo, **kwargs) -> GitHubRepoConfig:
+    return GitHubRepoConfig(repo_url=repo.url, name="Docs", **kwargs)
+
+
+async def ingest(processor: GitHubProcessor, config: GitHubRepoConfig, last_ingest=None):
+    """Run process_repository against a faked previous ingest.
+
+    Returns the upload config, the names of the files it lists and the document deletion mock.
+    """
+    with (
+        patch.object(processor, "_last_ingest", return_value=last_ingest),
+        patch.object(processor, "_delete_documents", return_value=1) as delete,
+        patch.object(processor.upload_processor, "process_upload", return_value="job-1") as upload,
+    ):
+        assert await processor.process_repository(config) == "job-1"
+    upload_config = upload.call_args.args[0]
+    # Files are read from the clone, which on_complete removes
+    names = sorted(Path(entry["path"]).name for entry in upload_config.files)
+    await upload.call_args.kwargs["on_complete"]()
+    return upload_config, names, delete
+
+
+class TestIncrementalIngestion:
+    """Test that re-ingesting processes only what changed since the stored commit."""
+
+    @pytest.mark.asyncio
+    async def test_first_ingest_processes_every_file_and_stores_the_commit(self, repo, processor):
+        head = repo.commit({"docs/a.md": "# A", "docs/b.md": "# B", "src/app.py": "print()"})
+
+        upload, names, delete = await ingest(processor, repo_config(repo))
+
+        assert upload.metadata["commit"] == head
+        assert upload.metadata["mode"] == "full"
+        assert not upload.incremental
+        assert upload.file_count == 2
+        assert names == ["a.md", "b.md"]
+        delete.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_only_changed_files_are_processed_and_removed_ones_deleted(self, repo, processor):
+        base = repo.commit({"docs/a.md": "# A", "docs/b.md": "# B", "docs/c.md": "# C"})
+        head = repo.commit(
+            {"docs/a.md": "# A v2", "docs/d.md": "# D", "src/app.py": "print()"},
+            remove=("docs/b.md",),
+        )
+
+        upload, names, delete = await ingest(processor, repo_config(repo), last_ingest=("job-0", base))
+
+        assert upload.metadata["mode"] == "incremental"
+        assert upload.incremental
+        assert upload.metadata["commit"] == head
+        assert upload.metadata["base_commit"] == base
+        assert upload.metadata["deleted_files"] == 1
+        assert names == ["a.md", "d.md"]
+        assert upload.file_count == 2
+
+        job_id, urls = delete.call_args.args
+        assert job_id == "job-0"
+        assert urls == [processor._generate_source_url(repo.url, Path("docs/b.md"), "main")]
+
+    @pytest.mark.asyncio
+    async def test_diff_is_limited_to_the_configured_path_and_patterns(self, repo, processor):
+        base = repo.commit({"docs/a.md": "# A", "docs/drafts/x.md": "# X", "blog/post.md": "# Post"})
+        repo.commit({"docs/a.md": "# A v2", "docs/drafts/x.md": "# X v2", "blog/post.md": "# Post v2"})
+
+        config = repo_config(repo, path="docs", exclude_patterns=["drafts/*.md"])
+        upload, names, _ = await ingest(processor, config, last_ingest=("job-0", base))
+
+        assert names == ["a.md"]
+
+    @pytest.mark.asyncio
+    async def test_unchanged_repository_uploads_nothing(self, repo, processor):
+        head = repo.commit({"docs/a.md": "# A"})
+
+        upload, names, delete = await ingest(processor, repo_config(repo), last_ingest=("job-0", head))
+
+        assert upload.metadata["mode"] == "incremental"
+        assert upload.file_count == 0
+        assert names == []
+        delete.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_unknown_base_commit_falls_back_to_full_ingestion(self, repo, processor):
+        repo.commit({"docs/a.md": "# A", "docs/b.md": "# B"})
+
+        upload, names, _ = await ingest(processor, repo_config(repo), last_ingest=("job-0", "0" * 40))
+
+        assert upload.metadata["mode"] == "full"
+        assert upload.file_count == 2
+
+    @pytest.mark.asyncio
+    async def test_full_flag_ignores_the_stored_commit(self, repo, processor):
+        base = repo.commit({"docs/a.md": "# A", "docs/b.md": "# B"})
+        repo.commit({"docs/a.md": "# A v2"})
+
+        config = repo_config(repo, incremental=False)
+        upload, names, _ = await ingest(processor, config, last_ingest=("job-0", base))
+
+        assert upload.metadata["mode"] == "full"
+        assert upload.file_count == 2
+
+
+class TestIngestRecords:
+    """Test the stored commit and document removal."""
+
+    @pytest.fixture
+    def processor(self, db: Session) -> GitHubProcessor:
+        @contextmanager
+        def session_scope():
+            yield db
+
+        processor = GitHubProcessor()
+        processor.upload_processor.db_manager = SimpleNamespace(session_scope=session_scope)
+        return processor
+
+    def add_job(self, db: Session, status: str = "completed", **config) -> UploadJob:
+        job = UploadJob(
+            id=uuid4(),
+            name="Docs",
+            status=status,
+            config={
+                "source": "github",
+                "repository": "https://github.com/example/repo",
+                "branch": "main",
+                "path": None,
+                "commit": "abc123",
+                **config,
+            },
+        )
+        db.add(job)
+        db.flush()
+        return job
+
+    def test_commit_of_the_last_completed_ingest_is_used(self, db: Session, processor):
+        job = self.add_job(db)
+        config = GitHubRepoConfig(repo_url="https://github.com/example/repo", name="Docs")
+
+        assert processor._last_ingest(config) == (str(job.id), "abc123")
+
+    def test_failed_or_different_ingests_are_ignored(self, db: Session, processor):
+        config = GitHubRepoConfig(repo_url="https://github.com/example/repo", name="Docs")
+        job = self.add_job(db, status="failed")
+        assert processor._last_ingest(config) is None
+
+        job.status = "completed"
+        job.config = {**job.config, "branch": "develop"}
+        db.flush()
+        assert processor._last_ingest(config) is None
+
+    def test_ingest_with_other_patterns_is_ignored(self, db: Session, processor):
+        self.add_job(db, include_patterns=["docs/*.md"])
+        config = GitHubRepoConfig(repo_url="https://github.com/example/repo", name="Docs")
+        assert processor._last_ingest(config) is None
+
+        config.include_patterns = ["docs/*.md"]
+        assert processor._last_ingest(config) is not None
+
+    def test_incremental_run_keeps_and_recounts_the_job_totals(self, db: Session, processor):
+        job = self.add_job(db)
+        job.file_count, job.snippets_extracted = 2, 3
+        for name, snippets in (("a.md", 1), ("b.md", 2)):
+            doc = Document(
+                url=f"https://github.com/example/repo/blob/main/{name}",
+                title=name,
+                content_hash=name,
+                upload_job_id=job.id,
+            )
+            db.add(doc)
+            db.flush()
+            for i in range(snippets):
+                db.add(CodeSnippet(document_id=doc.id, title=name, code_content=f"print({i})", code_hash=f"{name}-{i}"))
+        db.flush()
+
+        upload = processor.upload_processor
+        config = UploadConfig(name="Docs", files=[], incremental=True, metadata=dict(job.config))
+        assert upload._create_upload_job(config) == str(job.id)
+        assert (job.file_count, job.snippets_extracted) == (2, 3)
+
+        upload._complete_job(str(job.id), success=True, snippets_extracted=0, recount=True)
+        assert (job.status, job.file_count, job.snippets_extracted) == ("completed", 2, 3)
+
+    def test_documents_of_removed_files_are_deleted(self, db: Session, processor):
+        job = self.add_job(db)
+        for name in ("a.md", "b.md"):
+            db.add(Document(
+                url=f"https://github.com/example/repo/blob/main/{name}",
+                title=name,
+                content_hash=name,
+                upload_job_id=job.id,
+            ))
+        db.flush()
+
+        removed = processor._delete_documents(str(job.id), ["https://github.com/example/repo/blob/main/b.md"])
+
+        assert removed == 1
+        assert [doc.title for doc in db.query(Document).filter_by(upload_job_id=job.id)] == ["a.md"]
@@ -27,7 +27,7 @@ async def test_github_processor_respects_llm_disabled():
         
         # Mock the necessary methods
         with patch.object(processor, '_clone_repository') as mock_clone, \
-             patch.object(processor, '_find_markdown_files') as mock_find, \
+             patch.object(processor, '_iter_documentation_files') as mock_find, \
              patch.object(processor, '_generate_source_url') as mock_url, \
              patch.object(processor, '_cleanup_temp_dir') as mock_cleanup, \
              patch.object(processor.upload_processor, 'process_upload') as mock_process, \
@@ -56,7 +56,7 @@ async def test_github_processor_respects_llm_disabled():
         
         # Mock the necessary methods
         with patch.object(processor, '_clone_repository') as mock_clone, \
-             patch.object(processor, '_find_markdown_files') as mock_find, \
+             patch.object(processor, '_iter_documentation_files') as mock_find, \
              patch.object(processor, '_generate_source_url') as mock_url, \
              patch.object(processor, '_cleanup_temp_dir') as mock_cleanup, \
              patch.object(processor.upload_processor, 'process_upload') as mock_process, \
@@ -0,0 +1,176 @@
+"""Tests for per-host politeness scheduling."""
+
+import asyncio
+import functools
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.crawler.config import create_crawler_config
+from src.crawler.host_scheduler import HostAwareDispatcher, HostScheduler
+from src.crawler.http_fetcher import HTTPCrawler
+
+ROBOTS = "User-agent: *\nCrawl-delay: 2\nDisallow: /private/\n"
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Static site with a robots.txt that sets a crawl-delay and disallows /private/."""
+    (tmp_path / "robots.txt").write_text(ROBOTS)
+    (tmp_path / "private").mkdir()
+    (tmp_path / "private" / "page.html").write_text("<html><body>secret</body></html>")
+
+    handler = functools.partial(QuietHandler, directory=str(tmp_path))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_scheduler(**kwargs) -> HostScheduler:
+    kwargs.setdefault("request_interval", 0.0)
+    kwargs.setdefault("respect_robots_txt", False)
+    return HostScheduler(**kwargs)
+
+
+async def peak_concurrency(scheduler: HostScheduler, urls: list[str], hold: float = 0.05) -> int:
+    """Fetch the URLs concurrently and return the most fetches seen in flight at once."""
+    active = peak = 0
+
+    async def fetch(url: str) -> None:
+        nonlocal active, peak
+        async with scheduler.slot(url):
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(hold)
+            active -= 1
+
+    await asyncio.gather(*(fetch(url) for url in urls))
+    return peak
+
+
+class TestHostScheduler:
+    """Test per-host limits, the global cap and adaptive backoff."""
+
+    @pytest.mark.asyncio
+    async def test_different_hosts_run_in_parallel(self):
+        scheduler = make_scheduler(per_host_limit=1)
+
+        peak = await peak_concurrency(scheduler, ["https://a.example.com/1", "https://b.example.com/1"])
+
+        assert peak == 2
+
+    @pytest.mark.asyncio
+    async def test_jobs_on_the_same_host_share_its_budget(self):
+        scheduler = make_scheduler(per_host_limit=2)
+        job_a = [f"https://docs.example.com/a/{i}" for i in range(4)]
+        job_b = [f"https://docs.example.com/b/{i}" for i in range(4)]
+
+        peak = await peak_concurrency(scheduler, job_a + job_b)
+
+        assert peak == 2
+        assert scheduler.snapshot()["docs.example.com"]["requests"] == 8
+
+    @pytest.mark.asyncio
+    async def test_global_limit_caps_all_hosts(self):
+        scheduler = make_scheduler(global_limit=2, per_host_limit=5)
+        urls = [f"https://host{i}.example.com/" for i in range(6)]
+
+        assert await peak_concurrency(scheduler, urls) == 2
+
+    @pytest.mark.asyncio
+    async def test_request_interval_spaces_one_host_only(self):
+        scheduler = make_scheduler(request_interval=0.1, per_host_limit=5)
+
+        started = time.perf_counter()
+        await peak_concurrency(scheduler, [f"https://a.example.com/{i}" for i in range(3)], hold=0)
+        same_host = time.perf_counter() - started
+
+        started = time.perf_counter()
+        await peak_concurrency(scheduler, [f"https://h{i}.example.com/" for i in range(3)], hold=0)
+        different_hosts = time.perf_counter() - started
+
+        assert same_host >= 0.2
+        assert different_hosts < 0.1
+
+    @pytest.mark.asyncio
+    async def test_throttling_backs_off_and_recovers(self):
+        scheduler = make_scheduler(request_interval=0.5, max_delay=10.0)
+        url = "https://docs.example.com/page"
+
+        scheduler.record_response(url, 429)
+        scheduler.record_response(url, 503)
+        assert scheduler.delay_for("docs.example.com") == 2.5
+
+        for _ in range(10):
+            scheduler.record_response(url, 200)
+        assert scheduler.delay_for("docs.example.com") == 0.5
+        assert scheduler.snapshot()["docs.example.com"]["throttled"] == 2
+
+    @pytest.mark.asyncio
+    async def test_backoff_is_capped(self):
+        scheduler = make_scheduler(max_delay=4.0)
+
+        for _ in range(10):
+            scheduler.record_response("https://docs.example.com/", None)
+
+        assert scheduler.delay_for("docs.example.com") == 4.0
+
+    @pytest.mark.asyncio
+    async def test_retry_after_delays_next_request(self):
+        scheduler = make_scheduler()
+        url = "https://docs.example.com/page"
+
+        scheduler.record_response(url, 429, retry_after="1")
+        started = time.perf_counter()
+        async with scheduler.slot(url):
+            pass
+
+        assert time.perf_counter() - started >= 0.9
+
+
+class TestRobotsTxt:
+    """Test robots.txt crawl-delay and disallow rules."""
+
+    @pytest.mark.asyncio
+    async def test_crawl_delay_and_disallow_are_honored(self, site):
+        scheduler = HostScheduler(request_interval=0.5, respect_robots_txt=True)
+        host = HostScheduler.host_of(site)
+
+        assert await scheduler.allowed(f"{site}/docs/page.html")
+        assert not await scheduler.allowed(f"{site}/private/page.html")
+        assert scheduler.delay_for(host) == 2.0
+
+    @pytest.mark.asyncio
+    async def test_robots_ignored_when_disabled(self, site):
+        scheduler = make_scheduler()
+
+        assert await scheduler.allowed(f"{site}/private/page.html")
+        assert scheduler.delay_for(HostScheduler.host_of(site)) == 0.0
+
+    @pytest.mark.asyncio
+    async def test_http_crawler_skips_disallowed_pages(self, site):
+        scheduler = HostScheduler(request_interval=0.0, respect_robots_txt=True)
+
+        async with HTTPCrawler(scheduler=scheduler) as crawler:
+            result = await crawler.arun(f"{site}/private/page.html", config=create_crawler_config(max_depth=0))
+
+        assert not result.success
+        assert "robots.txt" in result.error_message
+
+    @pytest.mark.asyncio
+    async def test_dispatcher_skips_disallowed_pages(self, site):
+        dispatcher = HostAwareDispatcher(HostScheduler(respect_robots_txt=True))
+
+        task_result = await dispatcher.crawl_url(f"{site}/private/page.html", config=None, task_id="t1")
+
+        assert not task_result.result.success
+        assert "robots.txt" in task_result.error_message
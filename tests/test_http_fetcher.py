@@ -0,0 +1,181 @@
+"""Tests for browserless page fetching."""
+
+import functools
+import threading
+from contextlib import asynccontextmanager
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import pytest
+
+from src.crawler.config import BrowserConfig, create_crawler_config
+from src.crawler.http_fetcher import HTTPCrawler, parse_page
+from src.crawler.page_crawler import PageCrawler
+
+DOC_PAGE = """<html><head><title>{title}</title><meta name="description" content="Docs page"></head>
+<body><h1>{title}</h1><p>{text}</p>
+<pre><code class="language-python">print("{title}")</code></pre>
+{links}</body></html>"""
+
+APP_SHELL = """<html><head><title>App</title><script src="/bundle.js"></script></head>
+<body><div id="root"></div><noscript>You need to enable JavaScript to run this app.</noscript></body></html>"""
+
+PROSE = "This page explains the configuration options in detail. " * 10
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Static docs site: index links to two pages, plus an app-shell page."""
+    pages = {
+        "index.html": DOC_PAGE.format(
+            title="Index", text=PROSE,
+            links='<a href="/guide.html">Guide</a> <a href="api.html#top">API</a> <a href="https://other.example.com/">Ext</a>',
+        ),
+        "guide.html": DOC_PAGE.format(title="Guide", text=PROSE, links='<a href="/index.html">Home</a>'),
+        "api.html": DOC_PAGE.format(title="API", text=PROSE, links=""),
+        "app.html": APP_SHELL,
+    }
+    for name, html in pages.items():
+        (tmp_path / name).write_text(html)
+
+    handler = functools.partial(QuietHandler, directory=str(tmp_path))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+class FakeBrowser:
+    """Browser crawler stand-in recording the URLs handed to it."""
+
+    def __init__(self):
+        self.urls: list[str] = []
+
+    async def arun_many(self, urls, config):
+        self.urls.extend(urls)
+
+        async def stream():
+            for url in urls:
+                yield SimpleNamespace(url=url, success=True, rendered_by="browser")
+
+        return stream()
+
+
+def browser_factory(browser: FakeBrowser):
+    @asynccontextmanager
+    async def open_browser():
+        yield browser
+
+    return open_browser
+
+
+async def collect(crawler: HTTPCrawler, urls: list[str]) -> list:
+    config = create_crawler_config(max_depth=0)
+    return [result async for result in await crawler.arun_many(urls, config=config)]
+
+
+class TestHTTPCrawler:
+    """Test the HTTP fetch path against a local static site."""
+
+    @pytest.mark.asyncio
+    async def test_fetches_html_markdown_and_links(self, site):
+        async with HTTPCrawler() as crawler:
+            results = await collect(crawler, [f"{site}/index.html"])
+
+        result = results[0]
+        assert result.success
+        assert result.metadata["title"] == "Index"
+        assert result.metadata["description"] == "Docs page"
+        assert 'print("Index")' in result.markdown["raw_markdown"]
+        assert result.has_code and not result.js_rendered
+        internal = [link["href"] for link in result.links["internal"]]
+        assert internal == [f"{site}/guide.html", f"{site}/api.html"]
+        assert [link["href"] for link in result.links["external"]] == ["https://other.example.com/"]
+
+    @pytest.mark.asyncio
+    async def test_errors_are_reported_as_failed_results(self, site):
+        async with HTTPCrawler() as crawler:
+            results = await collect(crawler, [f"{site}/missing.html"])
+
+        assert not results[0].success
+        assert results[0].error_message == "HTTP 404"
+
+    @pytest.mark.asyncio
+    async def test_deep_crawl_strategy_runs_over_http(self, site):
+        config = create_crawler_config(max_depth=1)
+
+        async with HTTPCrawler() as crawler:
+            results = [result async for result in await crawler.arun(f"{site}/index.html", config=config)]
+
+        assert sorted(result.url for result in results) == sorted([
+            f"{site}/index.html", f"{site}/guide.html", f"{site}/api.html",
+        ])
+
+    @pytest.mark.asyncio
+    async def test_auto_mode_hands_app_shells_to_browser(self, site):
+        browser = FakeBrowser()
+
+        async with HTTPCrawler(browser_factory=browser_factory(browser)) as crawler:
+            results = await collect(crawler, [f"{site}/index.html", f"{site}/app.html"])
+
+        assert browser.urls == [f"{site}/app.html"]
+        assert {result.url: getattr(result, "rendered_by", "http") for result in results} == {
+            f"{site}/index.html": "http",
+            f"{site}/app.html": "browser",
+        }
+
+    @pytest.mark.asyncio
+    async def test_auto_mode_keeps_definitive_errors(self, site):
+        browser = FakeBrowser()
+
+        async with HTTPCrawler(browser_factory=browser_factory(browser)) as crawler:
+            results = await collect(crawler, [f"{site}/missing.html", "http://127.0.0.1:9/down.html"])
+
+        assert browser.urls == ["http://127.0.0.1:9/down.html"]
+        assert [result.error_message for result in results if not getattr(result, "rendered_by", None)] == [
+            "HTTP 404"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_parse_errors_fail_only_the_page(self, site):
+        def failing_parse_page(url, response, markdown_generator):
+            if url.endswith("guide.html"):
+                raise UnicodeDecodeError("utf-8", b"", 0, 1, "invalid start byte")
+            return parse_page(url, response, markdown_generator)
+
+        with patch("src.crawler.http_fetcher.parse_page", failing_parse_page):
+            async with HTTPCrawler() as crawler:
+                results = await collect(crawler, [f"{site}/index.html", f"{site}/guide.html"])
+
+        by_url = {result.url: result for result in results}
+        assert by_url[f"{site}/index.html"].success
+        assert not by_url[f"{site}/guide.html"].success
+        assert by_url[f"{site}/guide.html"].error_message.startswith("Failed to parse page")
+
+    @pytest.mark.asyncio
+    async def test_http_mode_never_launches_browser(self, site):
+        async with HTTPCrawler() as crawler:
+            results = await collect(crawler, [f"{site}/app.html"])
+
+        assert results[0].success
+        assert results[0].js_rendered
+
+
+class TestFetchModeSelection:
+    """Test how the page crawler picks a fetch mode."""
+
+    def test_job_metadata_overrides_default(self):
+        crawler = PageCrawler(BrowserConfig())
+
+        assert crawler._fetch_mode(None) == crawler.settings.crawling.fetch_mode
+        assert crawler._fetch_mode({"metadata": {"fetch_mode": "http"}}) == "http"
+        assert crawler._fetch_mode({"metadata": {"fetch_mode": "bogus"}}) == "browser"
+        assert isinstance(crawler._open_crawler({"metadata": {"fetch_mode": "auto"}}), HTTPCrawler)
@@ -0,0 +1,61 @@
+"""Tests for the pooled LLM client registry."""
+
+import pytest
+
+from src.crawler.llm_clients import LLMClientRegistry, make_client_key
+
+
+class TestLLMClientRegistry:
+    """Test client reuse and idle eviction."""
+
+    def test_key_does_not_contain_raw_api_key(self):
+        key = make_client_key("sk-secret", "http://localhost:8000/v1", "gpt-4o-mini")
+        assert "sk-secret" not in "".join(key)
+        assert key[0] == "http://localhost:8000/v1"
+
+    def test_same_endpoint_reuses_client(self):
+        registry = LLMClientRegistry()
+        client1 = registry.get_client("key", "http://localhost:8000/v1", "model-a")
+        client2 = registry.get_client("key", "http://localhost:8000/v1", "model-a")
+        assert client1 is client2
+        assert registry.snapshot()["clients"] == 1
+
+    def test_different_endpoints_get_separate_clients(self):
+        registry = LLMClientRegistry()
+        client1 = registry.get_client("key", "http://localhost:8000/v1", "model-a")
+        client2 = registry.get_client("key", "http://localhost:9000/v1", "model-a")
+        client3 = registry.get_client("other-key", "http://localhost:8000/v1", "model-a")
+        assert len({id(client1), id(client2), id(client3)}) == 3
+
+    @pytest.mark.asyncio
+    async def test_idle_clients_are_evicted(self):
+        registry = LLMClientRegistry(idle_ttl=60)
+        client1 = registry.get_client("key", "http://localhost:8000/v1")
+
+        for pooled in registry._clients.values():
+            pooled.last_used -= 120
+
+        client2 = registry.get_client("key", "http://localhost:8000/v1")
+        assert client2 is not client1
+        assert registry.snapshot()["clients"] == 1
+
+        await registry.close()
+        assert registry.snapshot()["clients"] == 0
+
+    @pytest.mark.asyncio
+    async def test_leased_clients_are_not_evicted(self):
+        registry = LLMClientRegistry(idle_ttl=60)
+        leased = registry.acquire("key", "http://localhost:8000/v1")
+
+        for pooled in registry._clients.values():
+            pooled.last_used -= 120
+        assert registry.get_client("key", "http://localhost:8000/v1") is leased
+
+        registry.release(leased)
+        for pooled in registry._clients.values():
+            pooled.last_used -= 120
+        assert registry.get_client("key", "http://localhost:8000/v1") is not leased
+        assert len(registry._closing) == 1
+
+        await registry.close()
+        assert not registry._closing
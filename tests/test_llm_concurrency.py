@@ -0,0 +1,134 @@
+"""Tests for the adaptive LLM concurrency limiter."""
+
+import asyncio
+
+import pytest
+
+from src.crawler import llm_concurrency
+from src.crawler.llm_concurrency import (
+    AdaptiveConcurrencyLimiter,
+    classify_llm_error,
+    get_llm_limiter,
+    parse_retry_after,
+)
+
+
+class _FakeResponse:
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+class _FakeStatusError(Exception):
+    def __init__(self, status_code: int, headers: dict[str, str] | None = None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = _FakeResponse(status_code, headers)
+
+
+class TestErrorClassification:
+    """Test mapping of client errors to congestion signals."""
+
+    def test_parse_retry_after_seconds(self):
+        assert parse_retry_after("3") == 3.0
+        assert parse_retry_after(None) is None
+        assert parse_retry_after("not-a-date") is None
+
+    def test_classify_rate_limit_with_retry_after(self):
+        kind, retry_after = classify_llm_error(_FakeStatusError(429, {"retry-after": "2"}))
+        assert kind == "throttled"
+        assert retry_after == 2.0
+
+    def test_classify_timeout_and_server_error(self):
+        assert classify_llm_error(asyncio.TimeoutError())[0] == "timeout"
+        assert classify_llm_error(_FakeStatusError(503))[0] == "server_error"
+        assert classify_llm_error(ValueError("bad response"))[0] == "error"
+
+
+class TestAdaptiveConcurrencyLimiter:
+    """Test the AIMD control loop."""
+
+    @pytest.mark.asyncio
+    async def test_limit_bounds_in_flight_requests(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.slot():
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(call() for _ in range(10)))
+        assert peak == 2
+        assert limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_additive_increase_on_fast_responses(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, max_limit=10, latency_target=5.0)
+
+        for _ in range(20):
+            async with limiter.slot():
+                pass
+
+        assert limiter.limit > 2
+        assert limiter.limit <= 10
+
+    @pytest.mark.asyncio
+    async def test_multiplicative_decrease_on_throttle(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        with pytest.raises(_FakeStatusError):
+            async with limiter.slot():
+                raise _FakeStatusError(429)
+
+        assert limiter.limit == 4
+        assert limiter.snapshot()["throttled"] == 1
+
+    @pytest.mark.asyncio
+    async def test_burst_of_throttles_decreases_once(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+
+        for _ in range(3):
+            limiter._in_flight += 1
+            limiter.release(error=_FakeStatusError(429))
+
+        assert limiter.limit == 4
+
+    @pytest.mark.asyncio
+    async def test_limit_never_drops_below_minimum(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=2, min_limit=2)
+
+        limiter._in_flight += 1
+        limiter.release(error=asyncio.TimeoutError())
+
+        assert limiter.limit == 2
+
+    @pytest.mark.asyncio
+    async def test_retry_after_pauses_acquisition(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        limiter._in_flight += 1
+        limiter.release(error=_FakeStatusError(429, {"retry-after": "0.2"}))
+        assert limiter.snapshot()["paused_for_seconds"] > 0
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        async with limiter.slot():
+            pass
+        assert loop.time() - started >= 0.15
+
+    @pytest.mark.asyncio
+    async def test_application_errors_do_not_shrink_limit(self):
+        limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+
+        with pytest.raises(ValueError):
+            async with limiter.slot():
+                raise ValueError("unparseable response")
+
+        assert limiter.limit == 4
+        assert limiter.snapshot()["errors"] == 1
+
+    def test_limiter_singleton(self, monkeypatch):
+        monkeypatch.setattr(llm_concurrency, "_llm_limiter", None)
+        assert get_llm_limiter() is get_llm_limiter()
@@ -0,0 +1,162 @@
+"""Tests for the global LLM request scheduler."""
+
+import asyncio
+
+import pytest
+
+from src.crawler.llm_concurrency import AdaptiveConcurrencyLimiter
+from src.crawler.llm_scheduler import UNSCOPED_JOB, LLMRequestScheduler, LLMTicket, TokenBucket
+
+
+def make_scheduler(slots: int = 32, **kwargs) -> LLMRequestScheduler:
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=slots, min_limit=slots, max_limit=slots)
+    return LLMRequestScheduler(limiter=limiter, **kwargs)
+
+
+class TestTokenBucket:
+    """Test the token bucket primitive."""
+
+    def test_disabled_bucket_never_waits(self):
+        bucket = TokenBucket(0)
+        bucket.consume(1_000_000)
+        assert bucket.time_until_available(1_000_000) == 0.0
+        assert bucket.available is None
+
+    def test_wait_after_exhaustion(self):
+        bucket = TokenBucket(60)  # one token per second
+        bucket.consume(60)
+        wait = bucket.time_until_available(2)
+        assert 1.5 < wait <= 2.0
+
+    def test_oversized_request_only_needs_full_bucket(self):
+        bucket = TokenBucket(100)
+        assert bucket.time_until_available(500) == 0.0
+
+
+class TestLLMRequestScheduler:
+    """Test rate limiting and fair sharing between jobs."""
+
+    @pytest.mark.asyncio
+    async def test_unlimited_scheduler_dispatches_immediately(self):
+        scheduler = make_scheduler()
+        await asyncio.wait_for(scheduler.acquire("job-a", 100), timeout=1)
+        assert scheduler.snapshot()["jobs"] == {}
+
+    @pytest.mark.asyncio
+    async def test_requests_per_minute_budget_is_enforced(self):
+        scheduler = make_scheduler(requests_per_minute=2)
+        await scheduler.acquire("job-a", 1)
+        await scheduler.acquire("job-a", 1)
+
+        third = asyncio.create_task(scheduler.acquire("job-a", 1))
+        await asyncio.sleep(0.05)
+        assert not third.done()
+        assert scheduler.snapshot()["jobs"]["job-a"]["queued"] == 1
+
+        third.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await third
+        assert "job-a" not in scheduler.snapshot()["jobs"]
+
+    @pytest.mark.asyncio
+    async def test_jobs_share_budget_fairly(self):
+        # 600 RPM: one request every 0.1s once the initial burst is spent
+        scheduler = make_scheduler(requests_per_minute=600)
+        scheduler._rpm.consume(scheduler._rpm.capacity)
+
+        order: list[str] = []
+
+        async def submit(job_id: str):
+            await scheduler.acquire(job_id, 10)
+            order.append(job_id)
+
+        # Job A floods the queue before job B submits anything
+        tasks = [asyncio.create_task(submit("job-a")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(submit("job-b")) for _ in range(2)]
+
+        await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+
+        # Job B is interleaved instead of waiting behind all of job A's requests
+        assert order.index("job-b") < 4
+        assert order.count("job-b") == 2
+
+    @pytest.mark.asyncio
+    async def test_jobs_share_concurrency_slots_without_rate_limits(self):
+        # Default configuration: no RPM/TPM budget, only the concurrency limiter
+        scheduler = make_scheduler(slots=1)
+        order: list[str] = []
+        release = asyncio.Event()
+
+        async def send(job_id: str):
+            async with scheduler.request(job_id, "prompt"):
+                order.append(job_id)
+                await release.wait()
+
+        blocker = asyncio.create_task(send("crawl"))
+        await asyncio.sleep(0)
+        # The crawl queues many requests before the upload submits any
+        tasks = [asyncio.create_task(send("crawl")) for _ in range(6)]
+        await asyncio.sleep(0)
+        tasks += [asyncio.create_task(send("upload")) for _ in range(2)]
+        await asyncio.sleep(0.01)
+        assert scheduler.snapshot()["jobs"]["crawl"]["queued"] == 6
+
+        release.set()
+        await asyncio.wait_for(asyncio.gather(blocker, *tasks), timeout=5)
+
+        # The upload is interleaved instead of waiting behind the whole crawl backlog
+        assert order.index("upload") <= 2
+        assert order.count("upload") == 2
+        assert scheduler.limiter.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_usage_reconciliation_refunds_tokens(self):
+        scheduler = make_scheduler(tokens_per_minute=1000)
+        await scheduler.acquire(None, 800)
+
+        ticket = LLMTicket(job_id=UNSCOPED_JOB, estimated_tokens=800, actual_tokens=300)
+        scheduler.release(ticket)
+
+        assert scheduler.snapshot()["available_tokens"] >= 700
+
+    @pytest.mark.asyncio
+    async def test_cancelled_dispatched_waiter_refunds_tokens(self):
+        scheduler = make_scheduler(tokens_per_minute=1000)
+        await scheduler.acquire(None, 1000)
+        waiter = asyncio.create_task(scheduler.acquire(None, 800))
+        await asyncio.sleep(0)
+        assert scheduler.snapshot()["jobs"][UNSCOPED_JOB]["queued"] == 1
+
+        # The budget frees up and the waiter is dispatched, then cancelled before it resumes
+        scheduler._tpm._tokens = 1000
+        scheduler._dispatch()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+
+        assert scheduler.snapshot()["available_tokens"] >= 999
+
+    @pytest.mark.asyncio
+    async def test_request_cancelled_waiting_for_a_slot_consumes_no_budget(self):
+        scheduler = make_scheduler(slots=1, tokens_per_minute=1000)
+        release = asyncio.Event()
+
+        async def send(max_tokens: int):
+            async with scheduler.request(None, "prompt", max_tokens=max_tokens):
+                await release.wait()
+
+        holder = asyncio.create_task(send(100))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(send(800))
+        await asyncio.sleep(0.01)
+        assert scheduler.snapshot()["jobs"][UNSCOPED_JOB]["queued"] == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert scheduler.snapshot()["available_tokens"] >= 850
+
+        release.set()
+        await holder
+        assert scheduler.limiter.in_flight == 0
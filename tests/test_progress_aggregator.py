@@ -0,0 +1,203 @@
+"""Tests for write-behind job progress aggregation."""
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from src.crawler.progress_aggregator import ProgressAggregator
+from src.crawler.progress_bus import InMemoryProgressBus
+from src.crawler.progress_tracker import ProgressTracker
+from src.database.models import CrawlJob, UploadJob
+
+
+class FakeSession:
+    """Session recording the compiled SQL of executed statements."""
+
+    def __init__(self, statements: list[str], fail: bool = False, updated: list | None = None):
+        self.statements = statements
+        self.fail = fail
+        self.updated = updated or []
+
+    def execute(self, stmt):
+        if self.fail:
+            raise RuntimeError("database unavailable")
+        self.statements.append(str(stmt.compile(dialect=postgresql.dialect())))
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: self.updated))
+
+    def commit(self):
+        pass
+
+
+def fake_db_manager(statements: list[str], fail: bool = False, updated: list | None = None) -> SimpleNamespace:
+    @contextmanager
+    def session_scope():
+        yield FakeSession(statements, fail, updated)
+
+    return SimpleNamespace(session_scope=session_scope)
+
+
+class TestProgressAggregator:
+    """Test coalescing and batched flushing of job progress."""
+
+    @pytest.mark.asyncio
+    async def test_updates_are_coalesced_into_one_statement_per_table(self):
+        statements: list[str] = []
+        aggregator = ProgressAggregator(flush_interval=60, db_manager=fake_db_manager(statements))
+        crawl_a, crawl_b, upload = str(uuid4()), str(uuid4()), str(uuid4())
+        aggregator.track(crawl_a)
+        aggregator.track(crawl_b)
+        aggregator.track(upload, UploadJob)
+
+        for pages in range(1, 31):
+            aggregator.update(crawl_a, processed_pages=pages, total_pages=40)
+            aggregator.update(crawl_b, processed_pages=pages)
+            aggregator.update(upload, processed_pages=pages, snippets_extracted=pages * 2)
+
+        assert await aggregator.flush() == 3
+        assert len(statements) == 2
+        crawl_sql = next(sql for sql in statements if sql.startswith("UPDATE crawl_jobs"))
+        assert "FROM (VALUES" in crawl_sql
+        assert "last_heartbeat=coalesce" in crawl_sql
+        upload_sql = next(sql for sql in statements if sql.startswith("UPDATE upload_jobs"))
+        assert "processed_files=coalesce" in upload_sql
+
+        await aggregator.release(crawl_a)
+        await aggregator.release(crawl_b)
+        await aggregator.release(upload)
+
+    @pytest.mark.asyncio
+    async def test_unchanged_jobs_are_not_written(self):
+        statements: list[str] = []
+        aggregator = ProgressAggregator(flush_interval=60, db_manager=fake_db_manager(statements))
+        job_id = str(uuid4())
+        aggregator.track(job_id, processed_pages=5)
+
+        assert await aggregator.flush() == 0
+
+        aggregator.update(job_id, processed_pages=6)
+        assert await aggregator.flush() == 1
+        assert await aggregator.flush() == 0
+        await aggregator.release(job_id)
+
+    @pytest.mark.asyncio
+    async def test_snapshot_is_served_from_memory(self):
+        aggregator = ProgressAggregator(flush_interval=60, db_manager=fake_db_manager([]))
+        job_id = str(uuid4())
+        aggregator.track(job_id, snippets_extracted=12)
+
+        aggregator.update(job_id, processed_pages=3, total_pages=10)
+        aggregator.update(job_id, total_pages=None, documents_crawled=3)
+
+        assert aggregator.snapshot(job_id) == {
+            "processed_pages": 3,
+            "total_pages": 10,
+            "snippets_extracted": 12,
+            "documents_crawled": 3,
+            "crawl_phase": "crawling",
+        }
+        await aggregator.release(job_id)
+        assert aggregator.snapshot(job_id) is None
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_is_retried(self):
+        statements: list[str] = []
+        aggregator = ProgressAggregator(flush_interval=60, db_manager=fake_db_manager(statements, fail=True))
+        job_id = str(uuid4())
+        aggregator.track(job_id)
+        aggregator.update(job_id, processed_pages=1)
+
+        assert await aggregator.flush() == 0
+
+        aggregator.db_manager = fake_db_manager(statements)
+        assert await aggregator.flush() == 1
+        await aggregator.release(job_id)
+
+
+    @pytest.mark.asyncio
+    async def test_jobs_taken_over_by_another_worker_are_dropped(self):
+        statements: list[str] = []
+        owned, lost = uuid4(), uuid4()
+        aggregator = ProgressAggregator(
+            flush_interval=60, db_manager=fake_db_manager(statements, updated=[owned])
+        )
+        lost_jobs: list[str] = []
+        aggregator.track(str(owned), owner="host-a:1", on_lost=lambda: lost_jobs.append("owned"))
+        aggregator.track(str(lost), owner="host-a:1", on_lost=lambda: lost_jobs.append("lost"))
+        aggregator.update(str(owned), processed_pages=1)
+        aggregator.update(str(lost), processed_pages=1)
+
+        assert await aggregator.flush() == 2
+        assert "crawl_jobs.worker_id = progress.owner" in statements[0]
+        assert lost_jobs == ["lost"]
+        assert aggregator.snapshot(str(lost)) is None
+        await aggregator.release(str(owned))
+
+
+class FakeJobManager:
+    """Job manager counting database reads and writes."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def get_job_status(self, job_id):
+        self.calls.append("get_job_status")
+        return {"processed_pages": 0, "total_pages": 0, "snippets_extracted": 7}
+
+    def update_job_progress(self, job_id, **kwargs):
+        self.calls.append("update_job_progress")
+
+    def update_job_status(self, job_id, **kwargs):
+        self.calls.append("update_job_status")
+
+
+class TestProgressTrackerWriteBehind:
+    """Test that progress updates no longer hit the database per update."""
+
+    @pytest.mark.asyncio
+    async def test_progress_updates_are_written_on_flush(self):
+        bus = InMemoryProgressBus()
+        statements: list[str] = []
+        job_manager = FakeJobManager()
+        tracker = ProgressTracker(
+            job_manager,
+            job_model=CrawlJob,
+            aggregator=ProgressAggregator(flush_interval=60, db_manager=fake_db_manager(statements)),
+            progress_bus=bus,
+        )
+        job_id = str(uuid4())
+
+        await tracker.start_tracking(job_id)
+        for page in range(1, 10):
+            await tracker.update_progress(job_id, processed_pages=page, total_pages=20)
+
+        assert job_manager.calls == ["get_job_status"]
+        assert statements == []
+        assert bus.published[-1][2]["urls_crawled"] == 9
+        assert bus.published[-1][2]["snippets_extracted"] == 7
+
+        await tracker.stop_tracking(job_id)
+        assert len(statements) == 1
+
+    @pytest.mark.asyncio
+    async def test_phase_changes_are_written_on_flush(self):
+        statements: list[str] = []
+        job_manager = FakeJobManager()
+        tracker = ProgressTracker(
+            job_manager,
+            job_model=CrawlJob,
+            aggregator=ProgressAggregator(flush_interval=60, db_manager=fake_db_manager(statements)),
+            progress_bus=InMemoryProgressBus(),
+        )
+        job_id = str(uuid4())
+
+        await tracker.start_tracking(job_id)
+        await tracker.update_progress(job_id, phase="finalizing", send_notification=False)
+
+        assert "update_job_status" not in job_manager.calls
+        assert tracker.aggregator.snapshot(job_id)["crawl_phase"] == "finalizing"
+
+        await tracker.stop_tracking(job_id)
+        assert "crawl_phase=CASE WHEN (crawl_jobs.status" in statements[0]
@@ -0,0 +1,153 @@
+"""Tests for cross-process fan-out of job progress."""
+
+import asyncio
+import json
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+
+from src.api import websocket
+from src.api.websocket import ConnectionManager, relay_crawl_update
+from src.crawler.progress_bus import (
+    MAX_PAYLOAD_BYTES,
+    MAX_PUBLISHED,
+    InMemoryProgressBus,
+    PostgresProgressBus,
+    ProgressBus,
+    decode_event,
+    encode_event,
+)
+
+
+@pytest_asyncio.fixture
+async def postgres_bus():
+    bus = PostgresProgressBus(db_manager=SimpleNamespace(), reconnect_delay=0.01)
+    bus.batches = []
+
+    def notify(payloads):
+        bus.batches.append([json.loads(payload) for payload in payloads])
+
+    bus._notify = notify
+    yield bus
+    await bus.close()
+
+
+class TestEventEncoding:
+    """Test NOTIFY payloads."""
+
+    def test_round_trip(self):
+        payload = encode_event("job-1", "running", {"urls_crawled": 3})
+        assert decode_event(payload) == ("job-1", "running", {"urls_crawled": 3})
+
+    def test_pipeline_metrics_are_dropped_from_oversized_events(self):
+        data = {"urls_crawled": 3, "pipeline": {"stages": "x" * MAX_PAYLOAD_BYTES}}
+        assert decode_event(encode_event("job-1", "running", data)) == ("job-1", "running", {"urls_crawled": 3})
+
+    def test_oversized_events_are_not_published(self):
+        assert encode_event("job-1", "failed", {"error": "x" * MAX_PAYLOAD_BYTES}) is None
+
+    def test_malformed_payload_is_ignored(self):
+        assert decode_event("not json") is None
+        assert decode_event('{"status": "running"}') is None
+
+
+class TestInMemoryProgressBus:
+    """Test local delivery."""
+
+    def test_handlers_receive_events_and_failures_are_isolated(self):
+        bus = InMemoryProgressBus()
+        received = []
+
+        def failing(job_id, status, data):
+            raise RuntimeError("boom")
+
+        bus.add_handler(failing)
+        bus.add_handler(lambda *event: received.append(event))
+        bus.publish("job-1", "running", {"urls_crawled": 1})
+
+        assert received == [("job-1", "running", {"urls_crawled": 1})]
+
+    def test_published_events_are_bounded(self):
+        bus = InMemoryProgressBus()
+        for page in range(MAX_PUBLISHED + 10):
+            bus.publish("job-1", "running", {"urls_crawled": page})
+
+        assert len(bus.published) == MAX_PUBLISHED
+        assert bus.published[-1][2]["urls_crawled"] == MAX_PUBLISHED + 9
+
+    def test_bus_without_publish_cannot_be_created(self):
+        with pytest.raises(TypeError):
+            ProgressBus()
+
+
+class TestPostgresProgressBus:
+    """Test batching of NOTIFY statements without a database."""
+
+    @pytest.mark.asyncio
+    async def test_events_are_sent_in_one_batch_with_latest_running_update(self, postgres_bus):
+        postgres_bus.publish("job-1", "running", {"urls_crawled": 1})
+        postgres_bus.publish("job-2", "running", {"urls_crawled": 5})
+        postgres_bus.publish("job-1", "running", {"urls_crawled": 2})
+        postgres_bus.publish("job-1", "completed", {"processed_pages": 2})
+
+        await asyncio.sleep(0.05)
+
+        assert postgres_bus.batches == [[
+            {"job_id": "job-2", "status": "running", "data": {"urls_crawled": 5}},
+            {"job_id": "job-1", "status": "running", "data": {"urls_crawled": 2}},
+            {"job_id": "job-1", "status": "completed", "data": {"processed_pages": 2}},
+        ]]
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_sent_again(self, postgres_bus):
+        notify = postgres_bus._notify
+        failures = []
+
+        def flaky(payloads):
+            if not failures:
+                failures.append(1)
+                raise RuntimeError("database unavailable")
+            notify(payloads)
+
+        postgres_bus._notify = flaky
+        postgres_bus.publish("job-1", "completed", {"processed_pages": 2})
+        await asyncio.sleep(0.1)
+
+        assert postgres_bus.batches == [[{"job_id": "job-1", "status": "completed", "data": {"processed_pages": 2}}]]
+
+    @pytest.mark.asyncio
+    async def test_close_sends_pending_events(self, postgres_bus):
+        postgres_bus.publish("job-1", "completed", {"processed_pages": 2})
+        await postgres_bus.close()
+
+        assert postgres_bus.batches[-1][0]["status"] == "completed"
+
+
+class TestWebSocketRelay:
+    """Test that relayed events reach the subscribers of this process."""
+
+    @pytest.mark.asyncio
+    async def test_relayed_event_is_queued_for_subscribers(self, monkeypatch):
+        hub = ConnectionManager()
+        monkeypatch.setattr(websocket, "manager", hub)
+        sent = []
+
+        class FakeWebSocket:
+            async def accept(self):
+                pass
+
+            async def send_json(self, message):
+                sent.append(message)
+
+        await hub.connect(FakeWebSocket(), "client-1")
+        hub.subscribe("client-1", "job-1")
+
+        bus = InMemoryProgressBus()
+        bus.add_handler(relay_crawl_update)
+        bus.publish("job-1", "running", {"urls_crawled": 4, "timestamp": "now"})
+        await asyncio.sleep(0.01)
+
+        assert sent[0]["job_id"] == "job-1"
+        assert sent[0]["data"]["urls_crawled"] == 4
+        await hub.close()
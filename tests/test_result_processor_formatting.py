@@ -3,11 +3,18 @@
 from unittest.mock import Mock
 
 import pytest
+from sqlalchemy.dialects import postgresql
 
 from src.crawler.extractors.models import ExtractedCodeBlock, ExtractedContext
 from src.crawler.result_processor import ResultProcessor
 
 
+def inserted_params(mock_session):
+    """Get the bound parameters of the bulk snippet INSERT."""
+    stmt = mock_session.execute.call_args[0][0]
+    return stmt.compile(dialect=postgresql.dialect()).params
+
+
 class TestResultProcessorFormatting:
     """Test code block processing in result processor."""
 
@@ -32,28 +39,28 @@ class TestResultProcessorFormatting:
             )
         ]
 
-        # Mock find_duplicate_snippet_in_source to return None (no duplicate)
-        def mock_find_duplicate(session, code_hash, doc):
-            return None
-        
+        # Mock find_duplicate_hashes_in_source to return no duplicates
+        def mock_find_duplicates(session, code_hashes, doc):
+            return set()
+
         monkeypatch.setattr(
-            'src.database.content_check.find_duplicate_snippet_in_source',
-            mock_find_duplicate
+            'src.database.content_check.find_duplicate_hashes_in_source',
+            mock_find_duplicates
         )
-        
-        # Mock database operations
-        mock_session.add = Mock()
-        mock_session.flush = Mock()
+
+        # Mock database operations; the INSERT returns one new snippet (not band-indexed)
+        mock_session.execute.return_value.all.return_value = [Mock(id=101, simhash=None)]
         mock_session.commit = Mock()
 
         snippet_count = await processor._process_code_blocks(
             mock_session, mock_doc, code_blocks, 'https://example.com/test'
         )
 
-        # Verify the code was saved
-        saved_snippet = mock_session.add.call_args[0][0]
-        assert saved_snippet.code_content == 'const x = 5;\nconst y = 10;'
-        assert saved_snippet.language == 'javascript'
+        # Verify the code was saved in a single statement
+        mock_session.execute.assert_called_once()
+        params = inserted_params(mock_session)
+        assert params['code_content_m0'] == 'const x = 5;\nconst y = 10;'
+        assert params['language_m0'] == 'javascript'
         assert snippet_count == 1
 
     @pytest.mark.asyncio
@@ -88,19 +95,15 @@ class TestResultProcessorFormatting:
             code_content=test_code
         )
         
-        # Mock find_duplicate_snippet_in_source to return existing snippet
-        def mock_find_duplicate(session, code_hash, doc):
-            if code_hash == expected_hash:
-                return existing_snippet
-            return None
-        
+        # Mock find_duplicate_hashes_in_source to report the existing snippet
+        def mock_find_duplicates(session, code_hashes, doc):
+            return {h for h in code_hashes if h == existing_snippet.code_hash}
+
         monkeypatch.setattr(
-            'src.database.content_check.find_duplicate_snippet_in_source',
-            mock_find_duplicate
+            'src.database.content_check.find_duplicate_hashes_in_source',
+            mock_find_duplicates
         )
-        
-        mock_session.add = Mock()
-        mock_session.flush = Mock()
+
         mock_session.commit = Mock()
 
         snippet_count = await processor._process_code_blocks(
@@ -109,8 +112,8 @@ class TestResultProcessorFormatting:
 
         # Should not add duplicate
         assert snippet_count == 0
-        # Verify that add was not called since it's a duplicate
-        mock_session.add.assert_not_called()
+        # Verify that nothing was inserted since it's a duplicate
+        mock_session.execute.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_multiple_code_blocks(self, monkeypatch):
@@ -140,24 +143,107 @@ class TestResultProcessorFormatting:
             )
         ]
 
-        # Mock find_duplicate_snippet_in_source to return None (no duplicates)
-        def mock_find_duplicate(session, code_hash, doc):
-            return None
-        
+        # Mock find_duplicate_hashes_in_source to return no duplicates
+        lookups = []
+
+        def mock_find_duplicates(session, code_hashes, doc):
+            lookups.append(list(code_hashes))
+            return set()
+
         monkeypatch.setattr(
-            'src.database.content_check.find_duplicate_snippet_in_source',
-            mock_find_duplicate
+            'src.database.content_check.find_duplicate_hashes_in_source',
+            mock_find_duplicates
         )
-        
-        # Mock database operations
-        mock_session.add = Mock()
-        mock_session.flush = Mock()
+
+        # Mock database operations; the INSERT returns two new snippets (not band-indexed)
+        mock_session.execute.return_value.all.return_value = [Mock(id=101, simhash=None), Mock(id=102, simhash=None)]
         mock_session.commit = Mock()
 
         snippet_count = await processor._process_code_blocks(
             mock_session, mock_doc, code_blocks, 'https://example.com/test'
         )
 
-        # Verify both snippets were saved
+        # Verify both snippets were saved with one lookup and one INSERT
         assert snippet_count == 2
-        assert mock_session.add.call_count == 2
+        assert len(lookups) == 1 and len(lookups[0]) == 2
+        mock_session.execute.assert_called_once()
+        params = inserted_params(mock_session)
+        assert params['language_m0'] == 'javascript'
+        assert params['language_m1'] == 'python'
+
+    @pytest.mark.asyncio
+    async def test_repeated_block_on_page_is_inserted_once(self, monkeypatch):
+        """Test that identical code blocks on one page produce one row."""
+        processor = ResultProcessor()
+
+        mock_session = Mock()
+        mock_doc = Mock(id=1, url='https://example.com/test', crawl_job_id='test-job-id', upload_job_id=None)
+
+        block = ExtractedCodeBlock(
+            code='pip install codedox',
+            language='bash',
+            context=ExtractedContext(title='Install', description='Install the package')
+        )
+
+        monkeypatch.setattr(
+            'src.database.content_check.find_duplicate_hashes_in_source',
+            lambda session, code_hashes, doc: set()
+        )
+        mock_session.execute.return_value.all.return_value = [Mock(id=101, simhash=None)]
+
+        snippet_count = await processor._process_code_blocks(
+            mock_session, mock_doc, [block, block], 'https://example.com/test'
+        )
+
+        assert snippet_count == 1
+        params = inserted_params(mock_session)
+        assert 'code_content_m0' in params
+        assert 'code_content_m1' not in params
+
+
+class TestBatchPersistence:
+    """Test that a micro-batch is written in one transaction."""
+
+    @pytest.mark.asyncio
+    async def test_batch_shares_one_session_and_records_failures(self, monkeypatch):
+        from contextlib import contextmanager
+        from types import SimpleNamespace
+
+        processor = ResultProcessor()
+        session = Mock()
+        sessions: list[Mock] = []
+
+        @contextmanager
+        def session_scope():
+            sessions.append(session)
+            yield session
+
+        async def store(session, result, job_id, depth, ignore_hash):
+            if result.url.endswith("bad"):
+                raise ValueError("broken page")
+            return 1, 2
+
+        recorded: list[str] = []
+
+        async def record(job_id, url, error_message, failure_class=None):
+            recorded.append(url)
+
+        processor.db_manager = SimpleNamespace(session_scope=session_scope)
+        monkeypatch.setattr(processor, "_store_result", store)
+        monkeypatch.setattr(processor, "_ignore_hash", lambda session, job_id: False)
+        monkeypatch.setattr(processor, "_clear_failed_pages", Mock())
+        monkeypatch.setattr("src.crawler.result_processor.record_failed_page", record)
+
+        results = [
+            SimpleNamespace(url=f"https://example.com/{name}", metadata={}) for name in ("a", "bad", "b")
+        ]
+        documents, snippets = await processor.process_batch(results, "job-1")
+
+        assert (documents, snippets) == (2, 4)
+        assert len(sessions) == 1
+        assert session.begin_nested.call_count == 3
+        session.commit.assert_not_called()
+        assert recorded == ["https://example.com/bad"]
+        processor._clear_failed_pages.assert_called_once_with(
+            session, "job-1", ["https://example.com/a", "https://example.com/b"]
+        )
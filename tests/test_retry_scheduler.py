@@ -0,0 +1,182 @@
+"""Tests for background retries of failed pages."""
+
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from src.crawler.failed_page_utils import (
+    FailedPageRecorder,
+    PendingFailure,
+    is_retryable,
+    retry_delay,
+)
+from src.crawler.host_scheduler import HostScheduler
+from src.crawler.retry_scheduler import RetryScheduler
+
+
+class TestRetryPolicy:
+    """Test which failures are retried and when."""
+
+    @pytest.mark.parametrize("failure_class, status_code, expected", [
+        ("timeout", None, True),
+        ("server_error", 503, True),
+        ("other", None, True),
+        ("client_error", 429, True),
+        ("client_error", 404, False),
+        ("client_error", 410, False),
+        ("extraction", None, False),
+    ])
+    def test_is_retryable(self, failure_class, status_code, expected):
+        assert is_retryable(failure_class, status_code) is expected
+
+    def test_delay_doubles_with_jitter_up_to_the_cap(self):
+        for attempts, upper in [(1, 30), (2, 60), (3, 120), (10, 1800), (5000, 1800)]:
+            delays = [retry_delay(attempts, 30, 1800) for _ in range(50)]
+            assert all(upper / 2 <= delay <= upper for delay in delays)
+        assert len({retry_delay(3, 30, 1800) for _ in range(20)}) > 1
+
+    def test_recorded_rows_get_next_retry_time(self):
+        recorder = FailedPageRecorder(db_manager=SimpleNamespace())
+        recorder.max_attempts = 3
+        failed_at = datetime(2026, 1, 1)
+        job_id = str(uuid4())
+
+        def row(failure_class, status_code=None, attempts=1):
+            failure = PendingFailure(
+                error_message="boom", failure_class=failure_class, status_code=status_code,
+                failed_at=failed_at, attempts=attempts,
+            )
+            return recorder._row(job_id, "https://example.com/a", failure)
+
+        retry_at = row("server_error", 503)["next_retry_at"]
+        assert failed_at + timedelta(seconds=recorder.base_delay / 2) <= retry_at
+        assert retry_at <= failed_at + timedelta(seconds=recorder.base_delay)
+        assert row("client_error", 404)["next_retry_at"] is None
+        assert row("timeout", attempts=3)["next_retry_at"] is None
+
+        recorder.retry_enabled = False
+        assert row("timeout")["next_retry_at"] is None
+
+
+class FakeQuery:
+    def __init__(self, pages):
+        self.pages = pages
+
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: self
+
+    def all(self):
+        return self.pages
+
+
+class FakeSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.statements = []
+
+    def query(self, model):
+        return FakeQuery(self.pages)
+
+    def execute(self, stmt):
+        self.statements.append(stmt)
+
+    def commit(self):
+        pass
+
+
+def make_scheduler(pages, batch_size=10, per_host_limit=2):
+    session = FakeSession(pages)
+
+    @contextmanager
+    def session_scope():
+        yield session
+
+    scheduler = RetryScheduler(
+        crawl_manager=SimpleNamespace(),
+        host_scheduler=HostScheduler(per_host_limit=per_host_limit, respect_robots_txt=False),
+        batch_size=batch_size,
+        db_manager=SimpleNamespace(session_scope=session_scope),
+    )
+    scheduler.session = session
+    return scheduler
+
+
+def page(job_id, url):
+    return SimpleNamespace(crawl_job_id=job_id, url=url, next_retry_at=datetime.utcnow())
+
+
+class TestClaims:
+    """Test how due pages are picked per host."""
+
+    def test_claims_at_most_the_host_limit_per_host(self):
+        job_id = uuid4()
+        pages = [page(job_id, f"https://a.example.com/{i}") for i in range(4)]
+        pages.append(page(job_id, "https://b.example.com/1"))
+        scheduler = make_scheduler(pages, per_host_limit=2)
+        lease_until = datetime.utcnow() + timedelta(minutes=10)
+
+        claimed = scheduler.claim_due(lease_until)
+
+        assert claimed == {str(job_id): [
+            "https://a.example.com/0", "https://a.example.com/1", "https://b.example.com/1",
+        ]}
+        assert [p.next_retry_at == lease_until for p in pages] == [True, True, False, False, True]
+
+    def test_skips_hosts_that_are_backing_off(self):
+        job_id = uuid4()
+        scheduler = make_scheduler([
+            page(job_id, "https://flaky.example.com/1"),
+            page(job_id, "https://ok.example.com/1"),
+        ])
+        scheduler.host_scheduler._state("flaky.example.com").penalty = 2.0
+
+        claimed = scheduler.claim_due(datetime.utcnow())
+
+        assert claimed == {str(job_id): ["https://ok.example.com/1"]}
+
+    def test_claims_at_most_the_batch_size(self):
+        job_id = uuid4()
+        pages = [page(job_id, f"https://host{i}.example.com/") for i in range(5)]
+        scheduler = make_scheduler(pages, batch_size=3)
+
+        claimed = scheduler.claim_due(datetime.utcnow())
+
+        assert len(claimed[str(job_id)]) == 3
+
+
+class TestRunOnce:
+    """Test retry runs and lease handling."""
+
+    @pytest.mark.asyncio
+    async def test_retries_per_job_and_ends_leases_of_finished_jobs(self):
+        scheduler = make_scheduler([])
+        calls = []
+
+        async def retry_pages(job_id, urls):
+            calls.append((job_id, urls))
+            if job_id == "job-2":
+                raise RuntimeError("browser crashed")
+            return len(urls)
+
+        scheduler.crawl_manager = SimpleNamespace(retry_pages=retry_pages)
+        scheduler.claim_due = lambda lease_until: {
+            "job-1": ["https://a.example.com/1"],
+            "job-2": ["https://b.example.com/1"],
+        }
+        ended = []
+        scheduler._end_leases = lambda claimed, lease_until: ended.append(claimed)
+
+        assert await scheduler.run_once() == 2
+
+        assert sorted(job_id for job_id, _ in calls) == ["job-1", "job-2"]
+        # The failed run keeps its lease, so the pages are retried once it expires
+        assert ended == [{"job-1": ["https://a.example.com/1"]}]
+
+    @pytest.mark.asyncio
+    async def test_nothing_due(self):
+        scheduler = make_scheduler([])
+
+        assert await scheduler.run_once() == 0
@@ -0,0 +1,140 @@
+"""Tests for conditional HTTP revalidation of previously crawled pages."""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import pytest_asyncio
+
+from src.crawler.config import BrowserConfig
+from src.crawler.page_crawler import PageCrawler
+from src.crawler.revalidation import (
+    HTTPRevalidator,
+    UnchangedPage,
+    extract_validators,
+    is_unchanged,
+)
+
+LAST_MODIFIED = "Wed, 01 Jan 2025 00:00:00 GMT"
+
+
+class ConditionalHandler(BaseHTTPRequestHandler):
+    """Serves pages with validators; only /ignores-conditional never answers 304."""
+
+    etags = {"/page": '"v1"', "/ignores-conditional": '"v1"'}
+    requests: list[tuple[str, str]] = []
+
+    def do_HEAD(self):
+        self.requests.append((self.command, self.path))
+        etag = self.etags.get(self.path)
+        honors_conditional = self.path != "/ignores-conditional"
+
+        if honors_conditional and etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+        elif honors_conditional and not etag and self.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            self.send_response(304)
+        else:
+            self.send_response(200)
+            self.send_header("Content-Length", "42")
+        if etag:
+            self.send_header("ETag", etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    ConditionalHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), ConditionalHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest_asyncio.fixture
+async def revalidator():
+    checker = HTTPRevalidator(timeout=5.0, db_manager=object())
+    yield checker
+    await checker.close()
+
+
+class TestValidators:
+    """Test validator extraction and comparison."""
+
+    def test_extract_validators_is_case_insensitive(self):
+        headers = {"ETag": '"abc"', "last-modified": LAST_MODIFIED, "Content-Type": "text/html"}
+
+        assert extract_validators(headers) == {"etag": '"abc"', "last_modified": LAST_MODIFIED}
+        assert extract_validators(None) == {}
+
+    def test_full_response_compares_validators(self):
+        stored = {"etag": '"abc"', "last_modified": LAST_MODIFIED}
+
+        assert is_unchanged(stored, 304, {})
+        assert is_unchanged(stored, 200, {"ETag": '"abc"'})
+        assert not is_unchanged(stored, 200, {"ETag": '"def"', "Last-Modified": LAST_MODIFIED})
+        assert not is_unchanged(stored, 404, {"ETag": '"abc"'})
+
+    def test_last_modified_needs_matching_length(self):
+        stored = {"last_modified": LAST_MODIFIED, "content_length": "42"}
+
+        assert is_unchanged(stored, 200, {"Last-Modified": LAST_MODIFIED, "Content-Length": "42"})
+        assert not is_unchanged(stored, 200, {"Last-Modified": LAST_MODIFIED, "Content-Length": "43"})
+
+
+class TestConditionalRequests:
+    """Test revalidation requests against a local HTTP server."""
+
+    @pytest.mark.asyncio
+    async def test_not_modified_page_is_skipped(self, server, revalidator):
+        assert await revalidator.check(f"{server}/page", {"etag": '"v1"'})
+        assert ConditionalHandler.requests == [("HEAD", "/page")]
+
+    @pytest.mark.asyncio
+    async def test_changed_etag_is_recrawled(self, server, revalidator):
+        assert not await revalidator.check(f"{server}/page", {"etag": '"v0"'})
+
+    @pytest.mark.asyncio
+    async def test_last_modified_only(self, server, revalidator):
+        assert await revalidator.check(f"{server}/other", {"last_modified": LAST_MODIFIED})
+
+    @pytest.mark.asyncio
+    async def test_server_ignoring_conditionals_falls_back_to_validators(self, server, revalidator):
+        assert await revalidator.check(f"{server}/ignores-conditional", {"etag": '"v1"'})
+
+    @pytest.mark.asyncio
+    async def test_pages_without_validators_are_not_requested(self, server, revalidator):
+        assert not await revalidator.check(f"{server}/page", {"content_length": "42"})
+        assert ConditionalHandler.requests == []
+
+    @pytest.mark.asyncio
+    async def test_unreachable_server_counts_as_changed(self, revalidator):
+        assert not await revalidator.check("http://127.0.0.1:9/page", {"etag": '"v1"'})
+
+
+class TestNotModifiedResult:
+    """Test that skipped pages reuse the stored document."""
+
+    @pytest.mark.asyncio
+    async def test_parse_stage_passes_unchanged_page_through(self):
+        crawler = PageCrawler(BrowserConfig())
+        page = UnchangedPage(
+            url="https://docs.example.com/a",
+            title="A",
+            content_hash="abc",
+            snippet_count=7,
+            metadata={"depth": 1, "parent_url": "https://docs.example.com"},
+        )
+
+        result = await crawler._parse_crawl_result(page, "job-1", 0)
+
+        assert result.content_hash == "abc"
+        assert result.code_blocks == []
+        assert result.metadata["content_unchanged"]
+        assert result.metadata["existing_snippet_count"] == 7
+        assert result.metadata["depth"] == 1
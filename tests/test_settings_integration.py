@@ -54,24 +54,21 @@ def test_llm_generator_sees_runtime_changes(isolated_runtime):
     assert generator.settings.code_extraction.llm_extraction_model == "gpt-4"
 
 
-def test_llm_client_reinitializes_on_change(isolated_runtime):
+def test_llm_client_follows_runtime_changes(isolated_runtime):
     runtime, settings = isolated_runtime
     
     runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4o-mini", "llm")
     runtime.set("CODE_LLM_API_KEY", "test-key-1", "llm")
     
     generator = LLMDescriptionGenerator()
-    hash1 = generator._last_settings_hash
+    client1 = generator.client
     
-    assert not generator._should_reinit_client()
+    assert generator.client is client1
     
     runtime.set("CODE_LLM_EXTRACTION_MODEL", "gpt-4", "llm")
     
-    should_reinit = generator._should_reinit_client()
-    assert should_reinit
-    
-    hash2 = generator._last_settings_hash
-    assert hash1 != hash2
+    client2 = generator.client
+    assert client2 is not client1
 
 
 def test_bulk_update_propagates(isolated_runtime):
@@ -146,43 +143,43 @@ def test_observer_called_on_each_change(isolated_runtime):
     assert call_count[0] == 4
 
 
-def test_settings_hash_changes_with_api_key(isolated_runtime):
+def test_client_changes_with_api_key(isolated_runtime):
     runtime, settings = isolated_runtime
     
     runtime.set("CODE_LLM_API_KEY", "key1", "llm")
     
     generator = LLMDescriptionGenerator()
-    hash1 = generator._get_settings_hash()
+    client1 = generator.client
     
     runtime.set("CODE_LLM_API_KEY", "key2", "llm")
-    hash2 = generator._get_settings_hash()
+    client2 = generator.client
     
-    assert hash1 != hash2
+    assert client1 is not client2
+    assert client2.api_key == "key2"
 
 
-def test_settings_hash_changes_with_base_url(isolated_runtime):
+def test_client_changes_with_base_url(isolated_runtime):
     runtime, settings = isolated_runtime
     
+    runtime.set("CODE_LLM_API_KEY", "key1", "llm")
     runtime.set("CODE_LLM_BASE_URL", "http://localhost:8000", "llm")
     
     generator = LLMDescriptionGenerator()
-    hash1 = generator._get_settings_hash()
+    client1 = generator.client
     
     runtime.set("CODE_LLM_BASE_URL", "http://localhost:9000", "llm")
-    hash2 = generator._get_settings_hash()
+    client2 = generator.client
     
-    assert hash1 != hash2
+    assert client1 is not client2
+    assert "9000" in str(client2.base_url)
 
 
-def test_settings_hash_changes_with_enable_flag(isolated_runtime):
+def test_generators_share_pooled_client(isolated_runtime):
     runtime, settings = isolated_runtime
     
-    runtime.set("CODE_ENABLE_LLM_EXTRACTION", True, "llm")
-    
-    generator = LLMDescriptionGenerator()
-    hash1 = generator._get_settings_hash()
+    runtime.set("CODE_LLM_API_KEY", "key1", "llm")
     
-    runtime.set("CODE_ENABLE_LLM_EXTRACTION", False, "llm")
-    hash2 = generator._get_settings_hash()
+    gen1 = LLMDescriptionGenerator()
+    gen2 = LLMDescriptionGenerator()
     
-    assert hash1 != hash2
+    assert gen1.client is gen2.client
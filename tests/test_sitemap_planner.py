@@ -0,0 +1,138 @@
+"""Tests for sitemap-driven crawl planning."""
+
+import functools
+import gzip
+import threading
+from datetime import datetime
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.crawler.sitemap import SitemapPlanner, matches_filters, parse_lastmod, parse_sitemap
+
+URLSET = '<?xml version="1.0" encoding="UTF-8"?>\n<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</urlset>'
+INDEX = '<?xml version="1.0" encoding="UTF-8"?>\n<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{}</sitemapindex>'
+
+
+def url_entry(loc: str, lastmod: str | None = None) -> str:
+    return f"<url><loc>{loc}</loc>{f'<lastmod>{lastmod}</lastmod>' if lastmod else ''}</url>"
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    """Static site whose robots.txt points at a sitemap index."""
+    handler = functools.partial(QuietHandler, directory=str(tmp_path))
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    base = f"http://127.0.0.1:{httpd.server_address[1]}"
+
+    (tmp_path / "robots.txt").write_text(f"User-agent: *\nSitemap: {base}/sitemap_index.xml\n")
+    (tmp_path / "sitemap_index.xml").write_text(INDEX.format(
+        f"<sitemap><loc>{base}/sitemap-docs.xml</loc></sitemap>"
+        f"<sitemap><loc>{base}/sitemap-blog.xml.gz</loc></sitemap>"
+    ))
+    (tmp_path / "sitemap-docs.xml").write_text(URLSET.format(
+        url_entry(f"{base}/docs/a", "2025-01-10")
+        + url_entry(f"{base}/docs/b", "2025-03-01T10:00:00+02:00")
+        + url_entry(f"{base}/docs/c")
+        + url_entry("https://other.example.com/docs/x", "2025-03-01")
+    ))
+    (tmp_path / "sitemap-blog.xml.gz").write_bytes(gzip.compress(URLSET.format(
+        url_entry(f"{base}/blog/post", "2025-02-01")
+    ).encode()))
+
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield base
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def make_planner(last_crawled: dict[str, datetime] | None = None) -> SitemapPlanner:
+    planner = SitemapPlanner(timeout=5.0, db_manager=object())
+    planner._load_last_crawled = lambda urls: {url: ts for url, ts in (last_crawled or {}).items() if url in urls}
+    return planner
+
+
+class TestSitemapParsing:
+    """Test sitemap XML parsing and URL filters."""
+
+    def test_parse_urlset_and_index(self):
+        entries, nested = parse_sitemap(URLSET.format(url_entry("https://a.com/x", "2025-01-01")).encode())
+        assert [entry.url for entry in entries] == ["https://a.com/x"]
+        assert entries[0].lastmod == datetime(2025, 1, 1)
+        assert nested == []
+
+        entries, nested = parse_sitemap(INDEX.format("<sitemap><loc>https://a.com/s.xml</loc></sitemap>").encode())
+        assert entries == []
+        assert nested == ["https://a.com/s.xml"]
+
+    def test_invalid_xml_is_ignored(self):
+        assert parse_sitemap(b"<html>not a sitemap") == ([], [])
+
+    def test_lastmod_is_normalized_to_utc(self):
+        assert parse_lastmod("2025-03-01T10:00:00+02:00") == datetime(2025, 3, 1, 8, 0)
+        assert parse_lastmod("2025-03-01T10:00:00Z") == datetime(2025, 3, 1, 10, 0)
+        assert parse_lastmod("yesterday") is None
+
+    def test_filters(self):
+        assert matches_filters("https://docs.example.com/a", ["example.com"])
+        assert not matches_filters("https://example.org/a", ["example.com"])
+        assert matches_filters("https://example.com/docs/a", ["example.com"], ["*/docs/*"])
+        assert not matches_filters("https://example.com/blog/a", ["example.com"], ["*/docs/*"])
+
+
+class TestSitemapPlanner:
+    """Test planning against a local static server."""
+
+    @pytest.mark.asyncio
+    async def test_reads_index_and_gzipped_sitemaps(self, site):
+        plan = await make_planner().plan([f"{site}/docs/"])
+
+        assert plan.found
+        assert sorted(plan.urls) == sorted([
+            f"{site}/docs/a", f"{site}/docs/b", f"{site}/docs/c", f"{site}/blog/post",
+        ])
+        assert len(plan.sitemaps) == 3
+
+    @pytest.mark.asyncio
+    async def test_include_patterns_and_max_pages(self, site):
+        plan = await make_planner().plan([f"{site}/docs/"], include_patterns=["*/docs/*"], max_pages=2)
+
+        assert plan.listed_count == 3
+        assert plan.urls == [f"{site}/docs/a", f"{site}/docs/b"]
+
+    @pytest.mark.asyncio
+    async def test_recrawl_only_schedules_newer_lastmod(self, site):
+        crawled = datetime(2025, 2, 15)
+        planner = make_planner({
+            f"{site}/docs/a": crawled,
+            f"{site}/docs/b": crawled,
+            f"{site}/docs/c": crawled,
+            f"{site}/blog/post": crawled,
+        })
+
+        plan = await planner.plan([f"{site}/docs/"])
+
+        # a and the blog post were modified before the last crawl; c has no lastmod
+        assert sorted(plan.urls) == [f"{site}/docs/b", f"{site}/docs/c"]
+        assert plan.unchanged_count == 2
+
+    @pytest.mark.asyncio
+    async def test_missing_sitemap_is_not_found(self, tmp_path):
+        handler = functools.partial(QuietHandler, directory=str(tmp_path))
+        httpd = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+        thread.start()
+        try:
+            plan = await make_planner().plan([f"http://127.0.0.1:{httpd.server_address[1]}/"])
+        finally:
+            httpd.shutdown()
+            httpd.server_close()
+
+        assert not plan.found
+        assert plan.urls == []
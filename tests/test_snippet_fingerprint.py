@@ -0,0 +1,239 @@
+"""Tests for near-duplicate snippet fingerprints and description reuse."""
+
+import hashlib
+from contextlib import contextmanager
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+from sqlalchemy.orm import Session
+
+from src.crawler import page_crawler
+from src.crawler.config import BrowserConfig
+from src.crawler.extractors.models import ExtractedCodeBlock, ExtractedContext
+from src.crawler.page_crawler import PageCrawler, ParsedPage
+from src.database.content_check import find_near_duplicate_snippets, index_snippet_fingerprints
+from src.database.fingerprint import (
+    LSH_BANDS,
+    MAX_INDEXED_DISTANCE,
+    code_fingerprint,
+    hamming_distance,
+    lsh_bands,
+)
+from src.database.models import CodeSnippet, CrawlJob, Document
+from src.database.search import CodeSearcher
+
+FETCH_USERS = """
+async function fetchUsers(client, limit = 10) {
+  const response = await client.get('/api/users', { params: { limit } });
+  if (!response.ok) {
+    throw new Error('Request failed');
+  }
+  return response.data.users;
+}
+"""
+
+# Same code with different indentation and line breaks
+FETCH_USERS_REFORMATTED = """
+async function fetchUsers(client, limit = 10) {
+    const response = await client.get('/api/users', {params: {limit}});
+    if (!response.ok) { throw new Error('Request failed'); }
+    return response.data.users;
+}
+"""
+
+# Same code with a renamed parameter
+FETCH_USERS_RENAMED = FETCH_USERS.replace("client", "http")
+
+PARSE_CONFIG = """
+import yaml
+
+def load_config(path):
+    with open(path) as handle:
+        data = yaml.safe_load(handle)
+    return {key.lower(): value for key, value in data.items()}
+"""
+
+
+class TestCodeFingerprint:
+    """Test the SimHash fingerprint and its band keys."""
+
+    def test_whitespace_changes_keep_the_fingerprint(self):
+        assert code_fingerprint(FETCH_USERS) == code_fingerprint(FETCH_USERS_REFORMATTED)
+
+    def test_small_edits_stay_within_the_indexed_distance(self):
+        distance = hamming_distance(code_fingerprint(FETCH_USERS), code_fingerprint(FETCH_USERS_RENAMED))
+
+        assert 0 < distance <= MAX_INDEXED_DISTANCE
+
+    def test_unrelated_code_is_far_apart(self):
+        assert hamming_distance(code_fingerprint(FETCH_USERS), code_fingerprint(PARSE_CONFIG)) > 10
+
+    def test_short_code_has_no_fingerprint(self):
+        assert code_fingerprint("npm install") is None
+
+    def test_fingerprint_fits_a_bigint(self):
+        fingerprint = code_fingerprint(FETCH_USERS)
+
+        assert -(2 ** 63) <= fingerprint < 2 ** 63
+
+    def test_close_fingerprints_share_a_band(self):
+        original = code_fingerprint(FETCH_USERS)
+        bands = lsh_bands(original)
+
+        assert [band for band, _ in bands] == list(range(LSH_BANDS))
+        for bits in ((0, 20, 40), (1, 17, 33), (5, 30, 60)):
+            nearby = original ^ sum(1 << bit for bit in bits)
+            assert set(bands) & set(lsh_bands(nearby))
+
+
+def _block(code: str, language: str | None = "javascript") -> ExtractedCodeBlock:
+    return ExtractedCodeBlock(code=code, language=language, context=ExtractedContext(), source_url=None)
+
+
+class FakeGenerator:
+    """Description generator recording the blocks it is asked to describe."""
+
+    custom_api_key = None
+    custom_base_url = None
+    custom_model = None
+
+    def __init__(self):
+        self.described: list[str] = []
+
+    async def generate_titles_and_descriptions_batch(self, blocks, url, job_id=None):
+        for block in blocks:
+            self.described.append(block.code)
+            block.context.title = "Fresh title"
+            block.context.description = "Fresh description"
+        return blocks
+
+
+class TestDescriptionReuse:
+    """Test that near-duplicate blocks skip the LLM call."""
+
+    @pytest.mark.asyncio
+    async def test_near_duplicate_reuses_stored_description(self, monkeypatch):
+        stored = SimpleNamespace(id=42, title="Fetch users", description="Fetches users.", language="javascript")
+
+        def find(session, blocks, max_distance):
+            return [stored if fingerprint == code_fingerprint(FETCH_USERS) else None for fingerprint, _ in blocks]
+
+        @contextmanager
+        def session_scope():
+            yield None
+
+        monkeypatch.setattr(page_crawler, "find_near_duplicate_snippets", find)
+        crawler = PageCrawler(BrowserConfig())
+        crawler.db_manager = SimpleNamespace(session_scope=session_scope)
+        crawler.description_generator = FakeGenerator()
+        page = ParsedPage(
+            url="https://docs.example.com/users",
+            title="Users",
+            content="",
+            content_hash="h1",
+            depth=0,
+            code_blocks=[_block(FETCH_USERS_REFORMATTED), _block(PARSE_CONFIG, "python")],
+        )
+
+        result = await crawler._describe_page(page, "job-1")
+
+        assert crawler.description_generator.described == [PARSE_CONFIG]
+        reused, described = result.code_blocks
+        assert reused["code"] == FETCH_USERS_REFORMATTED
+        assert (reused["title"], reused["description"]) == ("Fetch users", "Fetches users.")
+        assert reused["metadata"] == {"extraction_method": "near_duplicate", "near_duplicate_of": 42}
+        assert described["description"] == "Fresh description"
+        assert described["metadata"]["extraction_method"] == "html_llm"
+
+
+class TestSearchCollapse:
+    """Test collapsing near-duplicate search results."""
+
+    def test_only_first_near_duplicate_is_kept(self):
+        searcher = CodeSearcher(session=None)
+        first = SimpleNamespace(simhash=code_fingerprint(FETCH_USERS), language="javascript")
+        renamed = SimpleNamespace(simhash=code_fingerprint(FETCH_USERS_RENAMED), language="javascript")
+        other_language = SimpleNamespace(simhash=code_fingerprint(FETCH_USERS), language="typescript")
+        unrelated = SimpleNamespace(simhash=code_fingerprint(PARSE_CONFIG), language="javascript")
+        unfingerprinted = SimpleNamespace(simhash=None, language="javascript")
+
+        kept = searcher._collapse_near_duplicates(
+            [first, renamed, other_language, unrelated, unfingerprinted]
+        )
+
+        assert kept == [first, other_language, unrelated, unfingerprinted]
+        assert first._near_duplicate_count == 1
+
+
+class TestUploadIndexing:
+    """Test that uploaded snippets are added to the band index."""
+
+    def test_uploaded_snippets_are_indexed(self, monkeypatch):
+        from unittest.mock import Mock
+
+        from src.api.routes.upload_utils import process_code_snippets
+        from src.database import content_check
+
+        indexed: list[tuple[int, int | None]] = []
+        monkeypatch.setattr(content_check, "find_duplicate_snippet_in_source", lambda db, code_hash, doc: None)
+        monkeypatch.setattr(
+            content_check, "index_snippet_fingerprints", lambda db, snippets: indexed.extend(snippets)
+        )
+        db = Mock()
+        blocks = [
+            ExtractedCodeBlock(code=FETCH_USERS, language="javascript"),
+            ExtractedCodeBlock(code=PARSE_CONFIG, language="javascript"),
+        ]
+
+        created = process_code_snippets(blocks, SimpleNamespace(id=1), "https://example.com/a.md", db)
+
+        assert created == 2
+        db.flush.assert_called_once()
+        assert [fingerprint for _, fingerprint in indexed] == [
+            code_fingerprint(FETCH_USERS),
+            code_fingerprint(PARSE_CONFIG),
+        ]
+
+
+class TestNearDuplicateLookup:
+    """Test the band index lookup against the database."""
+
+    def test_lookup_finds_described_near_duplicates(self, db: Session):
+        job = CrawlJob(id=uuid4(), name="Users", status="completed", start_urls=["https://docs.example.com/"])
+        db.add(job)
+        db.flush()
+        doc = Document(url="https://docs.example.com/users", title="Users", crawl_job_id=job.id)
+        db.add(doc)
+        db.flush()
+
+        snippets = []
+        for code, method in ((FETCH_USERS, "html_llm"), (PARSE_CONFIG, "html_only")):
+            snippet = CodeSnippet(
+                document_id=doc.id,
+                title="Snippet",
+                description="Described",
+                language="javascript" if code == FETCH_USERS else "python",
+                code_content=code,
+                code_hash=hashlib.md5(code.encode()).hexdigest(),
+                simhash=code_fingerprint(code),
+                meta_data={"extraction_method": method},
+            )
+            db.add(snippet)
+            snippets.append(snippet)
+        db.flush()
+        index_snippet_fingerprints(db, [(snippet.id, snippet.simhash) for snippet in snippets])
+
+        matches = find_near_duplicate_snippets(
+            db,
+            [
+                (code_fingerprint(FETCH_USERS_RENAMED), "javascript"),
+                (code_fingerprint(FETCH_USERS_RENAMED), "python"),
+                (code_fingerprint(PARSE_CONFIG), "python"),
+            ],
+            max_distance=MAX_INDEXED_DISTANCE,
+        )
+
+        # Placeholder descriptions (html_only) are never reused
+        assert [match and match.id for match in matches] == [snippets[0].id, None, None]
+        assert matches[0].description == "Described"
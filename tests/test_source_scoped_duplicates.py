@@ -6,7 +6,10 @@ from uuid import uuid4
 import pytest
 from sqlalchemy.orm import Session
 
-from src.database.content_check import find_duplicate_snippet_in_source
+from src.database.content_check import (
+    find_duplicate_hashes_in_source,
+    find_duplicate_snippet_in_source,
+)
 from src.database.models import CodeSnippet, CrawlJob, Document, UploadJob
 
 
@@ -344,4 +347,27 @@ class TestSourceScopedDuplicates:
             doc = db.query(Document).filter_by(id=snippet.document_id).first()
             job_ids.add(doc.crawl_job_id)
 
-        assert len(job_ids) == 3  # Three different sources
\ No newline at end of file
+        assert len(job_ids) == 3  # Three different sources
+
+    def test_batch_hash_lookup_is_source_scoped(self, db: Session):
+        """Test that the batch lookup returns only hashes already in the same source."""
+        job1 = CrawlJob(id=uuid4(), name="Vue", status="completed", start_urls=["https://vuejs.org/v2"])
+        job2 = CrawlJob(id=uuid4(), name="Vue", status="completed", start_urls=["https://vuejs.org/v3"])
+        db.add_all([job1, job2])
+        db.flush()
+
+        doc1 = Document(url="https://vuejs.org/v2/guide", crawl_job_id=job1.id, source_type="crawl")
+        doc2 = Document(url="https://vuejs.org/v3/guide", crawl_job_id=job2.id, source_type="crawl")
+        db.add_all([doc1, doc2])
+        db.flush()
+
+        hashes = [hashlib.md5(f"snippet {i}".encode()).hexdigest() for i in range(3)]
+        db.add_all([
+            CodeSnippet(document_id=doc1.id, code_content="snippet 0", code_hash=hashes[0]),
+            CodeSnippet(document_id=doc1.id, code_content="snippet 1", code_hash=hashes[1]),
+        ])
+        db.flush()
+
+        assert find_duplicate_hashes_in_source(db, hashes, doc1) == {hashes[0], hashes[1]}
+        assert find_duplicate_hashes_in_source(db, hashes, doc2) == set()
+        assert find_duplicate_hashes_in_source(db, [], doc1) == set()
@@ -0,0 +1,165 @@
+"""Tests for streaming ingestion of uploads and GitHub repositories."""
+
+import asyncio
+import tempfile
+from contextlib import contextmanager
+from functools import partial
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from src.crawler.github_processor import GitHubProcessor, GitHubRepoConfig
+from src.crawler.upload_processor import (
+    UploadConfig,
+    UploadProcessor,
+    UploadResult,
+    read_text_file,
+)
+from src.database.content_check import ContentHashIndex
+
+
+class TestReadTextFile:
+    """Test lazy file reads."""
+
+    def test_reads_utf8_text(self, tmp_path):
+        path = tmp_path / "guide.md"
+        path.write_text("# Guide ✓", encoding="utf-8")
+        assert read_text_file(path, max_size=1024, binary_check_bytes=512) == "# Guide ✓"
+
+    def test_skips_binary_oversized_and_undecodable_files(self, tmp_path):
+        binary = tmp_path / "image.md"
+        binary.write_bytes(b"\x89PNG\x00\x00data")
+        large = tmp_path / "large.md"
+        large.write_text("x" * 2048)
+        latin1 = tmp_path / "latin1.md"
+        latin1.write_bytes("café".encode("latin-1"))
+
+        assert read_text_file(binary, max_size=1024, binary_check_bytes=512) is None
+        assert read_text_file(large, max_size=1024, binary_check_bytes=512) is None
+        assert read_text_file(latin1, max_size=1024, binary_check_bytes=512) is None
+
+
+def make_processor() -> UploadProcessor:
+    processor = UploadProcessor()
+
+    @contextmanager
+    def session_scope():
+        yield SimpleNamespace()
+
+    processor.db_manager = SimpleNamespace(session_scope=session_scope)
+    processor.description_generator = None
+    processor.progress_tracker = SimpleNamespace(
+        start_tracking=AsyncMock(),
+        update_progress=AsyncMock(),
+        send_completion=AsyncMock(),
+        stop_tracking=AsyncMock(),
+    )
+    processor.completed = {}
+    processor._complete_job = lambda job_id, **kwargs: processor.completed.update(kwargs)
+    return processor
+
+
+class TestStreamingUpload:
+    """Test the bounded worker pool of upload jobs."""
+
+    @pytest.mark.asyncio
+    async def test_lazy_files_are_pulled_as_workers_free_up(self, tmp_path):
+        for i in range(40):
+            (tmp_path / f"doc-{i}.md").write_text(f"# Doc {i}")
+        (tmp_path / "doc-binary.md").write_bytes(b"\x00\x01")
+
+        processor = make_processor()
+        pulled = 0
+        in_flight = 0
+        max_in_flight = 0
+        max_ahead = 0
+        stored = 0
+
+        def files():
+            nonlocal pulled
+            for path in sorted(tmp_path.iterdir()):
+                pulled += 1
+                yield {"path": str(path), "source_url": f"https://example.com/{path.name}"}
+
+        async def process_file(content, source_url, content_type):
+            nonlocal in_flight, max_in_flight, max_ahead
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            max_ahead = max(max_ahead, pulled - stored)
+            await asyncio.sleep(0.001)
+            in_flight -= 1
+            return UploadResult(source_url=source_url, title="Doc", content_hash="", code_blocks=[])
+
+        async def store_result(result, job_id):
+            nonlocal stored
+            stored += 1
+            return 1, 2
+
+        processor._process_file = process_file
+        processor._store_result = store_result
+        config = UploadConfig(name="Docs", files=files(), file_count=41, max_concurrent_files=3)
+
+        with (
+            patch("src.database.content_check.preload_content_hashes", return_value={}) as preload,
+            patch("src.crawler.upload_processor.ContentHashIndex", partial(ContentHashIndex, chunk_size=10)),
+        ):
+            await processor._execute_upload("job-1", config)
+
+        assert stored == 40
+        assert max_in_flight <= 3
+        # One hash lookup batch, workers and the bounded queue, not the whole repository
+        assert max_ahead <= 10 + 3 + 6 + 1
+        assert preload.call_count == 5
+        assert processor.completed["snippets_extracted"] == 80
+        ingestion = processor.completed["ingestion"]
+        assert ingestion["files"] == 41
+        assert ingestion["unreadable_files"] == 1
+        assert ingestion["peak_rss_mb"] > 0
+
+    @pytest.mark.asyncio
+    async def test_in_memory_files_still_work(self):
+        processor = make_processor()
+        processor._process_file = AsyncMock(
+            return_value=UploadResult(source_url="upload://a.md", title="A", content_hash="", code_blocks=[])
+        )
+        processor._store_result = AsyncMock(return_value=(1, 1))
+        config = UploadConfig(name="Docs", files=[{"content": "# A", "source_url": "upload://a.md"}])
+
+        with patch("src.database.content_check.preload_content_hashes", return_value={}):
+            await processor._execute_upload("job-1", config)
+
+        processor._process_file.assert_awaited_once_with("# A", "upload://a.md", "markdown")
+        assert processor.completed["success"] is True
+
+
+class TestGitHubStreaming:
+    """Test that repositories are handed to the upload as a lazy file stream."""
+
+    @pytest.mark.asyncio
+    async def test_clone_is_removed_after_the_upload_finishes(self):
+        processor = GitHubProcessor()
+        clone = Path(tempfile.mkdtemp(prefix="codedox_test_"))
+        (clone / "docs").mkdir()
+        for name in ("a.md", "b.rst", "c.html"):
+            (clone / "docs" / name).write_text("# Doc")
+
+        config = GitHubRepoConfig(repo_url="https://github.com/example/repo", name="Repo")
+        with (
+            patch.object(processor, "_clone_repository", return_value=clone),
+            patch.object(processor.upload_processor, "process_upload", return_value="job-1") as upload,
+        ):
+            assert await processor.process_repository(config) == "job-1"
+
+        upload_config = upload.call_args.args[0]
+        assert upload_config.file_count == 3
+        assert clone.exists()
+
+        entries = list(upload_config.files)
+        assert {Path(entry["path"]).name for entry in entries} == {"a.md", "b.rst", "c.html"}
+        assert all("content" not in entry for entry in entries)
+        assert entries[0]["source_url"].startswith("https://github.com/example/repo/blob/main/docs/")
+
+        await upload.call_args.kwargs["on_complete"]()
+        assert not clone.exists()
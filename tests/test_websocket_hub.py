@@ -0,0 +1,176 @@
+"""Tests for the WebSocket fan-out hub."""
+
+import asyncio
+import time
+
+import pytest
+import pytest_asyncio
+
+from src.api.websocket import ConnectionManager, coalesce_key, notify_crawl_update
+from src.constants import WebSocketMessageType
+
+
+class FakeWebSocket:
+    """Records sent frames; a stalled socket blocks until released."""
+
+    def __init__(self, stalled: bool = False):
+        self.sent: list[dict] = []
+        self.release = asyncio.Event()
+        if not stalled:
+            self.release.set()
+
+    async def accept(self):
+        pass
+
+    async def send_json(self, message):
+        await self.release.wait()
+        self.sent.append(message)
+
+
+def progress(job_id: str, processed: int) -> dict:
+    return {"type": WebSocketMessageType.CRAWL_UPDATE, "job_id": job_id,
+            "status": "running", "data": {"processed_pages": processed}}
+
+
+@pytest_asyncio.fixture
+async def hub():
+    hub = ConnectionManager(queue_size=5, send_timeout=0.2)
+    yield hub
+    await hub.close()
+
+
+async def connect(hub: ConnectionManager, client_id: str, job_id: str | None = None, **kwargs) -> FakeWebSocket:
+    websocket = FakeWebSocket(**kwargs)
+    await hub.connect(websocket, client_id)
+    if job_id:
+        hub.subscribe(client_id, job_id)
+    return websocket
+
+
+class TestCoalesceKey:
+    """Test which frames may replace each other."""
+
+    def test_running_updates_and_progress_coalesce(self):
+        assert coalesce_key(progress("job-1", 1)) == (WebSocketMessageType.CRAWL_UPDATE, "job-1")
+        assert coalesce_key({"type": WebSocketMessageType.REGENERATION_PROGRESS, "source_id": "s"}) == (
+            WebSocketMessageType.REGENERATION_PROGRESS, "s"
+        )
+
+    def test_final_updates_are_always_delivered(self):
+        assert coalesce_key({"type": WebSocketMessageType.CRAWL_UPDATE, "job_id": "job-1", "status": "completed"}) is None
+        assert coalesce_key({"type": WebSocketMessageType.PONG}) is None
+
+
+class TestConnectionManager:
+    """Test subscriptions, queueing and slow clients."""
+
+    @pytest.mark.asyncio
+    async def test_publish_reaches_only_subscribers(self, hub):
+        subscriber = await connect(hub, "a", "job-1")
+        other = await connect(hub, "b", "job-2")
+
+        assert hub.publish("job-1", progress("job-1", 1)) == 1
+        await asyncio.sleep(0.01)
+
+        assert subscriber.sent == [progress("job-1", 1)]
+        assert other.sent == []
+
+    @pytest.mark.asyncio
+    async def test_queued_progress_frames_are_coalesced(self, hub):
+        websocket = await connect(hub, "a", "job-1", stalled=True)
+        await asyncio.sleep(0)
+
+        for processed in range(2, 5):
+            hub.publish("job-1", progress("job-1", processed))
+        done = {"type": WebSocketMessageType.CRAWL_UPDATE, "job_id": "job-1", "status": "completed"}
+        hub.publish("job-1", done)
+        websocket.release.set()
+        await asyncio.sleep(0.01)
+
+        assert websocket.sent == [progress("job-1", 4), done]
+        assert hub.stats()["coalesced"] == 2
+
+    @pytest.mark.asyncio
+    async def test_full_queue_drops_stale_progress_first(self, hub):
+        websocket = await connect(hub, "a", stalled=True)
+        for job in range(5):
+            hub.subscribe("a", f"job-{job}")
+            hub.publish(f"job-{job}", progress(f"job-{job}", 1))
+
+        done = {"type": WebSocketMessageType.CRAWL_UPDATE, "job_id": "job-0", "status": "completed"}
+        hub.publish("job-0", done)
+        websocket.release.set()
+        await asyncio.sleep(0.01)
+
+        assert progress("job-0", 1) not in websocket.sent
+        assert websocket.sent[-1] == done
+        assert hub.stats()["dropped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_client_that_cannot_keep_up_is_disconnected(self, hub):
+        await connect(hub, "a", "job-1", stalled=True)
+        for i in range(6):
+            await hub.send_message("a", {"type": WebSocketMessageType.ERROR, "message": str(i)})
+
+        assert "a" not in hub.clients
+        assert "job-1" not in hub.subscribers
+
+    @pytest.mark.asyncio
+    async def test_send_timeout_disconnects_client(self, hub):
+        await connect(hub, "a", "job-1", stalled=True)
+        hub.publish("job-1", progress("job-1", 1))
+
+        await asyncio.sleep(0.3)
+
+        assert "a" not in hub.clients
+
+    @pytest.mark.asyncio
+    async def test_unsubscribe_and_disconnect_clean_the_index(self, hub):
+        await connect(hub, "a", "job-1")
+        await connect(hub, "b", "job-1")
+
+        hub.unsubscribe("a", "job-1")
+        assert hub.subscribers["job-1"] == {"b"}
+
+        hub.disconnect("b")
+        assert "job-1" not in hub.subscribers
+
+    @pytest.mark.asyncio
+    async def test_notify_crawl_update_uses_global_hub(self, monkeypatch, hub):
+        monkeypatch.setattr("src.api.websocket.manager", hub)
+        websocket = await connect(hub, "a", "job-1")
+
+        await notify_crawl_update("job-1", "running", {"processed_pages": 3})
+        await asyncio.sleep(0.01)
+
+        assert websocket.sent[0]["data"] == {"processed_pages": 3}
+
+
+class TestFanOutLoad:
+    """Fan-out to many subscribers with a stalled client among them."""
+
+    @pytest.mark.asyncio
+    async def test_500_subscribers_with_a_stalled_client(self):
+        hub = ConnectionManager(queue_size=100, send_timeout=5)
+        sockets = [await connect(hub, f"client-{i}", "job-1") for i in range(499)]
+        stalled = await connect(hub, "stalled", "job-1", stalled=True)
+
+        started = time.perf_counter()
+        for processed in range(50):
+            assert hub.publish("job-1", progress("job-1", processed)) == 500
+        elapsed = time.perf_counter() - started
+
+        # Publishing only enqueues: no send happened while the crawler waited
+        assert elapsed < 0.5
+        assert all(not websocket.sent for websocket in sockets)
+
+        await asyncio.sleep(0.05)
+
+        # Every responsive client ends on the latest progress despite the stalled one
+        assert all(websocket.sent and websocket.sent[-1] == progress("job-1", 49) for websocket in sockets)
+        assert stalled.sent == []
+        # ...which holds a single coalesced frame instead of fifty
+        assert hub.clients["stalled"].coalesced == 49
+
+        await hub.close()
+        assert hub.clients == {} and hub.subscribers == {}